@@ -14,7 +14,7 @@ async def get_admin_notifications_controller(
     try:
         admin_id = str(current_admin["_id"])
 
-        records, total_records = await NotificationModel.get_admin_notifications(
+        records, total_records, next_cursor = await NotificationModel.get_admin_notifications(
             admin_id,
             lang,
             pagination
@@ -22,9 +22,11 @@ async def get_admin_notifications_controller(
 
         paginated_response = build_paginated_response(
             records=records,
-            page=pagination.page or 1,
-            page_size=pagination.limit or len(records),
-            total_records=total_records
+            page=pagination.page,
+            page_size=pagination.limit,
+            total_records=total_records,
+            next_cursor=next_cursor,
+            has_next=next_cursor is not None
         )
 
         return response.success_message(
@@ -92,3 +94,22 @@ async def mark_all_admin_notifications_read(current_admin, lang: str = "en"):
             data=str(e),
             status_code=500
         )
+
+async def get_admin_unread_count_controller(current_admin, lang: str = "en"):
+    try:
+        admin_id = str(current_admin["_id"])
+
+        unread = await NotificationModel.get_admin_unread_count(admin_id)
+
+        return response.success_message(
+            translate_message("NOTIFICATION_FETCHED", lang),
+            data={"unread_count": unread},
+            status_code=200
+        )
+
+    except Exception as e:
+        return response.error_message(
+            translate_message("SOMETHING_WENT_WRONG", lang),
+            data=str(e),
+            status_code=500
+        )
@@ -57,7 +57,6 @@ async def reject_withdrawal_request_controller(
 
         await update_user_tokens_and_history(
             user_id=str(user["_id"]),
-            user_details=user,
             tokens=int(result['tokens']),
             transaction_type=TokenTransactionType.CREDIT,
             reason=TokenTransactionReason.TOKEN_WITHDRAWAL_REJECTED,
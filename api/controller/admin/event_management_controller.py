@@ -238,7 +238,8 @@ async def get_contest_participants_controller(
             records=result["data"],
             page=page,
             page_size=page_size,
-            total_records=result["total"]
+            total_records=result["total"],
+            search=result.get("search")
         )
 
         return response.success_message(
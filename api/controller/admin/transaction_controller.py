@@ -57,7 +57,8 @@ async def fetch_all_transactions_controller(
             records=records,
             page=page,
             page_size=page_size,
-            total_records=total_records
+            total_records=total_records,
+            search=result.get("search")
         )
 
         return response.success_message(
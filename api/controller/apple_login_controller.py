@@ -3,6 +3,7 @@ from config.db_config import user_collection
 from core.utils.auth_utils import generate_login_tokens
 from core.utils.response_mixin import CustomResponseMixin
 from datetime import datetime
+from services.admin_search_service import sync_admin_search_entry
 
 response = CustomResponseMixin()
 
@@ -29,6 +30,7 @@ async def apple_login_controller(payload):
         result = await user_collection.insert_one(new_user)
         new_user["_id"] = result.inserted_id
         user = new_user
+        await sync_admin_search_entry(str(result.inserted_id))
 
     # 3. Generate tokens
     access_token, refresh_token = generate_login_tokens(user)
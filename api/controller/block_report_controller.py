@@ -2,7 +2,6 @@ from datetime import datetime
 from bson import ObjectId
 import re
 from core.utils.response_mixin import CustomResponseMixin
-from core.utils.helper import serialize_datetime_fields
 from api.controller.onboardingController import fetch_user_by_id
 from config.db_config import blocked_users_collection , reported_users_collection , user_collection
 from services.translation import translate_message
@@ -272,7 +271,7 @@ async def get_blocked_users_list(user_id: str, lang: str):
 
         return response.success_message(
             translate_message("BLOCKED_USERS_FETCHED", lang),
-            data=serialize_datetime_fields(blocked_users),
+            data=blocked_users,
             status_code=200
         )
 
@@ -307,7 +306,7 @@ async def get_reported_users_list(user_id: str, lang: str):
 
         return response.success_message(
             translate_message("REPORTED_USERS_FETCHED", lang),
-            data=serialize_datetime_fields(reported_users),
+            data=reported_users,
             status_code=200
         )
 
@@ -395,10 +395,12 @@ async def participate_in_contest_controller(
         })
 
     # Debit tokens ONCE
-    balance_after, _ = await debit_user_tokens(
+    entry_key = f"contest_entry:{contest_history_id}:{user_id}"
+    balance_after, _, replayed = await debit_user_tokens(
         user_id=user_id,
         amount=vote_cost,
-        reason=f"Contest participation: {contest_id}"
+        reason=f"Contest participation: {contest_id}",
+        idempotency_key=entry_key
     )
 
     if balance_after is None:
@@ -407,15 +409,29 @@ async def participate_in_contest_controller(
             status_code=500
         )
 
-    # Save participant (using helper)
-    await create_contest_participant({
+    # A repeated request was not charged again: answer with the first entry.
+    # The participant is keyed like the debit, so a duplicate racing the
+    # first one past the participation check above inserts nothing either;
+    # a replay without a participant (the first request died) saves it now
+    if replayed and await contest_participant_collection.find_one({"idempotency_key": entry_key}):
+        return await _repeated_participation_response(
+            contest_id, contest_history_id, entry_key, uploaded_file_ids, vote_cost, balance_after, lang
+        )
+
+    participant_id = await create_contest_participant({
         "contest_id": contest_id,
         "contest_history_id": contest_history_id,
         "user_id": user_id,
         "uploaded_file_ids": uploaded_file_ids,
         "total_votes": 0,
+        "idempotency_key": entry_key,
         "created_at": datetime.utcnow()
     })
+
+    if participant_id is None:
+        return await _repeated_participation_response(
+            contest_id, contest_history_id, entry_key, uploaded_file_ids, vote_cost, balance_after, lang
+        )
     
     user_lang = current_user.get("language", "en")
 
@@ -456,6 +472,48 @@ async def participate_in_contest_controller(
         status_code=200
     )
 
+async def _repeated_participation_response(
+    contest_id: str,
+    contest_history_id: str,
+    entry_key: str,
+    uploaded_file_ids: list,
+    vote_cost: int,
+    balance_after: int,
+    lang: str
+):
+    """
+    Answer a repeated entry request with the entry that was saved (and
+    charged) first, dropping the images this request uploaded.
+    """
+    await file_collection.update_many(
+        {"_id": {"$in": [ObjectId(file_id) for file_id in uploaded_file_ids]}},
+        {"$set": {"is_deleted": True, "deleted_at": datetime.utcnow()}}
+    )
+    participant = await contest_participant_collection.find_one({"idempotency_key": entry_key})
+    images = []
+    for file_id in (participant or {}).get("uploaded_file_ids", []):
+        file_doc = await file_collection.find_one({"_id": ObjectId(file_id), "is_deleted": {"$ne": True}})
+        if file_doc:
+            images.append({
+                "file_id": file_id,
+                "url": await generate_file_url(
+                    storage_key=file_doc["storage_key"],
+                    backend=file_doc["storage_backend"]
+                )
+            })
+
+    return response.success_message(
+        translate_message("CONTEST_PARTICIPATION_SUCCESSFUL", lang),
+        data=[{
+            "contest_id": contest_id,
+            "contest_history_id": contest_history_id,
+            "tokens_deducted": vote_cost,
+            "balance_after": balance_after,
+            "images": images
+        }],
+        status_code=200
+    )
+
 async def get_full_leaderboard_controller(
     contest_id: str,
     pagination: StandardResultsSetPagination,
@@ -629,10 +687,12 @@ async def cast_vote_controller(
             status_code=400
         )
 
-    balance_after, balance_before = await debit_user_tokens(
+    vote_key = f"contest_vote:{contest_history_id}:{participant['_id']}:{user_id}"
+    balance_after, balance_before, replayed = await debit_user_tokens(
         user_id=user_id,
         amount=contest["cost_per_vote"],
-        reason=f"contest_vote:{contest_id}"
+        reason=f"contest_vote:{contest_id}",
+        idempotency_key=vote_key
     )
 
     if balance_after is None:
@@ -645,29 +705,39 @@ async def cast_vote_controller(
             status_code=400
         )
 
-    await create_vote_entry({
-        "contest_id": contest_id,
-        "contest_history_id": contest_history_id,
-        "participant_id": str(participant["_id"]),
-        "voter_user_id": user_id,
-        "vote_cost": contest["cost_per_vote"],
-        "voted_at": datetime.utcnow()
-    })
+    # Same as entries: a repeated vote answers with the first one, and the
+    # keyed insert stops a duplicate that raced it from counting twice
+    counted = False
+    if not (replayed and await contest_vote_collection.find_one({"idempotency_key": vote_key})):
+        counted = await create_vote_entry({
+            "contest_id": contest_id,
+            "contest_history_id": contest_history_id,
+            "participant_id": str(participant["_id"]),
+            "voter_user_id": user_id,
+            "vote_cost": contest["cost_per_vote"],
+            "idempotency_key": vote_key,
+            "voted_at": datetime.utcnow()
+        })
+
+    if counted:
+        await increment_vote_counts(
+            participant["_id"],
+            contest_history_id
+        )
+        await contest_collection.update_one(
+            {
+                "_id": ObjectId(contest_id),
+                "is_deleted": {"$ne": True}
+            },
+            {
+                "$inc": {"total_votes": 1},
+                "$set": {"updated_at": datetime.utcnow()}
+            }
+        )
+    else:
+        # The first request's vote is already counted in the votes cast
+        votes_casted = await get_user_vote_count(contest_id, contest_history_id, user_id) - 1
 
-    await increment_vote_counts(
-        participant["_id"],
-        contest_history_id
-    )
-    await contest_collection.update_one(
-        {
-            "_id": ObjectId(contest_id),
-            "is_deleted": {"$ne": True}
-        },
-        {
-            "$inc": {"total_votes": 1},
-            "$set": {"updated_at": datetime.utcnow()}
-        }
-    )
     return response.success_message(
         translate_message("VOTE_CAST_SUCCESSFULLY", lang),
         data={
@@ -1,7 +1,6 @@
 
 from fastapi import APIRouter, Depends, Request, Query
 from bson import ObjectId
-import time
 from datetime import datetime
 from config.models.user_models import Files, FileType
 from core.utils.permissions import UserPermission
@@ -11,8 +10,10 @@ from services.translation import translate_message
 from fastapi import UploadFile
 import os
 import aiofiles
-import boto3
+from functools import lru_cache
+from typing import Optional
 from botocore.exceptions import ClientError
+from core.utils.media import is_private_media, signed_media_query, upload_file_name
 
 
 # ENV VAR
@@ -27,9 +28,26 @@ AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY")
 AWS_S3_REGION = os.getenv("AWS_S3_REGION")
 
+# Derivative format served when a size is requested; every client we ship decodes WebP
+IMAGE_VARIANT_FORMAT = os.getenv("IMAGE_VARIANT_FORMAT", "webp")
+
 response = CustomResponseMixin()
 
 
+@lru_cache(maxsize=1)
+def get_s3_client():
+    """
+    Build the S3 client once, on first use, and reuse it afterwards.
+    """
+    import boto3
+    return boto3.client(
+        "s3",
+        region_name=AWS_S3_REGION,
+        aws_access_key_id=AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+    )
+
+
 #helper function to save the profile picture
 async def save_file(file_obj: UploadFile, file_name: str, user_id: str, file_type="profile_photo", content: bytes = None):
     """
@@ -48,32 +66,26 @@ async def save_file(file_obj: UploadFile, file_name: str, user_id: str, file_typ
         if content is None:
             content = await file_obj.read()
 
-        timestamp = int(time.time())
+        stored_name = upload_file_name(content, ext)
 
         # Storage key: always use forward slashes
-        storage_key = f"{file_type}/{user_id}/{timestamp}.{ext}"
+        storage_key = f"{file_type}/{user_id}/{stored_name}"
 
         if STORAGE_BACKEND == "LOCAL":
             # Local save: use os.path.join for actual filesystem path
             dir_path = os.path.join(UPLOAD_DIR, file_type, user_id)
             os.makedirs(dir_path, exist_ok=True)
-            file_path = os.path.join(dir_path, f"{timestamp}.{ext}")
+            file_path = os.path.join(dir_path, stored_name)
 
             async with aiofiles.open(file_path, "wb") as out_file:
                 await out_file.write(content)
-            public_url = f"{BASE_URL}/{file_type}/{user_id}/{timestamp}.{ext}"
+            public_url = await generate_file_url(storage_key, "LOCAL")
             return public_url, storage_key, "LOCAL"
 
         elif STORAGE_BACKEND == "S3":
 
             # Initialize S3 client here
-            import boto3
-            s3_client = boto3.client(
-                "s3",
-                region_name=AWS_S3_REGION,
-                aws_access_key_id=AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            )
+            s3_client = get_s3_client()
 
             if ext in allowed_images:
                 content_type = "image/jpeg" if ext in ["jpg", "jpeg"] else f"image/{ext}"
@@ -103,21 +115,74 @@ async def save_file(file_obj: UploadFile, file_name: str, user_id: str, file_typ
     except Exception as e:
         raise RuntimeError(f"Failed to save file: {str(e)}")
 
+#helper function to read a stored file
+async def read_file_bytes(storage_key: str, backend: str) -> bytes:
+    """
+    Read the raw bytes of a stored file from LOCAL or S3.
+    """
+    if backend == "LOCAL":
+        async with aiofiles.open(os.path.join(UPLOAD_DIR, *storage_key.split("/")), "rb") as in_file:
+            return await in_file.read()
+
+    elif backend == "S3":
+        s3_client = get_s3_client()
+        obj = s3_client.get_object(Bucket=AWS_S3_BUCKET_NAME, Key=storage_key)
+        return obj["Body"].read()
+
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+#helper function to write bytes under a given storage key
+async def write_file_bytes(storage_key: str, content: bytes, content_type: str, backend: str):
+    """
+    Store bytes under an explicit storage key (used for image derivatives).
+    """
+    if backend == "LOCAL":
+        file_path = os.path.join(UPLOAD_DIR, *storage_key.split("/"))
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        async with aiofiles.open(file_path, "wb") as out_file:
+            await out_file.write(content)
+
+    elif backend == "S3":
+        s3_client = get_s3_client()
+        s3_client.put_object(
+            Bucket=AWS_S3_BUCKET_NAME,
+            Key=storage_key,
+            Body=content,
+            ContentType=content_type,
+            CacheControl="public, max-age=31536000, immutable"
+        )
+
+    else:
+        raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def variant_storage_key(storage_key: str, variants: Optional[dict], size: Optional[str]) -> str:
+    """
+    Storage key of the `size` derivative ("thumb" / "medium" / "full") when it
+    has been generated, otherwise the original upload.
+    """
+    if not size or not variants or not variants.get(size):
+        return storage_key
+    sized = variants[size]
+    return sized.get(IMAGE_VARIANT_FORMAT) or next(iter(sized.values()), storage_key)
+
+
 #helper function to genrate the profile picture url
-async def generate_file_url(storage_key: str, backend: str):
+async def generate_file_url(storage_key: str, backend: str, size: Optional[str] = None, variants: Optional[dict] = None):
     """
     Generate fetch URL for an existing file.
+    Pass `size` with the file doc's `variants` to link a resized derivative.
     """
+    storage_key = variant_storage_key(storage_key, variants, size)
+
     if backend == "LOCAL":
+        if is_private_media(storage_key):
+            return f"{BASE_URL}/{storage_key}?{signed_media_query(storage_key)}"
         return f"{BASE_URL}/{storage_key}"
 
     elif backend == "S3":
-        s3_client = boto3.client(
-            "s3",
-            region_name=AWS_S3_REGION,
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-        )
+        s3_client = get_s3_client()
         try:
             return s3_client.generate_presigned_url(
                 ClientMethod="get_object",
@@ -209,6 +274,9 @@ async def upload_profile_photo_controller(
         )
         result = await file_collection.insert_one(file_doc.dict(by_alias=True))
         new_file_id = str(result.inserted_id)
+        # Imported lazily: the derivative service reads/writes through this module
+        from services.image_derivative_service import enqueue_image_derivatives
+        enqueue_image_derivatives(new_file_id)
 
         # Handle overwrite
         if existing_file_id and overwrite:
@@ -256,33 +324,26 @@ async def save_everytype_file(file_obj: UploadFile, file_name: str, user_id: str
         if ext not in ALLOWED_EXTENSIONS:
             raise ValueError(f"Invalid file type: {ext}")
 
-        timestamp = int(time.time())
-        storage_key = f"{file_type}/{user_id}/{timestamp}.{ext}"
+        content = await file_obj.read()
+        stored_name = upload_file_name(content, ext)
+        storage_key = f"{file_type}/{user_id}/{stored_name}"
 
         if STORAGE_BACKEND == "LOCAL":
             dir_path = os.path.join(UPLOAD_DIR, file_type, user_id)
             os.makedirs(dir_path, exist_ok=True)
-            file_path = os.path.join(dir_path, f"{timestamp}.{ext}")
+            file_path = os.path.join(dir_path, stored_name)
 
             async with aiofiles.open(file_path, "wb") as out_file:
-                content = await file_obj.read()
                 await out_file.write(content)
 
-            public_url = f"{BASE_URL}uploads/{file_type}/{user_id}/{timestamp}.{ext}"
+            public_url = f"{BASE_URL}uploads/{file_type}/{user_id}/{stored_name}"
             return public_url, storage_key, "LOCAL"
 
         elif STORAGE_BACKEND == "S3":
-            import boto3
             import mimetypes
 
-            s3_client = boto3.client(
-                "s3",
-                region_name=AWS_S3_REGION,
-                aws_access_key_id=AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            )
+            s3_client = get_s3_client()
 
-            content = await file_obj.read()
             mime_type, _ = mimetypes.guess_type(file_name)
             if not mime_type:
                 mime_type = "application/octet-stream"
@@ -341,6 +402,8 @@ async def upload_file_controller(
         )
         result = await file_collection.insert_one(file_doc.dict(by_alias=True))
         new_file_id_str = str(result.inserted_id)  # convert ObjectId to str
+        from services.image_derivative_service import enqueue_image_derivatives
+        enqueue_image_derivatives(new_file_id_str)
 
         # Store file IDs as strings in user document
         await user_collection.update_one(
@@ -426,17 +489,18 @@ async def delete_user_file_controller(file_id: str, user_id: str, lang: str = "e
 
         storage_backend = STORAGE_BACKEND
         storage_key = str(file_doc.get("storage_key")).replace("\\", "/")
+        storage_keys = [storage_key] + [
+            key
+            for sized in (file_doc.get("variants") or {}).values()
+            for key in sized.values()
+        ]
 
-        # 3. Delete file from storage
+        # 3. Delete file (and its derivatives) from storage
         if storage_backend == "S3":
-            s3_client = boto3.client(
-                "s3",
-                region_name=AWS_S3_REGION,
-                aws_access_key_id=AWS_ACCESS_KEY_ID,
-                aws_secret_access_key=AWS_SECRET_ACCESS_KEY
-            )
+            s3_client = get_s3_client()
             try:
-                s3_client.delete_object(Bucket=AWS_S3_BUCKET_NAME, Key=storage_key)
+                for key in storage_keys:
+                    s3_client.delete_object(Bucket=AWS_S3_BUCKET_NAME, Key=key)
             except ClientError as e:
                 return response.raise_exception(
                     translate_message("S3_DELETION_ERROR", lang=lang) + f": {str(e)}",
@@ -445,9 +509,10 @@ async def delete_user_file_controller(file_id: str, user_id: str, lang: str = "e
 
         elif storage_backend == "LOCAL":
             try:
-                local_path = os.path.join(UPLOAD_DIR, *storage_key.split("/"))
-                if os.path.exists(local_path):
-                    os.remove(local_path)
+                for key in storage_keys:
+                    local_path = os.path.join(UPLOAD_DIR, *key.split("/"))
+                    if os.path.exists(local_path):
+                        os.remove(local_path)
             except Exception as e:
                 return response.raise_exception(
                     translate_message("LOCAL_DELETION_ERROR", lang=lang) + f": {str(e)}",
@@ -477,7 +542,7 @@ async def delete_user_file_controller(file_id: str, user_id: str, lang: str = "e
             status_code=500
         )
     
-async def profile_photo_from_onboarding(onboarding: dict):
+async def profile_photo_from_onboarding(onboarding: dict, size: Optional[str] = None):
     """
     Priority:
     first image from images[]
@@ -502,7 +567,9 @@ async def profile_photo_from_onboarding(onboarding: dict):
 
     return await generate_file_url(
         file_doc["storage_key"],
-        file_doc["storage_backend"]
+        file_doc["storage_backend"],
+        size=size,
+        variants=file_doc.get("variants")
     )
 
 async def resolve_banner_url(file_id: str) -> str:
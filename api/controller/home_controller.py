@@ -5,7 +5,6 @@ from config.db_config import (
     user_match_history,
     user_like_history,
     favorite_collection,
-    deleted_account_collection,
     blocked_users_collection,
     reported_users_collection
 )
@@ -13,6 +12,7 @@ from core.utils.response_mixin import CustomResponseMixin
 from services.translation import translate_message
 from core.utils.age_calculation import calculate_age
 from api.controller.onboardingController import fetch_user_by_id
+from services.presence_service import online_status
 from bson import ObjectId
 
 response = CustomResponseMixin()
@@ -36,24 +36,7 @@ async def _get_excluded_user_ids(user_id: str) -> set:
     async for m in matches:
         excluded.update(m.get("user_ids", []))
 
-    # ================== DELETED USERS ==================
-    deleted = await deleted_account_collection.find_one(
-        {"user_id": user_id},
-        {"user_id": 1}
-    )
-
-    # If current user is deleted (safety case)
-    if deleted:
-        excluded.add(user_id)
-
-    # Get all deleted accounts (same pattern as passed)
-    deleted_users_cursor = deleted_account_collection.find(
-        {},
-        {"user_id": 1}
-    )
-
-    async for doc in deleted_users_cursor:
-        excluded.add(doc["user_id"])
+    # Deleted accounts are filtered by the feed query (is_deleted flag)
 
     # ================== BLOCKED USERS ==================
 
@@ -143,6 +126,7 @@ async def get_home_suggestions(user_id: str, lang: str = "en"):
 
         query = {
             "onboarding_completed": True,
+            "is_deleted": {"$ne": True},
             "user_id": {"$nin": list(excluded_ids)},
             "interested_in": {"$in": [user.get("gender")]},
         }
@@ -184,7 +168,8 @@ async def get_home_suggestions(user_id: str, lang: str = "en"):
             details["is_liked"] = candidate["user_id"] in liked_me_user_ids
 
             priority = {
-                "is_online": bool(candidate.get("is_online")),
+                "user_id": candidate["user_id"],
+                "is_online": False,
                 "recently_active": False,
                 "shared_interests": 0
             }
@@ -200,6 +185,11 @@ async def get_home_suggestions(user_id: str, lang: str = "en"):
             details["_priority"] = priority
             results.append(details)
 
+        # Presence of every candidate in one Redis round trip
+        online = await online_status([r["_priority"]["user_id"] for r in results])
+        for r in results:
+            r["_priority"]["is_online"] = online.get(r["_priority"]["user_id"], False)
+
         # 2️ SORTING (ranking only)
         results.sort(
             key=lambda x: (
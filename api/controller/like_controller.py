@@ -1,14 +1,12 @@
 #like_controller.py
 
 from services.translation import translate_message
-from bson import ObjectId
 from core.utils.core_enums import *
-from core.utils.age_calculation import calculate_age
 from api.controller.files_controller import get_profile_photo_url
 from core.utils.pagination import StandardResultsSetPagination
 from config.models.onboarding_model import *
 from core.utils.response_mixin import CustomResponseMixin
-from config.models.userPass_model import get_liked_user_ids
+from services.user_card_service import hydrate_user_cards, page_id_array, page_profile_views
 from config.db_config import *
 from services.premium_guard import require_premium
 from config.models.user_models import *
@@ -27,7 +25,12 @@ async def get_users_who_liked_me_for_premium(
     if premium_error:
         return premium_error
 
-    liked_by_user_ids = await get_liked_user_ids(str(current_user["_id"]))
+    liked_by_user_ids, total = await page_id_array(
+        user_like_history,
+        {"user_id": str(current_user["_id"])},
+        "liked_by_user_ids",
+        pagination
+    )
 
     if not liked_by_user_ids:
         return response.success_message(
@@ -39,51 +42,26 @@ async def get_users_who_liked_me_for_premium(
             }]
         )
 
-    cursor = (
-        user_collection.find(
-            {"_id": {"$in": [ObjectId(uid) for uid in liked_by_user_ids]}},
-            {"username": 1, "is_verified": 1, "login_status": 1}
-        )
-    )
-
-    if pagination.limit is not None:
-        cursor = cursor.skip(pagination.skip).limit(pagination.limit)
-
-    results = []
-
-    async for user in cursor:
-        onboarding = await get_onboarding_details(
-            {"user_id": str(user["_id"])},
-            fields=["birthdate", "country", "images"]
-        )
-
-        birthdate = onboarding.get("birthdate") if onboarding else None
-        age = calculate_age(birthdate) if birthdate else None
-
-        profile_photo, country_name = await asyncio.gather(
-            profile_photo_from_onboarding(onboarding),
-            get_country_name_by_id(
-                onboarding.get("country"),
-                countries_collection,
-                lang=lang
-            )
-        )
-
-        results.append({
-            "user_id": str(user["_id"]),
-            "name": user.get("username"),
-            "age": age,
-            "city": country_name,
-            "profile_photo": profile_photo,
-            "is_verified": user.get("is_verified", False),
-            "login_status": user.get("login_status")
-        })
-
-    response_data = serialize_datetime_fields({
+    cards = await hydrate_user_cards(liked_by_user_ids, lang)
+
+    results = [
+        {
+            "user_id": card["user_id"],
+            "name": card["name"],
+            "age": card["age"],
+            "city": card["country"],
+            "profile_photo": card["profile_photo"],
+            "is_verified": card["is_verified"],
+            "login_status": card["login_status"]
+        }
+        for card in cards
+    ]
+
+    response_data = {
         "results": results,
         "page": pagination.page,
         "page_size": pagination.page_size
-    })
+    }
 
     return response.success_message(
         translate_message("LIKED_USERS_FETCHED", lang),
@@ -106,31 +84,13 @@ async def get_users_who_visited_my_profile(
     if premium_error:
         return premium_error
 
-    # FETCH PROFILE VIEW HISTORY
-    history = await profile_view_history.find_one(
-        {"user_id": str(current_user["_id"])},
-        {"_id": 0, "viewed_by_user_ids": 1}
+    # LATEST VISIT PER VIEWER, PAGINATED IN THE DATABASE
+    views, total = await page_profile_views(
+        profile_view_history,
+        str(current_user["_id"]),
+        pagination
     )
 
-    views = history.get("viewed_by_user_ids", []) if history else []
-
-    # ---------------- REMOVE DUPLICATES (KEEP LATEST VISIT) ----------------
-    unique_views = {}
-
-    for view in views:
-        user_id = view.get("user_id")
-        viewed_at = view.get("viewed_at", datetime.min)
-
-        # If user not added OR this visit is newer → update
-        if (
-            user_id not in unique_views or
-            viewed_at > unique_views[user_id].get("viewed_at", datetime.min)
-        ):
-            unique_views[user_id] = view
-
-    # Convert back to list
-    views = list(unique_views.values())
-
     if not views:
         return response.success_message(
             translate_message("NO_PROFILE_VIEWS_FOUND", lang),
@@ -138,75 +98,34 @@ async def get_users_who_visited_my_profile(
                 "results": [],
                 "page": pagination.page,
                 "page_size": pagination.page_size,
-                "total": 0
+                "total": total
             }],
             status_code=200
         )
 
-    # SORT (LATEST FIRST)
-    views.sort(
-        key=lambda x: x.get("viewed_at", datetime.min),
-        reverse=True
-    )
-
-    # PAGINATION
-    total = len(views)
-
-    # If page_size is None → return all records
-    if pagination.limit is None:
-        paginated_views = views
-    else:
-        start = pagination.skip
-        end = start + pagination.limit
-        paginated_views = views[start:end]
-
-    results = []
-
-    # BUILD RESPONSE (PARALLEL FETCH)
-    for view in paginated_views:
-        viewer_id = view.get("user_id")
-        viewed_at = view.get("viewed_at")
-
-        user, onboarding = await asyncio.gather(
-            get_user_details(
-                condition={
-                    "_id": ObjectId(viewer_id),
-                    "is_deleted": {"$ne": True}
-                },
-                fields=["_id", "username", "is_verified", "login_status"]
-            ),
-            get_onboarding_details(
-                {"user_id": viewer_id},
-                fields=["birthdate", "country", "images"]
-            ),
-        )
-
-        if not user:
-            continue
-
-        profile_photo = await profile_photo_from_onboarding(onboarding)
-
-        birthdate = onboarding.get("birthdate") if onboarding else None
-        age = calculate_age(birthdate) if birthdate else None
-        country_name = await get_country_name_by_id(onboarding.get("country"), countries_collection, lang)
-
-        results.append({
-            "user_id": viewer_id,
-            "name": user.get("username"),
-            "age": age,
-            "country": country_name,
-            "profile_photo": profile_photo,
-            "is_verified": user.get("is_verified", False),
-            "login_status": user.get("login_status"),
-            "viewed_at": viewed_at
-        })
-
-    response_data = serialize_datetime_fields({
+    cards = await hydrate_user_cards([view["user_id"] for view in views], lang)
+    viewed_at_by_user = {view["user_id"]: view.get("viewed_at") for view in views}
+
+    results = [
+        {
+            "user_id": card["user_id"],
+            "name": card["name"],
+            "age": card["age"],
+            "country": card["country"],
+            "profile_photo": card["profile_photo"],
+            "is_verified": card["is_verified"],
+            "login_status": card["login_status"],
+            "viewed_at": viewed_at_by_user.get(card["user_id"])
+        }
+        for card in cards
+    ]
+
+    response_data = {
         "results": results,
         "page": pagination.page,
         "page_size": pagination.page_size,
         "total": total
-    })
+    }
 
     return response.success_message(
         translate_message("PROFILE_VISITS_FETCHED", lang),
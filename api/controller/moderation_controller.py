@@ -15,7 +15,7 @@ async def get_reported_users_controller(
     lang: str = "en"
 ):
     try:
-        reports, total_records = await ModerationModel.get_reported_users_pipeline(
+        reports, total_records, search_info = await ModerationModel.get_reported_users_pipeline(
             status=status,
             search=search,
             pagination=pagination
@@ -34,7 +34,8 @@ async def get_reported_users_controller(
             records=reports,
             page=pagination.page or 1,
             page_size=pagination.page_size or len(reports),
-            total_records=total_records
+            total_records=total_records,
+            search=search_info
         )
 
         return response.success_message(
@@ -1,5 +1,4 @@
 from datetime import datetime, date
-import asyncio
 from enum import Enum
 from typing import Dict, Any, List, Optional
 
@@ -16,7 +15,7 @@ from config.db_config import (
     user_collection,
     user_match_history
 )
-from core.utils.response_mixin import CustomResponseMixin
+from core.utils.response_mixin import CustomResponseMixin, SerializedPayloadCache
 from core.utils.core_enums import MembershipType
 from core.utils.helper import serialize_datetime_fields, get_country_name_by_id
 from api.controller.files_controller import generate_file_url
@@ -30,12 +29,18 @@ from api.controller.files_controller import save_file
 from config.models.user_models import Files, get_user_token_balance
 from core.utils.helper import serialize_datetime_fields
 from services.translation import translate_message
+from services.profile_snapshot_service import invalidate_profile_snapshot
+from services.search_profile_service import sync_search_profile
+from services.image_derivative_service import enqueue_image_derivatives
 from core.utils.age_calculation import calculate_age
 from core.templates.email_templates import onboarding_completed_template
 from core.utils.auth_utils import send_email
 
 response = CustomResponseMixin()
 
+# Serialized country / interest lists, per language
+static_payload_cache = SerializedPayloadCache(ttl=600)
+
 MIN_GALLERY_IMAGES = 1
 MAX_GALLERY_IMAGES = 3
 
@@ -279,6 +284,8 @@ async def save_onboarding_step(
             status_code=500
         )
 
+    await invalidate_profile_snapshot(user_id)
+
     completed = True
     for field in REQUIRED_FIELDS:
         if field not in doc or doc.get(field) in (None, "", []):
@@ -312,6 +319,8 @@ async def save_onboarding_step(
                 is_html=True
             )
 
+    await sync_search_profile(user_id)
+
     formatted = await format_onboarding_response(doc)
 
     return response.success_message(
@@ -624,9 +633,34 @@ async def get_onboarding_steps_by_user_id(user_id: str, lang: str = "en"):
         }]
     )
 
+async def _build_country_list(lang: str) -> list:
+    countries = await countries_collection.find(
+        {},
+        {"translations": 1, "code": 1}
+    ).to_list(length=None)
+
+    results = [
+        {
+            "id": str(c["_id"]),
+            "name": (
+                c.get("translations", {}).get(lang)
+                or c.get("translations", {}).get("en")
+            ),
+            "code": c.get("code")
+        }
+        for c in countries
+    ]
+
+    results = sorted(results, key=lambda x: (x["name"] or "").lower())
+
+    return [{
+        "count": len(results),
+        "results": results
+    }]
+
 async def list_of_country(lang: str = "en"):
     try:
-        total = await countries_collection.count_documents({})
+        total = await countries_collection.estimated_document_count()
 
         if total == 0:
             return response.success_message(
@@ -637,33 +671,14 @@ async def list_of_country(lang: str = "en"):
                 }]
             )
 
-        cursor = countries_collection.find(
-            {},
-            {"translations": 1, "code": 1}
+        # Seeded reference data: identical for every caller of a language
+        payload = await static_payload_cache.get_or_build(
+            f"countries:{lang}", lambda: _build_country_list(lang)
         )
 
-        countries = await cursor.to_list(length=None)
-
-        results = [
-            {
-                "id": str(c["_id"]),
-                "name": (
-                    c.get("translations", {}).get(lang)
-                    or c.get("translations", {}).get("en")
-                ),
-                "code": c.get("code")
-            }
-            for c in countries
-        ]
-
-        results = sorted(results, key=lambda x: (x["name"] or "").lower())
-
-        return response.success_message(
+        return response.success_message_bytes(
             translate_message("COUNTRY_LIST_FETCHED", lang),
-            data=[{
-                "count": len(results),
-                "results": results
-            }]
+            data=payload
         )
 
     except Exception as e:
@@ -672,38 +687,43 @@ async def list_of_country(lang: str = "en"):
             data=str(e),
             status_code=500
         )
- 
-async def intrest_and_categories(lang: str = "en"):
-    try:
-        cursor = interest_categories_collection.find(
-            {},
-            {"category": 1, "options": 1}
-        )
 
-        data = await cursor.to_list(length=None)
+async def _build_interest_categories(lang: str) -> list:
+    data = await interest_categories_collection.find(
+        {},
+        {"category": 1, "options": 1}
+    ).to_list(length=None)
 
-        results = []
+    results = []
 
-        for item in data:
-            category = item.get("category")
+    for item in data:
+        category = item.get("category")
 
-            translated_options = [
-                translate_message(opt, lang)
-                for opt in item.get("options", [])
-            ]
+        translated_options = [
+            translate_message(opt, lang)
+            for opt in item.get("options", [])
+        ]
 
-            results.append({
-                "id": str(item["_id"]),
-                "category": translate_message(category, lang),
-                "options": translated_options
-            })
+        results.append({
+            "id": str(item["_id"]),
+            "category": translate_message(category, lang),
+            "options": translated_options
+        })
 
-        return response.success_message(
+    return [{
+        "count": len(results),
+        "results": results
+    }]
+
+async def intrest_and_categories(lang: str = "en"):
+    try:
+        payload = await static_payload_cache.get_or_build(
+            f"interest_categories:{lang}", lambda: _build_interest_categories(lang)
+        )
+
+        return response.success_message_bytes(
             translate_message("INTEREST_CATEGORIES_FETCHED", lang),
-            data=[{
-                "count": len(results),
-                "results": results
-            }]
+            data=payload
         )
 
     except Exception as e:
@@ -840,8 +860,6 @@ async def upload_onboarding_images(
 
         for index, file in enumerate(images):
             await file.seek(0)
-            if index != 0:
-                await asyncio.sleep(1)
 
             public_url, storage_key, backend = await save_file(
                 file_obj=file,
@@ -861,6 +879,7 @@ async def upload_onboarding_images(
             inserted = await file_collection.insert_one(
                 file_doc.model_dump(by_alias=True)
             )
+            enqueue_image_derivatives(inserted.inserted_id)
 
             uploaded_files.append(
                 serialize_datetime_fields({
@@ -1019,6 +1038,7 @@ async def update_profile_image_onboarding(
         )
 
         new_file_id = str(inserted.inserted_id)
+        enqueue_image_derivatives(new_file_id)
 
         # ---------------- FETCH ONBOARDING ----------------
         onboarding = await onboarding_collection.find_one(
@@ -1050,6 +1070,8 @@ async def update_profile_image_onboarding(
                 }
             }
         )
+        await invalidate_profile_snapshot(user_id)
+        await sync_search_profile(user_id)
 
         # ---------------- RESPONSE ----------------
         return response.success_message(
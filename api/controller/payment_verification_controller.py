@@ -0,0 +1,38 @@
+# payment_verification_controller.py
+
+from core.utils.core_enums import PaymentVerificationStatus
+from core.utils.response_mixin import CustomResponseMixin
+from services.payment_verification_service import format_verification, get_payment_verification
+from services.translation import translate_message
+
+response = CustomResponseMixin()
+
+
+def payment_verification_response(verification: dict, lang: str = "en"):
+    """
+    202 while the payment is still being verified, the final state otherwise.
+    """
+    status = verification["status"]
+    if status == PaymentVerificationStatus.COMPLETED.value:
+        message, status_code = "TRANSACTION_DETAILS_VERIFIED_SUCCESSFULLY", 200
+    elif status == PaymentVerificationStatus.FAILED.value:
+        message, status_code = "PAYMENT_VERIFICATION_FAILED", 200
+    else:
+        message, status_code = "PAYMENT_VERIFICATION_QUEUED", 202
+
+    return response.success_message(
+        translate_message(message, lang=lang),
+        data=[format_verification(verification)],
+        status_code=status_code
+    )
+
+
+async def get_payment_verification_controller(verification_id: str, user_id: str, lang: str = "en"):
+    verification = await get_payment_verification(verification_id, user_id)
+    if verification is None:
+        return response.error_message(
+            translate_message("PAYMENT_VERIFICATION_NOT_FOUND", lang=lang),
+            data=[],
+            status_code=404
+        )
+    return payment_verification_response(verification, lang)
@@ -0,0 +1,41 @@
+# presence_controller.py
+
+from core.utils.response_mixin import CustomResponseMixin
+from services.translation import translate_message
+from services.presence_service import heartbeat, get_presence, PRESENCE_TTL
+
+response = CustomResponseMixin()
+
+
+async def presence_heartbeat_controller(current_user: dict, lang: str = "en"):
+    try:
+        await heartbeat(str(current_user["_id"]))
+    except Exception as e:
+        return response.error_message(
+            translate_message("SOMETHING_WENT_WRONG", lang),
+            data=str(e),
+            status_code=500
+        )
+
+    return response.success_message(
+        translate_message("PRESENCE_UPDATED", lang),
+        data=[{"is_online": True, "expires_in": PRESENCE_TTL}],
+        status_code=200
+    )
+
+
+async def get_presence_controller(user_ids: list, lang: str = "en"):
+    presence = await get_presence(user_ids)
+
+    return response.success_message(
+        translate_message("PRESENCE_FETCHED", lang),
+        data=[
+            {
+                "user_id": user_id,
+                "is_online": entry["is_online"],
+                "last_seen": entry["last_seen"].isoformat() if entry["last_seen"] else None
+            }
+            for user_id, entry in presence.items()
+        ],
+        status_code=200
+    )
@@ -1,15 +1,16 @@
 #profile_view_controller.py:
 
 from bson import ObjectId
-from config.db_config import contest_history_collection, contest_winner_collection, gift_transaction_collection, contest_participant_collection, countries_collection, private_gallery_purchases_collection, profile_view_history, user_collection, onboarding_collection, file_collection, gift_collection
+from config.db_config import gift_transaction_collection, contest_participant_collection, countries_collection, private_gallery_purchases_collection, profile_view_history, user_collection, onboarding_collection, file_collection, gift_collection
 from core.utils.response_mixin import CustomResponseMixin
 from core.utils.age_calculation import calculate_age
-from api.controller.files_controller import get_profile_photo_url, generate_file_url, profile_photo_from_onboarding
+from api.controller.files_controller import get_profile_photo_url, generate_file_url
 from datetime import date, datetime
+from typing import Optional
+from pymongo.errors import DuplicateKeyError
 from services.translation import translate_message
-from core.utils.helper import serialize_datetime_fields, get_country_name_by_id
-from config.models.user_token_history_model import create_user_token_history
-from schemas.user_token_history_schema import CreateTokenHistory
+from core.utils.helper import get_country_names_by_ids
+from services.token_ledger_service import transfer_tokens, InsufficientTokensError
 from config.models.user_models import *
 from core.utils.core_enums import *
 from core.utils.pagination import StandardResultsSetPagination
@@ -17,29 +18,21 @@ from core.utils.core_enums import MembershipType, NotificationType, Notification
 from services.notification_service import send_notification
 from services.premium_guard import require_premium
 from services.gallery_service import *
-from config.models.contest_model import resolve_badge
 from schemas.gift_transaction_schema import *
 from config.models.userPass_model import *
+from services.profile_snapshot_service import get_profile_snapshot, overlay_viewer
 
 response = CustomResponseMixin()
 
 
 async def get_profile_controller(user_id: str, viewer: dict, lang: str = "en"):
     """
-    Fetch profile using User + Onboarding data
+    Fetch profile using User + Onboarding data.
+    The viewed user's data comes from the cached profile snapshot; only the
+    viewer's unlocked images are applied per request.
     """
-
-    latest_contest_history = await contest_history_collection.find_one(
-        {"voting_end": {"$lt": datetime.utcnow()}},
-        sort=[("voting_end", -1)]
-    )
-
-    latest_history_id = str(latest_contest_history["_id"]) if latest_contest_history else None
-
-    user = await user_collection.find_one(
-        {"_id": ObjectId(user_id)}
-    )
-    if not user:
+    snapshot = await get_profile_snapshot(user_id, lang)
+    if not snapshot:
         return response.error_message(translate_message("USER_NOT_FOUND", lang=lang), data=[], status_code=404)
 
     viewer_unlocked_images = set()
@@ -52,24 +45,32 @@ async def get_profile_controller(user_id: str, viewer: dict, lang: str = "en"):
 
     is_owner = viewer and str(viewer["_id"]) == user_id
 
-    recipient_lang = user.get("language", "en")
-
     # RECORD PROFILE VIEW
     if viewer and str(viewer["_id"]) != user_id:
+        # One entry per viewer: drop the previous visit and append the new one
+        viewer_id = str(viewer["_id"])
+        now = datetime.utcnow()
         await profile_view_history.update_one(
             {"user_id": user_id},
-            {
-                "$addToSet": {
+            [{
+                "$set": {
                     "viewed_by_user_ids": {
-                        "user_id": str(viewer["_id"]),
-                        "viewed_at": datetime.utcnow()
-                    }
-                },
-                "$set": {"updated_at": datetime.utcnow()}
-            },
+                        "$concatArrays": [
+                            {
+                                "$filter": {
+                                    "input": {"$ifNull": ["$viewed_by_user_ids", []]},
+                                    "cond": {"$ne": ["$$this.user_id", viewer_id]}
+                                }
+                            },
+                            [{"user_id": viewer_id, "viewed_at": now}]
+                        ]
+                    },
+                    "updated_at": now
+                }
+            }],
             upsert=True
         )
-        is_premium = require_premium(user, lang) is None
+        is_premium = require_premium({"membership_type": snapshot["membership_type"]}, lang) is None
 
         if is_premium:
             await send_notification(
@@ -85,107 +86,9 @@ async def get_profile_controller(user_id: str, viewer: dict, lang: str = "en"):
                 sender_user_id=str(viewer["_id"]),
                 send_push=True
             )
-    onboarding = await onboarding_collection.find_one(
-        {"user_id": str(user["_id"])}
-    )
-    age = None
-    if onboarding and onboarding.get("birthdate"):
-        age = calculate_age(onboarding["birthdate"])
-
-    membership_type = user.get("membership_type", "free")
-    is_verified = user.get("is_verified", False)
-
-    public_gallery_raw = onboarding.get("public_gallery", []) if onboarding else []
-    private_gallery_raw = onboarding.get("private_gallery", []) if onboarding else []
-
-    public_gallery = await resolve_public_gallery_items(public_gallery_raw)
-    private_gallery = await resolve_private_gallery_items(
-        private_gallery_raw,
-        viewer_unlocked_images=viewer_unlocked_images,
-        is_owner=is_owner
-    )
 
-    private_gallery_locked = membership_type == "free"
-
-    profile_photo_url = await profile_photo_from_onboarding(onboarding)
-
-    country_name = await get_country_name_by_id(onboarding.get("country"), countries_collection, lang)
-
-    gifts = []
-
-    if is_verified:
-        cursor = gift_collection.find(
-            {"status": "active"}
-        )
-
-        async for gift in cursor:
-            file_doc = await file_collection.find_one(
-                {
-                    "_id": ObjectId(gift["file_id"]),
-                    "is_deleted": False
-                }
-            )
-
-            if not file_doc:
-                continue
-
-            image_url = await generate_file_url(
-                file_doc["storage_key"],
-                file_doc["storage_backend"]
-            )
-
-            gifts.append({
-                "gift_id": str(gift["_id"]),
-                "name": gift["name"],
-                "image_url": image_url,
-                "token": gift["token"]
-            })
-
-    # Fetch latest contest winner badge (if any)
-    winner_badges = []
-
-    if latest_history_id:
-        winner = await contest_winner_collection.find_one(
-            {
-                "user_id": user_id,
-                "contest_history_id": latest_history_id
-            }
-        )
-
-        if winner:
-            position = winner.get("rank")
-            badge = resolve_badge(position)
-            if badge:
-                winner_badges.append(badge)
-
-    profile_data = [{
-        "name": user.get("username"),
-        "age": age,
-        "email": user.get("email"),
-        "profile_photo": profile_photo_url,
-        "profile_badge": winner_badges,
-        "about": onboarding.get("bio"),
-        "hobbies": onboarding.get("passions"),
-        "gender": onboarding.get("gender"),
-        "country": country_name,
-        "orientation": onboarding.get("sexual_orientation"),
-        "status": onboarding.get("marital_status"),
-        "private_gallery": {
-            "items": private_gallery,
-            "count": len(private_gallery),
-            "locked": private_gallery_locked
-        },
-        "public_gallery": {
-            "items": public_gallery,
-            "count": len(public_gallery)
-        },
-        "send_gifts": {
-            "enabled": is_verified,
-            "items": gifts
-        }
-    }]
+    profile_data = [await overlay_viewer(snapshot, viewer_unlocked_images, is_owner)]
 
-    profile_data = serialize_datetime_fields(profile_data)
     return response.success_message(
         translate_message("PROFILE_FETCHED_SUCCESSFULLY", lang=lang),
         data=profile_data,
@@ -223,17 +126,22 @@ async def get_private_gallery_image(
         )
 
     # 3. Check if VIEWER already unlocked this image
-    is_unlocked = image_id in viewer.get("unlocked_images", [])
-
-    # 4. Fetch file
-    file_doc = await file_collection.find_one(
-        {"_id": ObjectId(image_id), "is_deleted": {"$ne": True}}
+    is_unlocked = (
+        str(viewer["_id"]) == profile_user_id
+        or image_id in viewer.get("unlocked_images", [])
     )
 
-    image_url = await generate_file_url(
-        file_doc["storage_key"],
-        file_doc.get("backend", "LOCAL")
-    )
+    # 4. Fetch file; locked images are never handed a URL
+    image_url = None
+    if is_unlocked:
+        file_doc = await file_collection.find_one(
+            {"_id": ObjectId(image_id), "is_deleted": {"$ne": True}}
+        )
+        if file_doc:
+            image_url = await generate_file_url(
+                file_doc["storage_key"],
+                file_doc["storage_backend"]
+            )
 
     return response.success_message(
         translate_message("PRIVATE_IMAGE_FETCHED", lang=lang),
@@ -301,10 +209,12 @@ async def buy_private_gallery_image(
         )
 
     # 5. Use centralized debit function (BONUS FIRST LOGIC)
-    balance_after, balance_before = await debit_user_tokens(
+    unlock_key = f"private_image:{viewer['_id']}:{image_id}"
+    balance_after, balance_before, replayed = await debit_user_tokens(
         user_id=str(viewer["_id"]),
         amount=price,
-        reason=TokenTransactionReason.PRIVATE_IMAGE_UNLOCK
+        reason=TokenTransactionReason.PRIVATE_IMAGE_UNLOCK,
+        idempotency_key=unlock_key
     )
 
     if balance_after is None:
@@ -313,24 +223,30 @@ async def buy_private_gallery_image(
             status_code=400
         )
 
-    # 6. Unlock image (same as before)
-    await user_collection.update_one(
-        {"_id": viewer["_id"]},
-        {
-            "$addToSet": {"unlocked_images": image_id}
-        }
-    )
-
-    # 7. Record purchase (same as before)
-    await private_gallery_purchases_collection.insert_one({
-        "buyer_id": str(viewer["_id"]),
-        "owner_id": profile_user_id,
+    # 6. Unlock image and record the purchase, unless a repeated request
+    # finds them done; both writes are idempotent for a racing duplicate
+    if not (replayed and await private_gallery_purchases_collection.find_one({"idempotency_key": unlock_key})):
+        await user_collection.update_one(
+            {"_id": viewer["_id"]},
+            {
+                "$addToSet": {"unlocked_images": image_id}
+            }
+        )
 
-        "file_id": image_id,
-        "price": price,
-        "purchased_at": datetime.utcnow(),
-        "is_active": True
-    })
+        # 7. Record purchase, keyed like the debit
+        try:
+            await private_gallery_purchases_collection.insert_one({
+                "buyer_id": str(viewer["_id"]),
+                "owner_id": profile_user_id,
+
+                "file_id": image_id,
+                "price": price,
+                "idempotency_key": unlock_key,
+                "purchased_at": datetime.utcnow(),
+                "is_active": True
+            })
+        except DuplicateKeyError:
+            pass
 
     # 8. Success response (same structure as before)
     return response.success_message(
@@ -387,7 +303,9 @@ async def get_profile_gallery(
 
         url = await generate_file_url(
             file_doc["storage_key"],
-            file_doc["storage_backend"]
+            file_doc["storage_backend"],
+            size="medium",
+            variants=file_doc.get("variants")
         )
 
         public_gallery.append({
@@ -409,19 +327,24 @@ async def get_profile_gallery(
         if not file_doc:
             continue
 
+        is_unlocked = (
+            viewer_id == profile_user_id
+            or str(img["file_id"]) in viewer_unlocked
+            or str(img["file_id"]) in purchased_map
+        )
+
         url = await generate_file_url(
             file_doc["storage_key"],
-            file_doc["storage_backend"]
-        )
+            file_doc["storage_backend"],
+            size="medium",
+            variants=file_doc.get("variants")
+        ) if is_unlocked else None
 
         private_gallery.append({
             "image_id": img["file_id"],
             "image_url": url,
             "price": int(img.get("price", 0)),
-            "is_unlocked": (
-                str(img["file_id"]) in viewer_unlocked
-                or str(img["file_id"]) in purchased_map
-            )
+            "is_unlocked": is_unlocked
         })
 
     # ADD PURCHASED BUT DELETED IMAGES
@@ -455,7 +378,8 @@ async def send_gift_to_profile(
     profile_user_id: str,
     gift_id: str,
     viewer: dict,
-    lang: str = "en"
+    lang: str = "en",
+    client_key: Optional[str] = None
 ):
     # Cannot send gift to self
     if str(viewer["_id"]) == profile_user_id:
@@ -467,7 +391,7 @@ async def send_gift_to_profile(
     # Fetch receiver (only what we need)
     receiver = await get_user_details(
         condition={"_id": ObjectId(profile_user_id)},
-        fields=["_id", "tokens"]
+        fields=["_id"]
     )
     if not receiver:
         return response.error_message(
@@ -487,23 +411,27 @@ async def send_gift_to_profile(
 
     gift_price = int(gift["token"])
 
-    # Use centralized debit logic (bonus first)
-    balance_after, balance_before = await debit_user_tokens(
-        user_id=str(viewer["_id"]),
-        amount=gift_price,
-        reason=TokenTransactionReason.GIFT_SENT
-    )
-
-    if balance_after is None:
+    # A client retry with the same key is answered from the ledger and
+    # resolves to the gift transaction of the first attempt
+    idempotency_key = f"gift:{viewer['_id']}:{client_key}" if client_key else f"gift:{ObjectId()}"
+
+    # Sender (bonus first) and receiver move together through the ledger
+    try:
+        sent, received = await transfer_tokens(
+            sender_id=str(viewer["_id"]),
+            receiver_id=str(profile_user_id),
+            amount=gift_price,
+            sent_reason=TokenTransactionReason.GIFT_SENT,
+            received_reason=TokenTransactionReason.GIFT_RECEIVED,
+            txn_id=str(ObjectId()),
+            idempotency_key=idempotency_key
+        )
+    except InsufficientTokensError:
         return response.error_message(
             translate_message("INSUFFICIENT_TOKENS", lang=lang),
             status_code=400
         )
 
-    # Receiver balance (same as before)
-    receiver_tokens = int(receiver.get("tokens", 0))
-    receiver_new_balance = receiver_tokens + gift_price
-
     # Create gift transaction (same structure as before)
     gift_tx = GiftTransactionCreate(
         sender_id=str(viewer["_id"]),
@@ -511,38 +439,19 @@ async def send_gift_to_profile(
         gift_id=str(gift["_id"]),
         gift_name=gift["name"],
         gift_token_value=gift_price,
-        sender_balance_before=balance_before,
-        sender_balance_after=balance_after,
-        receiver_balance_before=receiver_tokens,
-        receiver_balance_after=receiver_new_balance,
+        sender_balance_before=sent.balance_before,
+        sender_balance_after=sent.balance_after,
+        receiver_balance_before=received.balance_before,
+        receiver_balance_after=received.balance_after,
     )
 
-    gift_tx_result = await gift_transaction_collection.insert_one(
-        gift_tx.dict()
+    await gift_transaction_collection.update_one(
+        {"_id": ObjectId(sent.txn_id)},
+        {"$setOnInsert": gift_tx.dict()},
+        upsert=True
     )
 
-    gift_tx_id = str(gift_tx_result.inserted_id)
-
-    # Update receiver ONLY (sender already updated inside debit function)
-    await user_collection.update_one(
-        {"_id": ObjectId(profile_user_id)},
-        {"$set": {"tokens": receiver_new_balance}}
-    )
-
-    # DO NOT create sender history (already created inside debit_user_tokens)
-
-    # Token history — receiver
-    await create_user_token_history(
-        CreateTokenHistory(
-            user_id=str(profile_user_id),
-            delta=gift_price,
-            type=TokenTransactionType.CREDIT,
-            reason=TokenTransactionReason.GIFT_RECEIVED,
-            balance_before=str(receiver_tokens),
-            balance_after=str(receiver_new_balance),
-            txn_id=gift_tx_id
-        )
-    )
+    balance_after = sent.balance_after
     return response.success_message(
         translate_message("GIFT_SENT_SUCCESSFULLY", lang=lang),
         data=[{
@@ -599,7 +508,8 @@ async def search_profiles_controller(
                 query[db_field] = {"$in": value}
 
             elif operator == "range":
-                today = datetime.utcnow()
+                # Day precision keeps the query (and its cached count) stable
+                today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
                 birthdate_query = {}
 
                 if value.get("min"):
@@ -625,37 +535,52 @@ async def search_profiles_controller(
     )
 
     # --- Search profiles (MODEL LAYER) ---
-    cursor, total_matching = await search_profiles_aggregate(
+    profiles, total_matching, next_cursor = await search_profiles_aggregate(
         query=query,
         excluded_object_ids=excluded_object_ids,
         pagination=pagination
     )
 
     # --- Build response ---
+    country_names = await get_country_names_by_ids(
+        [profile.get("country") for profile in profiles],
+        countries_collection,
+        lang
+    )
+
+    # login_status changes too often to denormalize; one query per page
+    login_statuses = {
+        str(user["_id"]): user.get("login_status")
+        async for user in user_collection.find(
+            {"_id": {"$in": [profile["_id"] for profile in profiles]}},
+            {"login_status": 1}
+        )
+    } if profiles else {}
+
     results = []
 
-    async for onboarding in cursor:
-        user = onboarding["user"]
-        birthdate = onboarding.get("birthdate")
+    for profile in profiles:
+        birthdate = profile.get("birthdate")
+        photo = profile.get("photo")
 
         age = calculate_age(birthdate) if birthdate else None
-        country_name = await get_country_name_by_id(
-            onboarding.get("country"),
-            countries_collection,
-            lang
-        )
-        profile_photo = await profile_photo_from_onboarding(onboarding)
+        profile_photo = await generate_file_url(
+            photo["storage_key"],
+            photo["storage_backend"],
+            size="medium",
+            variants=photo.get("variants")
+        ) if photo else None
 
-        profile_user_id = str(user["_id"])
+        profile_user_id = profile["user_id"]
 
         results.append({
             "user_id": profile_user_id,
-            "name": user.get("username"),
+            "name": profile.get("username"),
             "age": age,
-            "country": country_name,
+            "country": country_names.get(str(profile.get("country"))),
             "profile_photo": profile_photo,
-            "is_verified": user.get("is_verified", False),
-            "login_status": user.get("login_status"),
+            "is_verified": profile.get("is_verified", False),
+            "login_status": login_statuses.get(profile_user_id),
             "liked_me": profile_user_id in liked_me_user_ids
         })
 
@@ -666,6 +591,7 @@ async def search_profiles_controller(
             "page": pagination.page,
             "page_size": pagination.page_size,
             "total": total_matching,
+            "next_cursor": next_cursor,
             "premium_required": False
         }]
     )
@@ -9,14 +9,13 @@ from services.translation import translate_message
 from core.utils.response_mixin import CustomResponseMixin
 from core.utils.helper import serialize_datetime_fields, convert_objectid_to_str
 from config.db_config import subscription_plan_collection
-from core.utils.transaction_helper import get_transaction_details, validate_destination_wallet, \
-    validate_transaction_status, build_transaction_model, handle_full_payment, mark_full_payment_received
 from schemas.transcation_schema import TransactionRequestModel, CompleteTransactionRequestModel
-from core.utils.core_enums import TransactionStatus, TransactionType, MembershipType
+from core.utils.core_enums import MembershipType
+from services.payment_verification_service import submit_payment_verification, SUBSCRIPTION, SUBSCRIPTION_REMAINING
+from api.controller.payment_verification_controller import payment_verification_response
 
 response = CustomResponseMixin()
-from config.models.transaction_models import store_transaction_details, get_existing_transaction, \
-    get_subscription_payment_details, update_transaction_details, get_subscription_transactions, \
+from config.models.transaction_models import get_subscription_payment_details, get_subscription_transactions, \
     get_user_transaction_details
 from config.models.subscription_plan_models import get_subscription_plan
 
@@ -43,45 +42,23 @@ async def get_subscription_list(request: Request, lang: str = "en"):
 
 async def transaction_verify(request: TransactionRequestModel,user_id:str, lang: str = "en"):
     """
-    Validate transaction details associated with subscription plans
+    Queue verification of a transaction for a subscription plan; the client
+    polls the returned verification.
     """
     try:
-        await get_existing_transaction(request.tron_txn_id, lang=lang)
-
-        transaction_details = await get_transaction_details(request.tron_txn_id, lang=lang)
-
-        # Fetch subscription plan details
+        # Fail fast on an unknown plan instead of after the chain lookup
         plan_data = await get_subscription_plan(request.plan_id, lang=lang)
+        if not isinstance(plan_data, dict):
+            return plan_data
 
-        validate_destination_wallet(transaction_details["to"], lang=lang)
-
-        validate_transaction_status(transaction_details["status"], lang=lang)
-
-        transaction_data = await build_transaction_model(
+        verification = await submit_payment_verification(
+            kind=SUBSCRIPTION,
             user_id=user_id,
-            plan_data=plan_data,
-            transaction_details=transaction_details,
-            trans_type=TransactionType.SUBSCRIPTION_TRANSACTION.value
-        )
-
-        if transaction_data.status == TransactionStatus.PARTIAL.value:
-            transaction_data.payment_details = [transaction_data.payment_details]
-            doc = await store_transaction_details(transaction_data)
-        else:
-            doc = await handle_full_payment(
-                transaction_data=transaction_data,
-                plan_data=plan_data,
-                user_id=user_id,
-            )
-
-        doc = serialize_datetime_fields(doc)
-        doc = convert_objectid_to_str(doc)
-
-
-        return response.success_message(
-            translate_message("TRANSACTION_DETAILS_VERIFIED_SUCCESSFULLY", lang=lang),
-            data=doc
+            tron_txn_id=request.tron_txn_id,
+            lang=lang,
+            plan_id=request.plan_id
         )
+        return payment_verification_response(verification, lang)
     except CustomValidationError as error:
         return response.error_message(
             message=error.message,
@@ -97,49 +74,19 @@ async def transaction_verify(request: TransactionRequestModel,user_id:str, lang:
 
 async def validate_remaining_transaction_payment(request: CompleteTransactionRequestModel, user_id:str, lang: str = "en"):
     """
-        Validate remaining transaction payment details associated with subscription plans
+        Queue verification of the remaining payment of a subscription plan
         """
     try:
-        await get_existing_transaction(request.tron_txn_id, lang=lang)
-
-        transaction_details = await get_transaction_details(request.tron_txn_id, lang=lang)
+        await get_subscription_payment_details(request.subscription_id, lang=lang)
 
-
-        partial_payment_data = await get_subscription_payment_details(request.subscription_id, lang=lang)
-
-        # Fetch subscription plan details
-        plan_data = await get_subscription_plan(partial_payment_data.get('plan_id'), lang=lang)
-
-        validate_destination_wallet(transaction_details["to"], lang=lang)
-
-        validate_transaction_status(transaction_details["status"], lang=lang)
-
-        transaction_data = await build_transaction_model(
+        verification = await submit_payment_verification(
+            kind=SUBSCRIPTION_REMAINING,
             user_id=user_id,
-            plan_data=plan_data,
-            transaction_details=transaction_details,
-            partial_payment_data=partial_payment_data,
-            trans_type=TransactionType.SUBSCRIPTION_TRANSACTION.value
-        )
-
-        if transaction_data.status == TransactionStatus.PARTIAL.value:
-            doc = await update_transaction_details(transaction_data, request.subscription_id)
-        else:
-            doc = await mark_full_payment_received(
-                transaction_data=transaction_data,
-                plan_data=plan_data,
-                user_id=user_id,
-                subscription_id=request.subscription_id
-            )
-
-        doc = serialize_datetime_fields(doc)
-        doc = convert_objectid_to_str(doc)
-
-
-        return response.success_message(
-            translate_message("TRANSACTION_DETAILS_VERIFIED_SUCCESSFULLY", lang=lang),
-            data=doc
+            tron_txn_id=request.tron_txn_id,
+            lang=lang,
+            trans_id=request.subscription_id
         )
+        return payment_verification_response(verification, lang)
 
     except CustomValidationError as error:
         return response.error_message(
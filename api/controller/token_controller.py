@@ -2,30 +2,28 @@ from typing import Optional
 
 from bson import ObjectId
 
-from config.db_config import user_collection
-from core.utils.core_enums import TransactionType, TransactionStatus, TokenTransactionType, TokenPlanStatus, \
+from core.utils.core_enums import TokenTransactionType, TokenPlanStatus, \
     WithdrawalStatus, TokenTransactionReason
 from core.utils.exceptions import CustomValidationError
 from core.utils.pagination import StandardResultsSetPagination
-from config.models.user_token_history_model import get_user_token_history, create_user_token_history
+from config.models.user_token_history_model import get_user_token_history
 from config.models.token_packages_plan_model import get_token_packages_plans, get_token_packages_plan
 from schemas.transcation_schema import TokenWithdrawTransactionCreateModel
 from schemas.user_token_history_schema import TokenHistoryResponse, TokenTransactionRequestModel, \
-    CompleteTokenTransactionRequestModel, WithdrawnTokenRequestModel, CreateTokenHistory
+    CompleteTokenTransactionRequestModel, WithdrawnTokenRequestModel
 from services.translation import translate_message
 from core.utils.helper import serialize_datetime_fields, convert_objectid_to_str
-from core.utils.transaction_helper import get_transaction_details, validate_destination_wallet, \
-    validate_transaction_status, build_transaction_model, handle_full_payment, mark_full_payment_received, \
-    handle_token_full_payment, mark_token_full_payment_received, validate_withdrawal_tokens, \
+from core.utils.transaction_helper import validate_withdrawal_tokens, \
     is_valid_tron_address, update_user_tokens_and_history, \
     calculate_amount_based_on_tokens
-from config.models.transaction_models import (store_transaction_details, get_existing_transaction,
-                                              get_subscription_payment_details, update_transaction_details,
+from config.models.transaction_models import (get_subscription_payment_details,
                                               store_withdrawn_token_request, ensure_no_pending_token_withdrawal,
                                               get_withdraw_token_transactions)
-from config.models.user_models import get_user_details, update_user_token_balance
+from config.models.user_models import get_user_details
 from core.utils.response_mixin import CustomResponseMixin
 from config.models.user_models import get_user_token_balance
+from services.payment_verification_service import submit_payment_verification, TOKEN_PACKAGE, TOKEN_REMAINING
+from api.controller.payment_verification_controller import payment_verification_response
 
 response = CustomResponseMixin()
 
@@ -37,7 +35,7 @@ async def get_user_token_details(
         transaction_type: Optional[TokenTransactionType] = None
 ):
     try:
-        token_history = await get_user_token_history(
+        token_history, next_cursor = await get_user_token_history(
             user_id=user_id,
             lang=lang,
             pagination=pagination,
@@ -56,7 +54,8 @@ async def get_user_token_details(
         data = TokenHistoryResponse(
             history=token_history,
             available_tokens=str(available_tokens),
-            token_plans=token_plans
+            token_plans=token_plans,
+            next_cursor=next_cursor
         ).model_dump()
         data = serialize_datetime_fields(data)
         return response.success_message(
@@ -71,73 +70,33 @@ async def get_user_token_details(
         )
 async def verify_token_purchase(request: TokenTransactionRequestModel,user_id:str, lang: str = "en"):
     """
-        Verifies a token purchase transaction and processes token credit based on the transaction status.
+        Queues verification of a token purchase transaction.
 
-        This function validates the transaction ID, retrieves transaction and token
-        package details, verifies the destination wallet and transaction status, and
-        builds the transaction model. For partial payments, it stores the transaction
-        without crediting tokens. For fully paid transactions, it credits tokens to
-        the user's account, updates token history, and persists the transaction.
-        Finally, it formats the response data and returns a success message.
+        The token package is checked here; the blockchain lookup, wallet and
+        status validation and the token credit run in the payment verification
+        worker (services/payment_verification_service.py). The response carries
+        the verification, which the client polls until it completes.
 
         :param request: TokenTransactionRequestModel containing transaction ID and
                         token package identifier.
         :param user_id: Unique identifier of the user initiating the token purchase.
         :param lang: Language code used for localized messages (default is "en").
-        :return: Success response containing the verified transaction details.
+        :return: Response containing the payment verification.
     """
     try:
-        await get_existing_transaction(request.tron_txn_id, lang=lang)
-
-        transaction_details = await get_transaction_details(request.tron_txn_id, lang=lang)
-
-        # Fetch token package plan details
+        # Fail fast on an unknown package instead of after the chain lookup
         plan_data = await get_token_packages_plan(request.package_id, lang=lang)
+        if not isinstance(plan_data, dict):
+            return plan_data
 
-        validate_destination_wallet(transaction_details["to"], lang=lang)
-
-        validate_transaction_status(transaction_details["status"], lang=lang)
-
-        transaction_data = await build_transaction_model(
+        verification = await submit_payment_verification(
+            kind=TOKEN_PACKAGE,
             user_id=user_id,
-            plan_data=plan_data,
-            transaction_details=transaction_details,
-            trans_type=TransactionType.TOKEN_TRANSACTION.value
-        )
-
-        if transaction_data.status == TransactionStatus.PARTIAL.value:
-            transaction_data.payment_details = [transaction_data.payment_details]
-            doc = await store_transaction_details(transaction_data)
-            user_details = await user_collection.find_one({"_id": ObjectId(user_id)})
-            current_tokens = int(user_details.get("tokens") or 0)
-            on_token_package = int(plan_data['tokens'])
-            new_balance = current_tokens + on_token_package
-            token_history_data = CreateTokenHistory(
-                user_id=str(ObjectId(user_id)),
-                delta=on_token_package,
-                type=TokenTransactionType.CREDIT.value,
-                reason=TokenTransactionReason.TOKEN_PURCHASE.value,
-                balance_before=str(current_tokens),
-                balance_after=str(new_balance),
-                txn_id=str(doc['_id']),
-            )
-            await create_user_token_history(data=token_history_data)
-        else:
-            doc = await handle_token_full_payment(
-                transaction_data=transaction_data,
-                plan_data=plan_data,
-                user_id=user_id,
-                insert_token=True
-            )
-
-        doc = serialize_datetime_fields(doc)
-        doc = convert_objectid_to_str(doc)
-        doc['tokens'] = plan_data['tokens']
-
-        return response.success_message(
-            translate_message("TRANSACTION_DETAILS_VERIFIED_SUCCESSFULLY", lang=lang),
-            data=doc
+            tron_txn_id=request.tron_txn_id,
+            lang=lang,
+            plan_id=request.package_id
         )
+        return payment_verification_response(verification, lang)
     except CustomValidationError as error:
         return response.error_message(
             message=error.message,
@@ -153,60 +112,24 @@ async def verify_token_purchase(request: TokenTransactionRequestModel,user_id:st
 
 async def validate_remaining_token_payment(request: CompleteTokenTransactionRequestModel, user_id:str, lang: str = "en"):
     """
-        Verifies and processes a token purchase transaction, including partial payments.
-
-        This flow validates the blockchain transaction, retrieves existing transaction and
-        partial payment details, fetches the associated token package plan, and validates
-        the destination wallet and transaction status.
-
-        The system then builds a transaction model using both blockchain and internal
-        payment data. If the transaction remains partially paid, it updates the existing
-        transaction record. If the payment is complete, it marks the transaction as fully
-        paid, credits tokens to the user, and records the token transaction history.
+        Queues verification of the remaining payment of a partially paid token purchase.
 
-        Finally, the system serializes the transaction document and prepares it for the response.
+        The partial transaction is checked here; the worker validates the
+        blockchain transaction and either records another partial payment or
+        marks the purchase fully paid and credits the tokens.
     """
 
     try:
-        await get_existing_transaction(request.tron_txn_id, lang=lang)
+        await get_subscription_payment_details(request.trans_id, lang=lang)
 
-        transaction_details = await get_transaction_details(request.tron_txn_id, lang=lang)
-
-        partial_payment_data = await get_subscription_payment_details(request.trans_id, lang=lang)
-
-        # Fetch token package plan details
-        plan_data = await get_token_packages_plan(partial_payment_data.get('plan_id'), lang=lang)
-
-        validate_destination_wallet(transaction_details["to"], lang=lang)
-
-        validate_transaction_status(transaction_details["status"], lang=lang)
-
-        transaction_data = await build_transaction_model(
+        verification = await submit_payment_verification(
+            kind=TOKEN_REMAINING,
             user_id=user_id,
-            plan_data=plan_data,
-            transaction_details=transaction_details,
-            partial_payment_data=partial_payment_data,
-            trans_type=TransactionType.TOKEN_TRANSACTION.value
-        )
-
-        if transaction_data.status == TransactionStatus.PARTIAL.value:
-            doc = await update_transaction_details(transaction_data, request.trans_id)
-        else:
-            doc = await mark_token_full_payment_received(
-                transaction_data=transaction_data,
-                plan_data=plan_data,
-                user_id=user_id,
-                package_id=request.trans_id
-            )
-
-        doc = serialize_datetime_fields(doc)
-        doc = convert_objectid_to_str(doc)
-        doc['tokens'] = plan_data['tokens']
-
-        return response.success_message(
-            translate_message("TRANSACTION_DETAILS_VERIFIED_SUCCESSFULLY", lang=lang),
-            data=doc
+            tron_txn_id=request.tron_txn_id,
+            lang=lang,
+            trans_id=request.trans_id
         )
+        return payment_verification_response(verification, lang)
 
     except CustomValidationError as error:
         return response.error_message(
@@ -251,10 +174,8 @@ async def request_withdrawn_token_amount(request: WithdrawnTokenRequestModel, us
         doc = serialize_datetime_fields(doc)
         doc = convert_objectid_to_str(doc)
 
-        user = await user_collection.find_one({"_id": ObjectId(user_id)})
         await update_user_tokens_and_history(
-            user_id=str(user["_id"]),
-            user_details=user,
+            user_id=str(ObjectId(user_id)),
             tokens=int(request.amount),
             transaction_type=TokenTransactionType.WITHDRAW,
             reason=TokenTransactionReason.TOKEN_WITHDRAWAL,
@@ -22,6 +22,8 @@ from config.models.user_models import *
 from config.models.onboarding_model import *
 from core.utils.helper import *
 from bson.errors import InvalidId
+from services.admin_search_service import sync_admin_search_entry
+from services.presence_service import mark_offline
 
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
 REFRESH_TOKEN_EXPIRE_MINUTES =int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
@@ -111,6 +113,7 @@ async def logout(request: LogoutRequest, lang: str = "en"):
             }
         }
     )
+    await mark_offline(str(user_id))
     return response.success_message(translate_message("LOGOUT_SUCCESSFUL", lang), data={})
 
 
@@ -155,6 +158,8 @@ async def get_user_profile_details(request: Request, current_user: dict, lang: s
             )
         # Remove sensitive info
         user_data.pop("password", None)
+        user_data.pop("ledger_ops", None)
+        user_data.pop("token_holds", None)
 
         # Get profile photo URL
         profile_url = await get_profile_photo_url(current_user=user_data)
@@ -275,6 +280,8 @@ async def verify_signup_otp_controller(payload, lang):
     except Exception as e:
         return response.error_message(translate_message("FAILED_TO_CREATE_USER",lang=lang), data = [{str(e)}], status_code=500)
 
+    await sync_admin_search_entry(user_id)
+
     # Step 5: Cleanup Redis keys
     await redis_client.delete(f"signup:{email}:otp")
     await redis_client.delete(f"signup:{email}:data")
@@ -5,7 +5,7 @@ from core.utils.response_mixin import CustomResponseMixin
 from core.utils.pagination import StandardResultsSetPagination ,pagination_params ,build_paginated_response
 from services.translation import translate_message
 from config.models.user_management_model import UserManagementModel
-from core.utils.helper import serialize_datetime_fields, get_country_name_by_id
+from core.utils.helper import get_country_name_by_id
 from config.db_config import countries_collection
 
 response = CustomResponseMixin()
@@ -24,7 +24,7 @@ async def get_admin_users(
     pagination: StandardResultsSetPagination = Depends(pagination_params)
 ):
     try:
-        users, total_records = await UserManagementModel.get_admin_users_pipeline(
+        users, total_records, search_info = await UserManagementModel.get_admin_users_pipeline(
             status,
             search,
             gender,
@@ -84,7 +84,8 @@ async def get_admin_users(
             records=users,
             page=pagination.page or 1,
             page_size=pagination.limit or len(users),
-            total_records=total_records
+            total_records=total_records,
+            search=search_info
         )
 
         return response.success_message(
@@ -195,7 +196,7 @@ async def get_admin_user_details(
 
         return response.success_message(
             translate_message("USER_DETAILS_FETCHED_SUCCESSFULLY", lang),
-            data=serialize_datetime_fields(result),
+            data=result,
             status_code=200
         )
 
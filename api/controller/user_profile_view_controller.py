@@ -5,11 +5,19 @@ from services.translation import translate_message
 from services.profile_fetch_service import fetch_basic_profile_data
 from services.profile_mapper import build_edit_profile_response
 from schemas.profile_edit_schema import *
+from schemas.notification_schema import MarkNotificationsReadRequest
 from core.utils.core_enums import *
 from config.db_config import *
 from datetime import datetime, timezone
 from config.models.user_models import *
 from services.premium_guard import require_premium
+from services.profile_snapshot_service import invalidate_profile_snapshot
+from services.search_profile_service import sync_search_profile
+from services.admin_search_service import sync_admin_search_entry
+from services.dashboard_rollup_service import mark_day_dirty, mark_user_days_dirty
+from services.account_tombstone_service import mark_account_deleted
+from services.notification_inbox_service import list_inbox, mark_one_read, mark_read, unread_count
+from core.utils.pagination import StandardResultsSetPagination
 from api.controller.files_controller import get_profile_photo_url, generate_file_url, save_file
 from fastapi import UploadFile
 from bson import ObjectId
@@ -132,6 +140,8 @@ async def update_edit_profile_controller(
             },
             upsert=True
         )
+        await invalidate_profile_snapshot(user_id)
+        await sync_search_profile(user_id)
 
     return response.success_message(
         translate_message("PROFILE_UPDATED_SUCCESSFULLY", lang),
@@ -268,6 +278,10 @@ async def retry_verification_selfie_controller(
             }
         }
     )
+    # The previous verification leaves the bucket of its day
+    await mark_day_dirty(current_user.get("verified_at"))
+    await invalidate_profile_snapshot(user_id)
+    await sync_search_profile(user_id)
 
     return response.success_message(
         translate_message("SELFIE_SUBMITTED_FOR_VERIFICATION", lang),
@@ -325,16 +339,19 @@ async def get_verification_selfie_controller(
         status_code=200
     )
 
-async def get_notifications_controller(current_user,lang: str = "en"):
+async def get_notifications_controller(
+    current_user,
+    pagination: StandardResultsSetPagination,
+    lang: str = "en"
+):
 
     user_id = str(current_user["_id"])
 
-    notifications = await notification_collection.find(
-        {
-            "recipient_id": user_id,
-            "recipient_type": NotificationRecipientType.USER.value,
-        }
-    ).sort("created_at", -1).to_list(length=100)
+    notifications, next_cursor = await list_inbox(
+        user_id,
+        NotificationRecipientType.USER.value,
+        pagination
+    )
 
     today = []
     earlier = []
@@ -388,53 +405,62 @@ async def get_notifications_controller(current_user,lang: str = "en"):
         translate_message("NOTIFICATION_FETCHED", lang),
         data=[{
             "today": today,
-            "earlier": earlier
+            "earlier": earlier,
+            "next_cursor": next_cursor
         }],
         status_code=200
     )
 
+async def get_unread_notification_count_controller(current_user, lang: str = "en"):
+    unread = await unread_count(str(current_user["_id"]), NotificationRecipientType.USER.value)
+
+    return response.success_message(
+        translate_message("NOTIFICATION_FETCHED", lang),
+        data=[{"unread_count": unread}],
+        status_code=200
+    )
+
 async def mark_notification_read(notification_id: str, current_user, lang: str = "en"):
     user_id = str(current_user["_id"])
 
-    result = await notification_collection.update_one(
-        {
-            "_id": ObjectId(notification_id),
-            "recipient_id": user_id
-        },
-        {
-            "$set": {
-                "is_read": True,
-                "read_at": datetime.now(timezone.utc)
-            }
-        }
+    try:
+        await mark_one_read(user_id, NotificationRecipientType.USER.value, notification_id)
+    except ValueError as e:
+        return response.error_message(
+            translate_message(str(e), lang),
+            status_code=404 if str(e) == "NOTIFICATION_NOT_FOUND" else 400
+        )
+
+    return response.success_message(
+        translate_message("NOTIFICATION_MARKED_AS_READ", lang),
+        status_code=200
     )
 
-    if result.matched_count == 0:
+async def mark_notifications_read(payload: MarkNotificationsReadRequest, current_user, lang: str = "en"):
+    user_id = str(current_user["_id"])
+
+    try:
+        updated_count = await mark_read(
+            user_id,
+            NotificationRecipientType.USER.value,
+            payload.notification_ids
+        )
+    except ValueError as e:
         return response.error_message(
-            translate_message("NOTIFICATION_NOT_FOUND", lang),
-            status_code=404
+            translate_message(str(e), lang),
+            status_code=400
         )
 
     return response.success_message(
-        translate_message("NOTIFICATION_MARKED_AS_READ", lang),
+        translate_message("NOTIFICATIONS_MARKED_AS_READ", lang),
+        data=[{"updated_count": updated_count}],
         status_code=200
     )
 
 async def mark_all_notifications_read(current_user, lang):
     user_id = str(current_user["_id"])
 
-    await notification_collection.update_many(
-        {
-            "recipient_id": user_id,
-            "is_read": False
-        },
-        {
-            "$set": {
-                "is_read": True,
-                "read_at": datetime.now(timezone.utc)
-            }
-        }
-    )
+    await mark_read(user_id, NotificationRecipientType.USER.value)
 
     return response.success_message(
         translate_message("ALL_NOTIFICATION_MARKED_AS_READ", lang),
@@ -453,11 +479,15 @@ async def delete_account_controller(current_user: dict, lang: str):
         {
             "$set": {
                 "is_deleted": True,
-                "deleted_at": datetime.utcnow(),
+                "deleted_at": now,
                 "deleted_by": "user"
             }
         }
     )
+    await mark_account_deleted(user_id, now)
+    await sync_search_profile(user_id)
+    await sync_admin_search_entry(user_id)
+    await mark_user_days_dirty(current_user)
 
     # Insert into deleted_account_collection (avoid duplicates)
     existing_record = await deleted_account_collection.find_one(
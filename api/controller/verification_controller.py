@@ -12,6 +12,9 @@ from config.basic_config import settings
 from core.utils.helper import credit_tokens_for_verification
 from core.utils.core_enums import NotificationType, NotificationRecipientType
 from services.notification_service import send_notification
+from services.profile_snapshot_service import invalidate_profile_snapshot
+from services.search_profile_service import sync_search_profile
+from services.admin_search_service import search_user_ids, search_summary, user_id_in
 from core.utils.helper import get_admin_id_by_email
 from core.templates.email_templates import verification_approved_template ,verification_rejected_template
 from core.utils.auth_utils import send_email
@@ -230,9 +233,11 @@ async def approve_verification(
     })
 
     # ------------------ USER UPDATE ------------------
+    now = datetime.utcnow()
     update_data = {
         "is_verified": True,
-        "updated_at": datetime.utcnow()
+        "verified_at": now,
+        "updated_at": now
     }
 
     # FEMALE → PREMIUM (FROM ONBOARDING)
@@ -243,6 +248,8 @@ async def approve_verification(
         {"_id": ObjectId(user_id)},
         {"$set": update_data}
     )
+    await invalidate_profile_snapshot(user_id)
+    await sync_search_profile(user_id)
 
     # ------------------ UPDATE OR INSERT VERIFICATION ------------------
     if pending_verification:
@@ -417,14 +424,20 @@ async def get_pending_verification_users_controller(
     lang: str = "en"
 ):
     try:
+        search_match = None
+        onboarding_match = {
+            "onboarding_completed": True,
+            "images": {"$exists": True, "$ne": []},
+            "selfie_image": {"$exists": True, "$ne": None}
+        }
+
+        # ---------------- SEARCH ----------------
+        if search:
+            search_match = await search_user_ids(search)
+            onboarding_match["user_id"] = user_id_in(search_match.user_ids)
+
         pipeline = [
-            {
-                "$match": {
-                    "onboarding_completed": True,
-                    "images": {"$exists": True, "$ne": []},
-                    "selfie_image": {"$exists": True, "$ne": None}
-                }
-            },
+            {"$match": onboarding_match},
             {
                 "$addFields": {
                     "userObjId": {
@@ -468,14 +481,6 @@ async def get_pending_verification_users_controller(
             }
         ]
 
-        # ---------------- SEARCH ----------------
-        if search:
-            pipeline.append({
-                "$match": {
-                    "user.username": {"$regex": search, "$options": "i"}
-                }
-            })
-
         # ---------------- VERIFICATION LOOKUP ----------------
         pipeline.extend([
             {
@@ -577,7 +582,8 @@ async def get_pending_verification_users_controller(
             records=records,
             page=page,
             page_size=page_size,
-            total_records=total_records
+            total_records=total_records,
+            search=search_summary(search_match)
         )
 
         return response.success_message(
@@ -1,19 +1,20 @@
-from datetime import datetime, date , time
+from datetime import datetime
 from bson import ObjectId
 from config.db_config import user_collection , video_call_sessions , onboarding_collection , file_collection
 from core.utils.response_mixin import CustomResponseMixin
 from services.translation import translate_message
-from core.utils.core_enums import MembershipType ,TokenTransactionType ,TokenTransactionReason
+from core.utils.core_enums import TokenTransactionReason
 import math
-from config.basic_config import settings
-from schemas.user_token_history_schema import CreateTokenHistory 
-from config.models.user_token_history_model import create_user_token_history
+from services.token_ledger_service import settle_hold
 from core.utils.core_enums import NotificationType, NotificationRecipientType
 from services.notification_service import send_notification
 from api.controller.files_controller import generate_file_url
-
-
-FREE_VIDEO_LIMIT_SECONDS = settings.FREE_VIDEO_LIMIT_SECONDS
+from services.video_call_session_service import (
+    PARTICIPANTS, call_rate, token_balance, free_seconds_remaining, record_free_seconds,
+    open_call_session, accept_call_session, get_call_session, close_call_session,
+    call_hold_id, extend_call_hold, release_call_holds,
+    paid_seconds, tokens_required
+)
 
 
 response = CustomResponseMixin()
@@ -93,6 +94,7 @@ async def start_video_call(
                 }
             }
         )
+        await accept_call_session(str(existing_call["_id"]), existing_call)
 
         return response.success_message(
             translate_message("CALL_ACCEPTED", lang),
@@ -110,14 +112,8 @@ async def start_video_call(
         )
 
     # ---------------- Token validation (BONUS FIRST) ----------------
-    caller_tokens = int(caller.get("tokens", 0))
-    caller_bonus_tokens = int(caller.get("bonus_tokens", 0))
-
-    receiver_tokens = int(receiver.get("tokens", 0))
-    receiver_bonus_tokens = int(receiver.get("bonus_tokens", 0))
-
-    caller_total_balance = caller_tokens + caller_bonus_tokens
-    receiver_total_balance = receiver_tokens + receiver_bonus_tokens
+    caller_total_balance = token_balance(caller)
+    receiver_total_balance = token_balance(receiver)
 
     if caller_total_balance <= 0:
         return response.error_message(
@@ -131,55 +127,13 @@ async def start_video_call(
             status_code=400
         )
 
-    # Calculate today's free usage (caller side)
-    today_start = datetime.combine(date.today(), time.min)
-    today_end = datetime.combine(date.today(), time.max)
-
-    # ---------------- Caller TOTAL free usage ----------------
-    caller_cursor = video_call_sessions.find({
-        "$or": [
-            {"caller_id": user_id},
-            {"receiver_id": user_id}
-        ],
-        "status": "ended",
-        "start_time": {"$gte": today_start, "$lte": today_end}
-    })
-
-    caller_free_used_seconds = 0
-    async for call in caller_cursor:
-        if call.get("caller_id") == user_id:
-            caller_free_used_seconds += call.get("caller_free_seconds_used", 0)
-        if call.get("receiver_id") == user_id:
-            caller_free_used_seconds += call.get("receiver_free_seconds_used", 0)
-
-    caller_free_seconds_remaining = max(
-        0, FREE_VIDEO_LIMIT_SECONDS - caller_free_used_seconds
-    )
-
-    # ---------------- Receiver TOTAL free usage ----------------
-    receiver_cursor = video_call_sessions.find({
-        "$or": [
-            {"caller_id": receiver_user_id},
-            {"receiver_id": receiver_user_id}
-        ],
-        "status": "ended",
-        "start_time": {"$gte": today_start, "$lte": today_end}
-    })
-
-    receiver_free_used_seconds = 0
-    async for call in receiver_cursor:
-        if call.get("caller_id") == receiver_user_id:
-            receiver_free_used_seconds += call.get("caller_free_seconds_used", 0)
-        if call.get("receiver_id") == receiver_user_id:
-            receiver_free_used_seconds += call.get("receiver_free_seconds_used", 0)
-
-    receiver_free_seconds_remaining = max(
-        0, FREE_VIDEO_LIMIT_SECONDS - receiver_free_used_seconds
-    )
+    # Today's free usage of each side (per-day counters)
+    caller_free_seconds_remaining = await free_seconds_remaining(user_id)
+    receiver_free_seconds_remaining = await free_seconds_remaining(receiver_user_id)
 
     # Rates
-    caller_rate = 1 if caller.get("membership_type") == MembershipType.PREMIUM.value else 2
-    receiver_rate = 1 if receiver.get("membership_type") == MembershipType.PREMIUM.value else 2
+    caller_rate = call_rate(caller)
+    receiver_rate = call_rate(receiver)
 
     call_doc = {
         "caller_id": user_id,
@@ -201,6 +155,7 @@ async def start_video_call(
 
     result = await video_call_sessions.insert_one(call_doc)
     call_id = str(result.inserted_id)
+    await open_call_session(call_id, call_doc, caller, receiver)
 
     # ================= NEW PART (FETCH PROFILE IMAGE) =================
 
@@ -349,6 +304,9 @@ async def end_video_call(user_id: str, call_id: str, total_call_seconds: int, la
                 }
             }
         )
+        # Nothing is held before acceptance; this only covers a racing accept
+        await release_call_holds(call_id, call)
+        await close_call_session(call_id)
 
         return response.success_message(
             translate_message("VIDEO_CALL_ENDED", lang),
@@ -361,192 +319,101 @@ async def end_video_call(user_id: str, call_id: str, total_call_seconds: int, la
             }]
         )
 
-    # ================= NORMAL BILLING FLOW =================
+    # ================= SETTLEMENT =================
 
-    caller = await user_collection.find_one({"_id": ObjectId(call["caller_id"])})
-    receiver = await user_collection.find_one({"_id": ObjectId(call["receiver_id"])})
-
-    if not caller or not receiver:
+    participants = await user_collection.count_documents(
+        {"_id": {"$in": [ObjectId(call["caller_id"]), ObjectId(call["receiver_id"])]}}
+    )
+    if participants < 2:
         return response.error_message(
             translate_message("USER_NOT_FOUND", lang),
             status_code=404
         )
 
-    # FORCE INT CONVERSION (VERY IMPORTANT)
     total_call_seconds = int(total_call_seconds)
+    settlement = {}
+
+    for role in PARTICIPANTS:
+        free_remaining = int(call.get(f"{role}_free_seconds_remaining", 0))
+        rate = int(call.get(f"{role}_rate_per_minute", 2))
+
+        free_used = min(total_call_seconds, free_remaining)
+        paid = paid_seconds(total_call_seconds, free_remaining)
+        charge = math.ceil(paid / 60) * rate
+
+        # Charged from the hold, never beyond it, and the rest returned;
+        # the key makes a repeated end request a no-op
+        entry = await settle_hold(
+            user_id=call[f"{role}_id"],
+            hold_id=call_hold_id(call_id, role),
+            amount=charge,
+            reason=TokenTransactionReason.VIDEO_CALL,
+            txn_id=call_id,
+            idempotency_key=f"video_call:{call_id}:{role}"
+        )
+        deducted = -entry.delta if entry else 0
 
-    caller_free_remaining = int(call.get("caller_free_seconds_remaining", 0))
-    receiver_free_remaining = int(call.get("receiver_free_seconds_remaining", 0))
-
-    caller_rate = int(call.get("caller_rate_per_minute", 2))
-    receiver_rate = int(call.get("receiver_rate_per_minute", 2))
-
-    caller_tokens_balance = int(caller.get("tokens", 0))
-    caller_bonus_balance = int(caller.get("bonus_tokens", 0))
-
-    receiver_tokens_balance = int(receiver.get("tokens", 0))
-    receiver_bonus_balance = int(receiver.get("bonus_tokens", 0))
-
-    caller_balance_before = caller_tokens_balance + caller_bonus_balance
-    receiver_balance_before = receiver_tokens_balance + receiver_bonus_balance
-
-    # Free usage
-    caller_free_used = min(total_call_seconds, caller_free_remaining)
-    receiver_free_used = min(total_call_seconds, receiver_free_remaining)
-
-    caller_paid_seconds = max(0, total_call_seconds - caller_free_used)
-    receiver_paid_seconds = max(0, total_call_seconds - receiver_free_used)
-
-    caller_paid_minutes = math.ceil(caller_paid_seconds / 60)
-    receiver_paid_minutes = math.ceil(receiver_paid_seconds / 60)
-
-    caller_tokens_to_deduct = caller_paid_minutes * caller_rate
-    receiver_tokens_to_deduct = receiver_paid_minutes * receiver_rate
-
-    # Never deduct more than balance
-    caller_tokens_to_deduct = min(caller_balance_before, caller_tokens_to_deduct)
-    receiver_tokens_to_deduct = min(receiver_balance_before, receiver_tokens_to_deduct)
-
-    # ================= BONUS TOKEN PRIORITY LOGIC =================
-
-    # Caller
-    caller_bonus_deduct = min(caller_bonus_balance, caller_tokens_to_deduct)
-    caller_token_deduct = caller_tokens_to_deduct - caller_bonus_deduct
-
-    new_caller_bonus_balance = caller_bonus_balance - caller_bonus_deduct
-    new_caller_token_balance = caller_tokens_balance - caller_token_deduct
-
-    # Receiver
-    receiver_bonus_deduct = min(receiver_bonus_balance, receiver_tokens_to_deduct)
-    receiver_token_deduct = receiver_tokens_to_deduct - receiver_bonus_deduct
-
-    new_receiver_bonus_balance = receiver_bonus_balance - receiver_bonus_deduct
-    new_receiver_token_balance = receiver_tokens_balance - receiver_token_deduct
-
-    await user_collection.update_one(
-        {"_id": caller["_id"]},
-        {"$set": {
-            "tokens": new_caller_token_balance,
-            "bonus_tokens": new_caller_bonus_balance
-        }}
-    )
-
-    await user_collection.update_one(
-        {"_id": receiver["_id"]},
-        {"$set": {
-            "tokens": new_receiver_token_balance,
-            "bonus_tokens": new_receiver_bonus_balance
-        }}
-    )
+        settlement.update({
+            f"{role}_free_seconds_used": free_used,
+            f"{role}_paid_seconds_used": paid,
+            f"{role}_free_seconds_remaining": max(0, free_remaining - free_used),
+            f"{role}_tokens_deducted": deducted,
+        })
 
-    # Token history - caller
-    await create_user_token_history(CreateTokenHistory(
-        user_id=str(caller["_id"]),
-        delta=caller_tokens_to_deduct,
-        type=TokenTransactionType.DEBIT,
-        reason=TokenTransactionReason.VIDEO_CALL,
-        balance_before=str(caller_balance_before),
-        balance_after=str(new_caller_token_balance + new_caller_bonus_balance)
-    ))
-
-    # Token history - receiver
-    await create_user_token_history(CreateTokenHistory(
-        user_id=str(receiver["_id"]),
-        delta=receiver_tokens_to_deduct,
-        type=TokenTransactionType.DEBIT,
-        reason=TokenTransactionReason.VIDEO_CALL,
-        balance_before=str(receiver_balance_before),
-        balance_after=str(new_receiver_token_balance + new_receiver_bonus_balance)
-    ))
-
-    new_caller_free_remaining = max(0, caller_free_remaining - caller_free_used)
-    new_receiver_free_remaining = max(0, receiver_free_remaining - receiver_free_used)
-
-    await video_call_sessions.update_one(
-        {"_id": ObjectId(call_id)},
+    ended = await video_call_sessions.update_one(
+        {"_id": ObjectId(call_id), "status": {"$ne": "ended"}},
         {
             "$set": {
                 "status": "ended",
                 "end_time": datetime.utcnow(),
                 "total_seconds": total_call_seconds,
-                "caller_free_seconds_used": caller_free_used,
-                "receiver_free_seconds_used": receiver_free_used,
-                "caller_paid_seconds_used": caller_paid_seconds,
-                "receiver_paid_seconds_used": receiver_paid_seconds,
-                "caller_free_seconds_remaining": new_caller_free_remaining,
-                "receiver_free_seconds_remaining": new_receiver_free_remaining,
-                "caller_tokens_deducted": caller_tokens_to_deduct,
-                "receiver_tokens_deducted": receiver_tokens_to_deduct
+                **settlement
             }
         }
     )
 
+    # Only the request that ended the call counts its free seconds
+    if ended.modified_count:
+        for role in PARTICIPANTS:
+            await record_free_seconds(call[f"{role}_id"], settlement[f"{role}_free_seconds_used"], call["start_time"])
+    await close_call_session(call_id)
+
     return response.success_message(
         translate_message("VIDEO_CALL_ENDED", lang),
         data=[{
             "call_id": call_id,
             "total_call_seconds": total_call_seconds,
-            "caller_free_seconds_used": caller_free_used,
-            "receiver_free_seconds_used": receiver_free_used,
-            "caller_paid_seconds_used": caller_paid_seconds,
-            "receiver_paid_seconds_used": receiver_paid_seconds,
-            "caller_tokens_deducted": caller_tokens_to_deduct,
-            "receiver_tokens_deducted": receiver_tokens_to_deduct
+            "caller_free_seconds_used": settlement["caller_free_seconds_used"],
+            "receiver_free_seconds_used": settlement["receiver_free_seconds_used"],
+            "caller_paid_seconds_used": settlement["caller_paid_seconds_used"],
+            "receiver_paid_seconds_used": settlement["receiver_paid_seconds_used"],
+            "caller_tokens_deducted": settlement["caller_tokens_deducted"],
+            "receiver_tokens_deducted": settlement["receiver_tokens_deducted"]
         }]
     )
 
 async def video_call_tick(user_id: str, call_id: str, elapsed_seconds: int, lang: str = "en"):
 
-    call = await video_call_sessions.find_one({"_id": ObjectId(call_id)})
-    if not call:
+    # Served from the Redis session: MongoDB is only hit to extend a hold
+    session = await get_call_session(call_id)
+    if not session:
         return response.error_message(
             translate_message("CALL_NOT_FOUND", lang),
             status_code=404
         )
 
-    call_status = call.get("status")
-
-    caller = await user_collection.find_one({"_id": ObjectId(call["caller_id"])})
-    receiver = await user_collection.find_one({"_id": ObjectId(call["receiver_id"])})
-
-    if not caller or not receiver:
-        return response.error_message(
-            translate_message("USER_NOT_FOUND", lang),
-            status_code=404
-        )
-
-    # USE BONUS + TOKENS
-    caller_tokens = int(caller.get("tokens", 0))
-    caller_bonus = int(caller.get("bonus_tokens", 0))
-    caller_total_balance = caller_tokens + caller_bonus
-
-    receiver_tokens = int(receiver.get("tokens", 0))
-    receiver_bonus = int(receiver.get("bonus_tokens", 0))
-    receiver_total_balance = receiver_tokens + receiver_bonus
-
     # Block only if already ended
-    if call_status == "ended":
+    if session["status"] == "ended":
         return response.error_message(
             translate_message("CALL_NOT_ACTIVE", lang),
             status_code=400
         )
 
-    # If still ringing → allow tick but NO billing
-    if call_status == "ringing":
-        return response.success_message(
-            translate_message("CALL_CAN_CONTINUE", lang),
-            data=[{
-                "continue_call": True,
-                "billing_started": False,
-                "caller_tokens_required": 0,
-                "receiver_tokens_required": 0,
-                "caller_available_tokens": caller_total_balance,
-                "receiver_available_tokens": receiver_total_balance
-            }]
-        )
+    caller_hold = session["caller_hold"]
+    receiver_hold = session["receiver_hold"]
 
-    # If receiver not accepted yet → no billing
-    if call.get("receiver_accepted") is not True:
+    # Ringing / not accepted yet → no billing
+    if session["status"] != "ongoing":
         return response.success_message(
             translate_message("CALL_CAN_CONTINUE", lang),
             data=[{
@@ -554,54 +421,29 @@ async def video_call_tick(user_id: str, call_id: str, elapsed_seconds: int, lang
                 "billing_started": False,
                 "caller_tokens_required": 0,
                 "receiver_tokens_required": 0,
-                "caller_available_tokens": caller_total_balance,
-                "receiver_available_tokens": receiver_total_balance
+                "caller_available_tokens": caller_hold,
+                "receiver_available_tokens": receiver_hold
             }]
         )
 
     # ================= NORMAL ONGOING BILLING FLOW =================
 
-    caller_free_remaining = int(call.get("caller_free_seconds_remaining", 0))
-    receiver_free_remaining = int(call.get("receiver_free_seconds_remaining", 0))
-
-    caller_rate = int(call.get("caller_rate_per_minute", 2))
-    receiver_rate = int(call.get("receiver_rate_per_minute", 2))
-
-    # PER USER FREE USAGE
-    caller_free_used = min(elapsed_seconds, caller_free_remaining)
-    receiver_free_used = min(elapsed_seconds, receiver_free_remaining)
+    caller_required = tokens_required(session, "caller", int(elapsed_seconds))
+    receiver_required = tokens_required(session, "receiver", int(elapsed_seconds))
 
-    caller_paid_seconds = max(0, elapsed_seconds - caller_free_used)
-    receiver_paid_seconds = max(0, elapsed_seconds - receiver_free_used)
-
-    caller_paid_minutes = math.ceil(caller_paid_seconds / 60)
-    receiver_paid_minutes = math.ceil(receiver_paid_seconds / 60)
-
-    caller_required = caller_paid_minutes * caller_rate
-    receiver_required = receiver_paid_minutes * receiver_rate
-
-    #  Compare with TOTAL (bonus + tokens)
-    if caller_required > caller_total_balance or receiver_required > receiver_total_balance:
-        return response.success_message(
-            translate_message("CALL_CAN_CONTINUE", lang),
-            data=[{
-                "continue_call": False,
-                "billing_started": True,
-                "caller_tokens_required": caller_required,
-                "receiver_tokens_required": receiver_required,
-                "caller_available_tokens": caller_total_balance,
-                "receiver_available_tokens": receiver_total_balance
-            }]
-        )
+    if caller_required > caller_hold:
+        caller_hold = await extend_call_hold(call_id, session, "caller", int(elapsed_seconds))
+    if receiver_required > receiver_hold:
+        receiver_hold = await extend_call_hold(call_id, session, "receiver", int(elapsed_seconds))
 
     return response.success_message(
         translate_message("CALL_CAN_CONTINUE", lang),
         data=[{
-            "continue_call": True,
+            "continue_call": caller_required <= caller_hold and receiver_required <= receiver_hold,
             "billing_started": True,
             "caller_tokens_required": caller_required,
             "receiver_tokens_required": receiver_required,
-            "caller_available_tokens": caller_total_balance,
-            "receiver_available_tokens": receiver_total_balance
+            "caller_available_tokens": caller_hold,
+            "receiver_available_tokens": receiver_hold
         }]
     )
@@ -3,7 +3,8 @@ from core.utils.permissions import AdminPermission
 from api.controller.admin.admin_notifications_controller import (
     get_admin_notifications_controller,
     mark_admin_notification_read,
-    mark_all_admin_notifications_read
+    mark_all_admin_notifications_read,
+    get_admin_unread_count_controller
 )
 from core.utils.pagination import StandardResultsSetPagination ,pagination_params
 
@@ -24,6 +25,13 @@ async def get_admin_notifications(
         pagination
     )
 
+@router.get("/admin/notifications/unread-count")
+async def get_admin_unread_count(
+    current_admin: dict = Depends(AdminPermission(["admin"])),
+    lang: str = Query("en")
+):
+    return await get_admin_unread_count_controller(current_admin, lang)
+
 @router.patch("/admin/read/{notification_id}")
 async def read_single_admin_notification(
     notification_id: str,
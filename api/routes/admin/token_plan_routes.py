@@ -4,6 +4,8 @@ from api.controller.admin.admin_token_controller import create_token_package_pla
     soft_delete_token_package_plan_controller, fetch_active_token_package_plans
 from core.utils.pagination import StandardResultsSetPagination, pagination_params
 from core.utils.permissions import AdminPermission
+from core.utils.http_cache import conditional_get
+from config.models.token_packages_plan_model import TOKEN_PLANS_HTTP_CACHE
 from schemas.token_package_schema import TokenPackagePlanResponseModel, TokenPackageCreateRequestModel, \
     TokenPackagePlanUpdateRequestModel
 
@@ -15,7 +17,8 @@ async def list_token_plans(
     current_user: dict = Depends(AdminPermission(allowed_roles=["admin"])),
     pagination: StandardResultsSetPagination = Depends(pagination_params),
     search:str = Query(None),
-    lang: str = Query(None)
+    lang: str = Query(None),
+    _cache: None = Depends(conditional_get(TOKEN_PLANS_HTTP_CACHE))
 ):
     """
     List all token package plans.
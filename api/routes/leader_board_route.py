@@ -1,6 +1,6 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, WebSocketException
 
-from core.utils.leaderboard.service import build_leaderboard
+from core.utils.leaderboard.service import get_leaderboard_snapshot
 from core.utils.leaderboard.websocket import manager
 from core.utils.permissions import websocket_authenticate
 
@@ -16,7 +16,7 @@ async def leaderboard_ws(ws: WebSocket):
 
         # ws.state.user = current_user
         await manager.connect(ws)
-        leaderboard = await build_leaderboard()
+        leaderboard = await get_leaderboard_snapshot()
         await ws.send_json({
             "type": "leaderboard_init",
             "data": leaderboard
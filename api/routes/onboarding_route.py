@@ -10,6 +10,7 @@ from api.controller.files_controller import save_file
 from config.models.user_models import Files
 from api.controller.onboardingController import *
 from core.auth import get_current_user
+from core.utils.http_cache import conditional_get
 
 router = APIRouter()
 response = CustomResponseMixin()
@@ -130,7 +131,8 @@ async def get_onboarding_steps(
 @router.get("/country-list")
 async def get_country_list(
     current_user: dict = Depends(get_current_user),
-    lang: str = "en"
+    lang: str = "en",
+    _cache: None = Depends(conditional_get("countries"))
 ):
     return await list_of_country(lang=lang)
 
@@ -138,7 +140,8 @@ async def get_country_list(
 @router.get("/intrest-category-list")
 async def get_intrest_categories(
     current_user: dict = Depends(get_current_user),
-    lang: str = "en"
+    lang: str = "en",
+    _cache: None = Depends(conditional_get("interest_categories"))
 ):
     return await intrest_and_categories(lang=lang)
 
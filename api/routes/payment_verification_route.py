@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, Query
+from core.utils.permissions import UserPermission
+from api.controller.payment_verification_controller import get_payment_verification_controller
+
+supported_langs = ["en", "fr"]
+router = APIRouter()
+
+# Route polled by the app after submitting a subscription / token payment
+@router.get("/api/payments/verifications/{verification_id}", response_model=dict)
+async def get_payment_verification_route(
+    verification_id: str,
+    current_user: dict = Depends(UserPermission(allowed_roles=["user"])),
+    lang: str = Query(None)
+):
+    lang = lang if lang in supported_langs else "en"
+    return await get_payment_verification_controller(verification_id, str(current_user["_id"]), lang)
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends, Query
+from core.auth import get_current_user
+from schemas.presence_schema import PresenceLookupRequest
+from api.controller.presence_controller import presence_heartbeat_controller, get_presence_controller
+
+router = APIRouter()
+
+# Route called by the app every ~30s while it is in the foreground
+@router.post("/user/presence/heartbeat", response_model=dict)
+async def presence_heartbeat(
+    current_user: dict = Depends(get_current_user),
+    lang: str = Query("en")
+):
+    return await presence_heartbeat_controller(current_user, lang)
+
+
+# Route to fetch online status / last seen of up to 100 users
+@router.post("/user/presence", response_model=dict)
+async def get_presence_route(
+    request: PresenceLookupRequest,
+    current_user: dict = Depends(get_current_user),
+    lang: str = Query("en")
+):
+    return await get_presence_controller(request.user_ids, lang)
@@ -1,6 +1,6 @@
 #profile_api_route.py:
 
-from fastapi import APIRouter, Depends, Query, UploadFile, File, Form
+from fastapi import APIRouter, Depends, Header, Query, UploadFile, File, Form
 from api.controller.profile_view_controller import *
 from core.utils.permissions import UserPermission
 from schemas.response_schema import Response
@@ -82,7 +82,8 @@ async def send_gift(
     profile_user_id: str,
     payload: dict,
     current_user: dict = Depends(UserPermission(allowed_roles=["user"])),
-    lang: str = Query("en")
+    lang: str = Query("en"),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key")
 ):
     """
     Send a virtual gift to another user's profile.
@@ -101,6 +102,11 @@ async def send_gift(
     Request Body:
     - gift_id (string): ID of the gift to send
 
+    Headers:
+    - Idempotency-Key (string, optional): client-generated id of this gift;
+      a retry with the same key returns the original result instead of
+      charging again
+
     Path Params:
     - profile_user_id (string): User ID of the profile receiving the gift
 
@@ -120,7 +126,8 @@ async def send_gift(
         profile_user_id=profile_user_id,
         gift_id=payload.get("gift_id"),
         viewer=current_user,
-        lang=lang
+        lang=lang,
+        client_key=idempotency_key
     )
 
 @router.post("/search/profiles", response_model=Response)
@@ -4,6 +4,7 @@ from core.utils import pagination
 from core.utils.pagination import StandardResultsSetPagination, pagination_params
 from schemas.response_schema import Response
 from core.utils.permissions import UserPermission
+from core.utils.http_cache import conditional_get
 from api.controller.subscriptionPlan import get_subscription_list, transaction_verify, \
     validate_remaining_transaction_payment, fetch_subscription_transactions, \
     fetch_user_subscription_details
@@ -16,7 +17,7 @@ class SubscriptionPlan:
 
     # api for getting subscription plans
     @api_router.get("/", response_model=Response)
-    async def get_subscription_plans(request: Request, current_user: dict = Depends(UserPermission(allowed_roles=["user","admin"])), lang: str = Query(None)):
+    async def get_subscription_plans(request: Request, current_user: dict = Depends(UserPermission(allowed_roles=["user","admin"])), lang: str = Query(None), _cache: None = Depends(conditional_get("subscription_plans"))):
         """
             Get subscription plans:-
             Retrieves the active subscription plan details.
@@ -27,7 +28,8 @@ class SubscriptionPlan:
     @api_router.post("/verify_transaction", response_model=Response)
     async def verify_transaction(request: TransactionRequestModel, current_user: dict = Depends(UserPermission(allowed_roles=["user"], require_verified=True)), lang: str = Query(None)):
         """
-            check transaction details associated with subscription plans
+            queue verification of a transaction for a subscription plan;
+            poll /api/payments/verifications/{verification_id} for the outcome
         """
         user_id = str(current_user["_id"])
         lang = lang if lang in supported_langs else "en"
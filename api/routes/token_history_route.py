@@ -46,16 +46,17 @@ class TokenRoutes:
         """
             Validates a token purchase transaction for the authenticated user.
 
-            This endpoint verifies the provided transaction details, ensures the
-            transaction status and destination wallet are valid, and processes
-            the token purchase accordingly.
+            This endpoint queues verification of the provided transaction; a
+            worker checks the transaction status and destination wallet on chain
+            and processes the token purchase. Poll
+            /api/payments/verifications/{verification_id} for the outcome.
 
             :param request: TokenTransactionRequestModel contains the transaction
                             identifier and token package details.
             :param current_user: Authenticated user details provided by the permission
                                  dependency.
             :param lang: Optional language code for localized responses.
-            :return: Response containing the validated token purchase details.
+            :return: Response containing the payment verification (202 while pending).
         """
 
         user_id = str(current_user["_id"])
@@ -11,6 +11,7 @@ from config.models.userPass_model import(
      get_matched_users_controller
 )
 from core.utils.response_mixin import CustomResponseMixin
+from core.utils.pagination import StandardResultsSetPagination, pagination_params
 from services.translation import translate_message
 from schemas.userpass_schema import( 
     AddFavoriteRequest , 
@@ -80,19 +81,21 @@ async def pass_user_route(
 @router.get("/user/favorites", response_model=dict)
 async def get_favorite_users(
     current_user: dict = Depends(get_current_user),
+    pagination: StandardResultsSetPagination = Depends(pagination_params),
     lang: str = "en"
 ):
     user_id = str(current_user["_id"])
-    return await get_my_favorites(user_id, lang)
+    return await get_my_favorites(user_id, pagination, lang)
 
 # Rotue to get user who liked my profile
 @router.get("/user/liked-me", response_model=dict)
 async def get_liked_me_users(
     current_user: dict = Depends(get_current_user),
+    pagination: StandardResultsSetPagination = Depends(pagination_params),
     lang: str = "en"
 ):
     user_id = str(current_user["_id"])
-    return await get_users_who_liked_me(user_id, lang)
+    return await get_users_who_liked_me(user_id, pagination, lang)
 
 @router.get("/user/login-status")
 async def get_user_login_status_api(
@@ -3,6 +3,7 @@
 from fastapi import APIRouter, Depends, Query, UploadFile, File
 from api.controller.user_profile_view_controller import *
 from core.utils.permissions import UserPermission
+from core.utils.pagination import StandardResultsSetPagination, pagination_params
 from schemas.response_schema import Response
 
 router = APIRouter(prefix="", tags=["User Profile"])
@@ -58,10 +59,30 @@ async def get_verification_selfie(
 
 @router.get("/notifications")
 async def get_notifications(
+    current_user: dict = Depends(UserPermission(["user"])),
+    lang: str = Query("en"),
+    pagination: StandardResultsSetPagination = Depends(pagination_params)
+):
+    return await get_notifications_controller(current_user, pagination, lang)
+
+@router.get("/notifications/unread-count")
+async def get_unread_notification_count(
+    current_user: dict = Depends(UserPermission(["user"])),
+    lang: str = Query("en")
+):
+    return await get_unread_notification_count_controller(current_user, lang)
+
+@router.patch("/read-many")
+async def read_many_notifications(
+    payload: MarkNotificationsReadRequest,
     current_user: dict = Depends(UserPermission(["user"])),
     lang: str = Query("en")
 ):
-    return await get_notifications_controller(current_user, lang)
+    return await mark_notifications_read(
+        payload=payload,
+        current_user=current_user,
+        lang=lang
+    )
 
 @router.patch("/{notification_id}/read")
 async def read_single_notification(
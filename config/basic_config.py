@@ -29,6 +29,9 @@ class Settings(BaseSettings):
     REDIS_HOST: str
     REDIS_PORT: int
     REDIS_DB: int
+    REDIS_MAX_CONNECTIONS: int = 50
+    REDIS_BREAKER_THRESHOLD: int = 5
+    REDIS_BREAKER_COOLDOWN: int = 10
     VERIFICATION_TTL: int 
     RATE_LIMIT_MAX: int  
     RATE_LIMIT_PERIOD: int
@@ -68,6 +71,17 @@ class Settings(BaseSettings):
     LEADERBOARD_REDIS_DB:int
     CHAT_AUDIO_MAX_LIMIT:int
     FREE_VIDEO_LIMIT_SECONDS :int
+    RUN_MIGRATIONS_ON_STARTUP: bool = False
+    WEB_CONCURRENCY: int = 1
+    GRACEFUL_SHUTDOWN_TIMEOUT: int = 30
+    FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+    COMPRESSION_MIN_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+    MEDIA_SIGNING_KEY: Optional[str] = None
+    MEDIA_URL_TTL: int = 3600
+    MEDIA_OFFLOAD: str = ""
+    MEDIA_ACCEL_PREFIX: str = "/protected-media"
     
     class ConfigDict:
         env_file = ".env"
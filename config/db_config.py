@@ -12,11 +12,9 @@ if settings.MONGO_USER and settings.MONGO_PASSWORD:
     username = quote_plus(settings.MONGO_USER)
     password = quote_plus(settings.MONGO_PASSWORD)
     uri = f"mongodb://{username}:{password}@{settings.MONGO_HOST}:{settings.MONGO_PORT}/{settings.MONGO_DATABASE}"
-    print('db compass url dev-----------------------',uri)
 
 else:
     uri = f"mongodb://{settings.MONGO_HOST}:{settings.MONGO_PORT}"
-    print('db compass url local-----------------------',uri)
 
 # Singleton MongoDB client with optimized connection pooling
 class MongoDBClient:
@@ -110,60 +108,17 @@ gift_transaction_collection = db["gift_transaction"]
 chat_audio_collection = db["chat_audio_files"]
 video_call_sessions = db["video_call_history"]
 contest_winner_collection = db["contest_winners"]
+search_profile_collection = db["search_profiles"]
+dashboard_rollup_collection = db["dashboard_daily_rollups"]
+admin_search_collection = db["admin_search_index"]
+payment_verification_collection = db["payment_verifications"]
 
 async def create_indexes():
     """
-    Placeholder for database indexes.
-    Currently no indexes are created.
+    Sync the declarative index registry (see config/db_indexes.py).
     """
-    try:
-        print("🔧 Creating database indexes...")
-
-        # Favorites
-        await favorite_collection.create_index(
-            [("user_id", 1), ("favorite_user_ids", 1)],
-            name="idx_favorite_user"
-        )
-
-        # Likes (core matching logic)
-        await user_like_history.create_index(
-            [("user_id", 1), ("liked_by_user_ids", 1)],
-            name="idx_user_likes"
-        )
-
-        # Matches (prevent duplicate matches)
-        existing_indexes = await user_match_history.index_information()
-        if "idx_unique_user_match" in existing_indexes:
-            await user_match_history.drop_index("idx_unique_user_match")
-
-        await user_match_history.create_index(
-            [("pair_key", 1)],
-            unique=True,
-            name="idx_unique_pair_key"
-        )
-
-        # Passed users
-        await user_passed_hostory.create_index(
-            [("user_id", 1), ("passed_user_ids", 1)],
-            name="idx_user_passed"
-        )
-
-        # Onboarding (token & profile fetch)
-        await onboarding_collection.create_index(
-            [("user_id", 1)],
-            name="idx_onboarding_user"
-        )
-
-        print("✅ Database indexes created successfully")
-        await user_token_history_collection.create_index(
-            [("user_id", ASCENDING), ("created_at", DESCENDING)],
-            name="user_id_created_at_idx"
-        )
-        return True
-
-    except Exception as e:
-        print(f"❌ Error creating indexes: {e}")
-        return False
+    from config.db_indexes import sync_indexes
+    return await sync_indexes()
 
         
 async def initialize_database():
@@ -0,0 +1,419 @@
+"""
+Declarative index registry.
+
+Every index the application relies on is declared once in `INDEX_REGISTRY`,
+keyed by the MongoDB collection name. At startup the registry is diffed
+against `index_information()` and only missing/changed indexes are built,
+in a background task so the API can start serving immediately.
+
+CLI:
+    python -m config.db_indexes report    # show missing / changed / extra indexes
+    python -m config.db_indexes sync      # build missing and changed indexes
+    python -m config.db_indexes explain   # explain hot queries, exit 1 on COLLSCAN
+"""
+import asyncio
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+from pymongo import ASCENDING, DESCENDING
+
+from config.db_config import db
+
+
+# class for IndexSpec
+class IndexSpec(BaseModel):
+    name: str
+    keys: List[Tuple[str, int]]
+    unique: bool = False
+    sparse: bool = False
+    partial_filter: Optional[dict] = None
+    expire_after_seconds: Optional[int] = None
+
+    def create_kwargs(self) -> dict:
+        kwargs = {"name": self.name, "background": True}
+        if self.unique:
+            kwargs["unique"] = True
+        if self.sparse:
+            kwargs["sparse"] = True
+        if self.partial_filter is not None:
+            kwargs["partialFilterExpression"] = self.partial_filter
+        if self.expire_after_seconds is not None:
+            kwargs["expireAfterSeconds"] = self.expire_after_seconds
+        return kwargs
+
+    def matches(self, info: dict) -> bool:
+        """
+        Compare this spec with an entry of `index_information()`.
+        """
+        existing_keys = [(field, int(direction)) for field, direction in info.get("key", [])]
+        return (
+            existing_keys == [(field, int(direction)) for field, direction in self.keys]
+            and bool(info.get("unique", False)) == self.unique
+            and bool(info.get("sparse", False)) == self.sparse
+            and info.get("partialFilterExpression") == self.partial_filter
+            and info.get("expireAfterSeconds") == self.expire_after_seconds
+        )
+
+
+SEARCHABLE_PROFILE = {"onboarding_completed": True, "is_deleted": False}
+
+INDEX_REGISTRY: Dict[str, List[IndexSpec]] = {
+    "users": [
+        IndexSpec(name="idx_user_email", keys=[("email", ASCENDING)]),
+        # Day-bounded counts of the dashboard rollups
+        IndexSpec(name="idx_user_created", keys=[("created_at", ASCENDING)]),
+        IndexSpec(name="idx_user_last_login", keys=[("last_login_at", ASCENDING)]),
+        IndexSpec(
+            name="idx_user_verified_at",
+            keys=[("verified_at", ASCENDING)],
+            partial_filter={"is_verified": True},
+        ),
+    ],
+    "user_onboarding": [
+        IndexSpec(name="idx_onboarding_user", keys=[("user_id", ASCENDING)]),
+        IndexSpec(name="idx_onboarding_created", keys=[("created_at", ASCENDING)]),
+        # Home feed: completed profiles minus deleted accounts
+        IndexSpec(name="idx_onboarding_feed", keys=[("onboarding_completed", ASCENDING), ("is_deleted", ASCENDING)]),
+    ],
+    "withdraw_token_transaction": [
+        IndexSpec(name="idx_withdraw_status_updated", keys=[("status", ASCENDING), ("updated_at", ASCENDING)]),
+    ],
+    "admin_blocked_users_history": [
+        IndexSpec(name="idx_admin_blocked_created", keys=[("created_at", ASCENDING)]),
+    ],
+    "deleted_accounts": [
+        IndexSpec(name="idx_deleted_user", keys=[("user_id", ASCENDING)]),
+    ],
+    "contests": [
+        IndexSpec(name="idx_contest_created", keys=[("created_at", ASCENDING)]),
+    ],
+    "favorite_collection": [
+        IndexSpec(name="idx_favorite_user", keys=[("user_id", ASCENDING), ("favorite_user_ids", ASCENDING)]),
+    ],
+    "user_like_history": [
+        IndexSpec(name="idx_user_likes", keys=[("user_id", ASCENDING), ("liked_by_user_ids", ASCENDING)]),
+    ],
+    "users_matched_history": [
+        IndexSpec(name="idx_unique_pair_key", keys=[("pair_key", ASCENDING)], unique=True),
+    ],
+    "user_passed_history": [
+        IndexSpec(name="idx_user_passed", keys=[("user_id", ASCENDING), ("passed_user_ids", ASCENDING)]),
+    ],
+    "user_token_history": [
+        IndexSpec(name="user_id_created_at_idx", keys=[("user_id", ASCENDING), ("created_at", DESCENDING)]),
+        IndexSpec(
+            name="idx_token_history_idempotency",
+            keys=[("idempotency_key", ASCENDING)],
+            unique=True,
+            partial_filter={"idempotency_key": {"$type": "string"}},
+        ),
+    ],
+    "blocked_users_history": [
+        IndexSpec(name="idx_blocker_blocked", keys=[("blocker_id", ASCENDING), ("blocked_id", ASCENDING)]),
+        IndexSpec(name="idx_blocked", keys=[("blocked_id", ASCENDING)]),
+    ],
+    "reported_users_history": [
+        IndexSpec(name="idx_reporter_reported", keys=[("reporter_id", ASCENDING), ("reported_id", ASCENDING)]),
+        IndexSpec(name="idx_reported", keys=[("reported_id", ASCENDING)]),
+    ],
+    "notifications": [
+        # Inbox pages: keyset on (created_at, _id)
+        IndexSpec(
+            name="idx_recipient_created",
+            keys=[("recipient_id", ASCENDING), ("recipient_type", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+        ),
+        # Seeds and reconciles the unread counters
+        IndexSpec(
+            name="idx_recipient_unread",
+            keys=[("recipient_id", ASCENDING), ("recipient_type", ASCENDING), ("is_read", ASCENDING)],
+        ),
+        # Archives old notifications (see services/notification_inbox_service.py)
+        IndexSpec(name="idx_notification_archive", keys=[("archive_at", ASCENDING)], expire_after_seconds=0),
+    ],
+    "video_call_history": [
+        IndexSpec(name="idx_caller_start", keys=[("caller_id", ASCENDING), ("start_time", DESCENDING)]),
+        IndexSpec(name="idx_receiver_start", keys=[("receiver_id", ASCENDING), ("start_time", DESCENDING)]),
+        IndexSpec(name="idx_call_request_status", keys=[("call_request_id", ASCENDING), ("status", ASCENDING)]),
+        IndexSpec(name="idx_status_accepted", keys=[("status", ASCENDING), ("accepted_at", ASCENDING)]),
+    ],
+    "contests_participants": [
+        IndexSpec(
+            name="idx_history_votes",
+            keys=[("contest_id", ASCENDING), ("contest_history_id", ASCENDING), ("total_votes", DESCENDING)],
+        ),
+        IndexSpec(name="idx_history_user", keys=[("contest_history_id", ASCENDING), ("user_id", ASCENDING)]),
+        # One participant per paid entry (the key of its token debit)
+        IndexSpec(
+            name="idx_participant_idempotency",
+            keys=[("idempotency_key", ASCENDING)],
+            unique=True,
+            partial_filter={"idempotency_key": {"$type": "string"}},
+        ),
+    ],
+    "contest_vote": [
+        IndexSpec(
+            name="idx_vote_idempotency",
+            keys=[("idempotency_key", ASCENDING)],
+            unique=True,
+            partial_filter={"idempotency_key": {"$type": "string"}},
+        ),
+    ],
+    "private_gallery_purchases": [
+        IndexSpec(
+            name="idx_purchase_idempotency",
+            keys=[("idempotency_key", ASCENDING)],
+            unique=True,
+            partial_filter={"idempotency_key": {"$type": "string"}},
+        ),
+    ],
+    "fcm_device_tokens": [
+        IndexSpec(name="idx_fcm_user_status", keys=[("user_id", ASCENDING), ("status", ASCENDING)]),
+        IndexSpec(name="idx_fcm_user_device", keys=[("user_id", ASCENDING), ("device_token", ASCENDING)]),
+    ],
+    "transaction": [
+        IndexSpec(
+            name="idx_txn_user_type_status",
+            keys=[("user_id", ASCENDING), ("trans_type", ASCENDING), ("status", ASCENDING)],
+        ),
+        IndexSpec(name="idx_txn_tron_txn_id", keys=[("payment_details.tron_txn_id", ASCENDING)]),
+        IndexSpec(name="idx_txn_status_updated", keys=[("status", ASCENDING), ("updated_at", ASCENDING)]),
+        # Expiry / reminder jobs: unprocessed subscriptions by expiry date
+        IndexSpec(
+            name="idx_txn_subscription_expiry",
+            keys=[
+                ("trans_type", ASCENDING), ("status", ASCENDING),
+                ("expiry_processed_at", ASCENDING), ("expires_at", ASCENDING),
+            ],
+        ),
+    ],
+    # Search only ever reads completed, non-deleted profiles, so every search
+    # index is partial on those flags. Keys follow FREE_FILTERS / PREMIUM_FILTERS
+    # with `_id` after the equality keys for the keyset sort; the birthdate
+    # range comes after `_id` so the sort is still read from the index.
+    "search_profiles": [
+        IndexSpec(
+            name="idx_search_country_gender",
+            keys=[("country", ASCENDING), ("gender", ASCENDING), ("_id", ASCENDING)],
+            partial_filter=SEARCHABLE_PROFILE,
+        ),
+        IndexSpec(
+            name="idx_search_gender",
+            keys=[("gender", ASCENDING), ("_id", ASCENDING)],
+            partial_filter=SEARCHABLE_PROFILE,
+        ),
+        IndexSpec(
+            name="idx_search_premium",
+            keys=[
+                ("gender", ASCENDING), ("sexual_orientation", ASCENDING),
+                ("marital_status", ASCENDING), ("_id", ASCENDING), ("birthdate", ASCENDING),
+            ],
+            partial_filter=SEARCHABLE_PROFILE,
+        ),
+    ],
+    "payment_verifications": [
+        # One verification per on-chain transaction
+        IndexSpec(name="idx_unique_payment_txn", keys=[("tron_txn_id", ASCENDING)], unique=True),
+        IndexSpec(name="idx_payment_verification_status", keys=[("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+    ],
+    "admin_search_index": [
+        IndexSpec(name="idx_admin_search_tokens", keys=[("tokens", ASCENDING)]),
+    ],
+}
+
+# Indexes that were created by earlier releases and must be removed on sync.
+LEGACY_INDEXES: Dict[str, List[str]] = {
+    "users_matched_history": ["idx_unique_user_match"],
+    "users": ["idx_user_verified_updated"],
+}
+
+# Representative hot queries checked by `explain`: (collection, filter, sort)
+EXPLAIN_PROBES: List[Tuple[str, dict, Optional[List[Tuple[str, int]]]]] = [
+    ("users", {"email": "probe@example.com"}, None),
+    ("user_onboarding", {"user_id": "probe"}, None),
+    ("user_onboarding", {"onboarding_completed": True, "is_deleted": {"$ne": True}}, None),
+    ("blocked_users_history", {"blocker_id": "probe"}, None),
+    ("blocked_users_history", {"blocked_id": "probe"}, None),
+    ("reported_users_history", {"reporter_id": "probe", "reported_id": "probe"}, None),
+    ("reported_users_history", {"reported_id": "probe"}, None),
+    (
+        "notifications",
+        {"recipient_id": "probe", "recipient_type": "user"},
+        [("created_at", DESCENDING), ("_id", DESCENDING)],
+    ),
+    ("notifications", {"recipient_id": "probe", "recipient_type": "user", "is_read": False}, None),
+    (
+        "video_call_history",
+        {"$or": [{"caller_id": "probe"}, {"receiver_id": "probe"}], "status": "ended"},
+        None,
+    ),
+    (
+        "contests_participants",
+        {"contest_id": "probe", "contest_history_id": "probe"},
+        [("total_votes", DESCENDING)],
+    ),
+    ("fcm_device_tokens", {"user_id": "probe", "status": "active"}, None),
+    ("transaction", {"user_id": "probe", "trans_type": "subscription_transaction", "status": "success"}, None),
+    ("user_token_history", {"user_id": "probe"}, [("created_at", DESCENDING)]),
+    (
+        "transaction",
+        {"trans_type": "subscription_transaction", "status": "success", "expiry_processed_at": None, "expires_at": {"$lt": "probe"}},
+        [("expires_at", ASCENDING)],
+    ),
+    (
+        "search_profiles",
+        {**SEARCHABLE_PROFILE, "country": {"$in": ["probe"]}, "gender": {"$in": ["probe"]}},
+        [("_id", ASCENDING)],
+    ),
+    (
+        "search_profiles",
+        {
+            **SEARCHABLE_PROFILE, "gender": {"$in": ["probe"]}, "sexual_orientation": {"$in": ["probe"]},
+            "marital_status": {"$in": ["probe"]}, "birthdate": {"$gte": "probe", "$lte": "probe"},
+        },
+        [("_id", ASCENDING)],
+    ),
+    ("admin_search_index", {"tokens": {"$all": ["ug:pro", "ug:rob"]}}, None),
+]
+
+
+async def diff_collection_indexes(collection_name: str, specs: List[IndexSpec]) -> dict:
+    """
+    Diff declared specs against the live indexes of one collection.
+    """
+    existing = await db[collection_name].index_information()
+    declared = {spec.name for spec in specs}
+
+    missing, changed = [], []
+    for spec in specs:
+        info = existing.get(spec.name)
+        if info is None:
+            missing.append(spec)
+        elif not spec.matches(info):
+            changed.append(spec)
+
+    extra = [name for name in existing if name != "_id_" and name not in declared]
+
+    return {"missing": missing, "changed": changed, "extra": extra}
+
+
+async def index_report() -> Dict[str, dict]:
+    """
+    Return the registry diff for every collection.
+    """
+    report = {}
+    for collection_name, specs in INDEX_REGISTRY.items():
+        report[collection_name] = await diff_collection_indexes(collection_name, specs)
+    return report
+
+
+async def sync_indexes() -> bool:
+    """
+    Create missing indexes, rebuild changed ones and drop legacy ones.
+    Already up-to-date collections are not touched.
+    """
+    ok = True
+    for collection_name, legacy_names in LEGACY_INDEXES.items():
+        try:
+            existing = await db[collection_name].index_information()
+            for name in legacy_names:
+                if name in existing:
+                    await db[collection_name].drop_index(name)
+                    print(f"🗑️ Dropped legacy index {collection_name}.{name}")
+        except Exception as e:
+            ok = False
+            print(f"❌ Legacy index cleanup failed for {collection_name}: {e}")
+
+    for collection_name, specs in INDEX_REGISTRY.items():
+        try:
+            diff = await diff_collection_indexes(collection_name, specs)
+            collection = db[collection_name]
+
+            for spec in diff["changed"]:
+                await collection.drop_index(spec.name)
+
+            for spec in diff["missing"] + diff["changed"]:
+                await collection.create_index(spec.keys, **spec.create_kwargs())
+                print(f"🔧 Built index {collection_name}.{spec.name}")
+        except Exception as e:
+            ok = False
+            print(f"❌ Index sync failed for {collection_name}: {e}")
+
+    return ok
+
+
+def start_background_index_sync() -> asyncio.Task:
+    """
+    Schedule `sync_indexes` on the running loop without blocking startup.
+    """
+    return asyncio.create_task(sync_indexes())
+
+
+def _find_stages(plan: dict) -> List[str]:
+    stages = []
+    if not isinstance(plan, dict):
+        return stages
+    if "stage" in plan:
+        stages.append(plan["stage"])
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages.extend(_find_stages(plan[key]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_find_stages(child))
+    return stages
+
+
+async def explain_hot_queries() -> List[dict]:
+    """
+    Run `explain` for every probe and flag plans that fall back to a COLLSCAN.
+    """
+    results = []
+    for collection_name, query, sort in EXPLAIN_PROBES:
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = _find_stages(explain.get("queryPlanner", {}).get("winningPlan", {}))
+        results.append({
+            "collection": collection_name,
+            "query": query,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        })
+    return results
+
+
+async def _run_cli(command: str) -> int:
+    if command == "report":
+        report = await index_report()
+        for collection_name, diff in report.items():
+            missing = [spec.name for spec in diff["missing"]]
+            changed = [spec.name for spec in diff["changed"]]
+            status = "ok" if not (missing or changed) else "out of sync"
+            print(f"{collection_name}: {status}")
+            if missing:
+                print(f"    missing: {', '.join(missing)}")
+            if changed:
+                print(f"    changed: {', '.join(changed)}")
+            if diff["extra"]:
+                print(f"    not in registry: {', '.join(diff['extra'])}")
+        return 0
+
+    if command == "sync":
+        return 0 if await sync_indexes() else 1
+
+    if command == "explain":
+        results = await explain_hot_queries()
+        failures = 0
+        for result in results:
+            flag = "COLLSCAN" if result["collscan"] else "ok"
+            print(f"[{flag}] {result['collection']} {result['query']} -> {' > '.join(result['stages'])}")
+            failures += int(result["collscan"])
+        return 1 if failures else 0
+
+    print(__doc__)
+    return 2
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(_run_cli(sys.argv[1] if len(sys.argv) > 1 else "")))
@@ -0,0 +1,87 @@
+"""
+One-off deployment step: sync indexes, run the seeders and backfill
+derived collections that are still empty.
+
+Run it once per release instead of on every pod boot:
+    python -m config.migrate
+"""
+import asyncio
+import sys
+
+from config.db_indexes import sync_indexes
+from config.db_seeder.AdminSeeder import seed_admin
+from config.db_seeder.SubscriptionPlanSeeder import seed_subscription_plan
+from services.search_profile_service import rebuild_if_empty
+from services.admin_search_service import rebuild_admin_search_if_empty
+from services.token_ledger_service import normalize_token_balances
+from services.job_services.contest_tasks import reschedule_contest_deadlines
+from services.notification_inbox_service import backfill_archive_at
+from services.account_tombstone_service import rebuild_if_missing as rebuild_tombstones_if_missing
+from services.dashboard_rollup_service import backfill_rollups, backfill_verified_at
+
+
+async def run_migrations() -> bool:
+    """Sync the index registry, seed the admin / subscription plans, backfill search profiles and the admin search index, convert string token balances, seed the contest deadline queue, date older notifications for archiving, build the deleted-account tombstones and date past verifications for the dashboard rollups."""
+    ok = await sync_indexes()
+    try:
+        await seed_admin()
+        print("[SUCCESS] Admin seeding completed")
+        await seed_subscription_plan()
+        print("[SUCCESS] Subscription Plan seeding completed")
+    except Exception as seeder_error:
+        print(f"[ERROR] Seeding failed: {seeder_error}")
+        ok = False
+    try:
+        rebuilt = await rebuild_if_empty()
+        if rebuilt:
+            print(f"[SUCCESS] Backfilled {rebuilt} search profiles")
+    except Exception as backfill_error:
+        print(f"[ERROR] Search profile backfill failed: {backfill_error}")
+        ok = False
+    try:
+        indexed = await rebuild_admin_search_if_empty()
+        if indexed:
+            print(f"[SUCCESS] Backfilled {indexed} admin search entries")
+    except Exception as backfill_error:
+        print(f"[ERROR] Admin search backfill failed: {backfill_error}")
+        ok = False
+    try:
+        converted = await normalize_token_balances()
+        if converted:
+            print(f"[SUCCESS] Converted {converted} string token balances to numbers")
+    except Exception as balance_error:
+        print(f"[ERROR] Token balance conversion failed: {balance_error}")
+        ok = False
+    try:
+        queued = await reschedule_contest_deadlines()
+        print(f"[SUCCESS] Queued deadlines of {queued} active contest histories")
+    except Exception as deadline_error:
+        print(f"[ERROR] Contest deadline queue seeding failed: {deadline_error}")
+        ok = False
+    try:
+        dated = await backfill_archive_at()
+        if dated:
+            print(f"[SUCCESS] Set archive dates on {dated} notifications")
+    except Exception as archive_error:
+        print(f"[ERROR] Notification archive backfill failed: {archive_error}")
+        ok = False
+    try:
+        tombstones = await rebuild_tombstones_if_missing()
+        if tombstones:
+            print(f"[SUCCESS] Rebuilt {tombstones} deleted-account tombstones")
+    except Exception as tombstone_error:
+        print(f"[ERROR] Deleted-account tombstone rebuild failed: {tombstone_error}")
+        ok = False
+    try:
+        verified = await backfill_verified_at()
+        if verified:
+            # Verified counts moved from updated_at to verified_at days
+            print(f"[SUCCESS] Dated {verified} verifications, recomputed {await backfill_rollups()} daily rollups")
+    except Exception as rollup_error:
+        print(f"[ERROR] Verification date backfill failed: {rollup_error}")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(run_migrations()) else 1)
@@ -9,7 +9,8 @@ from services.profile_fetch_service import format_notification
 from services.translation import translate_message
 from bson import ObjectId
 from core.utils.core_enums import NotificationRecipientType
-from core.utils.pagination import StandardResultsSetPagination
+from core.utils.pagination import StandardResultsSetPagination, cached_count
+from services.notification_inbox_service import inbox_filter, list_inbox, mark_one_read, mark_read, unread_count
 
 class NotificationModel:
 
@@ -20,23 +21,21 @@ class NotificationModel:
         pagination: StandardResultsSetPagination
     ):
         try:
-            base_query = {
-                "recipient_id": admin_id,
-                "recipient_type": NotificationRecipientType.ADMIN.value,
-            }
+            base_query = inbox_filter(admin_id, NotificationRecipientType.ADMIN.value)
 
             # ---------------- COUNT TOTAL RECORDS ----------------
-            total_records = await notification_collection.count_documents(base_query)
+            total_records = await cached_count(
+                "admin_notifications",
+                base_query,
+                lambda: notification_collection.count_documents(base_query)
+            )
 
             # ---------------- PAGINATION ----------------
-            skip = pagination.skip if pagination.skip >= 0 else 0
-            limit = pagination.limit if pagination.limit else 10
-
-            notifications = await notification_collection.find(base_query) \
-                .sort("created_at", -1) \
-                .skip(skip) \
-                .limit(limit) \
-                .to_list(length=limit)
+            notifications, next_cursor = await list_inbox(
+                admin_id,
+                NotificationRecipientType.ADMIN.value,
+                pagination
+            )
 
             today = []
             earlier = []
@@ -96,7 +95,7 @@ class NotificationModel:
                 "earlier": earlier
             }
 
-            return records, total_records
+            return records, total_records, next_cursor
 
         except Exception as e:
             raise RuntimeError(str(e))
@@ -111,22 +110,7 @@ class NotificationModel:
         if not ObjectId.is_valid(notification_id):
             raise ValueError("INVALID_NOTIFICATION_ID")
 
-        result = await notification_collection.update_one(
-            {
-                "_id": ObjectId(notification_id),
-                "recipient_id": admin_id,
-                "recipient_type": NotificationRecipientType.ADMIN.value,
-            },
-            {
-                "$set": {
-                    "is_read": True,
-                    "read_at": datetime.now(timezone.utc)
-                }
-            }
-        )
-
-        if result.matched_count == 0:
-            raise ValueError("NOTIFICATION_NOT_FOUND")
+        await mark_one_read(admin_id, NotificationRecipientType.ADMIN.value, notification_id)
 
         return True
 
@@ -135,18 +119,11 @@ class NotificationModel:
     @staticmethod
     async def mark_all_admin_notifications_read(admin_id: str):
 
-        result = await notification_collection.update_many(
-            {
-                "recipient_id": admin_id,
-                "recipient_type": NotificationRecipientType.ADMIN.value,
-                "is_read": False
-            },
-            {
-                "$set": {
-                    "is_read": True,
-                    "read_at": datetime.now(timezone.utc)
-                }
-            }
-        )
+        return await mark_read(admin_id, NotificationRecipientType.ADMIN.value)
+
+    # -----------------------------------------------------
+
+    @staticmethod
+    async def get_admin_unread_count(admin_id: str):
 
-        return result.modified_count
+        return await unread_count(admin_id, NotificationRecipientType.ADMIN.value)
@@ -7,7 +7,6 @@ from datetime import datetime, timezone, time
 
 from config.db_config import withdraw_token_transaction_collection
 from core.utils.core_enums import WithdrawalStatus
-from core.utils.helper import serialize_datetime_fields
 from core.utils.pagination import build_paginated_response
 from core.utils.response_mixin import CustomResponseMixin
 from core.utils.transaction_helper import get_transaction_details
@@ -190,7 +189,6 @@ async def list_withdrawal_requests(search: str, pagination, status: Optional[str
         }
         for doc in data
     ]
-    items = serialize_datetime_fields(items)
     return build_paginated_response(
         records=items,
         page=pagination.page,
@@ -2,20 +2,20 @@ from pydantic import BaseModel, Field
 from typing import List, Optional
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from core.utils.core_enums import ContestFrequency
 from config.models.onboarding_model import GenderEnum
 from core.utils.core_enums import *
 from config.db_config import contest_collection
 from core.utils.leaderboard.leaderboard_helper import LeaderboardRedisHelper
-from core.utils.pagination import pagination_params, StandardResultsSetPagination
+from core.utils.pagination import pagination_params, StandardResultsSetPagination, cached_count
 from api.controller.files_controller import *
 from schemas.contest_schema import *
 from core.utils.helper import get_user_details, get_admin_id_by_email
 from services.notification_service import send_notification, send_topic_notification
 from core.utils.helper import unsubscribe_user_from_topic
-from config.models.user_models import get_user_token_balance
-from config.models.user_token_history_model import create_user_token_history
-from schemas.user_token_history_schema import CreateTokenHistory
+from services.token_ledger_service import credit_tokens
+from services.profile_snapshot_service import invalidate_profile_snapshot
 
 leaderboard_redis_helper = LeaderboardRedisHelper()
 
@@ -224,7 +224,12 @@ async def get_contests_paginated(
             "voting_end": {"$lt": now}
         }
 
-    total = await contest_history_collection.count_documents(history_query)
+    # history_query embeds "now", so the cached total is keyed by type only
+    total = await cached_count(
+        "contests",
+        {"contest_type": contest_type.value},
+        lambda: contest_history_collection.count_documents(history_query)
+    )
 
     cursor = (
         contest_history_collection
@@ -416,7 +421,7 @@ async def resolve_user_avatar(user_id: str) -> dict | None:
 
     file_doc = await file_collection.find_one(
         {"_id": ObjectId(file_id)},
-        {"storage_key": 1, "storage_backend": 1}
+        {"storage_key": 1, "storage_backend": 1, "variants": 1}
     )
 
     if not file_doc:
@@ -424,7 +429,9 @@ async def resolve_user_avatar(user_id: str) -> dict | None:
 
     url = await generate_file_url(
         storage_key=file_doc["storage_key"],
-        backend=file_doc["storage_backend"]
+        backend=file_doc["storage_backend"],
+        size="thumb",
+        variants=file_doc.get("variants")
     )
 
     return {
@@ -512,8 +519,15 @@ async def is_user_already_participant(
         "user_id": user_id
     })
 
-async def create_contest_participant(data: dict):
-    result = await contest_participant_collection.insert_one(data)
+async def create_contest_participant(data: dict) -> Optional[str]:
+    """
+    Insert a participant. Returns None when one with the same
+    `idempotency_key` exists, i.e. a repeated entry request.
+    """
+    try:
+        result = await contest_participant_collection.insert_one(data)
+    except DuplicateKeyError:
+        return None
     return str(result.inserted_id)
 
 async def increment_participant_count(contest_history_id: str):
@@ -574,8 +588,16 @@ async def has_user_voted_for_participant(
         "voter_user_id": voter_user_id
     })
 
-async def create_vote_entry(data: dict):
-    await contest_vote_collection.insert_one(data)
+async def create_vote_entry(data: dict) -> bool:
+    """
+    Insert a vote. False when one with the same `idempotency_key` exists,
+    i.e. a repeated vote request.
+    """
+    try:
+        await contest_vote_collection.insert_one(data)
+    except DuplicateKeyError:
+        return False
+    return True
 
 async def increment_vote_counts(
     participant_id: ObjectId,
@@ -688,6 +710,7 @@ async def auto_declare_winners(contest_id: str):
         }
 
         await contest_winner_collection.insert_one(winner_doc)
+        await invalidate_profile_snapshot(participant["user_id"])
 
         # Update participant record
         await contest_participant_collection.update_one(
@@ -704,28 +727,13 @@ async def auto_declare_winners(contest_id: str):
         # Credit prize tokens to user
         winner_user_id = participant["user_id"]
 
-        balance_before = await get_user_token_balance(winner_user_id)
-        balance_after = balance_before + prize_amount
-
-        # Credit prize into main tokens (withdrawable)
-        await user_collection.update_one(
-            {"_id": ObjectId(winner_user_id)},
-            {
-                "$inc": {"tokens": prize_amount},
-                "$set": {"updated_at": datetime.utcnow()}
-            }
-        )
-
-        # Create token history
-        await create_user_token_history(
-            CreateTokenHistory(
-                user_id=str(winner_user_id),
-                delta=prize_amount,
-                type=TokenTransactionType.CREDIT,
-                reason=TokenTransactionReason.CONTEST_PRIZE,
-                balance_before=str(balance_before),
-                balance_after=str(balance_after)
-            )
+        # Credit prize into main tokens (withdrawable); keyed on the participant
+        # entry so re-declaring winners never pays twice
+        await credit_tokens(
+            user_id=str(winner_user_id),
+            amount=prize_amount,
+            reason=TokenTransactionReason.CONTEST_PRIZE,
+            idempotency_key=f"contest_prize:{participant['_id']}"
         )
         recipient_lang = participant.get("language", "en")
         admin_id = await get_admin_id_by_email()
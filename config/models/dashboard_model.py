@@ -1,56 +1,34 @@
 from pymongo.errors import PyMongoError
-from bson import ObjectId
 from datetime import datetime
-from config.db_config import (
-    user_collection,
-    admin_blocked_users_collection,
-    transaction_collection,
-    onboarding_collection,
-    contest_collection,
-    withdraw_token_transaction_collection,
-    deleted_account_collection
-)
+from config.db_config import transaction_collection
 from core.utils.filer_date import get_date_filter
+from services.dashboard_rollup_service import get_rollup_range
+
+
+MONTH_NAMES = {
+    1: "Jan", 2: "Feb", 3: "Mar", 4: "Apr",
+    5: "May", 6: "Jun", 7: "Jul", 8: "Aug",
+    9: "Sep", 10: "Oct", 11: "Nov", 12: "Dec"
+}
 
 
 class DashboardModel:
 
     @staticmethod
     async def get_dashboard_stats(filter_type: str):
+        """
+        Sum the pre-aggregated daily buckets (see services.dashboard_rollup_service)
+        for the filter's range; only today's bucket is ever recounted here.
+        """
         try:
             start_date, end_date = get_date_filter(filter_type)
-            date_range = {"$gte": start_date, "$lte": end_date}
             now = datetime.utcnow()
 
-            # ---------------- EXCLUDE DELETED USERS ----------------
-            # deleted_users = await deleted_account_collection.distinct("user_id")
-
-            deleted_users = await deleted_account_collection.distinct("user_id")
-
-            # ---------------- USERS ----------------
-            total_users = await user_collection.count_documents({
-                "created_at": date_range,
-                "_id": {"$nin": deleted_users}
-            })
-
-            verified_users = await user_collection.count_documents({
-                "is_verified": True,
-                "updated_at": date_range,
-                "_id": {"$nin": deleted_users}
-            })
-
-            active_users = await user_collection.count_documents({
-                "login_status": "active",
-                "last_login_at": date_range,
-                "_id": {"$nin": deleted_users}
-            })
-
-            new_users = await user_collection.count_documents({
-                "created_at": date_range,
-                "_id": {"$nin": deleted_users}
-            })
+            rollup = await get_rollup_range(start_date, end_date)
+            totals = rollup["totals"]
 
             # ---------------- ACTIVE SUBSCRIPTIONS----------------
+            # Point-in-time, not a daily counter: only unexpired rows are read
             active_subscription_pipeline = [
                 {
                     "$match": {
@@ -78,177 +56,14 @@ class DashboardModel:
                 if active_sub_result else 0
             )
 
-            # ---------------- BLOCKED USERS ----------------
-            blocked_users = await admin_blocked_users_collection.count_documents({
-                "created_at": date_range,
-                "user_id": {"$nin": deleted_users}
-            })
-
-            print("blocked_users",blocked_users)
-
-            # ---------------- TOTAL REVENUE ----------------
-            monthly_revenue_pipeline = [
-                {
-                    "$match": {
-                        "status": {"$in": ["success", "partial payment"]},
-                        "updated_at": date_range
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": {
-                            "year": {"$year": "$updated_at"},
-                            "month": {"$month": "$updated_at"}
-                        },
-                        "revenue": {"$sum": "$paid_amount"}
-                    }
-                },
-                {
-                    "$sort": {"_id.year": 1, "_id.month": 1}
-                }
+            # ---------------- REVENUE SUMMARY ----------------
+            revenue_summary = [
+                {"month": MONTH_NAMES[month], "revenue": revenue}
+                for (_, month), revenue in rollup["monthly_revenue"]
             ]
 
-            monthly_data = await transaction_collection.aggregate(
-                monthly_revenue_pipeline
-            ).to_list(None)
-
-            # ---------------- TOTAL WITHDRAWAL AMOUNT (SUCCESS ONLY) ----------------
-            withdraw_monthly_pipeline = [
-                {
-                    "$match": {
-                        "status": "completed",
-                        "updated_at": date_range
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": {
-                            "year": {"$year": "$updated_at"},
-                            "month": {"$month": "$updated_at"}
-                        },
-                        "withdraw": {
-                            "$sum": {
-                                "$add": [
-                                    {"$ifNull": ["$paid_amount", 0]},
-                                    {"$ifNull": ["$tron_fee", 0]}
-                                ]
-                            }
-                        }
-                    }
-                }
-            ]
-
-            withdraw_monthly_data = await withdraw_token_transaction_collection.aggregate(
-                withdraw_monthly_pipeline
-            ).to_list(None)
-
-            withdraw_map = {
-                (item["_id"]["year"], item["_id"]["month"]): item["withdraw"]
-                for item in withdraw_monthly_data
-            }
-
-            month_map = {
-                1: "Jan", 2: "Feb", 3: "Mar", 4: "Apr",
-                5: "May", 6: "Jun", 7: "Jul", 8: "Aug",
-                9: "Sep", 10: "Oct", 11: "Nov", 12: "Dec"
-            }
-
-            revenue_summary = []
-            total_revenue = 0
-
-            for item in monthly_data:
-                year = item["_id"]["year"]
-                month = item["_id"]["month"]
-                revenue = round(item["revenue"], 2)
-
-                total_revenue += revenue
-
-                revenue_summary.append({
-                    "month": month_map[month],
-                    "revenue": revenue
-                })
-
-            total_revenue = round(total_revenue, 2)
-
-            # ---------------- TOTAL WITHDRAWALS APPROVED ----------------
-            total_withdrawals_approved = await withdraw_token_transaction_collection.count_documents({
-                "status": "completed",
-                "updated_at": date_range
-            })
-
-            # ---------------- CONTEST COUNT ----------------
-            total_contests = await contest_collection.count_documents({
-                "created_at": date_range
-            })
-
             # ---------------- GENDER DISTRIBUTION ----------------
-            gender_pipeline = [
-                # Filter by date
-                {
-                    "$match": {
-                        "created_at": date_range
-                    }
-                },
-
-                # Convert user_id to string (important)
-                {
-                    "$addFields": {
-                        "userIdStr": {
-                            "$cond": [
-                                {"$eq": [{"$type": "$user_id"}, "objectId"]},
-                                {"$toString": "$user_id"},
-                                "$user_id"
-                            ]
-                        }
-                    }
-                },
-
-                # Lookup deleted accounts
-                {
-                    "$lookup": {
-                        "from": "deleted_accounts",
-                        "let": {"uid": "$userIdStr"},
-                        "pipeline": [
-                            {
-                                "$match": {
-                                    "$expr": {
-                                        "$eq": ["$user_id", "$$uid"]
-                                    }
-                                }
-                            }
-                        ],
-                        "as": "deleted_user"
-                    }
-                },
-
-                # Remove deleted users
-                {
-                    "$match": {
-                        "deleted_user": {"$size": 0}
-                    }
-                },
-
-                # Group by gender
-                {
-                    "$group": {
-                        "_id": "$gender",
-                        "count": {"$sum": 1}
-                    }
-                }
-            ]
-
-            gender_data = await onboarding_collection.aggregate(
-                gender_pipeline
-            ).to_list(None)
-
-            gender_counts = {"male": 0, "female": 0, "other": 0}
-
-            for g in gender_data:
-                if g["_id"] in gender_counts:
-                    gender_counts[g["_id"]] = g["count"]
-                else:
-                    gender_counts["other"] += g["count"]
-
+            gender_counts = rollup["gender"]
             total_gender = sum(gender_counts.values())
 
             def pct(c):
@@ -263,24 +78,24 @@ class DashboardModel:
 
             return {
                 "users": {
-                    "total_registered": total_users,
-                    "verified": verified_users,
-                    "active": active_users,
-                    "new_users": new_users,
-                    "blocked": blocked_users
+                    "total_registered": totals["signups"],
+                    "verified": totals["verified"],
+                    "active": totals["active"],
+                    "new_users": totals["signups"],
+                    "blocked": totals["blocked"]
                 },
                 "subscriptions": {
                     "active": active_subscriptions
                 },
                 "revenue": {
-                    "total": total_revenue
+                    "total": totals["revenue"]
                 },
                 "revenue_summary": revenue_summary,
                 "withdrawals": {
-                    "approved": total_withdrawals_approved
+                    "approved": totals["withdrawals_approved"]
                 },
                 "contests": {
-                    "total_hosted": total_contests
+                    "total_hosted": totals["contests"]
                 },
                 "gender_distribution": gender_distribution
             }
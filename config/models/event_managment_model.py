@@ -8,11 +8,15 @@ from config.db_config import contest_collection, file_collection , contest_parti
 from core.utils.helper import serialize_datetime_fields
 from api.controller.files_controller import save_file
 from api.controller.files_controller import generate_file_url
+from services.image_derivative_service import enqueue_image_derivatives
 from config.models.user_models import Files
 from config.basic_config import settings
 from services.translation import translate_message
 from core.utils.helper import calculate_visibility , parse_date_format
 from core.utils.core_enums import ContestVisibility
+from core.utils.pagination import aggregate_with_total
+from services.admin_search_service import search_user_ids, search_summary, user_id_in
+from services.job_services.contest_deadlines import DECLARE_WINNERS, schedule_contest_deadline
 
 class ContestModel:
 
@@ -366,7 +370,8 @@ class ContestModel:
             "updated_at": now
         }
 
-        await contest_history_collection.insert_one(contest_history_doc)
+        history_result = await contest_history_collection.insert_one(contest_history_doc)
+        await schedule_contest_deadline(str(history_result.inserted_id), DECLARE_WINNERS, contest_doc["voting_end"])
 
         return {
             "error": False,
@@ -441,6 +446,7 @@ class ContestModel:
             inserted = await file_collection.insert_one(
                 file_doc.model_dump(by_alias=True)
             )
+            enqueue_image_derivatives(inserted.inserted_id)
 
             return {
                 "error": False,
@@ -566,9 +572,6 @@ class ContestModel:
         end = start + page_size
         contests = contests[start:end]
 
-        # ---------------- SERIALIZE ----------------
-        contests = [serialize_datetime_fields(c) for c in contests]
-
         return {
             "data": contests,
             "total": total_count
@@ -1100,7 +1103,15 @@ class ContestModel:
         pipeline = []
 
         # ---------------- MATCH CONTEST ----------------
-        pipeline.append({"$match": {"contest_id": contest_id}})
+        participant_match = {"contest_id": contest_id}
+        search_match = None
+
+        # ---------------- SEARCH ----------------
+        if search:
+            search_match = await search_user_ids(search)
+            participant_match["user_id"] = user_id_in(search_match.user_ids)
+
+        pipeline.append({"$match": participant_match})
 
         # ---------------- USER LOOKUP ----------------
         pipeline.extend([
@@ -1116,38 +1127,18 @@ class ContestModel:
             {"$unwind": "$user"}
         ])
 
-        # ---------------- SEARCH ----------------
-        if search:
-            pipeline.append({
-                "$match": {
-                    "user.username": {"$regex": search, "$options": "i"}
-                }
-            })
-
-        # ==================================================
-        # COUNT PIPELINE (BEFORE PAGINATION)
-        # ==================================================
-        count_pipeline = pipeline.copy()
-        count_pipeline.append({"$count": "total"})
-
-        count_result = await contest_participant_collection.aggregate(
-            count_pipeline
-        ).to_list(1)
-
-        total_records = count_result[0]["total"] if count_result else 0
-
         # ---------------- SORT ----------------
-        pipeline.append({"$sort": {"total_votes": -1}})
+        page_stages = [{"$sort": {"total_votes": -1}}]
 
         # ---------------- PAGINATION ----------------
         if pagination and pagination.skip is not None and pagination.limit is not None:
-            pipeline.extend([
+            page_stages.extend([
                 {"$skip": int(pagination.skip)},
                 {"$limit": int(pagination.limit)}
             ])
 
         # ---------------- FINAL PROJECTION ----------------
-        pipeline.append({
+        page_stages.append({
             "$project": {
                 "_id": 0,
                 "participant_id": {"$toString": "$_id"},
@@ -1160,7 +1151,10 @@ class ContestModel:
             }
         })
 
-        participants = await contest_participant_collection.aggregate(pipeline).to_list(None)
+        # Page and total in a single pass
+        participants, total_records = await aggregate_with_total(
+            contest_participant_collection, pipeline, page_stages
+        )
 
         # ---------------- RESOLVE IMAGE URLS ----------------
         for p in participants:
@@ -1184,9 +1178,8 @@ class ContestModel:
             p["photos"] = photos
             p.pop("uploaded_file_ids", None)
 
-        participants = serialize_datetime_fields(participants)
-
         return {
             "data": participants,
-            "total": total_records
+            "total": total_records,
+            "search": search_summary(search_match)
         }
@@ -1,5 +1,4 @@
 from typing import Optional
-import copy
 from pymongo.errors import PyMongoError
 from bson import ObjectId
 from config.db_config import (
@@ -9,7 +8,8 @@ from config.db_config import (
 from api.controller.files_controller import generate_file_url
 from core.utils.core_enums import VerificationStatusEnum
 from services.translation import translate_message
-from core.utils.pagination import StandardResultsSetPagination
+from core.utils.pagination import StandardResultsSetPagination, aggregate_with_total
+from services.admin_search_service import search_user_ids, search_summary, user_id_in
 
 
 
@@ -26,6 +26,7 @@ class ModerationModel:
                 raise ValueError("Pagination object is required")
 
             pipeline = []
+            search_match = None
 
             # ---------------- REPORT STATUS FILTER ----------------
             report_match = {}
@@ -33,6 +34,15 @@ class ModerationModel:
             if status and status.lower() != "all":
                 report_match["status"] = status.lower()
 
+            # ---------------- SEARCH ----------------
+            if search:
+                search_match = await search_user_ids(search, fields=("username", "email"))
+                matched_ids = user_id_in(search_match.user_ids)
+                report_match["$or"] = [
+                    {"reporter_id": matched_ids},
+                    {"reported_id": matched_ids},
+                ]
+
             if report_match:
                 pipeline.append({"$match": report_match})
 
@@ -140,45 +150,18 @@ class ModerationModel:
                 }
             })
 
-            # ---------------- SEARCH ----------------
-            if search:
-                pipeline.append({
-                    "$match": {
-                        "$or": [
-                            {"reporter.username": {"$regex": search, "$options": "i"}},
-                            {"reporter.email": {"$regex": search, "$options": "i"}},
-                            {"reported_user.username": {"$regex": search, "$options": "i"}},
-                            {"reported_user.email": {"$regex": search, "$options": "i"}},
-                        ]
-                    }
-                })
-
-            # =====================================================
-            #  COUNT PIPELINE (BEFORE PAGINATION)
-            # =====================================================
-            count_pipeline = copy.deepcopy(pipeline)
-            count_pipeline.append({"$count": "total"})
-
-            count_result = await reported_users_collection.aggregate(
-                count_pipeline
-            ).to_list(1)
-
-            total_records = count_result[0]["total"] if count_result else 0
-
-            # ---------------- SORT ----------------
-            pipeline.append({"$sort": {"created_at": -1}})
-
             # ---------------- PAGINATION ----------------
             skip = pagination.skip if isinstance(pagination.skip, int) and pagination.skip >= 0 else 0
             limit = pagination.page_size if isinstance(pagination.page_size, int) and pagination.page_size > 0 else 10
 
-            pipeline.extend([
+            page_stages = [
+                {"$sort": {"created_at": -1}},
                 {"$skip": skip},
                 {"$limit": limit}
-            ])
+            ]
 
             # ---------------- FINAL PROJECTION ----------------
-            pipeline.append({
+            page_stages.append({
                 "$project": {
                     "_id": 0,
                     "report_id": {"$toString": "$_id"},
@@ -197,9 +180,12 @@ class ModerationModel:
                 }
             })
 
-            reports = await reported_users_collection.aggregate(pipeline).to_list(None)
+            # Page and total in a single pass
+            reports, total_records = await aggregate_with_total(
+                reported_users_collection, pipeline, page_stages
+            )
 
-            return reports, total_records
+            return reports, total_records, search_summary(search_match)
 
         except ValueError:
             raise
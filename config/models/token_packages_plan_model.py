@@ -8,9 +8,13 @@ from services.translation import translate_message
 from core.utils.response_mixin import CustomResponseMixin
 from config.db_config import token_packages_plan_collection
 from core.utils.helper import convert_objectid_to_str, calculate_usdt_amount
+from core.utils.http_cache import invalidate_http_cache
 
 response = CustomResponseMixin()
 
+# conditional_get namespace of the admin token plan listing
+TOKEN_PLANS_HTTP_CACHE = "token_plans"
+
 async def get_token_packages_plans(condition:dict, pagination:StandardResultsSetPagination | None = None):
     cursor = (
         token_packages_plan_collection.
@@ -46,6 +50,7 @@ async def store_token_packages_plan(doc:TokenPackagePlanCreateModel, admin_user:
     doc = doc.model_dump()
     doc['created_by'] = ObjectId(admin_user)
     result = await token_packages_plan_collection.insert_one(doc)
+    await invalidate_http_cache(TOKEN_PLANS_HTTP_CACHE)
     doc["_id"] = convert_objectid_to_str(result.inserted_id)
     return doc
 
@@ -113,6 +118,7 @@ async def update_token_package_plan(
         {"_id": ObjectId(plan_id)},
         {"$set": update_doc}
     )
+    await invalidate_http_cache(TOKEN_PLANS_HTTP_CACHE)
 
     updated = await token_packages_plan_collection.find_one(
         {"_id": ObjectId(plan_id)}
@@ -164,6 +170,7 @@ async def soft_delete_token_package_plan(
             }
         }
     )
+    await invalidate_http_cache(TOKEN_PLANS_HTTP_CACHE)
 
     return {
         "id": str(plan["_id"]),
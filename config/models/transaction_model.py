@@ -3,8 +3,8 @@ import copy
 from bson import ObjectId
 from typing import Optional
 from config.db_config import withdraw_token_transaction_collection ,transaction_collection,system_config_collection
-from core.utils.helper import serialize_datetime_fields
 from core.utils.core_enums import TransactionType , TransactionTab
+from services.admin_search_service import search_user_ids, search_summary, user_id_in
 
 class TransactionModel:
 
@@ -31,6 +31,7 @@ class TransactionModel:
         # MATCH
         # --------------------------------------------------
         match_stage = {}
+        search_match = None
 
         if tab == TransactionTab.SUBSCRIPTION:
             match_stage["trans_type"] = TransactionType.SUBSCRIPTION_TRANSACTION.value
@@ -48,6 +49,10 @@ class TransactionModel:
             if date_to:
                 match_stage["updated_at"]["$lte"] = date_to
 
+        if search:
+            search_match = await search_user_ids(search)
+            match_stage["user_id"] = user_id_in(search_match.user_ids)
+
         pipeline.append({"$match": match_stage})
 
         # --------------------------------------------------
@@ -65,16 +70,6 @@ class TransactionModel:
             {"$unwind": "$user"}
         ])
 
-        # --------------------------------------------------
-        # SEARCH
-        # --------------------------------------------------
-        if search:
-            pipeline.append({
-                "$match": {
-                    "user.username": {"$regex": search, "$options": "i"}
-                }
-            })
-
         # --------------------------------------------------
         # TOKEN PACKAGE LOOKUP (ONLY FOR TOKEN PURCHASE)
         # --------------------------------------------------
@@ -220,8 +215,9 @@ class TransactionModel:
         data = await collection.aggregate(pipeline).to_list(None)
 
         return {
-            "data": serialize_datetime_fields(data),
-            "total": total
+            "data": data,
+            "total": total,
+            "search": search_summary(search_match)
         }
 
     @staticmethod
@@ -12,6 +12,7 @@ from core.utils.helper import convert_objectid_to_str, convert_datetime_to_date,
     get_subscription_status
 from services.translation import translate_message
 from core.utils.response_mixin import CustomResponseMixin
+from services.dashboard_rollup_service import mark_day_dirty
 from datetime import datetime,timezone
 response = CustomResponseMixin()
 
@@ -37,6 +38,14 @@ async def get_existing_transaction(tron_txn_id: str, lang:str) -> Optional[Dict[
                                                          lang=lang), data=[], status_code=400)
     return None
 
+async def get_settled_transaction(tron_txn_id: str, user_id: str) -> Optional[Dict[str, Any]]:
+    """
+    transaction of `user_id` that already recorded `tron_txn_id`, if any
+    """
+    return await transaction_collection.find_one(
+        {"payment_details.tron_txn_id": tron_txn_id, "user_id": ObjectId(user_id)}
+    )
+
 async def get_subscription_payment_details(payment_id: str, lang:str) -> Dict[str, Any]:
     payment_details = await transaction_collection.find_one(
         {"_id": ObjectId(payment_id)}
@@ -49,15 +58,19 @@ async def get_subscription_payment_details(payment_id: str, lang:str) -> Dict[st
 async def update_transaction_details(doc:TransactionUpdateModel, subscription_id:str):
     doc = doc.model_dump()
     payment_details = doc.pop("payment_details", None)
-    res = await transaction_collection.find_one_and_update(
+    previous = await transaction_collection.find_one_and_update(
         {"_id": ObjectId(subscription_id)},
         {
             "$push": {"payment_details": payment_details},
             "$set": doc
         },
-        return_document=ReturnDocument.AFTER
+        return_document=ReturnDocument.BEFORE
     )
-    return res
+    if not previous:
+        return None
+    # Revenue is bucketed by updated_at: the payment leaves its old day
+    await mark_day_dirty(previous.get("updated_at"))
+    return await transaction_collection.find_one({"_id": previous["_id"]})
 
 async def ensure_no_pending_token_withdrawal(user_id: str, lang:str) -> Optional[Dict[str, Any]]:
     """
@@ -8,20 +8,19 @@ from config.db_config import (
     user_match_history ,
     user_passed_hostory,
     user_passed_hostory,
-    onboarding_collection,
-    file_collection,
     daily_action_history
 )
 from core.utils.helper import serialize_datetime_fields
 from core.utils.response_mixin import CustomResponseMixin
 from services.translation import translate_message
 from core.utils.core_enums import MembershipType
-from core.utils.age_calculation import calculate_age
-from api.controller.files_controller import generate_file_url
 from core.utils.action_limit import check_daily_action_limit , increment_daily_counter
 from core.utils.core_enums import NotificationType, NotificationRecipientType
 from services.notification_service import send_notification
 from api.controller.onboardingController import get_matched_users_model
+from core.utils.pagination import StandardResultsSetPagination
+from services.user_card_service import hydrate_user_cards, page_id_array
+from services.presence_service import get_presence
 
 response = CustomResponseMixin()
 
@@ -428,21 +427,8 @@ async def pass_user(user_id: str, passed_user_id: str, lang: str = "en"):
     )
 
 # Function to return the list of the favorites users.
-async def get_my_favorites(user_id: str, lang: str = "en"):
-    fav_doc = await favorite_collection.find_one(
-        {"user_id": user_id},
-        {"_id": 0, "favorite_user_ids": 1}
-    )
-
-    favorite_user_ids = fav_doc.get("favorite_user_ids", []) if fav_doc else []
-
-    if not favorite_user_ids:
-        return response.success_message(
-            translate_message("NO_FAVORITES_FOUND", lang),
-            data=[]
-        )
-
-    # -------- 2. Get Passed Users --------
+async def get_my_favorites(user_id: str, pagination: StandardResultsSetPagination, lang: str = "en"):
+    # -------- 1. Get Passed Users --------
     passed_doc = await user_passed_hostory.find_one(
         {"user_id": user_id},
         {"_id": 0, "passed_user_ids": 1}
@@ -450,64 +436,35 @@ async def get_my_favorites(user_id: str, lang: str = "en"):
 
     passed_user_ids = passed_doc.get("passed_user_ids", []) if passed_doc else []
 
-    # -------- 3. Remove Passed Users from Favorites --------
-    filtered_favorite_ids = [
-        uid for uid in favorite_user_ids
-        if uid not in passed_user_ids
-    ]
+    # -------- 2. Page Favorites (minus passed users) in the database --------
+    favorite_user_ids, _ = await page_id_array(
+        favorite_collection,
+        {"user_id": user_id},
+        "favorite_user_ids",
+        pagination,
+        exclude_ids=passed_user_ids
+    )
 
-    if not filtered_favorite_ids:
+    if not favorite_user_ids:
         return response.success_message(
             translate_message("NO_FAVORITES_FOUND", lang),
             data=[]
         )
 
-    # -------- 4. Fetch Users --------
-    users_cursor = user_collection.find(
-        {"_id": {"$in": [ObjectId(uid) for uid in filtered_favorite_ids]}},
-        {"_id": 1, "username": 1, "is_verified": 1}
-    )
-
-    users = []
-    async for user in users_cursor:
-        uid = str(user["_id"])
-
-        onboarding = await onboarding_collection.find_one(
-            {"user_id": uid},
-            {"birthdate": 1, "images": 1}
-        )
-
-        # -------- Age --------
-        age = None
-        if onboarding and onboarding.get("birthdate"):
-            age = calculate_age(onboarding["birthdate"].date())
-
-        # -------- Profile Photo --------
-        profile_photo_id = None
-        profile_photo_url = None
-
-        image_ids = onboarding.get("images", []) if onboarding else []
-        if image_ids:
-            file_doc = await file_collection.find_one(
-                {"_id": ObjectId(image_ids[0])},
-                {"storage_key": 1, "storage_backend": 1}
-            )
+    # -------- 3. Hydrate Users --------
+    cards = await hydrate_user_cards(favorite_user_ids, lang)
 
-            if file_doc:
-                profile_photo_id = str(file_doc["_id"])
-                profile_photo_url = await generate_file_url(
-                    file_doc["storage_key"],
-                    file_doc.get("storage_backend")
-                )
-
-        users.append({
-            "user_id": uid,
-            "username": user.get("username"),
-            "is_verified": user.get("is_verified"),
-            "age": age,
-            "profile_photo_id": profile_photo_id,
-            "profile_photo_url": profile_photo_url
-        })
+    users = [
+        {
+            "user_id": card["user_id"],
+            "username": card["name"],
+            "is_verified": card["is_verified"],
+            "age": card["age"],
+            "profile_photo_id": card["profile_photo_id"],
+            "profile_photo_url": card["profile_photo"]
+        }
+        for card in cards
+    ]
 
     return response.success_message(
         translate_message("FAVORITES_FETCHED", lang),
@@ -526,8 +483,13 @@ async def get_liked_user_ids(user_id: str) -> list[str]:
     return like_doc.get("liked_by_user_ids", []) if like_doc else []
 
 #function to return the liked user list .
-async def get_users_who_liked_me(user_id: str, lang: str = "en"):
-    liked_by_user_ids = await get_liked_user_ids(user_id)
+async def get_users_who_liked_me(user_id: str, pagination: StandardResultsSetPagination, lang: str = "en"):
+    liked_by_user_ids, _ = await page_id_array(
+        user_like_history,
+        {"user_id": user_id},
+        "liked_by_user_ids",
+        pagination
+    )
 
     if not liked_by_user_ids:
         return response.success_message(
@@ -535,19 +497,17 @@ async def get_users_who_liked_me(user_id: str, lang: str = "en"):
             data=[]
         )
 
-    users_cursor = user_collection.find(
-        {"_id": {"$in": [ObjectId(uid) for uid in liked_by_user_ids]}},
-        {"_id": 1, "username": 1, "is_verified": 1, "profile_photo_id": 1}
-    )
+    cards = await hydrate_user_cards(liked_by_user_ids, lang)
 
-    users = []
-    async for user in users_cursor:
-        users.append({
-            "user_id": str(user["_id"]),
-            "username": user.get("username"),
-            "is_verified": user.get("is_verified"),
-            "profile_photo_id": user.get("profile_photo_id")
-        })
+    users = [
+        {
+            "user_id": card["user_id"],
+            "username": card["name"],
+            "is_verified": card["is_verified"],
+            "profile_photo_id": card["profile_photo_id"]
+        }
+        for card in cards
+    ]
 
     return response.success_message(
         translate_message("LIKED_USERS_FETCHED", lang),
@@ -582,11 +542,15 @@ async def get_user_login_status_internal(user_id: str, lang: str = "en"):
             status_code=404
         )
 
+    presence = (await get_presence([user_id]))[user_id]
+
     return response.success_message(
         translate_message("USER_STATUS_FETCHED", lang),
         data=[{
             "user_id": user_id,
-            "login_status": user.get("login_status")
+            "login_status": user.get("login_status"),
+            "is_online": presence["is_online"],
+            "last_seen": presence["last_seen"].isoformat() if presence["last_seen"] else None
         }]
     )
 
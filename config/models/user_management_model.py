@@ -1,5 +1,4 @@
 from bson import ObjectId
-import copy
 from datetime import datetime, timedelta
 from typing import Optional
 from pymongo.errors import PyMongoError
@@ -18,6 +17,11 @@ from config.db_config import (
 )
 from api.controller.files_controller import generate_file_url
 from core.utils.core_enums import VerificationStatusEnum
+from core.utils.pagination import aggregate_with_total
+from services.search_profile_service import sync_search_profile
+from services.admin_search_service import search_user_ids, search_summary, sync_admin_search_entry
+from services.dashboard_rollup_service import mark_user_days_dirty
+from services.account_tombstone_service import mark_account_deleted
 from services.translation import translate_message
 
 class UserManagementModel:
@@ -40,6 +44,7 @@ class UserManagementModel:
                 raise ValueError("Pagination object is required")
 
             pipeline = []
+            search_match = None
 
             # ---------------- USER MATCH ----------------
             user_match = {"is_deleted": {"$ne": True}}
@@ -57,6 +62,10 @@ class UserManagementModel:
                 if date_to:
                     user_match["created_at"]["$lte"] = date_to
 
+            if search:
+                search_match = await search_user_ids(search)
+                user_match["_id"] = {"$in": search_match.user_ids}
+
             pipeline.append({"$match": user_match})
 
             # ---------------- STRING ID ----------------
@@ -88,11 +97,6 @@ class UserManagementModel:
                 }
             ])
 
-            if search:
-                pipeline.append({
-                    "$match": {"username": {"$regex": search, "$options": "i"}}
-                })
-
             if gender:
                 pipeline.append({"$match": {"onboarding.gender": gender}})
 
@@ -133,8 +137,21 @@ class UserManagementModel:
             if verification:
                 pipeline.append({"$match": {"verification_status": verification}})
 
+            # =====================================================
+            # PAGINATION
+            # =====================================================
+            skip = pagination.skip if isinstance(pagination.skip, int) and pagination.skip >= 0 else 0
+            limit = pagination.limit if isinstance(pagination.limit, int) and pagination.limit > 0 else 10
+
+            # Match counts and countries are only looked up for the page rows
+            page_stages = [
+                {"$sort": {"created_at": -1}},
+                {"$skip": skip},
+                {"$limit": limit}
+            ]
+
             # ---------------- MATCHES ----------------
-            pipeline.extend([
+            page_stages.extend([
                 {
                     "$lookup": {
                         "from": "users_matched_history",
@@ -149,7 +166,7 @@ class UserManagementModel:
             ])
 
             # ---------------- COUNTRY ----------------
-            pipeline.extend([
+            page_stages.extend([
                 {
                     "$addFields": {
                         "countryObjId": {
@@ -178,29 +195,8 @@ class UserManagementModel:
                 }
             ])
 
-            # =====================================================
-            # COUNT PIPELINE (BEFORE PAGINATION)
-            # =====================================================
-            count_pipeline = copy.deepcopy(pipeline)
-            count_pipeline.append({"$count": "total"})
-
-            count_result = await user_collection.aggregate(count_pipeline).to_list(1)
-            total_records = count_result[0]["total"] if count_result else 0
-
-            # =====================================================
-            # PAGINATION
-            # =====================================================
-            skip = pagination.skip if isinstance(pagination.skip, int) and pagination.skip >= 0 else 0
-            limit = pagination.limit if isinstance(pagination.limit, int) and pagination.limit > 0 else 10
-
-            pipeline.extend([
-                {"$sort": {"created_at": -1}},
-                {"$skip": skip},
-                {"$limit": limit}
-            ])
-
             # ---------------- FINAL PROJECTION ----------------
-            pipeline.append({
+            page_stages.append({
                 "$project": {
                     "_id": 0,
                     "user_id": {"$toString": "$_id"},
@@ -226,9 +222,12 @@ class UserManagementModel:
                 }
             })
 
-            users = await user_collection.aggregate(pipeline).to_list(None)
+            # Page and total in a single pass
+            users, total_records = await aggregate_with_total(
+                user_collection, pipeline, page_stages
+            )
 
-            return users, total_records
+            return users, total_records, search_summary(search_match)
 
         except Exception as e:
             # logger.exception("Unexpected error while fetching admin users")
@@ -239,7 +238,7 @@ class UserManagementModel:
     async def get_user(user_id: str):
         return await user_collection.find_one(
             {"_id": ObjectId(user_id), "is_deleted": {"$ne": True}},
-            {"password": 0}
+            {"password": 0, "ledger_ops": 0, "token_holds": 0}
         )
 
     @staticmethod
@@ -598,6 +597,10 @@ class UserManagementModel:
                 }
             }
         )
+        await mark_account_deleted(user_id, now)
+        await sync_search_profile(user_id)
+        await sync_admin_search_entry(user_id)
+        await mark_user_days_dirty(user)
 
     # ---------------- UPDATE REPORT STATUS ----------------
         await reported_users_collection.update_many(
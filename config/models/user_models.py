@@ -6,15 +6,16 @@ from pydantic import GetJsonSchemaHandler
 from pydantic.json_schema import JsonSchemaValue
 from pydantic_core import core_schema
 from bson import ObjectId
-from datetime import datetime, date, timedelta, timezone
+from datetime import datetime, date
 from config.db_config import db
-from config.db_config import blocked_users_collection, reported_users_collection, user_like_history, user_passed_hostory, favorite_collection, user_collection,token_collection, file_collection, onboarding_collection
-from core.utils.core_enums import MembershipStatus
+from config.db_config import blocked_users_collection, reported_users_collection, user_like_history, user_passed_hostory, favorite_collection, user_collection,token_collection, file_collection, onboarding_collection, search_profile_collection
 from core.utils.response_mixin import CustomResponseMixin
+from core.utils.pagination import cached_count, fetch_with_has_next
 from enum import Enum
 import asyncio
 import re
 from config.models.user_token_history_model import *
+from services.token_ledger_service import debit_tokens, InsufficientTokensError
 
 response = CustomResponseMixin()
 
@@ -91,6 +92,8 @@ class Files(BaseModel):
     uploaded_at: datetime = Field(default_factory=datetime.utcnow)
     uploaded_by: Optional[PyObjectId] = None
     is_deleted: bool = Field(default=False)
+    # {"thumb": {"webp": key, "avif": key}, "medium": {...}, "full": {...}}, filled by the derivative worker
+    variants: Optional[dict] = None
 
 
 # ---- User model ----
@@ -255,86 +258,26 @@ async def get_user_token_balance(user_id: str) -> int:
 
     return int(user.get("tokens", 0) or 0) + int(user.get("bonus_tokens", 0) or 0)
 
-async def debit_user_tokens(user_id: str, amount: int, reason: str):
-
-    user = await user_collection.find_one(
-        {"_id": ObjectId(user_id)},
-        {"tokens": 1, "bonus_tokens": 1}
-    )
-
-    if not user:
-        return None, 0
-
-    tokens = int(user.get("tokens", 0))
-    bonus_tokens = int(user.get("bonus_tokens", 0))
-    total_balance = tokens + bonus_tokens
-
-    if total_balance < amount:
-        return None, total_balance
-
-    balance_before = total_balance
-
-    bonus_deduct = min(bonus_tokens, amount)
-    remaining = amount - bonus_deduct
-    token_deduct = remaining
-
-    # Conditional update (protect against race)
-    result = await user_collection.update_one(
-        {
-            "_id": ObjectId(user_id),
-            "bonus_tokens": {"$gte": bonus_deduct},
-            "tokens": {"$gte": token_deduct}
-        },
-        {
-            "$inc": {
-                "bonus_tokens": -bonus_deduct,
-                "tokens": -token_deduct
-            },
-            "$set": {"updated_at": datetime.utcnow()}
-        }
-    )
-
-    if result.modified_count == 0:
-        # Balance changed in between → retry or fail
-        return None, balance_before
-
-    balance_after = balance_before - amount
-
-    await create_user_token_history(
-        CreateTokenHistory(
+async def debit_user_tokens(user_id: str, amount: int, reason: str, idempotency_key: Optional[str] = None):
+    """
+    Spend tokens (bonus first) through the ledger.
+    Returns (balance_after, balance_before, replayed), or (None, available,
+    False) when the balance does not cover `amount`. `replayed` means the
+    key was charged before: the balances are those of that first debit.
+    """
+    try:
+        entry = await debit_tokens(
             user_id=user_id,
-            delta=-amount,
-            type=TokenTransactionType.DEBIT,
+            amount=amount,
             reason=reason,
-            balance_before=str(balance_before),
-            balance_after=str(balance_after)
+            idempotency_key=idempotency_key
         )
-    )
+    except InsufficientTokensError as e:
+        return None, e.available, False
+    except ValueError:
+        return None, 0, False
 
-    return balance_after, balance_before
-
-async def update_user_token_balance(
-    user_id: str,
-    new_balance: int
-) -> None:
-    """
-    Update the user's token balance.
-
-    :param user_id: User ID (str or ObjectId)
-    :param new_balance: New token balance (must be >= 0)
-    """
-
-    if new_balance < 0:
-        raise ValueError("Token balance cannot be negative")
-
-    await user_collection.update_one(
-        {"_id": ObjectId(user_id)},
-        {
-            "$set": {
-                "tokens": new_balance
-            }
-        }
-    )
+    return entry.balance_after, entry.balance_before, entry.replayed
 
 async def get_excluded_profile_user_ids(viewer_id: str):
     excluded_user_ids = set()
@@ -415,122 +358,29 @@ async def search_profiles_aggregate(
     excluded_object_ids: list,
     pagination
 ):
-    base_pipeline = [
-        {"$match": query},
-        {"$match": {"user_id": {"$ne": None}}},
-        {"$addFields": {"user_obj_id": {"$toObjectId": "$user_id"}}},
-        {
-            "$lookup": {
-                "from": "users",
-                "localField": "user_obj_id",
-                "foreignField": "_id",
-                "as": "user"
-            }
-        },
-        {"$unwind": "$user"},
-        {"$match": {"user.is_deleted": {"$ne": True}}},
-    ]
+    """
+    Search the denormalized `search_profiles` collection.
 
+    `query` uses the onboarding field names. With `pagination.cursor` results
+    continue by keyset on `_id`; otherwise the page/page_size offset is
+    applied. The total is cached briefly per filter.
+    Returns (docs, total, next_cursor).
+    """
+    match = {**query, "is_deleted": False}
     if excluded_object_ids:
-        base_pipeline.append(
-            {"$match": {"user._id": {"$nin": excluded_object_ids}}}
-        )
+        match["_id"] = {"$nin": excluded_object_ids}
 
-    # Count
-    count_pipeline = base_pipeline + [{"$count": "total"}]
-    count_cursor = onboarding_collection.aggregate(count_pipeline)
-    count_result = await count_cursor.to_list(length=1)
-    total = count_result[0]["total"] if count_result else 0
-
-    # Data
-    data_pipeline = base_pipeline + [{"$sort": {"_id": 1}}]
-
-    if pagination.page and pagination.page_size:
-        data_pipeline.extend([
-            {"$skip": pagination.skip},
-            {"$limit": pagination.page_size}
-        ])
-
-    cursor = onboarding_collection.aggregate(data_pipeline)
-    return cursor, total
-
-
-async def find_expiring_subscriptions(days_before:int):
-    today = datetime.now(tz=timezone.utc).date()
-    target_date = today + timedelta(days=days_before)
-
-    start = datetime.combine(target_date, datetime.min.time(), tzinfo=timezone.utc)
-    end = datetime.combine(target_date, datetime.max.time(), tzinfo=timezone.utc)
-
-    pipeline = [
-        {
-            "$match": {
-                "membership_status": MembershipStatus.ACTIVE.value,
-                "membership_trans_id": {"$ne": None}
-            }
-        },
-        # 🔹 SAFE ObjectId conversion
-        {
-            "$addFields": {
-                "membership_trans_id_obj": {
-                    "$cond": [
-                        {
-                            "$and": [
-                                {"$ne": ["$membership_trans_id", None]},
-                                {"$eq": [{"$type": "$membership_trans_id"}, "string"]}
-                            ]
-                        },
-                        {"$toObjectId": "$membership_trans_id"},
-                        None
-                    ]
-                }
-            }
-        },
-        {
-            "$lookup": {
-                "from": "transaction",
-                "let": {"transId": "$membership_trans_id_obj"},
-                "pipeline": [
-                    {
-                        "$match": {
-                            "$expr": {
-                                "$and": [
-                                    {"$eq": ["$_id", "$$transId"]},
-                                    {"$eq": ["$trans_type", "subscription_transaction"]},
-                                    {"$eq": ["$status", "success"]},
-                                    {"$gte": ["$expires_at", start]},
-                                    {"$lte": ["$expires_at", end]},
-
-                                    # ✅ FIX: handles missing field
-                                    {
-                                        "$eq": [
-                                            {"$ifNull": ["$expiry_notified_at", None]},
-                                            None
-                                        ]
-                                    }
-                                ]
-                            }
-                        }
-                    },
-                    {
-                        "$project": {
-                            "_id": 1,
-                            "expires_at": 1
-                        }
-                    }
-                ],
-                "as": "active_subscription"
-            }
-        },
-
-        {
-            "$match": {
-                "active_subscription.0": {"$exists": True}
-            }
-        }
-    ]
+    count_filter = dict(match)
+    total = await cached_count(
+        "search_profiles",
+        count_filter,
+        lambda: search_profile_collection.count_documents(count_filter)
+    )
 
-    cursor = user_collection.aggregate(pipeline)
+    after = pagination.keyset_match("_id", descending=False)
+    if after:
+        match["_id"] = {**match.get("_id", {}), **after["_id"]}
 
-    # Convert to list to see results
-    return await cursor.to_list(length=None)
+    cursor = search_profile_collection.find(match).sort("_id", 1).skip(pagination.skip)
+    docs, has_next = await fetch_with_has_next(cursor, pagination.limit)
+    return docs, total, pagination.next_cursor(docs, "_id", has_next)
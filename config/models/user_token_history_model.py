@@ -10,13 +10,18 @@ from schemas.user_token_history_schema import CreateTokenHistory
 
 async def get_user_token_history(user_id:str,lang:str, pagination:StandardResultsSetPagination, transaction_type: Optional[TokenTransactionType] = None):
 
-    match_stage = {"user_id": user_id}
+    match_stage = {"user_id": user_id, **pagination.keyset_match("created_at")}
     if transaction_type:
         match_stage["type"] = transaction_type.value
 
     pipeline = [
         {"$match": match_stage},
 
+        # 🔹 Page first so the lookups below only run for returned rows
+        {"$sort": {"created_at": -1, "_id": -1}},
+        {"$skip": pagination.skip},
+        {"$limit": pagination.limit + 1},
+
         # 🔹 Convert txn_id (string) → ObjectId
         {
             "$addFields": {
@@ -195,13 +200,14 @@ async def get_user_token_history(user_id:str,lang:str, pagination:StandardResult
             }
         },
 
-        {"$sort": {"created_at": -1}},
-        {"$skip": pagination.skip},
-        {"$limit": pagination.limit}
+        {"$sort": {"created_at": -1, "_id": -1}}
     ]
 
     cursor = user_token_history_collection.aggregate(pipeline)
-    docs = await cursor.to_list(length=pagination.limit)
+    docs = await cursor.to_list(length=None)
+    has_next = len(docs) > pagination.limit
+    docs = docs[:pagination.limit]
+    next_cursor = pagination.next_cursor(docs, "created_at", has_next)
     history: list[dict] = []
     for doc in docs:
         history.append({
@@ -223,7 +229,7 @@ async def get_user_token_history(user_id:str,lang:str, pagination:StandardResult
             "created_at": doc["created_at"],
         })
 
-    return history
+    return history, next_cursor
 
 async def create_user_token_history(data:CreateTokenHistory):
     await user_token_history_collection.insert_one(data.model_dump())
\ No newline at end of file
@@ -1,10 +1,16 @@
 import firebase_admin
-from firebase_admin import credentials
+from firebase_admin import credentials, messaging
 from config.basic_config import settings
 
 def init_firebase():
     if not firebase_admin._apps:
         cred = credentials.Certificate(settings.FIREBASE_CRED_PATH)
-        print("Cred: ", cred)
-        print("settings.FIREBASE_CRED_PATH: ", settings.FIREBASE_CRED_PATH)
         firebase_admin.initialize_app(cred)
+
+def get_messaging():
+    """
+    Return the firebase messaging module, initializing the app on first use
+    so the API and Celery workers only load credentials when a push is sent.
+    """
+    init_firebase()
+    return messaging
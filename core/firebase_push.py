@@ -1,4 +1,5 @@
 from firebase_admin import messaging
+from core.firebase import get_messaging
 from config.db_config import fcm_device_tokens_collection
 
 
@@ -25,7 +26,7 @@ async def send_push_notification(user_id: str, title: str, body: str, data: dict
                 data={k: str(v) for k, v in data.items()}
             )
 
-            response = messaging.send(message)
+            response = get_messaging().send(message)
 
         except Exception as e:
             print(f"[Push Failed for token {d['device_token']}] {e}")
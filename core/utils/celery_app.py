@@ -60,13 +60,55 @@ celery_app.conf.beat_schedule = {
         "schedule": crontab(hour=0, minute=10),  # ⏰ 0:10 UTC daily
     },
 
-    "generate_contest_cycles_daily": {
-        "task": "tasks.generate_contest_cycles",
+    # Contest transitions fire from the deadline queue within seconds
+    "fire_contest_deadlines": {
+        "task": "tasks.fire_contest_deadlines",
+        "schedule": 5.0,
+        "options": {"expires": 5},
+    },
+
+    "reschedule_contest_deadlines_daily": {
+        "task": "tasks.reschedule_contest_deadlines",
         "schedule": crontab(hour=0, minute=15),
     },
 
-    "declare_contest_winners_daily": {
-        "task": "tasks.declare_contest_winners",
-        "schedule": crontab(hour=0, minute=20),  # Midnight UTC
+    "refresh_dashboard_rollups": {
+        "task": "tasks.refresh_dashboard_rollups",
+        "schedule": crontab(minute="*/10"),
+    },
+
+    "recompute_dashboard_rollups_nightly": {
+        "task": "tasks.refresh_dashboard_rollups",
+        "schedule": crontab(hour=0, minute=25),
+        "args": (7,),  # ROLLUP_RECOMPUTE_DAYS
+    },
+
+    "reconcile_notification_unread_counts": {
+        "task": "tasks.reconcile_notification_unread_counts",
+        "schedule": crontab(minute=40),  # hourly
+    },
+
+    # Persists last-seen times once users go offline (services/presence_service.py)
+    "flush_presence_last_seen": {
+        "task": "tasks.flush_presence_last_seen",
+        "schedule": 30.0,
+        "options": {"expires": 30},
+    },
+
+    "requeue_payment_verifications": {
+        "task": "tasks.requeue_payment_verifications",
+        "schedule": crontab(minute="*/5"),
+    },
+
+    # No-op unless the tombstone set went missing (services/account_tombstone_service.py)
+    "rebuild_account_tombstones": {
+        "task": "tasks.rebuild_account_tombstones",
+        "schedule": crontab(minute="*/15"),
+    },
+
+    # Returns token holds of calls nobody ended (services/video_call_session_service.py)
+    "release_abandoned_video_calls": {
+        "task": "tasks.release_abandoned_video_calls",
+        "schedule": crontab(minute=50),  # hourly
     },
 }
\ No newline at end of file
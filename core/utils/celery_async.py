@@ -0,0 +1,103 @@
+#core/utils/celery_async.py
+
+"""
+Runtime for async Celery tasks.
+
+Every worker process owns a single event loop for its whole life. Motor
+follows the current event loop and the shared redis.asyncio pools keep
+their connections on the loop that opened them, so running every task on
+that one loop lets both reuse their connections across tasks instead of
+stranding them on a loop that was closed after the previous run.
+
+Declare async tasks with `async_task`, which takes the same options as
+`celery_app.task`:
+
+    @async_task(name="tasks.refresh_dashboard_rollups")
+    async def refresh_dashboard_rollups(recompute_days: int = 0):
+        ...
+
+Fan-out jobs run their per-item work concurrently on that loop with
+`gather_bounded`.
+"""
+import asyncio
+import functools
+import os
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+from celery.signals import worker_process_init, worker_process_shutdown
+
+from config.db_config import mongodb_client
+from core.utils.celery_app import celery_app
+from core.utils.redis_helper import close_redis_connections, reset_redis_pools
+
+# Concurrent items per fan-out job; well inside the Motor and Redis pool sizes
+FANOUT_CONCURRENCY = 20
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """
+    The event loop of this worker process, created on first use and again
+    after a fork.
+    """
+    global _loop, _loop_pid
+    if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+        _loop = asyncio.new_event_loop()
+        _loop_pid = os.getpid()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def run_async(coroutine: Awaitable) -> Any:
+    return get_worker_loop().run_until_complete(coroutine)
+
+
+def async_task(*task_args, **task_options):
+    """
+    Register a coroutine function as a Celery task run on the worker loop.
+    With `bind=True` the task instance is passed first, as for sync tasks.
+    """
+    def decorator(func: Callable[..., Awaitable]):
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            return run_async(func(*args, **kwargs))
+        return celery_app.task(*task_args, **task_options)(run)
+    return decorator
+
+
+async def gather_bounded(
+    func: Callable[[Any], Awaitable],
+    items: Iterable,
+    concurrency: int = FANOUT_CONCURRENCY
+) -> List[Any]:
+    """
+    Await `func(item)` for every item with at most `concurrency` in flight.
+    Results keep the order of `items`; a failing item returns its exception
+    instead of cancelling the others.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(item):
+        async with semaphore:
+            return await func(item)
+
+    return await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
+
+
+@worker_process_init.connect
+def _start_worker_loop(**kwargs):
+    reset_redis_pools()
+    get_worker_loop()
+
+
+@worker_process_shutdown.connect
+def _stop_worker_loop(**kwargs):
+    if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+        return
+    try:
+        _loop.run_until_complete(close_redis_connections())
+        _loop.run_until_complete(mongodb_client.close())
+    finally:
+        _loop.close()
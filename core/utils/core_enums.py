@@ -19,6 +19,12 @@ class TransactionStatus(str, Enum):
     PARTIAL = "partial payment"
     PENDING = "pending"
 
+class PaymentVerificationStatus(str, Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
 class TokenTransactionReason(str, Enum):
     SUBSCRIPTION = "Purchased_Subscription_Plan"
     ACCOUNT_VERIFIED = "Account_Verified"
@@ -70,6 +76,7 @@ class NotificationType(str, Enum):
     VERIFICATION_REJECTED = "verification_rejected"
     CONTEST_RESULT = "contest_result"
     VIDEO_CALL = "video_call" 
+    PAYMENT_VERIFICATION = "payment_verification"
     
 class VerificationStatusEnum(str, Enum):
     PENDING = "pending"
@@ -11,8 +11,6 @@ from fastapi import Depends, Request
 from jose import jwt,JWTError
 # from core.utils.auth_utils import SECRET_ACCESS_KEY,ALGORITHM
 response = CustomResponseMixin()
-import boto3
-from botocore.exceptions import ClientError
 from datetime import datetime
 from config.db_config import user_collection, file_collection, fcm_device_tokens_collection
 import base64
@@ -33,10 +31,11 @@ from enum import Enum
 from typing import List
 from decimal import Decimal, ROUND_HALF_UP
 from config.basic_config import settings
-from schemas.user_token_history_schema import CreateTokenHistory
-from config.models.user_token_history_model import create_user_token_history
+from services.token_ledger_service import credit_tokens
+from services.dashboard_rollup_service import record_login
 import firebase_admin
 from firebase_admin import messaging
+from core.firebase import get_messaging
 
 TOKEN_TO_USDT_RATE = Decimal("0.05")
 
@@ -164,6 +163,7 @@ async def finalize_login_response(user: dict, lang: str):
             }
         }
     )
+    await record_login(str(user["_id"]))
 
     onboarding_completed = await get_onboarding_completed_status(str(user["_id"]))
 
@@ -240,6 +240,30 @@ async def get_country_name_by_id(
     except Exception:
         return None
 
+async def get_country_names_by_ids(
+    country_ids: list,
+    countries_collection,
+    lang: str = "en"
+) -> dict:
+    """
+    Resolve several country ids in one query: {country_id: name}
+    """
+    object_ids = list({ObjectId(cid) for cid in country_ids if cid and ObjectId.is_valid(cid)})
+    if not object_ids:
+        return {}
+
+    names = {}
+    async for country_doc in countries_collection.find(
+        {"_id": {"$in": object_ids}},
+        {"translations": 1, "name": 1}
+    ):
+        names[str(country_doc["_id"])] = (
+            country_doc.get("translations", {}).get(lang)
+            or country_doc.get("translations", {}).get("en")
+            or country_doc.get("name")
+        )
+    return names
+
 def calculate_usdt_amount(tokens: int) -> Decimal:
     """
     Calculate USDT amount based on token volume.
@@ -273,38 +297,15 @@ async def credit_tokens_for_verification(user_id: str, admin_id: str):
     if already_rewarded:
         return  # Prevent double credit
 
-    # Fetch current balance
-    user = await user_collection.find_one(
-        {"_id": ObjectId(user_id)},
-        {"tokens": 1, "bonus_tokens": 1}
-    )
-
-    balance_before = int(user.get("tokens") or 0)
-    balance_after = balance_before + settings.VERIFICATION_REWARD_TOKENS
-
-    # Atomic token update
-    await user_collection.update_one(
-        {"_id": ObjectId(user_id)},
-        {
-            "$inc": {
-                "bonus_tokens": settings.VERIFICATION_REWARD_TOKENS
-            },
-            "$set": {"updated_at": datetime.utcnow()}
-        }
-    )
-
-    # Insert history
-    token_history = CreateTokenHistory(
+    # Keyed per user: concurrent approvals credit once
+    await credit_tokens(
         user_id=user_id,
-        delta=settings.VERIFICATION_REWARD_TOKENS,
-        type=TokenTransactionType.CREDIT,
+        amount=settings.VERIFICATION_REWARD_TOKENS,
         reason=TokenTransactionReason.ACCOUNT_VERIFIED,
-        balance_before=str(balance_before),
-        balance_after=str(balance_after)
+        bucket="bonus_tokens",
+        idempotency_key=f"account_verified:{user_id}"
     )
 
-    await create_user_token_history(token_history)
-
 def calculate_visibility(
     start_date,
     end_date
@@ -360,7 +361,7 @@ async def subscribe_user_to_topic(user_id: str, topic: str):
     tokens = [d["device_token"] for d in devices]
 
     try:
-        messaging.subscribe_to_topic(tokens, topic)
+        get_messaging().subscribe_to_topic(tokens, topic)
     except Exception as e:
         print(f"[Topic Subscribe Failed] {e}")
 
@@ -379,7 +380,7 @@ async def unsubscribe_user_from_topic(user_id: str, topic: str):
     tokens = [d["device_token"] for d in devices]
 
     try:
-        messaging.unsubscribe_from_topic(tokens, topic)
+        get_messaging().unsubscribe_from_topic(tokens, topic)
     except Exception as e:
         print(f"[Topic Unsubscribe Failed] {e}")
 
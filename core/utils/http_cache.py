@@ -0,0 +1,202 @@
+#core/utils/http_cache.py
+
+import hashlib
+import time
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+from fastapi import HTTPException, Request
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.utils.redis_helper import redis_client, hot_key_cache
+
+# Bumped by invalidate_http_cache; read through the hot key cache so every
+# worker drops its validators as soon as Redis sends the invalidation
+HTTP_CACHE_VERSION_KEY = "hot:http_cache:{namespace}:version"
+
+# Upper bound on how long a validator is trusted without re-running the controller
+ETAG_TTL = 600
+
+# Clients may keep the body but must revalidate before reusing it
+CACHE_CONTROL = "private, no-cache"
+
+# Coding suffixes CompressionMiddleware appends to strong ETags
+ENCODING_SUFFIXES = ("-br", "-gzip")
+
+
+def _version_key(namespace: str) -> str:
+    return HTTP_CACHE_VERSION_KEY.format(namespace=namespace)
+
+
+def _cache_key(namespace: str, request: Request) -> str:
+    query = urlencode(sorted(request.query_params.multi_items()))
+    return f"{namespace}?{query}"
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def match_if_none_match(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    Return the client's validator that matches `etag` (ignoring the coding
+    suffix added by compression), or None.
+    """
+    if not if_none_match:
+        return None
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return etag
+        if candidate.startswith("W/"):
+            continue
+        bare = candidate
+        for suffix in ENCODING_SUFFIXES:
+            if bare.endswith(f'{suffix}"'):
+                bare = bare[:-len(suffix) - 1] + '"'
+                break
+        if bare == etag:
+            return candidate
+    return None
+
+
+# class for ETagStore
+class ETagStore:
+    """
+    Per-process map of cache key -> (etag, version, expires_at) for the
+    endpoints wrapped with `conditional_get`.
+    """
+
+    def __init__(self, max_entries: int = 5000):
+        self.max_entries = max_entries
+        self._entries: Dict[str, tuple] = {}
+
+    def get(self, key: str, version) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry and entry[1] == version and entry[2] > time.monotonic():
+            return entry[0]
+        return None
+
+    def set(self, key: str, etag: str, version, ttl: int):
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+        self._entries[key] = (etag, version, time.monotonic() + ttl)
+
+    def invalidate(self, namespace: str):
+        prefix = f"{namespace}?"
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            self._entries.pop(key, None)
+
+
+etag_store = ETagStore()
+
+
+async def _current_version(namespace: str):
+    try:
+        return await hot_key_cache.get(_version_key(namespace))
+    except Exception as e:
+        print(f"[HTTP Cache] version check failed for {namespace}: {e}")
+        return None
+
+
+def conditional_get(namespace: str, ttl: int = ETAG_TTL):
+    """
+    Route dependency for responses that are the same for every caller with
+    the same query string. Declare it after the auth dependency:
+
+        _cache: None = Depends(conditional_get("countries"))
+
+    A matching If-None-Match is answered with 304 before the controller
+    runs; otherwise ETagMiddleware hashes the 200 body and remembers it.
+    """
+    async def dependency(request: Request):
+        key = _cache_key(namespace, request)
+        version = await _current_version(namespace)
+        request.state.http_cache = (key, version, ttl)
+
+        etag = etag_store.get(key, version)
+        if etag:
+            matched = match_if_none_match(request.headers.get("if-none-match"), etag)
+            if matched:
+                raise HTTPException(
+                    status_code=304,
+                    headers={"ETag": matched, "Cache-Control": CACHE_CONTROL}
+                )
+
+    return dependency
+
+
+async def invalidate_http_cache(namespace: str):
+    """
+    Call after a write that changes a `conditional_get` endpoint.
+    Never raises: a failed invalidation only delays freshness until ETAG_TTL.
+    """
+    etag_store.invalidate(namespace)
+    try:
+        await redis_client.incr(_version_key(namespace))
+    except Exception as e:
+        print(f"[HTTP Cache] invalidation failed for {namespace}: {e}")
+
+
+# class for ETagMiddleware
+class ETagMiddleware:
+    """
+    Adds a strong ETag to 200 responses of routes using `conditional_get`
+    and turns them into 304 when the client already holds that body.
+    Must sit inside CompressionMiddleware so the hash covers the identity body.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        chunks = []
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message
+
+            if message["type"] == "http.response.start":
+                cache = scope.get("state", {}).get("http_cache")
+                if message["status"] == 200 and cache:
+                    start_message = message
+                    return
+                await send(message)
+                return
+
+            if start_message is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            key, version, ttl = scope["state"]["http_cache"]
+            etag = make_etag(body)
+            etag_store.set(key, etag, version, ttl)
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            headers["ETag"] = etag
+            headers["Cache-Control"] = CACHE_CONTROL
+
+            matched = match_if_none_match(Headers(scope=scope).get("if-none-match"), etag)
+            if matched:
+                headers["ETag"] = matched
+                for name in ("content-length", "content-type"):
+                    if name in headers:
+                        del headers[name]
+                await send({**start_message, "status": 304})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
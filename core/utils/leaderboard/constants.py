@@ -1,3 +1,12 @@
 LEADERBOARD_KEY = "leaderboard:current"
 EVENT_CHANNEL = "leaderboard:events"
-TOP_N = 10
\ No newline at end of file
+TOP_N = 10
+
+# Rebuilt payloads are fanned out to every worker on this channel
+BROADCAST_CHANNEL = "leaderboard:broadcast"
+SNAPSHOT_KEY = "leaderboard:snapshot"
+
+# One worker rebuilds per burst of events; the others flag a pending rebuild
+REBUILD_LOCK_KEY = "leaderboard:rebuild:lock"
+REBUILD_PENDING_KEY = "leaderboard:rebuild:pending"
+REBUILD_LOCK_TTL = 30
@@ -1,5 +1,5 @@
 from core.utils.baseRedisHelper import BaseRedisHelper
-from core.utils.leaderboard.constants import LEADERBOARD_KEY, EVENT_CHANNEL
+from core.utils.leaderboard.constants import LEADERBOARD_KEY, EVENT_CHANNEL, SNAPSHOT_KEY
 from config.basic_config import settings
 
 class LeaderboardRedisHelper(BaseRedisHelper):
@@ -20,5 +20,5 @@ class LeaderboardRedisHelper(BaseRedisHelper):
         )
 
     async def reset_contest(self):
-        await self.redis.delete(LEADERBOARD_KEY)
+        await self.redis.delete(LEADERBOARD_KEY, SNAPSHOT_KEY)
         await self.redis.publish(EVENT_CHANNEL, "contest_reset")
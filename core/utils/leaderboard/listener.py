@@ -1,29 +1,51 @@
+import asyncio
+
 from core.utils.leaderboard.leaderboard_helper import LeaderboardRedisHelper
-from core.utils.leaderboard.service import build_leaderboard
+from core.utils.leaderboard.service import rebuild_and_publish
 from core.utils.leaderboard.websocket import manager
-from core.utils.leaderboard.constants import EVENT_CHANNEL
+from core.utils.leaderboard.constants import EVENT_CHANNEL, BROADCAST_CHANNEL
 
 redis_helper = LeaderboardRedisHelper()
 
-async def leaderboard_listener():
-    pubsub = redis_helper.redis.pubsub()
-    await pubsub.subscribe(EVENT_CHANNEL)
+async def _handle_event(event: str):
+    if event == "updated":
+        await rebuild_and_publish()
 
-    async for message in pubsub.listen():
-        if message["type"] != "message":
-            continue
+    elif event == "contest_reset":
+        # Every worker receives the event, so each notifies its own sockets
+        await manager.broadcast({
+            "type": "contest_reset",
+            "data": []
+        })
 
-        event = message["data"]
+async def leaderboard_listener():
+    """
+    One per worker process. Raw vote events trigger a single cluster-wide
+    rebuild; the rebuilt payload arrives on BROADCAST_CHANNEL and is relayed
+    to this worker's WebSocket clients as-is.
+    """
+    while True:
+        pubsub = redis_helper.redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(EVENT_CHANNEL, BROADCAST_CHANNEL)
 
-        if event == "updated":
-            leaderboard = await build_leaderboard()
-            await manager.broadcast({
-                "type": "leaderboard_update",
-                "data": leaderboard
-            })
+            while True:
+                # Short poll so the pool's socket timeout never fires on an idle channel
+                message = await pubsub.get_message(timeout=1.0)
+                if not message or message["type"] != "message":
+                    continue
 
-        elif event == "contest_reset":
-            await manager.broadcast({
-                "type": "contest_reset",
-                "data": []
-            })
+                if message["channel"] == BROADCAST_CHANNEL:
+                    await manager.broadcast_text(message["data"])
+                else:
+                    await _handle_event(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Leaderboard listener error: {e}")
+            await asyncio.sleep(1)
+        finally:
+            try:
+                await pubsub.aclose()
+            except Exception:
+                pass
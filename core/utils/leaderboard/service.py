@@ -1,9 +1,13 @@
+import json
 from bson import ObjectId
 
 from config.models.contest_model import resolve_user_avatar
 from config.models.user_models import get_user_details
 from core.utils.leaderboard.leaderboard_helper import LeaderboardRedisHelper
-from core.utils.leaderboard.constants import TOP_N
+from core.utils.leaderboard.constants import (
+    TOP_N, BROADCAST_CHANNEL, SNAPSHOT_KEY,
+    REBUILD_LOCK_KEY, REBUILD_PENDING_KEY, REBUILD_LOCK_TTL
+)
 
 redis_helper = LeaderboardRedisHelper()
 
@@ -27,3 +31,38 @@ async def build_leaderboard():
         })
 
     return leaderboard
+
+async def get_leaderboard_snapshot():
+    """
+    Latest leaderboard built by any worker, or a fresh build if none exists yet.
+    """
+    cached = await redis_helper.redis.get(SNAPSHOT_KEY)
+    if cached:
+        return json.loads(cached)
+    return await build_leaderboard()
+
+async def rebuild_and_publish():
+    """
+    Rebuild the leaderboard once for a burst of "updated" events across all
+    workers and publish the result on BROADCAST_CHANNEL.
+
+    Every caller flags a pending rebuild before competing for the lock, so
+    the lock holder keeps rebuilding until no event arrived during its last
+    build; losers simply return.
+    """
+    redis = redis_helper.redis
+    await redis.set(REBUILD_PENDING_KEY, 1, ex=REBUILD_LOCK_TTL)
+
+    while await redis.exists(REBUILD_PENDING_KEY):
+        if not await redis.set(REBUILD_LOCK_KEY, 1, nx=True, ex=REBUILD_LOCK_TTL):
+            return
+        try:
+            while await redis.delete(REBUILD_PENDING_KEY):
+                leaderboard = await build_leaderboard()
+                await redis.set(SNAPSHOT_KEY, json.dumps(leaderboard, default=str))
+                await redis.publish(BROADCAST_CHANNEL, json.dumps({
+                    "type": "leaderboard_update",
+                    "data": leaderboard
+                }, default=str))
+        finally:
+            await redis.delete(REBUILD_LOCK_KEY)
@@ -1,6 +1,13 @@
+import asyncio
+import json
+
 from fastapi import WebSocket
 
 class ConnectionManager:
+    """
+    WebSockets connected to this worker. Cross-worker fan-out goes through
+    Redis (see listener.py); this class only ever talks to local sockets.
+    """
     def __init__(self):
         self.connections: list[WebSocket] = []
 
@@ -13,7 +20,17 @@ class ConnectionManager:
             self.connections.remove(ws)
 
     async def broadcast(self, message: dict):
-        for ws in self.connections:
-            await ws.send_json(message)
+        await self.broadcast_text(json.dumps(message, default=str))
+
+    async def broadcast_text(self, payload: str):
+        """Send an already serialized message to every local socket concurrently."""
+        connections = list(self.connections)
+        results = await asyncio.gather(
+            *(ws.send_text(payload) for ws in connections),
+            return_exceptions=True
+        )
+        for ws, result in zip(connections, results):
+            if isinstance(result, Exception):
+                self.disconnect(ws)
 
 manager = ConnectionManager()
@@ -224,4 +224,38 @@ class APIMonitor:
         }
 
 # Initialize global API monitor
-api_monitor = APIMonitor() 
\ No newline at end of file
+api_monitor = APIMonitor() 
+
+# Startup phase monitoring
+class StartupMonitor:
+    def __init__(self):
+        self.logger = get_logger("startup")
+        self.phases = {}
+
+    def record(self, phase, duration):
+        self.phases[phase] = round(duration, 4)
+        self.logger.info(f"Startup phase '{phase}' took {duration:.3f}s")
+
+    def phase(self, name):
+        """Context manager that times one startup phase"""
+        import time
+        import contextlib
+
+        @contextlib.contextmanager
+        def timer():
+            start_time = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.record(name, time.perf_counter() - start_time)
+
+        return timer()
+
+    def get_stats(self):
+        return {
+            "phases": self.phases,
+            "total": round(sum(self.phases.values()), 4)
+        }
+
+# Initialize global startup monitor
+startup_monitor = StartupMonitor()
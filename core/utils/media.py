@@ -0,0 +1,139 @@
+#core/utils/media.py
+
+import base64
+import hashlib
+import hmac
+import mimetypes
+import os
+import re
+import time
+from typing import Optional
+from urllib.parse import urlencode
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, QueryParams
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse
+from starlette.types import Scope
+
+from config.basic_config import settings
+
+# Upload prefixes that are only reachable through a signed, expiring URL.
+# Chat voice notes ("audio") are left out: their URL is handed out once at
+# upload and kept in chat history, with no fetch path that could re-sign it
+PRIVATE_MEDIA_PREFIXES = {"private_gallery", "selfie", "verification_selfie"}
+
+# Expiries are rounded up to this many seconds so repeated calls hand out the
+# same URL and clients / CDNs can reuse their cached copy
+SIGNED_URL_BUCKET = 300
+
+# Upload names carry a hash of their content (upload_file_name), so a name
+# never points at other bytes; older "<timestamp>.<ext>" keys could be
+# overwritten by a same-second upload and are revalidated instead
+IMMUTABLE_NAME = re.compile(r"^\d+-[0-9a-f]{16}(_(thumb|medium|full))?\.[a-z0-9]+$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+
+def upload_file_name(content: bytes, ext: str) -> str:
+    """
+    Write-once file name for an upload: "<timestamp>-<content hash>.<ext>".
+    """
+    return f"{int(time.time())}-{hashlib.sha256(content).hexdigest()[:16]}.{ext}"
+
+
+def _signing_key() -> bytes:
+    return (settings.MEDIA_SIGNING_KEY or settings.SECRET_ACCESS_KEY).encode()
+
+
+def _signature(media_path: str, expires: int) -> str:
+    digest = hmac.new(_signing_key(), f"{media_path}:{expires}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:18]).decode()
+
+
+def is_private_media(storage_key: str) -> bool:
+    return storage_key.split("/", 1)[0] in PRIVATE_MEDIA_PREFIXES
+
+
+def signed_media_query(storage_key: str, ttl: Optional[int] = None) -> str:
+    """
+    Query string (`expires` + `sig`) granting access to a private upload
+    for at least `ttl` seconds.
+    """
+    ttl = settings.MEDIA_URL_TTL if ttl is None else ttl
+    now = int(time.time())
+    expires = (now + ttl) - (now + ttl) % SIGNED_URL_BUCKET + SIGNED_URL_BUCKET
+    return urlencode({"expires": expires, "sig": _signature(storage_key, expires)})
+
+
+def verify_media_signature(storage_key: str, query: QueryParams) -> Optional[int]:
+    """
+    Return the expiry of a valid, unexpired signature, otherwise None.
+    """
+    try:
+        expires = int(query.get("expires", ""))
+    except ValueError:
+        return None
+    if expires < time.time():
+        return None
+    if not hmac.compare_digest(query.get("sig", ""), _signature(storage_key, expires)):
+        return None
+    return expires
+
+
+# class for MediaFiles
+class MediaFiles(StaticFiles):
+    """
+    StaticFiles for uploads.
+
+    - Write-once keys get a year-long immutable Cache-Control.
+    - Private prefixes require a valid `expires`/`sig` pair (see
+      signed_media_query) and are cached privately until the link expires.
+    - With MEDIA_OFFLOAD set, only headers are produced and the proxy
+      streams the file ("x-accel": nginx X-Accel-Redirect under
+      MEDIA_ACCEL_PREFIX, "x-sendfile": absolute path for Apache/lighttpd).
+      Otherwise FileResponse serves it, including Range requests.
+    """
+
+    def __init__(self, *, directory: str, prefix: str, private: bool = False):
+        super().__init__(directory=directory)
+        self.prefix = prefix
+        self.private = private
+
+    def _media_path(self, path: str) -> str:
+        return f"{self.prefix}/{path.replace(os.sep, '/')}"
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if self.private:
+            expires = verify_media_signature(self._media_path(path), QueryParams(scope.get("query_string", b"")))
+            if expires is None:
+                raise HTTPException(status_code=403)
+            scope.setdefault("state", {})["media_expires"] = expires
+        return await super().get_response(path, scope)
+
+    def _cache_control(self, full_path: str, scope: Scope) -> str:
+        if self.private:
+            remaining = max(int(scope["state"]["media_expires"] - time.time()), 0)
+            return f"private, max-age={remaining}"
+        if IMMUTABLE_NAME.match(os.path.basename(full_path)):
+            return IMMUTABLE_CACHE_CONTROL
+        return REVALIDATE_CACHE_CONTROL
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        headers = {"Cache-Control": self._cache_control(str(full_path), scope)}
+
+        if settings.MEDIA_OFFLOAD:
+            relative = os.path.relpath(full_path, os.path.realpath(self.directory)).replace(os.sep, "/")
+            if settings.MEDIA_OFFLOAD == "x-accel":
+                headers["X-Accel-Redirect"] = f"{settings.MEDIA_ACCEL_PREFIX.rstrip('/')}/{self.prefix}/{relative}"
+            else:
+                headers["X-Sendfile"] = str(full_path)
+            media_type = mimetypes.guess_type(str(full_path))[0] or "application/octet-stream"
+            return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -1,40 +1,126 @@
-from fastapi import Query
-from pydantic import BaseModel
-from typing import Optional
+import base64
+import hashlib
+import json
+from bson import json_util
+from fastapi import HTTPException, Query
+from pydantic import BaseModel, model_validator
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from core.utils.redis_helper import redis_client
+
+# Totals of paginated listings are cached this long; admin screens only need
+# an approximate number, not one that is exact to the second.
+COUNT_CACHE_TTL = 30
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(sort_value: Any, doc_id: Any) -> str:
+    """
+    Opaque cursor for keyset pagination: the last row's sort key and _id.
+    Extended JSON keeps datetimes and ObjectIds typed across the round trip.
+    """
+    raw = json_util.dumps([sort_value, doc_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """Inverse of `encode_cursor`; raises ValueError on a malformed cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, doc_id = json_util.loads(base64.urlsafe_b64decode(padded).decode())
+        return sort_value, doc_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
 
 # class for StandardResultsSetPagination
 class StandardResultsSetPagination(BaseModel):
+    """
+    Offset (page/page_size) or keyset (cursor) pagination.
+
+    The page size is always bounded by MAX_PAGE_SIZE. Endpoints that support
+    keyset mode filter with `keyset_match` and return `next_cursor`.
+    Endpoints that don't support it simply serve the first page.
+    """
     page: Optional[int] = None
     page_size: Optional[int] = None
+    cursor: Optional[str] = None
+
+    @model_validator(mode="after")
+    def apply_bounds(self):
+        if self.page is None or self.page < 1:
+            self.page = 1
+        if self.page_size is None or self.page_size < 1:
+            self.page_size = DEFAULT_PAGE_SIZE
+        self.page_size = min(self.page_size, MAX_PAGE_SIZE)
+        return self
 
     @property
     def skip(self) -> int:
-        if self.page is None or self.page_size is None:
+        if self.cursor:
             return 0
         return (self.page - 1) * self.page_size
 
     @property
-    def limit(self) -> Optional[int]:
+    def limit(self) -> int:
         return self.page_size
 
+    def keyset_match(self, sort_field: str, descending: bool = True) -> dict:
+        """
+        Filter selecting the rows after the cursor for a `(sort_field, _id)`
+        sort. Empty when no cursor was given.
+        """
+        if not self.cursor:
+            return {}
+        sort_value, doc_id = decode_cursor(self.cursor)
+        op = "$lt" if descending else "$gt"
+        if sort_field == "_id":
+            return {"_id": {op: doc_id}}
+        return {
+            "$or": [
+                {sort_field: {op: sort_value}},
+                {sort_field: sort_value, "_id": {op: doc_id}}
+            ]
+        }
+
+    def next_cursor(self, docs: list, sort_field: str, has_next: bool) -> Optional[str]:
+        if not has_next or not docs:
+            return None
+        last = docs[-1]
+        return encode_cursor(last.get(sort_field), last["_id"])
+
+
 # To use the pagination class in the endpoint
 def pagination_params(
     page: Optional[int] = Query(None, ge=1),
-    page_size: Optional[int] = Query(None, ge=1, le=100),
+    page_size: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
 ) -> StandardResultsSetPagination:
+    if cursor:
+        try:
+            decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
     return StandardResultsSetPagination(
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        cursor=cursor
     )
 
 def build_paginated_response(
     records: list,
     page: int,
     page_size: int,
-    total_records: int
+    total_records: int,
+    next_cursor: Optional[str] = None,
+    has_next: Optional[bool] = None,
+    search: Optional[dict] = None
 ) -> dict:
     """
     Build a standardized paginated response.
+    Keyset endpoints pass `next_cursor` and their own `has_next`; admin
+    listings filtered through the search index pass its `search` summary.
     """
 
     total_pages = (
@@ -42,15 +128,87 @@ def build_paginated_response(
         if page_size > 0 else 0
     )
 
-    return {
+    paginated = {
         "records": records,
         "pagination": {
             "page": page,
             "page_size": page_size,
             "total_records": total_records,
             "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_previous": page > 1
+            "has_next": page < total_pages if has_next is None else has_next,
+            "has_previous": page > 1,
+            "next_cursor": next_cursor
         }
     }
+    if search is not None:
+        paginated["search"] = search
+    return paginated
+
 
+def filter_hash(filters: Any) -> str:
+    """
+    Stable hash of a filter: key order does not matter, ObjectIds and
+    datetimes are hashed by their string form.
+    """
+    normalized = json.dumps(filters, sort_keys=True, default=str)
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+
+async def cached_count(
+    namespace: str,
+    filters: Any,
+    count: Callable[[], Awaitable[int]],
+    ttl: int = COUNT_CACHE_TTL
+) -> int:
+    """
+    Return the total for `filters`, running `count()` only when no total was
+    cached in the last `ttl` seconds. Redis errors fall back to counting.
+    """
+    key = f"count:{namespace}:{filter_hash(filters)}"
+    try:
+        cached = await redis_client.get(key)
+        if cached is not None:
+            return int(cached)
+    except Exception as e:
+        print(f"[Pagination] count cache read failed for {namespace}: {e}")
+
+    total = await count()
+
+    try:
+        await redis_client.setex(key, ttl, total)
+    except Exception as e:
+        print(f"[Pagination] count cache write failed for {namespace}: {e}")
+    return total
+
+
+async def aggregate_with_total(
+    collection,
+    pipeline: List[dict],
+    page_stages: List[dict]
+) -> Tuple[list, int]:
+    """
+    Run `pipeline` once and split it with `$facet`: `page_stages`
+    (sort/skip/limit and any per-row lookups) build the page while a
+    `$count` branch computes the total over the same pass.
+    """
+    facet_pipeline = pipeline + [{
+        "$facet": {
+            "records": page_stages,
+            "total": [{"$count": "total"}]
+        }
+    }]
+    result = await collection.aggregate(facet_pipeline).to_list(1)
+    if not result:
+        return [], 0
+    total = result[0]["total"][0]["total"] if result[0]["total"] else 0
+    return result[0]["records"], total
+
+
+async def fetch_with_has_next(cursor, limit: Optional[int]) -> Tuple[list, bool]:
+    """
+    Fetch one extra row to learn whether another page exists without counting.
+    """
+    if not limit:
+        return await cursor.to_list(length=None), False
+    docs = await cursor.limit(limit + 1).to_list(length=None)
+    return docs[:limit], len(docs) > limit
@@ -1,25 +1,20 @@
 import time
-from redis import Redis
+import uuid
 from fastapi import HTTPException
 from config.basic_config import settings
+from core.utils.redis_helper import redis_pipeline
 
-redis_client = Redis(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    db=settings.REDIS_DB,
-    decode_responses=True
-)
-
-def rate_limit_check(user_id: str, max_requests: int = settings.RATE_LIMIT_MAX, period: int = settings.RATE_LIMIT_PERIOD):
+async def rate_limit_check(user_id: str, max_requests: int = settings.RATE_LIMIT_MAX, period: int = settings.RATE_LIMIT_PERIOD):
     key = f"rate_limit:{user_id}"
     current_time = time.time()
-    request_times = redis_client.lrange(key, 0, -1)
 
-    # Remove outdated requests
-    request_times = [float(t) for t in request_times if current_time - float(t) <= period]
-    if len(request_times) >= max_requests:
-        raise HTTPException(status_code=429, detail="Too many requests. Try again later.")
+    # Sliding window on a sorted set, trimmed and counted in one round trip
+    async with redis_pipeline() as pipe:
+        pipe.zremrangebyscore(key, 0, current_time - period)
+        pipe.zcard(key)
+        pipe.zadd(key, {f"{current_time}:{uuid.uuid4().hex[:8]}": current_time})
+        pipe.expire(key, period)
+        _, request_count, _, _ = await pipe.execute()
 
-    # Update Redis
-    redis_client.rpush(key, current_time)
-    redis_client.expire(key, period)
+    if request_count >= max_requests:
+        raise HTTPException(status_code=429, detail="Too many requests. Try again later.")
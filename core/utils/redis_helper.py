@@ -1,23 +1,336 @@
 import redis.asyncio as redis
+from redis.asyncio.connection import Connection
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
 from config.basic_config import settings
 import asyncio
-from typing import Optional
-
-# Create Redis connection pool for better performance
-redis_pool = redis.ConnectionPool(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    db=settings.REDIS_DB,
-    decode_responses=True,
-    max_connections=20,  # Maximum connections in pool
-    retry_on_timeout=True,
-    socket_connect_timeout=5,
-    socket_timeout=10,
-    health_check_interval=30
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, Iterable, List, Optional
+
+# Errors that count as a Redis outage for the circuit breaker
+REDIS_OUTAGE_ERRORS = (RedisConnectionError, RedisTimeoutError, OSError)
+
+
+# class for RedisUnavailableError
+class RedisUnavailableError(RedisConnectionError):
+    """Raised without touching the network while the circuit breaker is open."""
+
+
+# class for RedisCircuitBreaker
+class RedisCircuitBreaker:
+    def __init__(self, failure_threshold: int, cooldown_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        # Start of the single half-open probe; a probe that never reports
+        # back (cancelled, non-outage error) is replaced after a cooldown
+        self.probe_started_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        if self.opened_at is None:
+            return False
+        if time.monotonic() - self.opened_at >= self.cooldown_seconds:
+            # Half-open: closed for the one call that probes Redis
+            return self._probe_in_flight
+        return True
+
+    @property
+    def _probe_in_flight(self) -> bool:
+        return (
+            self.probe_started_at is not None
+            and time.monotonic() - self.probe_started_at < self.cooldown_seconds
+        )
+
+    def before_call(self):
+        if self.is_open:
+            redis_monitor.log_rejected()
+            raise RedisUnavailableError("Redis circuit breaker is open")
+        if self.opened_at is not None:
+            self.probe_started_at = time.monotonic()
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probe_started_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold and self.opened_at is None:
+            redis_monitor.log_breaker_open()
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+        self.probe_started_at = None
+
+
+# Redis operation monitoring
+class RedisMonitor:
+    def __init__(self):
+        self.command_count = 0
+        self.error_count = 0
+        self.rejected_count = 0
+        self.breaker_open_count = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.total_duration = 0.0
+
+    def log_command(self, duration: float, failed: bool = False):
+        self.command_count += 1
+        self.total_duration += duration
+        if failed:
+            self.error_count += 1
+
+    def log_rejected(self):
+        self.rejected_count += 1
+
+    def log_breaker_open(self):
+        self.breaker_open_count += 1
+        print("❌ Redis circuit breaker opened")
+
+    def get_stats(self):
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "command_count": self.command_count,
+            "error_count": self.error_count,
+            "rejected_count": self.rejected_count,
+            "breaker_open_count": self.breaker_open_count,
+            "breaker_open": breaker.is_open,
+            "avg_command_ms": round(self.total_duration * 1000 / self.command_count, 3) if self.command_count else 0,
+            "hot_cache_hits": self.cache_hits,
+            "hot_cache_misses": self.cache_misses,
+            "hot_cache_hit_ratio": round(self.cache_hits / lookups, 3) if lookups else 0,
+        }
+
+
+redis_monitor = RedisMonitor()
+breaker = RedisCircuitBreaker(
+    failure_threshold=settings.REDIS_BREAKER_THRESHOLD,
+    cooldown_seconds=settings.REDIS_BREAKER_COOLDOWN,
 )
 
-# Create async Redis client with connection pool
-redis_client = redis.Redis(connection_pool=redis_pool)
+
+# class for ManagedRedis
+class ManagedRedis(redis.Redis):
+    """
+    Async Redis client that records metrics and trips the shared circuit
+    breaker instead of falling back to blocking sync connections.
+    """
+
+    async def execute_command(self, *args, **options):
+        breaker.before_call()
+        start_time = time.perf_counter()
+        try:
+            result = await super().execute_command(*args, **options)
+        except REDIS_OUTAGE_ERRORS:
+            redis_monitor.log_command(time.perf_counter() - start_time, failed=True)
+            breaker.record_failure()
+            raise
+        redis_monitor.log_command(time.perf_counter() - start_time)
+        breaker.record_success()
+        return result
+
+
+_pools: Dict[int, redis.ConnectionPool] = {}
+_clients: Dict[int, ManagedRedis] = {}
+
+
+def _connection_kwargs(db: int) -> dict:
+    return {
+        "host": settings.REDIS_HOST,
+        "port": settings.REDIS_PORT,
+        "db": db,
+        "decode_responses": True,
+        "socket_connect_timeout": 5,
+        "socket_timeout": 10,
+    }
+
+
+def get_redis(db: Optional[int] = None) -> ManagedRedis:
+    """
+    Return the shared async client for a Redis DB (defaults to REDIS_DB).
+    One sized pool exists per DB for the whole process.
+    """
+    db = settings.REDIS_DB if db is None else db
+    if db not in _clients:
+        _pools[db] = redis.ConnectionPool(
+            **_connection_kwargs(db),
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            retry_on_timeout=True,
+            health_check_interval=30,
+        )
+        _clients[db] = ManagedRedis(connection_pool=_pools[db])
+    return _clients[db]
+
+
+# Default client, kept under its historical name
+redis_client = get_redis()
+redis_pool = _pools[settings.REDIS_DB]
+
+
+def reset_redis_pools():
+    """
+    Forget connections inherited from a parent process (call right after a
+    fork); the child opens its own on first use without touching the
+    parent's sockets.
+    """
+    for pool in _pools.values():
+        pool.reset()
+
+
+@asynccontextmanager
+async def redis_pipeline(db: Optional[int] = None, transaction: bool = False):
+    """
+    Yield a pipeline on the shared pool so several commands go out in one
+    round trip. Failures are reported to the circuit breaker.
+
+        async with redis_pipeline() as pipe:
+            pipe.incr("a")
+            pipe.expire("a", 60)
+            results = await pipe.execute()
+    """
+    breaker.before_call()
+    start_time = time.perf_counter()
+    async with get_redis(db).pipeline(transaction=transaction) as pipe:
+        try:
+            yield pipe
+        except REDIS_OUTAGE_ERRORS:
+            redis_monitor.log_command(time.perf_counter() - start_time, failed=True)
+            breaker.record_failure()
+            raise
+    redis_monitor.log_command(time.perf_counter() - start_time)
+    breaker.record_success()
+
+
+async def get_many(keys: List[str], db: Optional[int] = None) -> List[Optional[str]]:
+    """Fetch several keys with a single MGET"""
+    if not keys:
+        return []
+    return await get_redis(db).mget(keys)
+
+
+async def set_many(mapping: Dict[str, str], ttl: int, db: Optional[int] = None):
+    """Store several keys with the same TTL in one pipelined round trip"""
+    if not mapping:
+        return
+    async with redis_pipeline(db) as pipe:
+        for key, value in mapping.items():
+            pipe.setex(key, ttl, value)
+        await pipe.execute()
+
+
+# class for HotKeyCache
+class HotKeyCache:
+    """
+    In-process cache for hot keys kept coherent with RESP3-style server
+    assisted invalidation: a dedicated connection enables
+    `CLIENT TRACKING ... BCAST PREFIX` and redirects invalidations to a
+    second connection subscribed to `__redis__:invalidate`.
+
+    Only keys under the configured prefixes are cached locally. If the
+    invalidation channel is down, entries still expire after `ttl` seconds.
+    """
+
+    INVALIDATION_CHANNEL = "__redis__:invalidate"
+
+    def __init__(self, prefixes: Iterable[str], ttl: int = 60, max_entries: int = 10000):
+        self.prefixes = tuple(prefixes)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, tuple] = {}
+        self._listener_task: Optional[asyncio.Task] = None
+        self._tracking_conn: Optional[Connection] = None
+        self._listen_conn: Optional[Connection] = None
+
+    def is_tracked(self, key: str) -> bool:
+        return key.startswith(self.prefixes)
+
+    async def get(self, key: str, db: Optional[int] = None) -> Optional[str]:
+        if not self.is_tracked(key):
+            return await get_redis(db).get(key)
+
+        entry = self._entries.get(key)
+        if entry and entry[1] > time.monotonic():
+            redis_monitor.cache_hits += 1
+            return entry[0]
+
+        redis_monitor.cache_misses += 1
+        value = await get_redis(db).get(key)
+        if value is not None:
+            if len(self._entries) >= self.max_entries:
+                self._entries.clear()
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+        return value
+
+    def invalidate(self, keys: Optional[List[str]] = None):
+        if keys is None:
+            self._entries.clear()
+            return
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def start(self):
+        if self._listener_task is None:
+            self._listener_task = asyncio.create_task(self._listen_forever())
+
+    async def stop(self):
+        if self._listener_task:
+            self._listener_task.cancel()
+            self._listener_task = None
+        await self._close_connections()
+
+    async def _close_connections(self):
+        for conn in (self._tracking_conn, self._listen_conn):
+            if conn is not None:
+                try:
+                    await conn.disconnect()
+                except Exception:
+                    pass
+        self._tracking_conn = None
+        self._listen_conn = None
+
+    async def _subscribe(self):
+        # No socket timeout: this connection blocks until an invalidation arrives
+        self._listen_conn = Connection(**{**_connection_kwargs(settings.REDIS_DB), "socket_timeout": None})
+        await self._listen_conn.connect()
+        await self._listen_conn.send_command("CLIENT", "ID")
+        listener_id = await self._listen_conn.read_response()
+        await self._listen_conn.send_command("SUBSCRIBE", self.INVALIDATION_CHANNEL)
+        await self._listen_conn.read_response()
+
+        prefix_args = []
+        for prefix in self.prefixes:
+            prefix_args += ["PREFIX", prefix]
+        self._tracking_conn = Connection(**_connection_kwargs(settings.REDIS_DB))
+        await self._tracking_conn.connect()
+        await self._tracking_conn.send_command(
+            "CLIENT", "TRACKING", "ON", "REDIRECT", listener_id, "BCAST", *prefix_args
+        )
+        await self._tracking_conn.read_response()
+
+    async def _listen_forever(self):
+        while True:
+            try:
+                await self._subscribe()
+                # Anything cached before the subscription may be stale
+                self.invalidate()
+                while True:
+                    message = await self._listen_conn.read_response(timeout=None)
+                    if not isinstance(message, list) or len(message) < 3 or message[0] != "message":
+                        continue
+                    # A null payload means the server flushed its tracking table
+                    self.invalidate(message[2] if message[2] is not None else None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Redis invalidation listener error: {e}")
+                self.invalidate()
+                await self._close_connections()
+                await asyncio.sleep(5)
+
+
+hot_key_cache = HotKeyCache(prefixes=["hot:"])
+
 
 async def store_in_redis(key: str, value: str, ttl: int):
     """Store value in Redis with TTL asynchronously"""
@@ -25,33 +338,15 @@ async def store_in_redis(key: str, value: str, ttl: int):
         await redis_client.setex(key, ttl, value)
     except Exception as e:
         print(f"Redis store error: {e}")
-        # Fallback to sync operation if async fails
-        sync_redis = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=settings.REDIS_DB,
-            decode_responses=True
-        )
-        sync_redis.setex(key, ttl, value)
-        sync_redis.close()
+        raise
 
 async def get_from_redis(key: str) -> Optional[str]:
     """Get value from Redis asynchronously"""
     try:
-        value = await redis_client.get(key)
-        return value
+        return await redis_client.get(key)
     except Exception as e:
         print(f"Redis get error: {e}")
-        # Fallback to sync operation if async fails
-        sync_redis = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=settings.REDIS_DB,
-            decode_responses=True
-        )
-        value = sync_redis.get(key)
-        sync_redis.close()
-        return value
+        raise
 
 async def delete_from_redis(key: str):
     """Delete key from Redis asynchronously"""
@@ -59,55 +354,14 @@ async def delete_from_redis(key: str):
         await redis_client.delete(key)
     except Exception as e:
         print(f"Redis delete error: {e}")
-        # Fallback to sync operation if async fails
-        sync_redis = redis.Redis(
-            host=settings.REDIS_HOST,
-            port=settings.REDIS_PORT,
-            db=settings.REDIS_DB,
-            decode_responses=True
-        )
-        sync_redis.delete(key)
-        sync_redis.close()
+        raise
 
 async def close_redis_connections():
-    """Close Redis connections properly"""
+    """Close every shared Redis pool and the hot key listener"""
     try:
-        await redis_client.close()
-        await redis_pool.disconnect()
+        await hot_key_cache.stop()
+        for db, client in list(_clients.items()):
+            await client.aclose()
+            await _pools[db].disconnect()
     except Exception as e:
         print(f"Error closing Redis connections: {e}")
-
-# Backward compatibility functions (sync versions)
-def store_in_redis_sync(key: str, value: str, ttl: int):
-    """Synchronous version for backward compatibility"""
-    sync_redis = redis.Redis(
-        host=settings.REDIS_HOST,
-        port=settings.REDIS_PORT,
-        db=settings.REDIS_DB,
-        decode_responses=True
-    )
-    sync_redis.setex(key, ttl, value)
-    sync_redis.close()
-
-def get_from_redis_sync(key: str) -> Optional[str]:
-    """Synchronous version for backward compatibility"""
-    sync_redis = redis.Redis(
-        host=settings.REDIS_HOST,
-        port=settings.REDIS_PORT,
-        db=settings.REDIS_DB,
-        decode_responses=True
-    )
-    value = sync_redis.get(key)
-    sync_redis.close()
-    return value
-
-def delete_from_redis_sync(key: str):
-    """Synchronous version for backward compatibility"""
-    sync_redis = redis.Redis(
-        host=settings.REDIS_HOST,
-        port=settings.REDIS_PORT,
-        db=settings.REDIS_DB,
-        decode_responses=True
-    )
-    sync_redis.delete(key)
-    sync_redis.close()
\ No newline at end of file
@@ -1,11 +1,82 @@
-from fastapi.responses import JSONResponse
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
 from .exceptions import CustomValidationError
-from typing import Optional, Union
+
+# Same format serialize_datetime_fields produces, so dropping the pre-walk
+# does not change the wire format
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _default(obj: Any):
+    if isinstance(obj, datetime):
+        return obj.strftime(DATETIME_FORMAT)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, (ObjectId, Decimal)):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize a response body with orjson. datetime, date, ObjectId, Decimal
+    and pydantic models are encoded natively, so callers no longer need to
+    walk the payload with serialize_datetime_fields first.
+    """
+    return orjson.dumps(
+        content,
+        default=_default,
+        option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS,
+    )
+
+
+# class for FastJSONResponse
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+# class for SerializedPayloadCache
+class SerializedPayloadCache:
+    """
+    In-process cache of already-serialized `data` payloads for responses
+    that are identical for every caller (per key, e.g. language).
+    Pair with `success_message_bytes` to skip encoding on a hit.
+    """
+
+    def __init__(self, ttl: int = 600):
+        self.ttl = ttl
+        self._entries: Dict[str, tuple] = {}
+
+    async def get_or_build(self, key: str, builder: Callable[[], Awaitable[Any]]) -> bytes:
+        entry = self._entries.get(key)
+        if entry and entry[1] > time.monotonic():
+            return entry[0]
+        payload = dumps(await builder())
+        self._entries[key] = (payload, time.monotonic() + self.ttl)
+        return payload
+
+    def invalidate(self, key: Optional[str] = None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
 
 #class for CustomResponseMixin
 class CustomResponseMixin:
     def success_message(self, message: str, data: Optional[Union[dict, list]] = None, status_code: int = 200):
-        return JSONResponse(
+        return FastJSONResponse(
             content={
                 "message": message,
                 "data": data if isinstance(data, dict) or isinstance(data, list) else {},
@@ -14,9 +85,22 @@ class CustomResponseMixin:
             },
             status_code=status_code,
         )
-    
+
+    def success_message_bytes(self, message: str, data: bytes, status_code: int = 200, headers: Optional[dict] = None):
+        """
+        Same envelope as success_message for a `data` payload that is already
+        serialized JSON (see SerializedPayloadCache); only the message is encoded.
+        """
+        body = b"".join([
+            b'{"message":', dumps(message),
+            b',"data":', data,
+            b',"success":true,"status_code":', str(status_code).encode(),
+            b"}",
+        ])
+        return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
     def error_message(self, message: str, data: Optional[Union[dict, list]] = None, status_code: int = 400):
-        return JSONResponse(
+        return FastJSONResponse(
             content={
                 "message": message,
                 "data": data if isinstance(data, dict) or isinstance(data, list) else {},
@@ -3,7 +3,7 @@ from typing import Dict, Any, Optional, Tuple
 from core.utils.helper import get_membership_period
 from core.utils.response_mixin import CustomResponseMixin
 from services.translation import translate_message
-from tronpy import Tron
+from functools import lru_cache
 import requests, base58, hashlib
 from config.basic_config import settings
 from schemas.transcation_schema import PaymentDetailsModel, TransactionCreateModel, TransactionUpdateModel
@@ -12,16 +12,20 @@ from config.db_config import transaction_collection, system_config_collection, u
 from config.models.transaction_models import store_transaction_details, update_transaction_details, \
     get_latest_membership_expiry
 from bson import ObjectId
-from config.models.user_token_history_model import create_user_token_history
-from schemas.user_token_history_schema import CreateTokenHistory
+from services.token_ledger_service import credit_tokens, debit_tokens, InsufficientTokensError
 
-client = Tron(network=settings.WALLET_NETWORK)
 response = CustomResponseMixin()
 TRONGRID = "https://api.trongrid.io"
 
 MIN_WITHDRAWAL_USD = 25
 TOKEN_TO_USD_RATE = 0.05
 
+@lru_cache(maxsize=1)
+def get_tron_client():
+    """Create the tronpy client on first use instead of at import time."""
+    from tronpy import Tron
+    return Tron(network=settings.WALLET_NETWORK)
+
 def hex20_to_base58(hex20: str) -> str:
     """Convert 20-byte hex (no 0x) to Tron base58 address (T...)."""
     if hex20.startswith("0x"):
@@ -65,7 +69,7 @@ def fetch_token_metadata(contract_addr_hex58: str):
     # Try common fields:
     token = {}
     if r.status_code != 200:
-        usdt = client.get_contract(contract_addr_hex58)
+        usdt = get_tron_client().get_contract(contract_addr_hex58)
         name = usdt.functions.name()
         symbol = usdt.functions.symbol()
         decimals = usdt.functions.decimals()
@@ -92,8 +96,8 @@ async def get_transaction_details(txn_id:str, lang:str) -> dict:
 
     try:
 
-        tx_details = client.get_transaction(txn_id)
-        tx_info = client.get_transaction_info(txn_id)
+        tx_details = get_tron_client().get_transaction(txn_id)
+        tx_info = get_tron_client().get_transaction_info(txn_id)
     except Exception as e:
         tx_details, tx_info = None, None
 
@@ -297,39 +301,24 @@ async def _update_user_membership_and_tokens(
     """
 
     membership_status = user_details.get("membership_status", MembershipStatus.EXPIRED)
-    current_tokens = int(user_details.get("tokens") or 0)
-    current_bonus_tokens = int(user_details.get("bonus_tokens") or 0)
-
-    total_before = current_tokens + current_bonus_tokens
-    total_after = total_before + on_subscribe_tokens
 
-    # Record token history (always, even if already active)
-    token_history_data = CreateTokenHistory(
-        user_id=str(ObjectId(user_id)),
-        delta=on_subscribe_tokens,
-        type=TokenTransactionType.CREDIT.value,
+    # Credit into bonus_tokens ONLY (history is always recorded, even if already active)
+    await credit_tokens(
+        user_id=user_id,
+        amount=on_subscribe_tokens,
         reason=TokenTransactionReason.SUBSCRIPTION.value,
-        balance_before=str(total_before),
-        balance_after=str(total_after),
+        bucket="bonus_tokens",
         txn_id=str(transaction_id),
+        idempotency_key=f"subscription:{transaction_id}",
     )
-    await create_user_token_history(data=token_history_data)
 
-    # Credit into bonus_tokens ONLY
     if membership_status == MembershipStatus.ACTIVE.value:
-        await user_collection.update_one(
-            {"_id": ObjectId(user_id)},
-            {
-                "$inc": {"bonus_tokens": on_subscribe_tokens}
-            },
-        )
         return
 
     # Activate membership for non-active users
     await user_collection.update_one(
         {"_id": ObjectId(user_id)},
         {
-            "$inc": {"bonus_tokens": on_subscribe_tokens},
             "$set": {
                 "membership_type": MembershipType.PREMIUM.value,
                 "membership_status": MembershipStatus.ACTIVE.value,
@@ -337,6 +326,8 @@ async def _update_user_membership_and_tokens(
             }
         },
     )
+    from services.profile_snapshot_service import invalidate_profile_snapshot
+    await invalidate_profile_snapshot(user_id)
 
 async def _prepare_transaction_for_subscription(
     transaction_data: TransactionCreateModel,
@@ -442,7 +433,6 @@ async def handle_token_full_payment(
         transaction_data=transaction_data,
         plan_data=plan_data,
     )
-    user_details = await user_collection.find_one({"_id": ObjectId(user_id)})
     # 3. Persist transaction
     doc = await store_transaction_details(transaction_data)
 
@@ -450,7 +440,6 @@ async def handle_token_full_payment(
     if insert_token:
         await _add_user_token_history_and_tokens(
             user_id=user_id,
-            user_details=user_details,
             on_token_package=int(transaction_data.tokens),
             transaction_id=doc["_id"],
         )
@@ -458,41 +447,27 @@ async def handle_token_full_payment(
 
 async def _add_user_token_history_and_tokens(
     user_id: str,
-    user_details: Dict[str, Any],
     on_token_package: int,
     transaction_id: ObjectId,
 ) -> None:
     """
-        Updates the user's token balance and records a token transaction history entry.
-        This function calculates the new token balance based on the purchased token package,
-        creates a token history record for auditing purposes, and updates the user's
-        token balance in the user collection.
+        Credits a purchased token package through the token ledger, which updates
+        the user's token balance and records the token transaction history entry
+        together. Keyed on the transaction, so a repeated payment callback
+        credits the package only once.
 
         :param user_id: Unique identifier of the user whose token balance is being updated.
-        :param user_details: Dictionary containing the user's current details, including
-                             existing token balance.
         :param on_token_package: Number of tokens to be credited to the user's account.
         :param transaction_id: Identifier of the transaction associated with the token purchase.
         :return: None
     """
-
-    current_tokens = int(user_details.get("tokens") or 0)
-    new_balance = current_tokens + on_token_package
-    # Record token history (always, even if already active)
-    token_history_data = CreateTokenHistory(
-        user_id=str(ObjectId(user_id)),
-        delta=on_token_package,
-        type=TokenTransactionType.CREDIT.value,
+    await credit_tokens(
+        user_id=user_id,
+        amount=on_token_package,
         reason=TokenTransactionReason.TOKEN_PURCHASE.value,
-        balance_before=str(current_tokens),
-        balance_after=str(new_balance),
         txn_id=str(transaction_id),
+        idempotency_key=f"token_purchase:{transaction_id}",
     )
-    await create_user_token_history(data=token_history_data)
-    await user_collection.update_one(
-            {"_id": ObjectId(user_id)},
-            {"$set": {"tokens": str(new_balance)}},
-        )
     return
 
 async def mark_token_full_payment_received(
@@ -520,17 +495,14 @@ async def mark_token_full_payment_received(
         transaction_data = transaction_data,
         plan_data = plan_data,
     )
-    user_details = await user_collection.find_one({"_id": ObjectId(user_id)})
     # 3. Persist transaction
     doc = await update_transaction_details(doc=TransactionUpdateModel(**transaction_data.model_dump()),subscription_id=package_id)
 
-
     # 4. Token history and user token updates
-    current_tokens = int(user_details.get("tokens") or 0)
-    new_balance = current_tokens + int(transaction_data.tokens)
-    await user_collection.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": {"tokens": str(new_balance)}},
+    await _add_user_token_history_and_tokens(
+        user_id=user_id,
+        on_token_package=int(transaction_data.tokens),
+        transaction_id=doc["_id"],
     )
     return doc
 
@@ -589,7 +561,7 @@ async def is_valid_tron_address(
 
     try:
         # tronpy is sync internally, but safe to call in async flow
-        if not client.is_address(address):
+        if not get_tron_client().is_address(address):
             _raise_invalid_tron_address(lang=lang)
     except Exception:
         _raise_invalid_tron_address(lang=lang)
@@ -606,7 +578,6 @@ def _raise_invalid_tron_address(lang: str):
 
 async def update_user_tokens_and_history(
     user_id: str,
-    user_details: Dict[str, Any],
     tokens: int,
     transaction_type: TokenTransactionType,
     reason: TokenTransactionReason,
@@ -614,12 +585,13 @@ async def update_user_tokens_and_history(
     lang: str
 ) -> None:
     """
-    Update user token balance and create token transaction history.
+    Update user token balance and create token transaction history
+    through the token ledger (one atomic write, keyed on the transaction).
 
-    Supports CREDIT, DEBIT, WITHDRAW operations.
+    Supports CREDIT, DEBIT, WITHDRAW operations. Only withdrawable
+    `tokens` are touched, never bonus tokens.
 
     :param user_id: User ID
-    :param user_details: Current user document
     :param tokens: Number of tokens involved (positive integer)
     :param transaction_type: CREDIT / DEBIT / WITHDRAW
     :param reason: Reason for token change
@@ -630,40 +602,31 @@ async def update_user_tokens_and_history(
     if tokens <= 0:
         raise ValueError("Tokens must be greater than zero")
 
-    current_tokens = int(user_details.get("tokens") or 0)
-
-    # 🔒 Balance validation for DEBIT / WITHDRAW
-    if transaction_type in (
-        TokenTransactionType.DEBIT,
-        TokenTransactionType.WITHDRAW,
-    ):
-        if current_tokens < tokens:
-            raise response.raise_exception(
-                translate_message(message="INSUFFICIENT_TOKENS",lang=lang),
-                status_code=400
-            )
-        new_balance = current_tokens - tokens
-        delta = -tokens
-    else:  # CREDIT
-        new_balance = current_tokens + tokens
-        delta = tokens
-
-    # 🧾 Token history entry
-    token_history_data = CreateTokenHistory(
-        user_id=str(ObjectId(user_id)),
-        delta=delta,
-        type=transaction_type.value,
-        reason=reason.value,
-        balance_before=str(current_tokens),
-        balance_after=str(new_balance),
-        txn_id=str(transaction_id),
-    )
+    idempotency_key = f"{reason.value}:{transaction_id}"
 
-    # 1️⃣ Save history
-    await create_user_token_history(data=token_history_data)
+    if transaction_type == TokenTransactionType.CREDIT:
+        await credit_tokens(
+            user_id=user_id,
+            amount=tokens,
+            reason=reason.value,
+            txn_id=str(transaction_id),
+            idempotency_key=idempotency_key,
+        )
+        return
 
-    # 2️⃣ Update user balance
-    await user_collection.update_one(
-        {"_id": ObjectId(user_id)},
-        {"$set": {"tokens": str(new_balance)}}
-    )
\ No newline at end of file
+    # 🔒 Balance validation for DEBIT / WITHDRAW
+    try:
+        await debit_tokens(
+            user_id=user_id,
+            amount=tokens,
+            reason=reason.value,
+            transaction_type=transaction_type,
+            spend_bonus=False,
+            txn_id=str(transaction_id),
+            idempotency_key=idempotency_key,
+        )
+    except InsufficientTokensError:
+        raise response.raise_exception(
+            translate_message(message="INSUFFICIENT_TOKENS",lang=lang),
+            status_code=400
+        )
@@ -1,3 +1,6 @@
+import time
+_import_started = time.perf_counter()
+
 import asyncio
 import os
 from fastapi import FastAPI, Request
@@ -9,7 +12,8 @@ from api.routes import (
     profile_api, token_history_route, profile_api_route ,
     userPass_route, like_route_api, block_report_route, user_profile_view_api_route,
     fcm_route,
-    verification_routes, contest_api_route, user_management , moderation_route, leader_board_route ,video_call_route
+    verification_routes, contest_api_route, user_management , moderation_route, leader_board_route ,video_call_route,
+    presence_route, payment_verification_route
 )
 
 from api.routes.admin import (
@@ -25,30 +29,27 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 
 from core.utils.permissions import websocket_authenticate
-from tasks import send_email_task
 from fastapi.middleware.cors import CORSMiddleware
+from core.utils.compression import CompressionMiddleware
+from core.utils.http_cache import ETagMiddleware
 from fastapi.staticfiles import StaticFiles
-from apscheduler.schedulers.background import BackgroundScheduler
+from core.utils.media import MediaFiles
 from datetime import datetime, timedelta, timezone
-from config.db_config import create_indexes, user_collection
-import requests
-import json
+from config.db_config import user_collection
 import logging
 from json import JSONEncoder
-from pydantic import Field
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from config.db_seeder.AdminSeeder import seed_admin
-from config.db_seeder.SubscriptionPlanSeeder import seed_subscription_plan
 
-from core.firebase import init_firebase
 from config.basic_config import *
 
 from core.utils.leaderboard.listener import leaderboard_listener
+from core.utils.logging_config import startup_monitor
 
 from services.translation import translate_message
 
-init_firebase()
+startup_monitor.record("imports", time.perf_counter() - _import_started)
+
 leaderboard_task = None
+index_sync_task = None
 from starlette.middleware.base import BaseHTTPMiddleware
 app = FastAPI()
 
@@ -79,15 +80,16 @@ os.makedirs(VERIFICATION_SELFIE_DIR, exist_ok=True)
 os.makedirs(CONTEST_PARTICIPATE_DIR, exist_ok=True)
 os.makedirs(AUDIO_DIR, exist_ok=True)
 
-app.mount("/public_gallery", StaticFiles(directory=PUBLIC_GALLERY_DIR))
-app.mount("/private_gallery", StaticFiles(directory=PRIVATE_GALLERY_DIR))
-app.mount("/profile_photo", StaticFiles(directory=PROFILE_PHOTO_DIR))
-app.mount("/gifts", StaticFiles(directory=GIFTS_DIR))
-app.mount("/selfie", StaticFiles(directory=SELFIE_DIR), name="selfie")
-app.mount("/contest_banner", StaticFiles(directory=BANNER_DIR))
-app.mount("/verification_selfie",StaticFiles(directory=VERIFICATION_SELFIE_DIR))
-app.mount("/contest",StaticFiles(directory=CONTEST_PARTICIPATE_DIR))
-app.mount("/audio", StaticFiles(directory=AUDIO_DIR))
+# Private prefixes only answer signed URLs from generate_file_url
+app.mount("/public_gallery", MediaFiles(directory=PUBLIC_GALLERY_DIR, prefix="public_gallery"))
+app.mount("/private_gallery", MediaFiles(directory=PRIVATE_GALLERY_DIR, prefix="private_gallery", private=True))
+app.mount("/profile_photo", MediaFiles(directory=PROFILE_PHOTO_DIR, prefix="profile_photo"))
+app.mount("/gifts", MediaFiles(directory=GIFTS_DIR, prefix="gifts"))
+app.mount("/selfie", MediaFiles(directory=SELFIE_DIR, prefix="selfie", private=True), name="selfie")
+app.mount("/contest_banner", MediaFiles(directory=BANNER_DIR, prefix="contest_banner"))
+app.mount("/verification_selfie", MediaFiles(directory=VERIFICATION_SELFIE_DIR, prefix="verification_selfie", private=True))
+app.mount("/contest", MediaFiles(directory=CONTEST_PARTICIPATE_DIR, prefix="contest"))
+app.mount("/audio", MediaFiles(directory=AUDIO_DIR, prefix="audio"))
 
 # Health check endpoints
 @app.get("/health")
@@ -156,9 +158,12 @@ async def detailed_health_check():
     
     # Add performance metrics
     from core.utils.logging_config import db_monitor, api_monitor
+    from core.utils.redis_helper import redis_monitor
     health_status["metrics"] = {
         "database": db_monitor.get_stats(),
-        "api": api_monitor.get_stats()
+        "api": api_monitor.get_stats(),
+        "startup": startup_monitor.get_stats(),
+        "redis": redis_monitor.get_stats()
     }
     
     total_duration = time.time() - start_time
@@ -206,6 +211,15 @@ app.add_middleware(
     allow_headers=["*"],  # Allow all headers
 )
 
+# ETags are hashed on the identity body, so ETagMiddleware sits inside compression
+app.add_middleware(ETagMiddleware)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
+
 # Add request monitoring middleware
 @app.middleware("http")
 async def monitor_requests(request: Request, call_next):
@@ -268,8 +282,8 @@ app.include_router(transctions_route.admin_router)
 app.include_router(leader_board_route.api_router)
 app.include_router(admin_notifications_route.router)
 app.include_router(video_call_route.router)
-# Scheduler Instance
-scheduler = BackgroundScheduler()
+app.include_router(presence_route.router)
+app.include_router(payment_verification_route.router)
 
 # Supported languages
 SUPPORTED_LANGS = ["en", "fr"]
@@ -288,64 +302,72 @@ app.add_middleware(BaseHTTPMiddleware, dispatch=detect_language)
 
 @app.on_event("startup")
 async def init_scheduler():
+    global leaderboard_task, index_sync_task
     print("[STARTUP] Starting application initialization...")
 
-    scheduler = AsyncIOScheduler()
-
     # Initialize database connection
     try:
         from config.db_config import initialize_database
-        db_initialized = await initialize_database()
+        with startup_monitor.phase("database"):
+            db_initialized = await initialize_database()
         if not db_initialized:
             print("[ERROR] Database initialization failed - application may not function properly")
         else:
             print("[SUCCESS] Database initialized successfully")
 
-            #  CREATE INDEXES HERE
-            try:
-                await create_indexes()
-                print("[SUCCESS] Database indexes created")
-            except Exception as index_error:
-                print(f"[ERROR] Index creation failed: {index_error}")
-            try:
-                await seed_admin()
-                print("[SUCCESS] Admin seeding completed")
-                await seed_subscription_plan()
-                print("[SUCCESS] Subscription Plan seeding completed")
-            except Exception as seeder_error:
-                print(f"[ERROR] Admin seeding failed: {seeder_error}")
+            # Seeders normally run once per release via `python -m config.migrate`;
+            # the index diff is cheap and runs in the background either way
+            if settings.RUN_MIGRATIONS_ON_STARTUP:
+                from config.migrate import run_migrations
+                with startup_monitor.phase("migrations"):
+                    await run_migrations()
+            else:
+                from config.db_indexes import start_background_index_sync
+                index_sync_task = start_background_index_sync()
+                print("[SUCCESS] Database index sync scheduled")
     except Exception as e:
         print(f"[ERROR] Database initialization error: {e}")
 
-    global leaderboard_task
-    leaderboard_task = asyncio.create_task(leaderboard_listener())
-    print("🔥 Leaderboard listener started")
+    # Exactly one listener per worker process
+    if leaderboard_task is None or leaderboard_task.done():
+        with startup_monitor.phase("leaderboard_listener"):
+            leaderboard_task = asyncio.create_task(leaderboard_listener())
+        print("🔥 Leaderboard listener started")
 
-    scheduler.start()
-    print("✅ Scheduler initialized successfully")
-    print("🟢 Registered jobs:")
-    for job in scheduler.get_jobs():
-        print(f"    • {job.id} - Next run at: {job.next_run_time}")
-    
-    print("🚀 Application startup completed successfully!")
+    from core.utils.redis_helper import hot_key_cache
+    await hot_key_cache.start()
+
+    # Workers are separate processes, so each warms its own read-only caches
+    # before taking traffic instead of on the first request
+    try:
+        from services.gift_catalog_service import get_active_gifts
+        with startup_monitor.phase("warmup"):
+            await get_active_gifts()
+    except Exception as e:
+        print(f"[WARN] Cache warmup failed: {e}")
+
+    print(f"🚀 Application startup completed successfully! {startup_monitor.get_stats()}")
     
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    global leaderboard_task
+    global leaderboard_task, index_sync_task
     print("🛑 Starting application shutdown...")
 
     # ---- STOP LEADERBOARD LISTENER ----
     if leaderboard_task:
         leaderboard_task.cancel()
         print("🛑 Leaderboard listener stopped")
-    # Shutdown scheduler
-    try:
-        logger.info("Shutting down scheduler...")
-        scheduler.shutdown()
-        print("✅ Scheduler shutdown completed")
-    except Exception as e:
-        print(f"❌ Error shutting down scheduler: {e}")
+
+    # ---- STOP INDEX SYNC (a worker stopping mid-sync leaves it to the next boot) ----
+    if index_sync_task and not index_sync_task.done():
+        index_sync_task.cancel()
+        try:
+            await index_sync_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        print("🛑 Background index sync cancelled")
+    index_sync_task = None
     
     # Close database connections
     try:
@@ -359,8 +381,6 @@ async def shutdown_event():
     try:
         from core.utils.redis_helper import close_redis_connections
         await close_redis_connections()
-        from core.utils.baseRedisHelper import BaseRedisHelper
-        await BaseRedisHelper.get_client(1).close()  # Leaderboard DB
         print("✅ Redis connections closed")
     except Exception as e:
         print(f"❌ Error closing Redis connections: {e}")
@@ -414,19 +434,6 @@ class DateTimeEncoder(JSONEncoder):
             return obj.isoformat()
         return super().default(obj)
 
-def main():
-    scheduler = init_scheduler()
-    logger.info("Scheduler started")
-    
-    try:
-
-        # Keep the main thread alive
-        while True:
-            pass
-    except (KeyboardInterrupt, SystemExit):
-        logger.info("Shutting down scheduler...")
-        scheduler.shutdown()
-
 if __name__ == "__main__":
     import uvicorn
     from config.basic_config import settings
@@ -0,0 +1,7 @@
+# schemas/notification_schema.py
+
+from pydantic import BaseModel, Field
+from typing import List
+
+class MarkNotificationsReadRequest(BaseModel):
+    notification_ids: List[str] = Field(..., min_length=1, max_length=100)
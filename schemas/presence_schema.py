@@ -0,0 +1,7 @@
+# schemas/presence_schema.py
+
+from pydantic import BaseModel, Field
+from typing import List
+
+class PresenceLookupRequest(BaseModel):
+    user_ids: List[str] = Field(..., min_length=1, max_length=100)
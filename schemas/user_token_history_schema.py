@@ -14,6 +14,7 @@ class CreateTokenHistory(BaseModel):
     balance_before: str
     balance_after: str
     txn_id: Optional[str] = None
+    idempotency_key: Optional[str] = None
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 class TokenHistory(BaseModel):
@@ -45,6 +46,7 @@ class TokenHistoryResponse(BaseModel):
     history: List[TokenHistory]
     available_tokens: str
     token_plans:List[TokenPlans]
+    next_cursor: Optional[str] = None
 
 class TokenTransactionRequestModel(BaseModel):
     tron_txn_id: str = Field(
@@ -0,0 +1,30 @@
+"""
+Production entry point.
+
+    python serve.py
+
+Runs `main:app` under uvicorn's process supervisor with WEB_CONCURRENCY
+workers. Send SIGHUP to restart the workers one at a time (graceful
+reload), SIGTTIN / SIGTTOU to add or remove a worker. In-flight requests
+get GRACEFUL_SHUTDOWN_TIMEOUT seconds to finish when a worker stops.
+Forwarded client IP / scheme headers are only trusted from the proxies in
+FORWARDED_ALLOW_IPS (default 127.0.0.1).
+
+With RELOAD=true a single auto-reloading process is started instead.
+"""
+import uvicorn
+
+from config.basic_config import settings
+
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        reload=settings.RELOAD,
+        workers=None if settings.RELOAD else settings.WEB_CONCURRENCY,
+        timeout_graceful_shutdown=settings.GRACEFUL_SHUTDOWN_TIMEOUT,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.FORWARDED_ALLOW_IPS,
+    )
@@ -0,0 +1,132 @@
+#services/account_tombstone_service.py
+
+"""
+Deleted-account tombstones.
+
+Deleting an account (admin or self-delete) goes through
+`mark_account_deleted`, which keeps two views of it current:
+
+  - `user_onboarding.is_deleted`: the indexed flag the home feed filters
+    on, so feeds never have to carry the list of deleted users.
+  - `accounts:deleted` (Redis set of user ids): membership checks for a
+    handful of ids, one SMISMEMBER per lookup (`deleted_among`).
+
+`accounts:deleted:ready` marks the set as complete. Without it (first
+deploy, Redis flushed) lookups fall back to an indexed `$in` query on
+`deleted_accounts` until the set is rebuilt:
+
+    python -m services.account_tombstone_service rebuild
+"""
+import asyncio
+import sys
+from datetime import datetime
+from typing import Iterable, Optional, Set
+
+from config.db_config import deleted_account_collection, onboarding_collection
+from core.utils.redis_helper import redis_client, redis_pipeline
+
+TOMBSTONE_KEY = "accounts:deleted"
+TOMBSTONE_READY_KEY = "accounts:deleted:ready"
+
+TOMBSTONE_REBUILD_BATCH = 1000
+
+
+async def mark_account_deleted(user_id: str, deleted_at: Optional[datetime] = None):
+    """
+    Flag the onboarding doc of `user_id` and add it to the tombstone set.
+    The Redis write never raises; a set that missed it is marked stale.
+    """
+    await onboarding_collection.update_many(
+        {"user_id": user_id},
+        {"$set": {"is_deleted": True, "deleted_at": deleted_at or datetime.utcnow()}}
+    )
+    try:
+        await redis_client.sadd(TOMBSTONE_KEY, user_id)
+    except Exception as e:
+        print(f"[Tombstones] could not add {user_id}: {e}")
+        try:
+            await redis_client.delete(TOMBSTONE_READY_KEY)
+        except Exception:
+            pass
+
+
+async def deleted_among(user_ids: Iterable[str]) -> Set[str]:
+    """
+    The ids in `user_ids` that belong to deleted accounts.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return set()
+    try:
+        async with redis_pipeline() as pipe:
+            pipe.exists(TOMBSTONE_READY_KEY)
+            pipe.smismember(TOMBSTONE_KEY, user_ids)
+            ready, members = await pipe.execute()
+        if ready:
+            return {user_id for user_id, member in zip(user_ids, members) if member}
+    except Exception as e:
+        print(f"[Tombstones] lookup failed, using MongoDB: {e}")
+    return set(await deleted_account_collection.distinct("user_id", {"user_id": {"$in": user_ids}}))
+
+
+async def is_account_deleted(user_id: str) -> bool:
+    return user_id in await deleted_among([user_id])
+
+
+async def rebuild_tombstones(batch_size: int = TOMBSTONE_REBUILD_BATCH) -> int:
+    """
+    Rebuild the tombstone set from `deleted_accounts` and flag the onboarding
+    docs of accounts deleted before the flag existed. The new set replaces
+    the old one in a single RENAME. Returns the number of tombstones.
+    """
+    staging_key = f"{TOMBSTONE_KEY}:rebuild"
+    await redis_client.delete(staging_key)
+    total = 0
+
+    async def flush(batch):
+        await onboarding_collection.update_many(
+            {"user_id": {"$in": batch}, "is_deleted": {"$ne": True}},
+            {"$set": {"is_deleted": True}}
+        )
+        await redis_client.sadd(staging_key, *batch)
+
+    batch = []
+    async for doc in deleted_account_collection.find({}, {"user_id": 1}):
+        if not doc.get("user_id"):
+            continue
+        batch.append(doc["user_id"])
+        if len(batch) >= batch_size:
+            await flush(batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+        total += len(batch)
+
+    async with redis_pipeline(transaction=True) as pipe:
+        if total:
+            # Deletions that landed during the rebuild are already in the old set
+            pipe.sunionstore(staging_key, [staging_key, TOMBSTONE_KEY])
+            pipe.rename(staging_key, TOMBSTONE_KEY)
+        else:
+            pipe.delete(TOMBSTONE_KEY)
+        pipe.set(TOMBSTONE_READY_KEY, 1)
+        await pipe.execute()
+    return total
+
+
+async def rebuild_if_missing() -> int:
+    """
+    Rebuild only when the set is not marked complete.
+    """
+    if await redis_client.exists(TOMBSTONE_READY_KEY):
+        return 0
+    return await rebuild_tombstones()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild":
+        print(f"Rebuilt {asyncio.run(rebuild_tombstones())} account tombstones")
+    else:
+        print(__doc__)
+        sys.exit(2)
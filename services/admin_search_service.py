@@ -0,0 +1,188 @@
+#services/admin_search_service.py
+
+"""
+Token index behind the admin search boxes (users, reports, transactions,
+contest participants and the verification queue).
+
+One document per user in `admin_search_index`, keyed by the user's ObjectId,
+holding the NFKC-normalized lowercase username / email and a multikey
+`tokens` array:
+
+  - "<field>p:<prefix>"  for the first ADMIN_SEARCH_PREFIX_LENGTH characters,
+  - "<field>g:<trigram>" for every 3-character window.
+
+A search is resolved here first, through the `tokens` index, into a bounded
+set of user ids; the admin pipelines then start with a plain `$in` on their
+user id field instead of running an unanchored regex after their lookups.
+When more users match than the bound, the newest ones are kept and the
+listing reports `search.truncated` with the full count from the index, so
+the admin knows to narrow the query.
+Queries of three or more characters match anywhere in the value (trigrams,
+confirmed with a literal check on the lowercase field); shorter ones match
+from the start. Kept current from the signup / social login / deletion
+paths; backfill with:
+
+    python -m services.admin_search_service rebuild
+"""
+import asyncio
+import re
+import sys
+import unicodedata
+from datetime import datetime
+from typing import Iterable, List, Optional
+from bson import ObjectId
+from pydantic import BaseModel
+from pymongo import ReplaceOne
+from config.db_config import admin_search_collection, user_collection
+
+SEARCH_FIELDS = {"username": "u", "email": "e"}
+
+NGRAM = 3
+
+# Longest prefix token; queries shorter than NGRAM are matched against these
+ADMIN_SEARCH_PREFIX_LENGTH = NGRAM - 1
+
+# Upper bound on the ids one search hands to the admin pipelines
+ADMIN_SEARCH_MAX_MATCHES = 2000
+
+USER_PROJECTION = {"username": 1, "email": 1, "is_deleted": 1}
+
+
+# class for AdminSearchMatch
+class AdminSearchMatch(BaseModel):
+    user_ids: List[ObjectId] = []
+    truncated: bool = False
+    matched_users: int = 0
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def summary(self) -> dict:
+        """
+        `search` block of a paginated admin response.
+        """
+        return {"truncated": self.truncated, "matched_users": self.matched_users}
+
+
+def search_summary(match: Optional[AdminSearchMatch]) -> Optional[dict]:
+    return match.summary() if match else None
+
+
+def normalize_search_text(value) -> str:
+    if not value:
+        return ""
+    return unicodedata.normalize("NFKC", str(value)).strip().lower()
+
+
+def _field_tokens(tag: str, value: str) -> List[str]:
+    tokens = [f"{tag}p:{value[:length]}" for length in range(1, min(len(value), ADMIN_SEARCH_PREFIX_LENGTH) + 1)]
+    tokens.extend(f"{tag}g:{value[i:i + NGRAM]}" for i in range(len(value) - NGRAM + 1))
+    return tokens
+
+
+def build_admin_search_entry(user: dict) -> dict:
+    doc = {
+        "_id": user["_id"],
+        "user_id": str(user["_id"]),
+        "is_deleted": bool(user.get("is_deleted", False)),
+        "updated_at": datetime.utcnow(),
+    }
+    tokens = set()
+    for field, tag in SEARCH_FIELDS.items():
+        value = normalize_search_text(user.get(field))
+        doc[f"{field}_lc"] = value
+        tokens.update(_field_tokens(tag, value))
+    doc["tokens"] = sorted(tokens)
+    return doc
+
+
+def _field_condition(field: str, query: str) -> dict:
+    tag = SEARCH_FIELDS[field]
+    if len(query) < NGRAM:
+        return {"tokens": f"{tag}p:{query}"}
+    grams = sorted({query[i:i + NGRAM] for i in range(len(query) - NGRAM + 1)})
+    return {
+        "tokens": {"$all": [f"{tag}g:{gram}" for gram in grams]},
+        f"{field}_lc": {"$regex": re.escape(query)},
+    }
+
+
+async def search_user_ids(search: str, fields: Iterable[str] = ("username",)) -> AdminSearchMatch:
+    """
+    Users whose `fields` contain `search` (case-insensitive, literal): the
+    ADMIN_SEARCH_MAX_MATCHES newest ids, and whether that dropped any.
+    """
+    query = normalize_search_text(search)
+    if not query:
+        return AdminSearchMatch()
+
+    conditions = [_field_condition(field, query) for field in fields]
+    match = conditions[0] if len(conditions) == 1 else {"$or": conditions}
+
+    # One extra id tells a full result from a cut one without counting
+    docs = await admin_search_collection.find(match, {"_id": 1}).sort("_id", -1).limit(
+        ADMIN_SEARCH_MAX_MATCHES + 1
+    ).to_list(None)
+    user_ids = [doc["_id"] for doc in docs[:ADMIN_SEARCH_MAX_MATCHES]]
+    if len(docs) <= ADMIN_SEARCH_MAX_MATCHES:
+        return AdminSearchMatch(user_ids=user_ids, matched_users=len(user_ids))
+
+    matched_users = await admin_search_collection.count_documents(match)
+    print(f"[Admin Search] {search!r} matched {matched_users} users, listing the newest {ADMIN_SEARCH_MAX_MATCHES}")
+    return AdminSearchMatch(user_ids=user_ids, truncated=True, matched_users=matched_users)
+
+
+def user_id_in(user_ids: List[ObjectId]) -> dict:
+    """
+    `$in` operand matching a user id field stored either as ObjectId or string.
+    """
+    return {"$in": user_ids + [str(user_id) for user_id in user_ids]}
+
+
+async def sync_admin_search_entry(user_id: str):
+    """
+    Rebuild the index entry of one user. Never raises: a failed sync is
+    repaired by the next write or a rebuild.
+    """
+    try:
+        user = await user_collection.find_one({"_id": ObjectId(user_id)}, USER_PROJECTION)
+        if not user:
+            await admin_search_collection.delete_one({"_id": ObjectId(user_id)})
+            return
+        doc = build_admin_search_entry(user)
+        await admin_search_collection.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+    except Exception as e:
+        print(f"[Admin Search] sync failed for {user_id}: {e}")
+
+
+async def rebuild_admin_search_index(batch_size: int = 1000) -> int:
+    written = 0
+    ops = []
+    async for user in user_collection.find({}, USER_PROJECTION):
+        doc = build_admin_search_entry(user)
+        ops.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+        if len(ops) >= batch_size:
+            await admin_search_collection.bulk_write(ops, ordered=False)
+            written += len(ops)
+            ops = []
+    if ops:
+        await admin_search_collection.bulk_write(ops, ordered=False)
+        written += len(ops)
+    return written
+
+
+async def rebuild_admin_search_if_empty() -> int:
+    """
+    Backfill on first deployment only; afterwards the write paths keep it current.
+    """
+    if await admin_search_collection.estimated_document_count():
+        return 0
+    return await rebuild_admin_search_index()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild":
+        print(f"Rebuilt {asyncio.run(rebuild_admin_search_index())} admin search entries")
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -0,0 +1,312 @@
+#services/dashboard_rollup_service.py
+
+"""
+Per-day counters behind the admin dashboard.
+
+One document per UTC day in `dashboard_daily_rollups` (`_id` "YYYY-MM-DD")
+holds signups, verifications, active users, blocks, revenue, approved
+withdrawals, contests and the gender split of that day. Each bucket is
+computed from day-bounded queries only, so a refresh never scans the whole
+database, and the dashboard just sums the buckets of the requested range.
+
+Buckets are kept current by:
+  - the Celery beat task refreshing today and any day marked dirty (e.g.
+    the signup day of a deleted account) every few minutes,
+  - a nightly pass over the trailing ROLLUP_RECOMPUTE_DAYS,
+  - the write paths marking the day a record leaves dirty when they move a
+    bucketed timestamp (a partial payment completing moves `updated_at`);
+    verifications are bucketed by the immutable `verified_at`,
+  - logins, recorded as they happen in a per-day HyperLogLog so "active"
+    stays a distinct count across multi-day ranges.
+
+Backfill the history once with:
+
+    python -m services.dashboard_rollup_service backfill
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from pymongo import ReplaceOne
+
+from config.db_config import (
+    dashboard_rollup_collection, user_collection, admin_blocked_users_collection,
+    transaction_collection, onboarding_collection, contest_collection,
+    withdraw_token_transaction_collection, verification_collection
+)
+from core.utils.core_enums import VerificationStatusEnum
+from core.utils.redis_helper import redis_client
+from services.account_tombstone_service import deleted_among
+
+ACTIVE_USERS_KEY = "dashboard:active:{day}"
+DIRTY_DAYS_KEY = "dashboard:rollup:dirty"
+
+# Long enough for the "yearly" filter
+ACTIVE_USERS_TTL = 400 * 24 * 3600
+
+# Today's bucket is recomputed on read once it is older than this
+TODAY_REFRESH_SECONDS = 300
+
+# Days re-counted by the nightly pass
+ROLLUP_RECOMPUTE_DAYS = 7
+
+REVENUE_STATUSES = ["success", "partial payment"]
+
+GENDERS = ("male", "female", "other")
+
+COUNTERS = ("signups", "verified", "active", "blocked", "revenue", "withdrawals_approved", "withdrawal_amount", "contests")
+
+
+def day_start(value: datetime) -> datetime:
+    return value.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def day_key(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d")
+
+
+def _days(start: datetime, end: datetime) -> List[datetime]:
+    day, last = day_start(start), day_start(end)
+    days = []
+    while day <= last:
+        days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+async def _sum(collection, match: dict, expression) -> dict:
+    result = await collection.aggregate([
+        {"$match": match},
+        {"$group": {"_id": None, "total": {"$sum": expression}, "count": {"$sum": 1}}}
+    ]).to_list(1)
+    return result[0] if result else {"total": 0, "count": 0}
+
+
+async def _gender_split(in_day: dict) -> Dict[str, int]:
+    rows = await onboarding_collection.aggregate([
+        {"$match": {"created_at": in_day}},
+        {"$project": {"gender": 1, "userIdStr": {"$toString": "$user_id"}}},
+        {"$lookup": {
+            "from": "deleted_accounts",
+            "localField": "userIdStr",
+            "foreignField": "user_id",
+            "as": "deleted_user"
+        }},
+        {"$match": {"deleted_user": {"$size": 0}}},
+        {"$group": {"_id": "$gender", "count": {"$sum": 1}}}
+    ]).to_list(None)
+
+    split = {gender: 0 for gender in GENDERS}
+    for row in rows:
+        split[row["_id"] if row["_id"] in split else "other"] += row["count"]
+    return split
+
+
+async def _active_users(day: datetime, in_day: dict, not_deleted: dict) -> int:
+    try:
+        tracked = await redis_client.pfcount(ACTIVE_USERS_KEY.format(day=day_key(day)))
+    except Exception as e:
+        print(f"[Dashboard Rollup] active user count failed for {day_key(day)}: {e}")
+        tracked = 0
+    if tracked:
+        return tracked
+    # Days before login tracking: users whose latest login falls on that day
+    return await user_collection.count_documents({"login_status": "active", "last_login_at": in_day, **not_deleted})
+
+
+async def compute_day(day: datetime) -> dict:
+    """
+    Count one UTC day from the source collections.
+    """
+    day = day_start(day)
+    in_day = {"$gte": day, "$lt": day + timedelta(days=1)}
+    not_deleted = {"is_deleted": {"$ne": True}}
+
+    blocked_user_ids = await admin_blocked_users_collection.distinct("user_id", {"created_at": in_day})
+    deleted_blocked = list(await deleted_among(blocked_user_ids))
+
+    revenue = await _sum(
+        transaction_collection,
+        {"status": {"$in": REVENUE_STATUSES}, "updated_at": in_day},
+        "$paid_amount"
+    )
+    withdrawals = await _sum(
+        withdraw_token_transaction_collection,
+        {"status": "completed", "updated_at": in_day},
+        {"$add": [{"$ifNull": ["$paid_amount", 0]}, {"$ifNull": ["$tron_fee", 0]}]}
+    )
+
+    return {
+        "_id": day_key(day),
+        "day": day,
+        "signups": await user_collection.count_documents({"created_at": in_day, **not_deleted}),
+        "verified": await user_collection.count_documents({"is_verified": True, "verified_at": in_day, **not_deleted}),
+        "active": await _active_users(day, in_day, not_deleted),
+        "blocked": await admin_blocked_users_collection.count_documents(
+            {"created_at": in_day, "user_id": {"$nin": deleted_blocked}}
+        ),
+        "revenue": round(revenue["total"] or 0, 2),
+        "withdrawals_approved": withdrawals["count"],
+        "withdrawal_amount": round(withdrawals["total"] or 0, 2),
+        "contests": await contest_collection.count_documents({"created_at": in_day}),
+        "gender": await _gender_split(in_day),
+        "refreshed_at": datetime.utcnow(),
+    }
+
+
+async def refresh_days(days: List[datetime]) -> int:
+    if not days:
+        return 0
+    buckets = [await compute_day(day) for day in days]
+    await dashboard_rollup_collection.bulk_write(
+        [ReplaceOne({"_id": bucket["_id"]}, bucket, upsert=True) for bucket in buckets],
+        ordered=False
+    )
+    return len(buckets)
+
+
+async def record_login(user_id: str):
+    """
+    Count a login towards today's active users. Never raises.
+    """
+    key = ACTIVE_USERS_KEY.format(day=day_key(datetime.utcnow()))
+    try:
+        await redis_client.pfadd(key, user_id)
+        await redis_client.expire(key, ACTIVE_USERS_TTL)
+    except Exception as e:
+        print(f"[Dashboard Rollup] login tracking failed for {user_id}: {e}")
+
+
+async def mark_day_dirty(value: Optional[datetime]):
+    """
+    Queue a past day for recomputation, e.g. the signup day of an account
+    that was just deleted. Never raises.
+    """
+    if not value:
+        return
+    try:
+        await redis_client.sadd(DIRTY_DAYS_KEY, day_key(value))
+    except Exception as e:
+        print(f"[Dashboard Rollup] could not mark {day_key(value)} dirty: {e}")
+
+
+async def mark_user_days_dirty(user: dict):
+    """
+    A deleted account drops out of the buckets of its signup, verification,
+    last update and last login days; queue them for recomputation.
+    """
+    for field in ("created_at", "verified_at", "updated_at", "last_login_at"):
+        if isinstance(user.get(field), datetime):
+            await mark_day_dirty(user[field])
+
+
+async def refresh_rollups(recompute_days: int = 0) -> int:
+    """
+    Refresh today, the previous `recompute_days` days and every dirty day.
+    """
+    today = day_start(datetime.utcnow())
+    days = {today - timedelta(days=offset) for offset in range(recompute_days + 1)}
+
+    try:
+        dirty = await redis_client.spop(DIRTY_DAYS_KEY, 1000) or []
+    except Exception as e:
+        print(f"[Dashboard Rollup] could not read dirty days: {e}")
+        dirty = []
+    days.update(datetime.strptime(key, "%Y-%m-%d") for key in dirty)
+
+    return await refresh_days(sorted(days))
+
+
+async def backfill_verified_at() -> int:
+    """
+    Date verifications made before `verified_at` existed, from the approved
+    verification record or else the last update. Returns how many were set.
+    """
+    dated = 0
+    async for user in user_collection.find(
+        {"is_verified": True, "verified_at": {"$exists": False}},
+        {"updated_at": 1, "created_at": 1}
+    ):
+        record = await verification_collection.find_one(
+            {"user_id": str(user["_id"]), "status": VerificationStatusEnum.APPROVED.value, "verified_at": {"$type": "date"}},
+            {"verified_at": 1},
+            sort=[("verified_at", -1)]
+        )
+        verified_at = record["verified_at"] if record else user.get("updated_at") or user.get("created_at")
+        await user_collection.update_one({"_id": user["_id"]}, {"$set": {"verified_at": verified_at}})
+        dated += 1
+    return dated
+
+
+async def backfill_rollups() -> int:
+    first_user = await user_collection.find_one({"created_at": {"$ne": None}}, {"created_at": 1}, sort=[("created_at", 1)])
+    if not first_user:
+        return 0
+    return await refresh_days(_days(first_user["created_at"], datetime.utcnow()))
+
+
+async def _range_active(buckets: List[dict], days: List[datetime]) -> int:
+    """
+    Distinct users across the range when every day has a login HyperLogLog,
+    otherwise the sum of the daily counts.
+    """
+    keys = [ACTIVE_USERS_KEY.format(day=day_key(day)) for day in days]
+    try:
+        if await redis_client.exists(*keys) == len(keys):
+            return await redis_client.pfcount(*keys)
+    except Exception as e:
+        print(f"[Dashboard Rollup] active user union failed: {e}")
+    return sum(bucket.get("active", 0) for bucket in buckets)
+
+
+async def get_rollup_range(start: datetime, end: datetime) -> dict:
+    """
+    Sum the daily buckets from `start` to `end` (whole UTC days).
+    Returns the totals, the gender split and the per-month revenue.
+    """
+    days = _days(start, end)
+    today_key = day_key(datetime.utcnow())
+
+    buckets = await dashboard_rollup_collection.find(
+        {"_id": {"$gte": day_key(days[0]), "$lte": day_key(days[-1])}}
+    ).sort("_id", 1).to_list(None)
+
+    today = next((bucket for bucket in buckets if bucket["_id"] == today_key), None)
+    if today_key <= day_key(days[-1]) and (
+        today is None
+        or (datetime.utcnow() - today["refreshed_at"]).total_seconds() > TODAY_REFRESH_SECONDS
+    ):
+        fresh = await compute_day(datetime.utcnow())
+        await dashboard_rollup_collection.replace_one({"_id": fresh["_id"]}, fresh, upsert=True)
+        buckets = [bucket for bucket in buckets if bucket["_id"] != today_key] + [fresh]
+
+    totals = {counter: 0 for counter in COUNTERS}
+    gender = {g: 0 for g in GENDERS}
+    monthly: Dict[tuple, float] = {}
+
+    for bucket in buckets:
+        for counter in COUNTERS:
+            totals[counter] += bucket.get(counter, 0)
+        for g in GENDERS:
+            gender[g] += bucket.get("gender", {}).get(g, 0)
+        if bucket.get("revenue"):
+            month = (bucket["day"].year, bucket["day"].month)
+            monthly[month] = monthly.get(month, 0) + bucket["revenue"]
+
+    totals["active"] = await _range_active(buckets, days)
+    totals["revenue"] = round(totals["revenue"], 2)
+
+    return {
+        "totals": totals,
+        "gender": gender,
+        "monthly_revenue": [(month, round(revenue, 2)) for month, revenue in sorted(monthly.items())],
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        print(f"Computed {asyncio.run(backfill_rollups())} daily rollups")
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -3,6 +3,7 @@
 from bson import ObjectId
 from config.db_config import file_collection
 from api.controller.files_controller import generate_file_url, save_file
+from services.image_derivative_service import enqueue_image_derivatives
 from datetime import datetime
 from config.models.user_models import Files, FileType
 from config.db_config import onboarding_collection
@@ -47,7 +48,9 @@ async def resolve_public_gallery_items(gallery: list):
 
         url = await generate_file_url(
             storage_key=file_doc["storage_key"],
-            backend=file_doc["storage_backend"]
+            backend=file_doc["storage_backend"],
+            size="medium",
+            variants=file_doc.get("variants")
         )
 
         resolved.append({
@@ -63,6 +66,10 @@ async def resolve_private_gallery_items(
     viewer_unlocked_images: set,
     is_owner: bool
 ):
+    """
+    Private gallery entries; only images the viewer owns or unlocked get a
+    signed URL, the others have `url` None.
+    """
     resolved = []
 
     for item in gallery:
@@ -80,8 +87,10 @@ async def resolve_private_gallery_items(
 
         url = await generate_file_url(
             file_doc["storage_key"],
-            file_doc["storage_backend"]
-        )
+            file_doc["storage_backend"],
+            size="medium",
+            variants=file_doc.get("variants")
+        ) if is_unlocked else None
 
         resolved.append({
             "file_id": file_id,
@@ -93,6 +102,28 @@ async def resolve_private_gallery_items(
 
     return resolved
 
+async def sign_private_gallery_urls(file_ids: list) -> dict:
+    """
+    {file_id: signed URL} for private images the caller already checked the
+    viewer may see, in one query.
+    """
+    object_ids = [ObjectId(file_id) for file_id in file_ids if ObjectId.is_valid(file_id)]
+    if not object_ids:
+        return {}
+
+    urls = {}
+    async for file_doc in file_collection.find(
+        {"_id": {"$in": object_ids}, "is_deleted": {"$ne": True}},
+        {"storage_key": 1, "storage_backend": 1, "variants": 1}
+    ):
+        urls[str(file_doc["_id"])] = await generate_file_url(
+            file_doc["storage_key"],
+            file_doc["storage_backend"],
+            size="medium",
+            variants=file_doc.get("variants")
+        )
+    return urls
+
 async def create_and_store_file(
     file_obj,
     user_id: str,
@@ -117,6 +148,7 @@ async def create_and_store_file(
     )
 
     result = await file_collection.insert_one(file_doc.dict(by_alias=True))
+    enqueue_image_derivatives(result.inserted_id)
 
     return {
         "file_id": str(result.inserted_id),
@@ -128,6 +160,8 @@ async def append_gallery_items(
     gallery_field: str,
     items: list
 ):
+    from services.profile_snapshot_service import invalidate_profile_snapshot
+
     await onboarding_collection.update_one(
         {"user_id": user_id},
         {
@@ -140,6 +174,7 @@ async def append_gallery_items(
         },
         upsert=True
     )
+    await invalidate_profile_snapshot(user_id)
 
 async def get_gallery_count(user_id: str, gallery_field: str) -> int:
     onboarding = await onboarding_collection.find_one(
@@ -160,7 +195,9 @@ async def find_gallery_item(user_id: str, gallery_field: str, file_id: str):
     )
 
 async def remove_gallery_item(user_id: str, gallery_field: str, file_id: str):
-    return await onboarding_collection.update_one(
+    from services.profile_snapshot_service import invalidate_profile_snapshot
+
+    result = await onboarding_collection.update_one(
         {"user_id": user_id},
         {
             "$pull": {
@@ -169,6 +206,8 @@ async def remove_gallery_item(user_id: str, gallery_field: str, file_id: str):
             "$set": {"updated_at": datetime.utcnow()}
         }
     )
+    await invalidate_profile_snapshot(user_id)
+    return result
 
 async def soft_delete_file(file_id: str, deleted_by: str):
     return await file_collection.update_one(
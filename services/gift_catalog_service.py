@@ -0,0 +1,109 @@
+#services/gift_catalog_service.py
+
+import asyncio
+import time
+from bson import ObjectId
+from config.db_config import gift_collection, file_collection
+from api.controller.files_controller import generate_file_url
+from core.utils.redis_helper import redis_client, hot_key_cache
+
+# Bumped on every gift change; read through the hot key cache so each worker
+# sees the new version as soon as Redis sends the invalidation.
+GIFT_CATALOG_VERSION_KEY = "hot:gift_catalog:version"
+
+# Rebuild at least this often so presigned S3 URLs (1h) never go stale
+GIFT_CATALOG_MAX_AGE = 1800
+
+
+# class for GiftCatalog
+class GiftCatalog:
+    """
+    In-memory copy of the active gift catalog with image URLs resolved.
+    """
+
+    def __init__(self):
+        self._items = []
+        self._version = None
+        self._loaded_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _current_version(self):
+        try:
+            return await hot_key_cache.get(GIFT_CATALOG_VERSION_KEY)
+        except Exception as e:
+            print(f"[Gift Catalog] version check failed: {e}")
+            return self._version
+
+    def _is_fresh(self, version) -> bool:
+        return bool(
+            self._loaded_at
+            and version == self._version
+            and time.monotonic() - self._loaded_at < GIFT_CATALOG_MAX_AGE
+        )
+
+    async def _load(self, version):
+        gifts = await gift_collection.find({"status": "active"}).to_list(length=None)
+
+        file_ids = [ObjectId(gift["file_id"]) for gift in gifts if gift.get("file_id")]
+        file_docs = await file_collection.find(
+            {"_id": {"$in": file_ids}, "is_deleted": False},
+            {"storage_key": 1, "storage_backend": 1, "variants": 1}
+        ).to_list(length=None)
+        files_by_id = {str(doc["_id"]): doc for doc in file_docs}
+
+        items = []
+        for gift in gifts:
+            file_doc = files_by_id.get(str(gift.get("file_id")))
+            if not file_doc:
+                continue
+
+            image_url = await generate_file_url(
+                file_doc["storage_key"],
+                file_doc["storage_backend"],
+                size="thumb",
+                variants=file_doc.get("variants")
+            )
+
+            items.append({
+                "gift_id": str(gift["_id"]),
+                "name": gift["name"],
+                "image_url": image_url,
+                "token": gift["token"]
+            })
+
+        self._items = items
+        self._version = version
+        self._loaded_at = time.monotonic()
+
+    async def get_items(self) -> list:
+        """
+        Active gifts as `{gift_id, name, image_url, token}` dicts.
+        The returned list is shared; callers must not mutate it.
+        """
+        version = await self._current_version()
+        if not self._is_fresh(version):
+            async with self._lock:
+                if not self._is_fresh(version):
+                    await self._load(version)
+        return self._items
+
+    def reset(self):
+        self._loaded_at = 0.0
+
+
+gift_catalog = GiftCatalog()
+
+
+async def get_active_gifts() -> list:
+    return await gift_catalog.get_items()
+
+
+async def invalidate_gift_catalog():
+    """
+    Call after any admin change to gifts or their images.
+    """
+    gift_catalog.reset()
+    try:
+        await redis_client.incr(GIFT_CATALOG_VERSION_KEY)
+    except Exception as e:
+        print(f"[Gift Catalog] invalidation failed: {e}")
@@ -0,0 +1,152 @@
+#services/image_derivative_service.py
+
+"""
+Sized WebP/AVIF derivatives of uploaded images.
+
+Uploads are stored as-is; `enqueue_image_derivatives` hands the file to the
+Celery worker, which writes one object per size and format next to the
+original (`<key>_thumb.webp`, `<key>_medium.avif`, ...) and records them on
+the file document under `variants`. Until then URLs fall back to the
+original. Backfill existing uploads with:
+
+    python -m services.image_derivative_service backfill
+"""
+import asyncio
+import io
+import os
+import sys
+from typing import Dict, Optional, Tuple
+from bson import ObjectId
+from PIL import Image, ImageOps, features
+from config.db_config import file_collection
+from api.controller.files_controller import read_file_bytes, write_file_bytes
+from core.utils.celery_app import celery_app
+
+# Longest edge in pixels; images are never upscaled
+IMAGE_SIZES = {"thumb": 160, "medium": 640, "full": 1280}
+
+IMAGE_FORMATS = {
+    "webp": {"quality": 80, "method": 4},
+    "avif": {"quality": 55, "speed": 6},
+}
+
+# File types shown to other users; selfies, audio and documents are skipped
+DERIVATIVE_FILE_TYPES = {
+    "profile_photo", "onboarding_image", "public_gallery", "private_gallery",
+    "gift", "contest", "contest_banner",
+}
+
+# Types embedded in search documents and profile snapshots
+PROFILE_FILE_TYPES = {"profile_photo", "onboarding_image", "public_gallery", "private_gallery"}
+
+SOURCE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+def derivative_key(storage_key: str, size: str, fmt: str) -> str:
+    base, _ = os.path.splitext(storage_key)
+    return f"{base}_{size}.{fmt}"
+
+
+def available_formats() -> list:
+    return [fmt for fmt in IMAGE_FORMATS if features.check(fmt)]
+
+
+def render_derivatives(content: bytes) -> Dict[Tuple[str, str], bytes]:
+    """
+    Decode once, then encode every size in every supported format.
+    CPU bound: run it off the event loop.
+    """
+    with Image.open(io.BytesIO(content)) as source:
+        image = ImageOps.exif_transpose(source)
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    rendered = {}
+    for size, edge in IMAGE_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((edge, edge), Image.LANCZOS)
+        for fmt in available_formats():
+            buffer = io.BytesIO()
+            resized.save(buffer, format=fmt.upper(), **IMAGE_FORMATS[fmt])
+            rendered[(size, fmt)] = buffer.getvalue()
+    return rendered
+
+
+async def generate_image_derivatives(file_id: str) -> Optional[dict]:
+    """
+    Build and store the derivatives of one file and record them on its
+    document. Idempotent: files that already have variants are skipped.
+    """
+    file_doc = await file_collection.find_one({"_id": ObjectId(file_id)})
+    if (
+        not file_doc
+        or file_doc.get("is_deleted")
+        or file_doc.get("variants")
+        or file_doc.get("file_type") not in DERIVATIVE_FILE_TYPES
+        or not file_doc["storage_key"].lower().endswith(SOURCE_EXTENSIONS)
+    ):
+        return None
+
+    storage_key = file_doc["storage_key"]
+    backend = file_doc["storage_backend"]
+
+    content = await read_file_bytes(storage_key, backend)
+    rendered = await asyncio.to_thread(render_derivatives, content)
+
+    variants = {}
+    for (size, fmt), data in rendered.items():
+        key = derivative_key(storage_key, size, fmt)
+        await write_file_bytes(key, data, f"image/{fmt}", backend)
+        variants.setdefault(size, {})[fmt] = key
+
+    await file_collection.update_one(
+        {"_id": file_doc["_id"]},
+        {"$set": {"variants": variants}}
+    )
+
+    uploaded_by = file_doc.get("uploaded_by")
+    if uploaded_by and file_doc["file_type"] in PROFILE_FILE_TYPES:
+        # Imported lazily: both modules resolve photos through files_controller
+        from services.profile_snapshot_service import invalidate_profile_snapshot
+        from services.search_profile_service import sync_search_profile
+        await sync_search_profile(str(uploaded_by))
+        await invalidate_profile_snapshot(str(uploaded_by))
+
+    return variants
+
+
+def enqueue_image_derivatives(file_id: str):
+    """
+    Queue derivative generation for a freshly stored upload.
+    Never raises: the original stays usable and backfill can catch up.
+    """
+    try:
+        celery_app.send_task("tasks.generate_image_derivatives", args=[str(file_id)])
+    except Exception as e:
+        print(f"[Image Derivatives] enqueue failed for {file_id}: {e}")
+
+
+async def backfill_image_derivatives() -> int:
+    generated = 0
+    cursor = file_collection.find(
+        {
+            "file_type": {"$in": list(DERIVATIVE_FILE_TYPES)},
+            "is_deleted": {"$ne": True},
+            "variants": None
+        },
+        {"_id": 1}
+    )
+    async for file_doc in cursor:
+        try:
+            if await generate_image_derivatives(str(file_doc["_id"])):
+                generated += 1
+        except Exception as e:
+            print(f"[Image Derivatives] failed for {file_doc['_id']}: {e}")
+    return generated
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        print(f"Generated derivatives for {asyncio.run(backfill_image_derivatives())} files")
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -0,0 +1,109 @@
+#services/job_services/contest_deadlines.py
+
+"""
+Deadline queue for contest phase transitions.
+
+A Redis sorted set holds one member per pending transition,
+"<action>:<contest_history_id>", scored by its due time (epoch seconds):
+
+  - declare_winners  at the history's voting end,
+  - next_cycle       when a recurring contest is due for its next history
+                     (queued once the winners of the current one are declared).
+
+The beat task `tasks.fire_contest_deadlines` runs every few seconds and only
+reads the due head of the set, so it costs the same with ten contests or ten
+thousand. Claiming a member leases it: one script moves its score
+DEADLINE_RETRY_SECONDS ahead, so concurrent workers never run the same
+transition twice and a worker that dies mid-transition only delays it by
+the lease. The member is removed once its transition succeeded, unless it
+was rescheduled meanwhile. The transitions re-check the database before
+writing.
+"""
+from datetime import datetime, timezone
+import time
+from typing import List, Tuple
+
+from core.utils.redis_helper import redis_client
+
+CONTEST_DEADLINES_KEY = "contest:deadlines"
+
+DECLARE_WINNERS = "declare_winners"
+NEXT_CYCLE = "next_cycle"
+
+# Most transitions claimed by one run; the rest wait for the next tick
+DEADLINE_BATCH_SIZE = 100
+
+# Delay before a failed transition is tried again
+DEADLINE_RETRY_SECONDS = 60
+
+# Fire just after the deadline so the `now > voting_end` checks downstream pass
+DEADLINE_GRACE_SECONDS = 1
+
+# Lease the due head: KEYS[1] set, ARGV now, lease score, limit
+_CLAIM_SCRIPT = """
+local due = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, tonumber(ARGV[3]))
+for _, member in ipairs(due) do
+    redis.call('ZADD', KEYS[1], 'XX', ARGV[2], member)
+end
+return due
+"""
+
+# Remove a member only while it still carries the lease score
+_COMPLETE_SCRIPT = """
+local score = redis.call('ZSCORE', KEYS[1], ARGV[1])
+if score and tonumber(score) == tonumber(ARGV[2]) then
+    return redis.call('ZREM', KEYS[1], ARGV[1])
+end
+return 0
+"""
+
+_claim_script = redis_client.register_script(_CLAIM_SCRIPT)
+_complete_script = redis_client.register_script(_COMPLETE_SCRIPT)
+
+
+def deadline_score(due: datetime) -> float:
+    # Mongo hands datetimes back naive; they are UTC
+    if due.tzinfo is None:
+        due = due.replace(tzinfo=timezone.utc)
+    return due.timestamp() + DEADLINE_GRACE_SECONDS
+
+
+async def schedule_contest_deadline(contest_history_id: str, action: str, due: datetime):
+    """
+    Queue (or move) one transition. Never raises: the daily reschedule pass
+    re-queues anything missed.
+    """
+    try:
+        await redis_client.zadd(CONTEST_DEADLINES_KEY, {f"{action}:{contest_history_id}": deadline_score(due)})
+    except Exception as e:
+        print(f"[Contest Deadlines] could not schedule {action} for {contest_history_id}: {e}")
+
+
+async def claim_due_deadlines(limit: int = DEADLINE_BATCH_SIZE) -> Tuple[List[Tuple[str, str]], float]:
+    """
+    Lease the transitions that are due. Returns their (action,
+    contest_history_id) and the lease score to pass to
+    `complete_contest_deadline`.
+    """
+    now = time.time()
+    lease = now + DEADLINE_RETRY_SECONDS
+    members = await _claim_script(keys=[CONTEST_DEADLINES_KEY], args=[now, lease, limit])
+    return [tuple(member.split(":", 1)) for member in members], lease
+
+
+async def complete_contest_deadline(contest_history_id: str, action: str, lease: float):
+    """
+    Drop a fired transition. Never raises: a member left behind fires again
+    after the lease, and the transitions are idempotent.
+    """
+    try:
+        await _complete_script(keys=[CONTEST_DEADLINES_KEY], args=[f"{action}:{contest_history_id}", lease])
+    except Exception as e:
+        print(f"[Contest Deadlines] could not complete {action} for {contest_history_id}: {e}")
+
+
+async def retry_contest_deadline(contest_history_id: str, action: str):
+    await redis_client.zadd(
+        CONTEST_DEADLINES_KEY,
+        {f"{action}:{contest_history_id}": time.time() + DEADLINE_RETRY_SECONDS}
+    )
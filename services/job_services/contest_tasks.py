@@ -1,23 +1,18 @@
-import asyncio
 from datetime import datetime, timedelta, timezone
+from bson import ObjectId
 from config.db_config import contest_collection, contest_history_collection, contest_winner_collection
 from dateutil.relativedelta import relativedelta
 from core.utils.core_enums import ContestFrequency
 from config.models.contest_model import auto_declare_winners
 from core.utils.leaderboard.leaderboard_helper import LeaderboardRedisHelper
+from core.utils.celery_async import gather_bounded
+from services.job_services.contest_deadlines import (
+    DECLARE_WINNERS, NEXT_CYCLE, claim_due_deadlines, complete_contest_deadline, retry_contest_deadline,
+    schedule_contest_deadline
+)
 
-_loop = None
 leaderboard_helper = LeaderboardRedisHelper()
 
-def get_loop():
-    global _loop
-
-    if _loop is None or _loop.is_closed():
-        _loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(_loop)
-
-    return _loop
-
 def increment_version(version: str) -> str:
     major, minor, patch = map(int, version.split("."))
     patch += 1
@@ -81,7 +76,7 @@ async def create_next_history(contest, latest, start_date, new_version):
     )
 
     # insert new version
-    await contest_history_collection.insert_one({
+    result = await contest_history_collection.insert_one({
         "contest_id": str(contest["_id"]),
         "contest_version": new_version,
 
@@ -102,6 +97,7 @@ async def create_next_history(contest, latest, start_date, new_version):
         "created_at": datetime.now(timezone.utc),
         "updated_at": datetime.now(timezone.utc),
     })
+    await schedule_contest_deadline(str(result.inserted_id), DECLARE_WINNERS, voting_end)
 
     # -----------------------------
     # 3 Update main contest document
@@ -168,8 +164,11 @@ async def generate_contest_cycles_job():
         "frequency": {"$ne": "non_recurring"}
     }).to_list(None)
 
-    for contest in contests:
-        await process_contest(contest, now)
+    # Each contest only touches its own history, so they advance concurrently
+    results = await gather_bounded(lambda contest: process_contest(contest, now), contests)
+    for contest, result in zip(contests, results):
+        if isinstance(result, Exception):
+            print(f"[Contest Cycles] failed for {contest['_id']}: {result}")
 
 async def declare_contest_winners_job():
     """
@@ -207,4 +206,85 @@ async def declare_contest_winners_job():
     return {
         "status": "success",
         "message": "contest winners declared successfully"
-    }
\ No newline at end of file
+    }
+
+
+def _as_utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+async def schedule_next_cycle(history: dict):
+    next_cycle_date = resolve_next_cycle_from_end(_as_utc(history["voting_end"]), history.get("cycle_type"))
+    if next_cycle_date:
+        await schedule_contest_deadline(str(history["_id"]), NEXT_CYCLE, next_cycle_date)
+
+
+async def declare_history_winners(history: dict):
+    """
+    Declare the winners of one ended history once, then queue the next
+    cycle of a recurring contest.
+    """
+    if not history.get("winners_declared_at"):
+        await auto_declare_winners(history["contest_id"])
+        marked = await contest_history_collection.update_one(
+            {"_id": history["_id"], "winners_declared_at": None},
+            {"$set": {"winners_declared_at": datetime.now(timezone.utc)}}
+        )
+        if marked.modified_count:
+            await leaderboard_helper.reset_contest()
+
+    await schedule_next_cycle(history)
+
+
+async def advance_history_cycle(history: dict):
+    contest = await contest_collection.find_one({
+        "_id": ObjectId(history["contest_id"]),
+        "is_active": True,
+        "is_deleted": False
+    })
+    if contest:
+        await process_contest(contest, datetime.now(timezone.utc))
+
+
+CONTEST_DEADLINE_ACTIONS = {
+    DECLARE_WINNERS: declare_history_winners,
+    NEXT_CYCLE: advance_history_cycle,
+}
+
+
+async def fire_due_contest_deadlines() -> int:
+    """
+    Run every contest transition that is due. Failed ones are retried shortly.
+    """
+    fired = 0
+    claimed, lease = await claim_due_deadlines()
+    for action, contest_history_id in claimed:
+        try:
+            handler = CONTEST_DEADLINE_ACTIONS.get(action)
+            history = await contest_history_collection.find_one({"_id": ObjectId(contest_history_id)})
+            if handler and history:
+                await handler(history)
+                fired += 1
+            await complete_contest_deadline(contest_history_id, action, lease)
+        except Exception as e:
+            print(f"[Contest Deadlines] {action} failed for {contest_history_id}: {e}")
+            await retry_contest_deadline(contest_history_id, action)
+    return fired
+
+
+async def reschedule_contest_deadlines() -> int:
+    """
+    Re-queue the pending transition of every active history (idempotent).
+    Repairs the queue after a Redis loss and seeds it on first deployment.
+    """
+    scheduled = 0
+    async for history in contest_history_collection.find(
+        {"is_active": True, "voting_end": {"$ne": None}},
+        {"voting_end": 1, "cycle_type": 1, "winners_declared_at": 1}
+    ):
+        if history.get("winners_declared_at"):
+            await schedule_next_cycle(history)
+        else:
+            await schedule_contest_deadline(str(history["_id"]), DECLARE_WINNERS, history["voting_end"])
+        scheduled += 1
+    return scheduled
@@ -1,172 +1,194 @@
-from datetime import timezone, datetime
+"""
+Nightly subscription jobs: expiry reminders and expiry / renewal.
+
+Both walk `transaction` through idx_txn_subscription_expiry in chunks of
+SUBSCRIPTION_CHUNK_SIZE, load the owners of a chunk with one query and
+write the results with bulk operations. A transaction is stamped once
+handled (`expiry_notified_at`, `expiry_processed_at`) at the end of its
+chunk, so an interrupted run resumes with the first unfinished chunk.
+"""
+from datetime import timezone, datetime, timedelta
+from typing import List, Tuple
+from pymongo import UpdateOne
 from config.db_config import user_collection, transaction_collection
-from config.models.user_models import find_expiring_subscriptions
 from core.templates.email_templates import subscription_expiry_template
-from core.utils.core_enums import NotificationRecipientType, NotificationType, MembershipStatus, MembershipType
-from core.utils.send_mail import smtp_send_email
-from services.notification_service import send_notification
+from core.utils.celery_app import celery_app
+from core.utils.core_enums import NotificationType, MembershipStatus, MembershipType, TransactionType
+from services.notification_service import send_bulk_notification
+from services.profile_snapshot_service import invalidate_profile_snapshot
 
+SUBSCRIPTION_CHUNK_SIZE = 500
 
-async def notify_expiring_subscriptions(days_before: int):
-    subs = await find_expiring_subscriptions(days_before)
-
-    for sub in subs:
-        lang = sub.get("language", "en")
-        email = sub.get("email",None)
-        email_data = subscription_expiry_template(lang=lang, username=sub.get("username",None))
-        await send_notification(
-            recipient_id=str(sub["_id"]),
-            recipient_type=NotificationRecipientType.USER,
-            notification_type=NotificationType.SUBSCRIPTION_EXPIRY,
-            title="PUSH_TITLE_SUBSCRIPTION_EXPIRING_SOON",
-            message="PUSH_MESSAGE_SUBSCRIPTION_EXPIRING_SOON",
-            send_push=True,
-        )
+USER_PROJECTION = {"membership_trans_id": 1, "membership_status": 1, "email": 1, "username": 1, "language": 1}
 
-        smtp_send_email(
-            to_email=email,
-            subject=email_data["title"],
-            body=email_data["body"]
-        )
 
-        # mark notification sent
-        await transaction_collection.update_one(
-            {"_id": sub["active_subscription"][0]["_id"]},
-            {"$set": {"expiry_notified_at": datetime.now(timezone.utc)}}
-        )
-
-async def expire_and_activate_subscriptions_job():
+def _subscriptions(**conditions) -> dict:
     """
-    1. Find users with expired active subscriptions
-    2. Check if they have other pending subscriptions
-    3. Activate next subscription OR mark as expired
+    Successful subscription transactions not yet expired by the job; the
+    equality fields lead idx_txn_subscription_expiry.
     """
-    today = datetime.now(tz=timezone.utc)
+    return {
+        "trans_type": TransactionType.SUBSCRIPTION_TRANSACTION.value,
+        "status": "success",
+        "expiry_processed_at": None,
+        **conditions
+    }
 
-    # Find users with active status but expired subscriptions
-    pipeline = [
-        {
-            "$match": {
-                "membership_status": MembershipStatus.ACTIVE.value
-            }
-        },
-        # 🔹 Convert string → ObjectId safely
-        {
-            "$addFields": {
-                "membership_trans_id_obj": {
-                    "$cond": [
-                        {
-                            "$and": [
-                                {"$ne": ["$membership_trans_id", None]},
-                                {"$eq": [{"$type": "$membership_trans_id"}, "string"]}
-                            ]
-                        },
-                        {"$toObjectId": "$membership_trans_id"},
-                        None
-                    ]
-                }
-            }
-        },
-        {
-            "$lookup": {
-                "from": "transaction",
-                "localField": "membership_trans_id_obj",
-                "foreignField": "_id",
-                "as": "transaction"
-            }
-        },
-        {
-            "$unwind": {
-                "path": "$transaction",
-                "preserveNullAndEmptyArrays": False
-            }
-        },
-        {
-            "$match": {
-                "transaction.trans_type": "subscription_transaction",
-                "transaction.status": "success",
-                "transaction.expires_at": {"$lt": today}
-            }
-        }
+
+async def _current_holders(transactions: List[dict]) -> List[Tuple[dict, dict]]:
+    """
+    (user, transaction) pairs where the transaction is the user's active
+    membership. `membership_trans_id` is stored both as ObjectId and string.
+    """
+    by_id = {str(txn["_id"]): txn for txn in transactions}
+    users = await user_collection.find(
+        {"_id": {"$in": list({txn["user_id"] for txn in transactions})}},
+        USER_PROJECTION
+    ).to_list(length=None)
+    return [
+        (user, by_id[str(user.get("membership_trans_id"))])
+        for user in users
+        if user.get("membership_status") == MembershipStatus.ACTIVE.value
+        and str(user.get("membership_trans_id")) in by_id
     ]
 
-    cursor = user_collection.aggregate(pipeline)
 
-    # Convert to list to see results
-    expired_users = await cursor.to_list(length=None)
+def _enqueue_expiry_email(user: dict):
+    if not user.get("email"):
+        return
+    email_data = subscription_expiry_template(lang=user.get("language", "en"), username=user.get("username"))
+    celery_app.send_task(
+        "tasks.send_email_task",
+        args=[user["email"], email_data["title"], email_data["body"]]
+    )
 
-    print(f"Found {len(expired_users)} users with expired subscriptions")
 
-    # Process each user
-    for user in expired_users:
-        await handle_subscription_expiry(user["_id"])
+async def notify_expiring_subscriptions(days_before: int):
+    """
+    Remind users whose active subscription ends within `days_before` days.
+    """
+    now = datetime.now(tz=timezone.utc)
+    target_date = now.date() + timedelta(days=days_before)
+    end = datetime.combine(target_date, datetime.max.time(), tzinfo=timezone.utc)
+    notified = 0
+
+    while True:
+        chunk = await transaction_collection.find(
+            _subscriptions(expires_at={"$gt": now, "$lte": end}, expiry_notified_at=None),
+            {"user_id": 1}
+        ).sort("expires_at", 1).limit(SUBSCRIPTION_CHUNK_SIZE).to_list(length=None)
+        if not chunk:
+            break
+
+        holders = await _current_holders(chunk)
+        await send_bulk_notification(
+            recipient_ids=[str(user["_id"]) for user, _ in holders],
+            notification_type=NotificationType.SUBSCRIPTION_EXPIRY,
+            title="PUSH_TITLE_SUBSCRIPTION_EXPIRING_SOON",
+            message="PUSH_MESSAGE_SUBSCRIPTION_EXPIRING_SOON",
+            send_push=True,
+        )
+        for user, _ in holders:
+            _enqueue_expiry_email(user)
 
+        # checkpoint: the whole chunk is done, including stacked / lapsed ones
+        await transaction_collection.update_many(
+            {"_id": {"$in": [txn["_id"] for txn in chunk]}},
+            {"$set": {"expiry_notified_at": datetime.now(timezone.utc)}}
+        )
+        notified += len(holders)
+
+    print(f"Queued expiry reminders for {notified} users")
+    return notified
 
-async def handle_subscription_expiry(user_id):
-    """Handle expiry for a specific user"""
 
-    # Find the next available (unused) subscription
-    next_subscription = await transaction_collection.find_one(
+async def _next_subscriptions(user_ids: list, now: datetime) -> dict:
+    """
+    Oldest paid, not yet activated, unexpired subscription per user (FIFO).
+    """
+    next_by_user = {}
+    cursor = transaction_collection.find(
         {
-            "user_id": user_id,
-            "trans_type": "subscription_transaction",
+            "user_id": {"$in": user_ids},
+            "trans_type": TransactionType.SUBSCRIPTION_TRANSACTION.value,
             "status": "success",
-            "is_activated": False,  # Not yet activated
-            "expires_at": {"$gte": datetime.now(tz=timezone.utc)}  # Not expired
+            "is_activated": False,
+            "expires_at": {"$gte": now}
         },
-        sort=[("created_at", 1)]  # Get oldest first (FIFO)
-    )
-
-    if next_subscription:
-        # Activate the next subscription
-        await activate_subscription(user_id, next_subscription)
-    else:
-        # No more subscriptions, mark user as expired
-        await mark_user_expired(user_id)
-
+        {"user_id": 1}
+    ).sort("created_at", 1)
+    async for txn in cursor:
+        next_by_user.setdefault(txn["user_id"], txn)
+    return next_by_user
 
-async def activate_subscription(user_id, subscription):
-    """Activate a new subscription for the user"""
 
-    # Update user with new active subscription
-    await user_collection.update_one(
-        {"_id": user_id},
-        {
-            "$set": {
-                "membership_trans_id": str(subscription["_id"]),
+async def expire_subscription_chunk(chunk: List[dict], now: datetime) -> Tuple[int, int]:
+    """
+    Move the holders of expired subscriptions to their next stacked
+    subscription or back to free. Returns (activated, expired).
+    """
+    holders = await _current_holders(chunk)
+    next_by_user = await _next_subscriptions([user["_id"] for user, _ in holders], now)
+
+    user_ops, txn_ops = [], []
+    for user, _ in holders:
+        # Guarded on the membership we are replacing, so a purchase made
+        # meanwhile is never overwritten
+        guard = {"_id": user["_id"], "membership_trans_id": user["membership_trans_id"]}
+        next_subscription = next_by_user.get(user["_id"])
+        if next_subscription:
+            user_ops.append(UpdateOne(guard, {"$set": {
+                "membership_trans_id": str(next_subscription["_id"]),
                 "membership_status": MembershipStatus.ACTIVE.value,
-                "updated_at": datetime.now(tz=timezone.utc)
-            }
-        }
-    )
-
-    # Mark this subscription as activated
-    await transaction_collection.update_one(
-        {"_id": subscription["_id"]},
-        {
-            "$set": {
-                "is_activated": True,
-                "activated_at": datetime.now(tz=timezone.utc)
-            }
-        }
-    )
-
-    print(f"Activated subscription {subscription['_id']} for user {user_id}")
-
-
-async def mark_user_expired(user_id):
-    """Mark user as expired when no subscriptions remain"""
-
-    await user_collection.update_one(
-        {"_id": user_id},
-        {
-            "$set": {
+                "updated_at": now
+            }}))
+            txn_ops.append(UpdateOne(
+                {"_id": next_subscription["_id"]},
+                {"$set": {"is_activated": True, "activated_at": now}}
+            ))
+        else:
+            user_ops.append(UpdateOne(guard, {"$set": {
                 "membership_status": MembershipStatus.EXPIRED.value,
-                "updated_at": datetime.now(tz=timezone.utc),
+                "updated_at": now,
                 "membership_type": MembershipType.FREE.value,
                 "membership_trans_id": None
-            }
-        }
+            }}))
+
+    # Users first: a rerun after a crash here finds them no longer holding
+    # the expired subscription and only finishes the checkpoint
+    if user_ops:
+        await user_collection.bulk_write(user_ops, ordered=False)
+    if txn_ops:
+        await transaction_collection.bulk_write(txn_ops, ordered=False)
+
+    await transaction_collection.update_many(
+        {"_id": {"$in": [txn["_id"] for txn in chunk]}},
+        {"$set": {"expiry_processed_at": now}}
     )
+    await invalidate_profile_snapshot(*[str(user["_id"]) for user, _ in holders])
+
+    return len(txn_ops), len(user_ops) - len(txn_ops)
+
 
-    print(f"Marked user {user_id} as expired")
+async def expire_and_activate_subscriptions_job():
+    """
+    1. Take expired, unprocessed subscription transactions in chunks
+    2. Activate the next stacked subscription of their holders
+    3. Otherwise mark the holders expired
+    """
+    now = datetime.now(tz=timezone.utc)
+    activated = expired = 0
+
+    while True:
+        chunk = await transaction_collection.find(
+            _subscriptions(expires_at={"$lt": now}),
+            {"user_id": 1}
+        ).sort("expires_at", 1).limit(SUBSCRIPTION_CHUNK_SIZE).to_list(length=None)
+        if not chunk:
+            break
+        chunk_activated, chunk_expired = await expire_subscription_chunk(chunk, now)
+        activated += chunk_activated
+        expired += chunk_expired
+
+    print(f"Activated {activated} stacked subscriptions, expired {expired} memberships")
+    return activated, expired
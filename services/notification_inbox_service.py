@@ -0,0 +1,228 @@
+#services/notification_inbox_service.py
+
+"""
+Notification inbox storage for users and admins.
+
+  - Listing is keyset-paginated on (created_at, _id), served by
+    idx_recipient_created.
+  - The unread badge is one Redis key per recipient,
+    `notifications:unread:{recipient_type}:{recipient_id}`. A missing
+    counter is seeded from idx_recipient_unread. Writes through this module
+    adjust it; a periodic reconcile recounts every live counter to repair
+    drift (TTL-archived or concurrently written notifications).
+  - Old notifications are archived by the TTL index on `archive_at`:
+    NOTIFICATION_UNREAD_RETENTION_DAYS after creation, moved forward to
+    NOTIFICATION_READ_RETENTION_DAYS after the notification is read.
+
+Existing notifications get their `archive_at` with:
+
+    python -m services.notification_inbox_service backfill
+"""
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from bson import ObjectId
+
+from config.db_config import notification_collection
+from core.utils.celery_async import gather_bounded
+from core.utils.pagination import StandardResultsSetPagination, fetch_with_has_next
+from core.utils.redis_helper import redis_client, redis_pipeline
+
+UNREAD_KEY = "notifications:unread:{recipient_type}:{recipient_id}"
+
+# Counters of recipients who stop opening the app are dropped, then reseeded
+UNREAD_COUNTER_TTL = 7 * 24 * 3600
+
+NOTIFICATION_UNREAD_RETENTION_DAYS = 180
+NOTIFICATION_READ_RETENTION_DAYS = 30
+
+
+def _unread_key(recipient_id: str, recipient_type: str) -> str:
+    return UNREAD_KEY.format(recipient_type=recipient_type, recipient_id=recipient_id)
+
+
+def inbox_filter(recipient_id: str, recipient_type: str) -> dict:
+    return {"recipient_id": recipient_id, "recipient_type": recipient_type}
+
+
+def _object_ids(notification_ids: List[str]) -> List[ObjectId]:
+    if not all(ObjectId.is_valid(notification_id) for notification_id in notification_ids):
+        raise ValueError("INVALID_NOTIFICATION_ID")
+    return [ObjectId(notification_id) for notification_id in notification_ids]
+
+
+async def _count_unread(recipient_id: str, recipient_type: str) -> int:
+    return await notification_collection.count_documents(
+        {**inbox_filter(recipient_id, recipient_type), "is_read": False}
+    )
+
+
+async def _adjust_unread(recipient_type: str, deltas: dict):
+    """
+    Apply {recipient_id: delta} to the counters that exist; missing ones are
+    seeded from MongoDB on their next read, which already sees the change.
+    """
+    keys = {recipient_id: _unread_key(recipient_id, recipient_type) for recipient_id in deltas}
+    try:
+        async with redis_pipeline() as pipe:
+            for key in keys.values():
+                pipe.exists(key)
+            exists = await pipe.execute()
+        async with redis_pipeline() as pipe:
+            for (recipient_id, key), present in zip(keys.items(), exists):
+                if present:
+                    pipe.incrby(key, deltas[recipient_id])
+            await pipe.execute()
+    except Exception as e:
+        print(f"[Notification Inbox] unread counter update failed: {e}")
+
+
+async def store_notifications(docs: List[dict]):
+    """
+    Insert notifications and count them as unread for their recipients.
+    All docs must share one recipient_type.
+    """
+    if not docs:
+        return
+    for doc in docs:
+        doc.setdefault("archive_at", doc["created_at"] + timedelta(days=NOTIFICATION_UNREAD_RETENTION_DAYS))
+
+    if len(docs) == 1:
+        await notification_collection.insert_one(docs[0])
+    else:
+        await notification_collection.insert_many(docs, ordered=False)
+
+    deltas = {}
+    for doc in docs:
+        deltas[doc["recipient_id"]] = deltas.get(doc["recipient_id"], 0) + 1
+    await _adjust_unread(docs[0]["recipient_type"], deltas)
+
+
+async def unread_count(recipient_id: str, recipient_type: str) -> int:
+    """
+    Unread badge: a single key read once the counter is seeded.
+    """
+    key = _unread_key(recipient_id, recipient_type)
+    try:
+        count = await redis_client.get(key)
+        if count is None:
+            await redis_client.set(key, await _count_unread(recipient_id, recipient_type), ex=UNREAD_COUNTER_TTL, nx=True)
+            count = await redis_client.get(key)
+        return max(0, int(count or 0))
+    except Exception as e:
+        print(f"[Notification Inbox] unread counter unavailable for {recipient_id}: {e}")
+        return await _count_unread(recipient_id, recipient_type)
+
+
+async def list_inbox(
+    recipient_id: str,
+    recipient_type: str,
+    pagination: StandardResultsSetPagination
+) -> Tuple[List[dict], Optional[str]]:
+    """
+    One page of the inbox, newest first, and the cursor of the next page.
+    """
+    page_query = {**inbox_filter(recipient_id, recipient_type), **pagination.keyset_match("created_at")}
+    notifications, has_next = await fetch_with_has_next(
+        notification_collection.find(page_query)
+        .sort([("created_at", -1), ("_id", -1)])
+        .skip(pagination.skip),
+        pagination.limit
+    )
+    return notifications, pagination.next_cursor(notifications, "created_at", has_next)
+
+
+async def mark_read(
+    recipient_id: str,
+    recipient_type: str,
+    notification_ids: Optional[List[str]] = None
+) -> int:
+    """
+    Mark the given notifications (all when `notification_ids` is None) of
+    one recipient read; returns how many were unread.
+    """
+    query = {**inbox_filter(recipient_id, recipient_type), "is_read": False}
+    if notification_ids is not None:
+        query["_id"] = {"$in": _object_ids(notification_ids)}
+
+    now = datetime.now(timezone.utc)
+    result = await notification_collection.update_many(query, {"$set": {
+        "is_read": True,
+        "read_at": now,
+        "archive_at": now + timedelta(days=NOTIFICATION_READ_RETENTION_DAYS)
+    }})
+
+    if notification_ids is None:
+        try:
+            await redis_client.set(_unread_key(recipient_id, recipient_type), 0, ex=UNREAD_COUNTER_TTL)
+        except Exception as e:
+            print(f"[Notification Inbox] could not reset unread counter of {recipient_id}: {e}")
+    elif result.modified_count:
+        await _adjust_unread(recipient_type, {recipient_id: -result.modified_count})
+    return result.modified_count
+
+
+async def mark_one_read(recipient_id: str, recipient_type: str, notification_id: str):
+    """
+    Mark a single notification read; reading it twice is not an error.
+    """
+    if await mark_read(recipient_id, recipient_type, [notification_id]):
+        return
+    exists = await notification_collection.count_documents(
+        {**inbox_filter(recipient_id, recipient_type), "_id": ObjectId(notification_id)},
+        limit=1
+    )
+    if not exists:
+        raise ValueError("NOTIFICATION_NOT_FOUND")
+
+
+async def _reconcile_counter(key: str):
+    _, _, recipient_type, recipient_id = key.split(":", 3)
+    count = await _count_unread(recipient_id, recipient_type)
+    await redis_client.set(key, count, keepttl=True, xx=True)
+
+
+async def reconcile_unread_counters(batch_size: int = 500) -> int:
+    """
+    Recount every live unread counter from MongoDB.
+    """
+    reconciled = 0
+    batch = []
+    async for key in redis_client.scan_iter(match=UNREAD_KEY.format(recipient_type="*", recipient_id="*"), count=batch_size):
+        batch.append(key)
+        if len(batch) >= batch_size:
+            await gather_bounded(_reconcile_counter, batch)
+            reconciled += len(batch)
+            batch = []
+    if batch:
+        await gather_bounded(_reconcile_counter, batch)
+        reconciled += len(batch)
+    return reconciled
+
+
+async def backfill_archive_at() -> int:
+    """
+    Give notifications written before the inbox its archive date.
+    """
+    result = await notification_collection.update_many(
+        {"archive_at": {"$exists": False}, "created_at": {"$type": "date"}},
+        [{"$set": {"archive_at": {"$add": [
+            {"$ifNull": ["$read_at", "$created_at"]},
+            {"$cond": [
+                {"$eq": ["$is_read", True]},
+                NOTIFICATION_READ_RETENTION_DAYS * 24 * 3600 * 1000,
+                NOTIFICATION_UNREAD_RETENTION_DAYS * 24 * 3600 * 1000
+            ]}
+        ]}}}]
+    )
+    return result.modified_count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "backfill":
+        print(f"Set archive_at on {asyncio.run(backfill_archive_at())} notifications")
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -1,13 +1,16 @@
 from datetime import datetime, timezone
-from typing import Optional
+from typing import List, Optional
 from bson import ObjectId
 from core.firebase_push import send_push_notification
 from core.utils.core_enums import NotificationType, NotificationRecipientType
-from config.db_config import notification_collection , user_collection , admin_collection
+from config.db_config import user_collection , admin_collection
 from core.utils.send_mail import smtp_send_email
 from services.translation import translate_message
+from core.utils.celery_async import gather_bounded
+from services.notification_inbox_service import store_notifications
 import firebase_admin
 from firebase_admin import messaging
+from core.firebase import get_messaging
 
 async def send_notification(
     *,
@@ -73,7 +76,7 @@ async def send_notification(
     }
 
     # Store in DB
-    await notification_collection.insert_one(notification_doc)
+    await store_notifications([notification_doc])
 
     # Send push notification (if required)
     if send_push:
@@ -90,6 +93,61 @@ async def send_notification(
 
     return True
 
+async def send_bulk_notification(
+    *,
+    recipient_ids: List[str],
+    notification_type: NotificationType,
+    title: str,
+    message: str,
+    send_push: bool = False
+):
+    """
+    send_notification for many users at once: one language lookup, one
+    insert, then pushes with bounded concurrency.
+    """
+    if not recipient_ids:
+        return
+
+    users = await user_collection.find(
+        {"_id": {"$in": [ObjectId(recipient_id) for recipient_id in recipient_ids]}},
+        {"language": 1}
+    ).to_list(length=None)
+    languages = {str(user["_id"]): user.get("language", "en") for user in users}
+
+    now = datetime.now(timezone.utc)
+    await store_notifications([
+        {
+            "recipient_id": recipient_id,
+            "recipient_type": NotificationRecipientType.USER.value,
+            "type": notification_type.value,
+            "title": title,
+            "message": message,
+            "reference": None,
+            "sender_user_id": None,
+            "is_read": False,
+            "read_at": None,
+            "created_at": now
+        }
+        for recipient_id in recipient_ids
+    ])
+
+    if not send_push:
+        return
+
+    async def push(recipient_id: str):
+        lang = languages.get(recipient_id, "en")
+        try:
+            await send_push_notification(
+                user_id=recipient_id,
+                title=translate_message(title, lang),
+                body=translate_message(message, lang),
+                data={}
+            )
+        except Exception as e:
+            print(f"[Notification Push Failed] {e}")
+
+    await gather_bounded(push, recipient_ids)
+
 async def send_topic_notification(topic: str, title: str, body: str, data: dict):
 
     try:
@@ -105,7 +163,7 @@ async def send_topic_notification(topic: str, title: str, body: str, data: dict)
             data={k: str(v) for k, v in data.items()}
         )
 
-        response = messaging.send(message)
+        response = get_messaging().send(message)
 
         print(f"[TOPIC PUSH SUCCESS] Message ID: {response}")
 
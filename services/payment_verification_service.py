@@ -0,0 +1,377 @@
+#services/payment_verification_service.py
+
+"""
+Asynchronous verification of Tron payments (subscriptions and token packages).
+
+The API only records a verification in `payment_verifications` and queues
+`tasks.verify_payment`; the worker fetches the transaction from the chain,
+validates it and settles the purchase with the same helpers the synchronous
+endpoints used. The client polls the verification, and is notified once it
+completes or fails.
+
+  - One verification per `tron_txn_id` (unique index), so a retried
+    request returns the verification already in flight instead of starting
+    another. A failed one can be resubmitted by the same user.
+  - A transaction the chain does not report yet (not found / unconfirmed)
+    is polled again with exponential backoff, PAYMENT_VERIFY_MAX_ATTEMPTS
+    times at most. Invalid payments fail at once.
+  - The worker claims a verification (`pending` -> `processing`) before
+    touching it, so duplicate task deliveries are no-ops. Verifications
+    whose task was lost are re-queued by `tasks.requeue_payment_verifications`.
+    A re-claimed verification whose transaction is already recorded for
+    the user completes without settling again.
+"""
+from datetime import datetime, timedelta
+from typing import Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from config.db_config import payment_verification_collection
+from config.models.subscription_plan_models import get_subscription_plan
+from config.models.token_packages_plan_model import get_token_packages_plan
+from config.models.transaction_models import store_transaction_details, get_existing_transaction, \
+    get_subscription_payment_details, update_transaction_details, get_settled_transaction
+from core.utils.celery_app import celery_app
+from core.utils.core_enums import PaymentVerificationStatus, TransactionStatus, TransactionType, \
+    NotificationType, NotificationRecipientType
+from core.utils.exceptions import CustomValidationError
+from core.utils.helper import serialize_datetime_fields, convert_objectid_to_str
+from core.utils.response_mixin import CustomResponseMixin
+from core.utils.transaction_helper import get_transaction_details, validate_destination_wallet, \
+    validate_transaction_status, build_transaction_model, handle_full_payment, mark_full_payment_received, \
+    handle_token_full_payment, mark_token_full_payment_received
+from services.notification_service import send_notification
+from services.translation import translate_message
+
+response = CustomResponseMixin()
+
+SUBSCRIPTION = "subscription"
+SUBSCRIPTION_REMAINING = "subscription_remaining"
+TOKEN_PACKAGE = "token_package"
+TOKEN_REMAINING = "token_remaining"
+
+# Chain polling: 10s, 20s, 40s ... capped at 5 min, ~30 min in total
+PAYMENT_VERIFY_BASE_DELAY = 10
+PAYMENT_VERIFY_MAX_DELAY = 300
+PAYMENT_VERIFY_MAX_ATTEMPTS = 10
+
+# A claim older than this belongs to a worker that died mid-verification
+PAYMENT_VERIFY_CLAIM_TIMEOUT = 300
+
+# get_transaction_details raises this status while the chain has no result yet
+CHAIN_PENDING_STATUS = 502
+
+
+def _enqueue(verification_id, countdown: int = 0):
+    try:
+        celery_app.send_task("tasks.verify_payment", args=[str(verification_id)], countdown=countdown)
+    except Exception as e:
+        # Picked up by the requeue sweep
+        print(f"[Payment Verification] enqueue failed for {verification_id}: {e}")
+
+
+def format_verification(verification: dict) -> dict:
+    return serialize_datetime_fields(convert_objectid_to_str({
+        "verification_id": verification["_id"],
+        "tron_txn_id": verification["tron_txn_id"],
+        "status": verification["status"],
+        "attempts": verification.get("attempts", 0),
+        "result": verification.get("result"),
+        "error": verification.get("error"),
+    }))
+
+
+async def submit_payment_verification(
+    *,
+    kind: str,
+    user_id: str,
+    tron_txn_id: str,
+    lang: str,
+    plan_id: Optional[str] = None,
+    trans_id: Optional[str] = None
+) -> dict:
+    """
+    Record a verification for `tron_txn_id` and queue it, or return the one
+    already recorded for this user and txid.
+    """
+    # Already settled through another verification or the old endpoints
+    await get_existing_transaction(tron_txn_id, lang=lang)
+
+    now = datetime.utcnow()
+    verification = {
+        "tron_txn_id": tron_txn_id,
+        "user_id": user_id,
+        "kind": kind,
+        "plan_id": plan_id,
+        "trans_id": trans_id,
+        "lang": lang,
+        "status": PaymentVerificationStatus.PENDING.value,
+        "attempts": 0,
+        "next_attempt_at": now,
+        "result": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    try:
+        result = await payment_verification_collection.insert_one(verification)
+        verification["_id"] = result.inserted_id
+    except DuplicateKeyError:
+        existing = await payment_verification_collection.find_one({"tron_txn_id": tron_txn_id})
+        if existing is None or existing["user_id"] != user_id:
+            raise response.raise_exception(translate_message("ALREADY_SUBSCRIBED_USING_THIS_TRANSACTION_ID",
+                                                             lang=lang), data=[], status_code=400)
+        if existing["status"] != PaymentVerificationStatus.FAILED.value:
+            return existing
+        # Resubmitted after a failure: start over with the new request
+        verification = await payment_verification_collection.find_one_and_update(
+            {"_id": existing["_id"], "status": PaymentVerificationStatus.FAILED.value},
+            # insert_one stamped the rejected document with an _id of its own
+            {"$set": {k: v for k, v in verification.items() if k not in ("_id", "created_at")}},
+            return_document=ReturnDocument.AFTER
+        )
+        if verification is None:
+            return await payment_verification_collection.find_one({"_id": existing["_id"]})
+
+    _enqueue(verification["_id"])
+    return verification
+
+
+async def get_payment_verification(verification_id: str, user_id: str) -> Optional[dict]:
+    if not ObjectId.is_valid(verification_id):
+        return None
+    return await payment_verification_collection.find_one({"_id": ObjectId(verification_id), "user_id": user_id})
+
+
+def _plan_or_raise(plan_data, message: str, lang: str) -> dict:
+    # The plan lookups answer a missing plan with a response, not an exception
+    if not isinstance(plan_data, dict):
+        raise response.raise_exception(translate_message(message, lang=lang), data=[], status_code=404)
+    return plan_data
+
+
+async def _settle_subscription(verification: dict, transaction_details: dict, lang: str) -> dict:
+    user_id = verification["user_id"]
+    plan_data = _plan_or_raise(
+        await get_subscription_plan(verification["plan_id"], lang=lang), "SUBSCRIPTION_PLAN_NOT_FOUND", lang
+    )
+    transaction_data = await build_transaction_model(
+        user_id=user_id,
+        plan_data=plan_data,
+        transaction_details=transaction_details,
+        trans_type=TransactionType.SUBSCRIPTION_TRANSACTION.value
+    )
+    if transaction_data.status == TransactionStatus.PARTIAL.value:
+        transaction_data.payment_details = [transaction_data.payment_details]
+        return await store_transaction_details(transaction_data)
+    return await handle_full_payment(transaction_data=transaction_data, plan_data=plan_data, user_id=user_id)
+
+
+async def _settle_subscription_remaining(verification: dict, transaction_details: dict, lang: str) -> dict:
+    user_id = verification["user_id"]
+    partial_payment_data = await get_subscription_payment_details(verification["trans_id"], lang=lang)
+    plan_data = _plan_or_raise(
+        await get_subscription_plan(partial_payment_data.get("plan_id"), lang=lang), "SUBSCRIPTION_PLAN_NOT_FOUND", lang
+    )
+    transaction_data = await build_transaction_model(
+        user_id=user_id,
+        plan_data=plan_data,
+        transaction_details=transaction_details,
+        partial_payment_data=partial_payment_data,
+        trans_type=TransactionType.SUBSCRIPTION_TRANSACTION.value
+    )
+    if transaction_data.status == TransactionStatus.PARTIAL.value:
+        return await update_transaction_details(transaction_data, verification["trans_id"])
+    return await mark_full_payment_received(
+        transaction_data=transaction_data,
+        plan_data=plan_data,
+        user_id=user_id,
+        subscription_id=verification["trans_id"]
+    )
+
+
+async def _settle_token_package(verification: dict, transaction_details: dict, lang: str) -> dict:
+    user_id = verification["user_id"]
+    plan_data = _plan_or_raise(
+        await get_token_packages_plan(verification["plan_id"], lang=lang), "TOKEN_PACKAGE_PLAN_NOT_FOUND", lang
+    )
+    transaction_data = await build_transaction_model(
+        user_id=user_id,
+        plan_data=plan_data,
+        transaction_details=transaction_details,
+        trans_type=TransactionType.TOKEN_TRANSACTION.value
+    )
+    if transaction_data.status == TransactionStatus.PARTIAL.value:
+        transaction_data.payment_details = [transaction_data.payment_details]
+        # Tokens are credited once the remaining amount is paid
+        doc = await store_transaction_details(transaction_data)
+    else:
+        doc = await handle_token_full_payment(
+            transaction_data=transaction_data,
+            plan_data=plan_data,
+            user_id=user_id,
+            insert_token=True
+        )
+    doc["tokens"] = plan_data["tokens"]
+    return doc
+
+
+async def _settle_token_remaining(verification: dict, transaction_details: dict, lang: str) -> dict:
+    user_id = verification["user_id"]
+    partial_payment_data = await get_subscription_payment_details(verification["trans_id"], lang=lang)
+    plan_data = _plan_or_raise(
+        await get_token_packages_plan(partial_payment_data.get("plan_id"), lang=lang), "TOKEN_PACKAGE_PLAN_NOT_FOUND", lang
+    )
+    transaction_data = await build_transaction_model(
+        user_id=user_id,
+        plan_data=plan_data,
+        transaction_details=transaction_details,
+        partial_payment_data=partial_payment_data,
+        trans_type=TransactionType.TOKEN_TRANSACTION.value
+    )
+    if transaction_data.status == TransactionStatus.PARTIAL.value:
+        doc = await update_transaction_details(transaction_data, verification["trans_id"])
+    else:
+        doc = await mark_token_full_payment_received(
+            transaction_data=transaction_data,
+            plan_data=plan_data,
+            user_id=user_id,
+            package_id=verification["trans_id"]
+        )
+    doc["tokens"] = plan_data["tokens"]
+    return doc
+
+
+SETTLEMENTS = {
+    SUBSCRIPTION: _settle_subscription,
+    SUBSCRIPTION_REMAINING: _settle_subscription_remaining,
+    TOKEN_PACKAGE: _settle_token_package,
+    TOKEN_REMAINING: _settle_token_remaining,
+}
+
+
+async def _claim(verification_id: str) -> Optional[dict]:
+    now = datetime.utcnow()
+    return await payment_verification_collection.find_one_and_update(
+        {
+            "_id": ObjectId(verification_id),
+            "$or": [
+                {"status": PaymentVerificationStatus.PENDING.value},
+                {
+                    "status": PaymentVerificationStatus.PROCESSING.value,
+                    "claimed_at": {"$lt": now - timedelta(seconds=PAYMENT_VERIFY_CLAIM_TIMEOUT)}
+                },
+            ],
+        },
+        {
+            "$set": {"status": PaymentVerificationStatus.PROCESSING.value, "claimed_at": now, "updated_at": now},
+            "$inc": {"attempts": 1},
+        },
+        return_document=ReturnDocument.AFTER
+    )
+
+
+async def _notify(verification: dict, succeeded: bool):
+    try:
+        await send_notification(
+            recipient_id=verification["user_id"],
+            recipient_type=NotificationRecipientType.USER,
+            notification_type=NotificationType.PAYMENT_VERIFICATION,
+            title="PAYMENT_VERIFIED_TITLE" if succeeded else "PAYMENT_VERIFICATION_FAILED_TITLE",
+            message="PAYMENT_VERIFIED_MESSAGE" if succeeded else "PAYMENT_VERIFICATION_FAILED_MESSAGE",
+            reference={"verification_id": str(verification["_id"]), "tron_txn_id": verification["tron_txn_id"]},
+            send_push=True,
+            push_data={"verification_id": str(verification["_id"]), "status": verification["status"]}
+        )
+    except Exception as e:
+        print(f"[Payment Verification] notification failed for {verification['_id']}: {e}")
+
+
+async def _finish(verification: dict, status: PaymentVerificationStatus, **fields) -> dict:
+    verification = await payment_verification_collection.find_one_and_update(
+        {"_id": verification["_id"]},
+        {"$set": {"status": status.value, "updated_at": datetime.utcnow(), **fields}},
+        return_document=ReturnDocument.AFTER
+    )
+    await _notify(verification, succeeded=status == PaymentVerificationStatus.COMPLETED)
+    return verification
+
+
+async def _retry_later(verification: dict, error: str) -> dict:
+    delay = min(PAYMENT_VERIFY_BASE_DELAY * 2 ** (verification["attempts"] - 1), PAYMENT_VERIFY_MAX_DELAY)
+    verification = await payment_verification_collection.find_one_and_update(
+        {"_id": verification["_id"]},
+        {"$set": {
+            "status": PaymentVerificationStatus.PENDING.value,
+            "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay),
+            "error": error,
+            "updated_at": datetime.utcnow(),
+        }},
+        return_document=ReturnDocument.AFTER
+    )
+    _enqueue(verification["_id"], countdown=delay)
+    return verification
+
+
+async def process_payment_verification(verification_id: str) -> Optional[dict]:
+    """
+    One attempt at a verification: poll the chain, then settle, retry later
+    or fail. Returns None when another worker holds or finished it.
+    """
+    verification = await _claim(verification_id)
+    if verification is None:
+        return None
+    lang = verification.get("lang") or "en"
+
+    # A worker that died after settling but before finishing left the
+    # transaction behind; the payment went through, so complete it
+    settled = await get_settled_transaction(verification["tron_txn_id"], verification["user_id"])
+    if settled:
+        return await _finish(verification, PaymentVerificationStatus.COMPLETED, result=settled, error=None)
+
+    try:
+        await get_existing_transaction(verification["tron_txn_id"], lang=lang)
+        transaction_details = await get_transaction_details(verification["tron_txn_id"], lang=lang)
+        validate_destination_wallet(transaction_details["to"], lang=lang)
+        validate_transaction_status(transaction_details["status"], lang=lang)
+    except CustomValidationError as error:
+        if error.status_code == CHAIN_PENDING_STATUS and verification["attempts"] < PAYMENT_VERIFY_MAX_ATTEMPTS:
+            return await _retry_later(verification, error.message)
+        return await _finish(verification, PaymentVerificationStatus.FAILED, error=error.message)
+    except Exception as e:
+        if verification["attempts"] < PAYMENT_VERIFY_MAX_ATTEMPTS:
+            return await _retry_later(verification, str(e))
+        return await _finish(verification, PaymentVerificationStatus.FAILED, error=str(e))
+
+    # Settlement writes are not retried: a failure here needs a look, not a replay
+    try:
+        doc = await SETTLEMENTS[verification["kind"]](verification, transaction_details, lang)
+    except CustomValidationError as error:
+        return await _finish(verification, PaymentVerificationStatus.FAILED, error=error.message)
+    except Exception as e:
+        print(f"[Payment Verification] settlement failed for {verification_id}: {e}")
+        return await _finish(verification, PaymentVerificationStatus.FAILED, error=str(e))
+
+    return await _finish(verification, PaymentVerificationStatus.COMPLETED, result=doc, error=None)
+
+
+async def requeue_payment_verifications() -> int:
+    """
+    Re-queue verifications whose task never ran (lost message, dead worker).
+    """
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=PAYMENT_VERIFY_CLAIM_TIMEOUT)
+    cursor = payment_verification_collection.find(
+        {"$or": [
+            {"status": PaymentVerificationStatus.PENDING.value, "next_attempt_at": {"$lt": stale}},
+            {"status": PaymentVerificationStatus.PROCESSING.value, "claimed_at": {"$lt": stale}},
+        ]},
+        {"_id": 1}
+    )
+    requeued = 0
+    async for verification in cursor:
+        _enqueue(verification["_id"])
+        requeued += 1
+    return requeued
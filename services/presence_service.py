@@ -0,0 +1,182 @@
+#services/presence_service.py
+
+"""
+Online presence for the home feed, chat and video calls.
+
+  - `presence:online:{user_id}`: set by every heartbeat to the heartbeat
+    time (epoch seconds) with a PRESENCE_TTL expiry. The user is online
+    while it exists, so a closed app goes offline on its own.
+  - `presence:last_seen` (sorted set): user id -> last heartbeat, waiting
+    to be written to `user_onboarding.last_active_at`. Entries are flushed
+    in batches once they are older than PRESENCE_TTL, i.e. once the user
+    went offline, so MongoDB sees one write per session instead of one
+    per heartbeat.
+  - PRESENCE_CHANNEL: JSON `{"user_id", "status", "at"}` published when a
+    user comes online, logs out or is found expired by the flush. Events
+    are states, not transitions, and may repeat.
+
+Lookups for a page of users cost one MGET (`online_status`), plus one
+ZMSCORE and at most one MongoDB query when last-seen times are needed
+(`get_presence`).
+"""
+import json
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from config.db_config import onboarding_collection
+from core.utils.redis_helper import get_many, redis_client, redis_pipeline
+
+PRESENCE_KEY = "presence:online:{user_id}"
+LAST_SEEN_KEY = "presence:last_seen"
+PRESENCE_CHANNEL = "presence:events"
+
+# Clients heartbeat every 30s; two missed beats mark the user offline
+PRESENCE_TTL = 90
+
+LAST_SEEN_FLUSH_BATCH = 1000
+
+# Remove flushed entries unless a heartbeat re-scored them meanwhile:
+# KEYS[1] set, ARGV member, score pairs
+_REMOVE_FLUSHED_SCRIPT = """
+local removed = 0
+for i = 1, #ARGV, 2 do
+    local score = redis.call('ZSCORE', KEYS[1], ARGV[i])
+    if score and tonumber(score) == tonumber(ARGV[i + 1]) then
+        removed = removed + redis.call('ZREM', KEYS[1], ARGV[i])
+    end
+end
+return removed
+"""
+
+_remove_flushed_script = redis_client.register_script(_REMOVE_FLUSHED_SCRIPT)
+
+
+def _presence_key(user_id: str) -> str:
+    return PRESENCE_KEY.format(user_id=user_id)
+
+
+def _to_datetime(epoch) -> Optional[datetime]:
+    # Naive UTC, like the datetimes MongoDB hands back
+    return datetime.utcfromtimestamp(float(epoch)) if epoch is not None else None
+
+
+async def _publish(user_id: str, status: str, at: float):
+    try:
+        await redis_client.publish(PRESENCE_CHANNEL, json.dumps({"user_id": user_id, "status": status, "at": at}))
+    except Exception as e:
+        print(f"[Presence] could not publish {status} for {user_id}: {e}")
+
+
+async def heartbeat(user_id: str):
+    """
+    Keep `user_id` online for another PRESENCE_TTL seconds.
+    """
+    now = int(time.time())
+    async with redis_pipeline() as pipe:
+        pipe.set(_presence_key(user_id), now, ex=PRESENCE_TTL, get=True)
+        pipe.zadd(LAST_SEEN_KEY, {user_id: now})
+        previous, _ = await pipe.execute()
+    if previous is None:
+        await _publish(user_id, "online", now)
+
+
+async def mark_offline(user_id: str):
+    """
+    Take `user_id` offline now (logout). Never raises.
+    """
+    now = int(time.time())
+    try:
+        async with redis_pipeline() as pipe:
+            pipe.delete(_presence_key(user_id))
+            pipe.zadd(LAST_SEEN_KEY, {user_id: now})
+            deleted, _ = await pipe.execute()
+    except Exception as e:
+        print(f"[Presence] could not mark {user_id} offline: {e}")
+        return
+    if deleted:
+        await _publish(user_id, "offline", now)
+
+
+async def online_status(user_ids: List[str]) -> Dict[str, bool]:
+    """
+    {user_id: is_online} with a single MGET; everyone is offline when Redis
+    is unavailable.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    try:
+        beats = await get_many([_presence_key(user_id) for user_id in user_ids])
+    except Exception as e:
+        print(f"[Presence] online lookup failed: {e}")
+        beats = [None] * len(user_ids)
+    return {user_id: beat is not None for user_id, beat in zip(user_ids, beats)}
+
+
+async def get_presence(user_ids: List[str]) -> Dict[str, dict]:
+    """
+    {user_id: {"is_online", "last_seen"}}. Last-seen times come from Redis,
+    falling back to `last_active_at` in one query for users not seen since
+    their last flush.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+    try:
+        async with redis_pipeline() as pipe:
+            pipe.mget([_presence_key(user_id) for user_id in user_ids])
+            pipe.zmscore(LAST_SEEN_KEY, user_ids)
+            beats, pending = await pipe.execute()
+    except Exception as e:
+        print(f"[Presence] presence lookup failed: {e}")
+        beats = pending = [None] * len(user_ids)
+
+    presence = {
+        user_id: {"is_online": beat is not None, "last_seen": _to_datetime(beat if beat is not None else seen)}
+        for user_id, beat, seen in zip(user_ids, beats, pending)
+    }
+
+    missing = [user_id for user_id, entry in presence.items() if entry["last_seen"] is None]
+    if missing:
+        async for doc in onboarding_collection.find(
+            {"user_id": {"$in": missing}},
+            {"user_id": 1, "last_active_at": 1}
+        ):
+            presence[doc["user_id"]]["last_seen"] = doc.get("last_active_at")
+    return presence
+
+
+async def flush_last_seen(batch_size: int = LAST_SEEN_FLUSH_BATCH) -> int:
+    """
+    Persist the last-seen times of users who went offline and announce the
+    ones whose presence expired. Returns how many were written.
+    """
+    cutoff = time.time() - PRESENCE_TTL
+    flushed = 0
+
+    while True:
+        entries = await redis_client.zrangebyscore(
+            LAST_SEEN_KEY, "-inf", cutoff, start=0, num=batch_size, withscores=True
+        )
+        if not entries:
+            break
+
+        await onboarding_collection.bulk_write([
+            UpdateOne({"user_id": user_id}, {"$max": {"last_active_at": _to_datetime(seen)}})
+            for user_id, seen in entries
+        ], ordered=False)
+        await _remove_flushed_script(
+            keys=[LAST_SEEN_KEY], args=[value for entry in entries for value in entry]
+        )
+
+        online = await online_status([user_id for user_id, _ in entries])
+        for user_id, seen in entries:
+            if not online[user_id]:
+                await _publish(user_id, "offline", int(seen))
+
+        flushed += len(entries)
+        if len(entries) < batch_size:
+            break
+
+    return flushed
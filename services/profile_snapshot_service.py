@@ -0,0 +1,202 @@
+#services/profile_snapshot_service.py
+
+import json
+import time
+from typing import Optional
+from bson import ObjectId
+from datetime import datetime
+from config.db_config import (
+    contest_history_collection, contest_winner_collection, countries_collection,
+    user_collection, onboarding_collection
+)
+from api.controller.files_controller import profile_photo_from_onboarding
+from core.utils.age_calculation import calculate_age
+from core.utils.helper import serialize_datetime_fields, get_country_name_by_id
+from core.utils.redis_helper import redis_client
+from services.gallery_service import (
+    resolve_public_gallery_items, resolve_private_gallery_items, sign_private_gallery_urls
+)
+from services.gift_catalog_service import get_active_gifts
+
+# Shorter than the presigned S3 URL lifetime (1h) embedded in the snapshot
+PROFILE_SNAPSHOT_TTL = 600
+LATEST_HISTORY_TTL = 60
+
+_latest_history_cache = {"value": None, "expires_at": 0.0}
+
+
+def _snapshot_key(user_id: str) -> str:
+    return f"profile_snapshot:{user_id}"
+
+
+async def get_latest_finished_history_id() -> Optional[str]:
+    """
+    Id of the most recent contest history whose voting has ended.
+    Cached in-process for a minute; winner badges are resolved against it.
+    """
+    now = time.monotonic()
+    if _latest_history_cache["expires_at"] > now:
+        return _latest_history_cache["value"]
+
+    latest_contest_history = await contest_history_collection.find_one(
+        {"voting_end": {"$lt": datetime.utcnow()}},
+        {"_id": 1},
+        sort=[("voting_end", -1)]
+    )
+    value = str(latest_contest_history["_id"]) if latest_contest_history else None
+
+    _latest_history_cache["value"] = value
+    _latest_history_cache["expires_at"] = now + LATEST_HISTORY_TTL
+    return value
+
+
+async def build_profile_snapshot(user_id: str, latest_history_id: Optional[str], lang: str = "en") -> Optional[dict]:
+    """
+    Build the viewer-independent part of a profile.
+    Returns None when the user does not exist.
+    """
+    # Imported lazily: contest_model imports this module to invalidate winner snapshots
+    from config.models.contest_model import resolve_badge
+
+    user = await user_collection.find_one(
+        {"_id": ObjectId(user_id)},
+        {"username": 1, "email": 1, "membership_type": 1, "is_verified": 1}
+    )
+    if not user:
+        return None
+
+    onboarding = await onboarding_collection.find_one(
+        {"user_id": user_id}
+    ) or {}
+
+    age = None
+    if onboarding.get("birthdate"):
+        age = calculate_age(onboarding["birthdate"])
+
+    membership_type = user.get("membership_type", "free")
+    is_verified = user.get("is_verified", False)
+
+    public_gallery = await resolve_public_gallery_items(onboarding.get("public_gallery", []))
+    private_gallery = await resolve_private_gallery_items(
+        onboarding.get("private_gallery", []),
+        viewer_unlocked_images=set(),
+        is_owner=False
+    )
+
+    profile_photo_url = await profile_photo_from_onboarding(onboarding, size="full")
+    country_name = await get_country_name_by_id(onboarding.get("country"), countries_collection, lang)
+
+    # Fetch latest contest winner badge (if any)
+    winner_badges = []
+    if latest_history_id:
+        winner = await contest_winner_collection.find_one(
+            {
+                "user_id": user_id,
+                "contest_history_id": latest_history_id
+            }
+        )
+
+        if winner:
+            badge = resolve_badge(winner.get("rank"))
+            if badge:
+                winner_badges.append(badge)
+
+    snapshot = {
+        "membership_type": membership_type,
+        "profile": {
+            "name": user.get("username"),
+            "age": age,
+            "email": user.get("email"),
+            "profile_photo": profile_photo_url,
+            "profile_badge": winner_badges,
+            "about": onboarding.get("bio"),
+            "hobbies": onboarding.get("passions"),
+            "gender": onboarding.get("gender"),
+            "country": country_name,
+            "orientation": onboarding.get("sexual_orientation"),
+            "status": onboarding.get("marital_status"),
+            "private_gallery": {
+                "items": private_gallery,
+                "count": len(private_gallery),
+                "locked": membership_type == "free"
+            },
+            "public_gallery": {
+                "items": public_gallery,
+                "count": len(public_gallery)
+            },
+            "send_gifts": {
+                "enabled": is_verified,
+                "items": []
+            }
+        }
+    }
+
+    return serialize_datetime_fields(snapshot)
+
+
+async def get_profile_snapshot(user_id: str, lang: str = "en") -> Optional[dict]:
+    """
+    Read-through cache for `build_profile_snapshot`.
+
+    Snapshots live in one Redis hash per user (field = history id + lang),
+    so a single DEL invalidates every variant.
+    """
+    latest_history_id = await get_latest_finished_history_id()
+    key = _snapshot_key(user_id)
+    field = f"{latest_history_id}:{lang}"
+
+    try:
+        cached = await redis_client.hget(key, field)
+        if cached:
+            return json.loads(cached)
+    except Exception as e:
+        print(f"[Profile Snapshot] cache read failed for {user_id}: {e}")
+
+    snapshot = await build_profile_snapshot(user_id, latest_history_id, lang)
+    if snapshot is None:
+        return None
+
+    try:
+        await redis_client.hset(key, field, json.dumps(snapshot, default=str))
+        await redis_client.expire(key, PROFILE_SNAPSHOT_TTL)
+    except Exception as e:
+        print(f"[Profile Snapshot] cache write failed for {user_id}: {e}")
+
+    return snapshot
+
+
+async def invalidate_profile_snapshot(*user_ids: str):
+    """
+    Drop cached snapshots after a write that changes what others see.
+    Never raises: a failed invalidation only delays freshness until the TTL.
+    """
+    keys = [_snapshot_key(str(uid)) for uid in user_ids if uid]
+    if not keys:
+        return
+    try:
+        await redis_client.delete(*keys)
+    except Exception as e:
+        print(f"[Profile Snapshot] invalidation failed for {keys}: {e}")
+
+
+async def overlay_viewer(snapshot: dict, viewer_unlocked_images: set, is_owner: bool) -> dict:
+    """
+    Apply the viewer-specific bits (unlocked private images) to a snapshot
+    and attach the in-memory gift catalog. The snapshot carries no private
+    image URLs; only the ones this viewer may see are signed here.
+    """
+    profile = dict(snapshot["profile"])
+    if profile["send_gifts"]["enabled"]:
+        profile["send_gifts"] = {"enabled": True, "items": await get_active_gifts()}
+    private_gallery = dict(profile["private_gallery"])
+    unlocked = {
+        item["file_id"] for item in private_gallery["items"]
+        if is_owner or item["file_id"] in viewer_unlocked_images
+    }
+    urls = await sign_private_gallery_urls(list(unlocked))
+    private_gallery["items"] = [
+        {**item, "url": urls.get(item["file_id"]), "is_unlocked": item["file_id"] in unlocked}
+        for item in private_gallery["items"]
+    ]
+    profile["private_gallery"] = private_gallery
+    return profile
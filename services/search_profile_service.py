@@ -0,0 +1,143 @@
+#services/search_profile_service.py
+
+"""
+Denormalized "search profile" documents used by profile search.
+
+One document per user in `search_profiles`, keyed by the user's ObjectId,
+holding the filterable onboarding fields, the first photo's storage key and
+the flags search filters on. Kept in sync from the onboarding/user write
+paths via `sync_search_profile`; backfill with:
+
+    python -m services.search_profile_service rebuild
+"""
+import asyncio
+import sys
+from datetime import datetime
+from typing import List, Optional
+from bson import ObjectId
+from pymongo import ReplaceOne
+from config.db_config import (
+    search_profile_collection, user_collection, onboarding_collection, file_collection
+)
+
+# Onboarding fields copied as-is; search filters address them by the same name
+SEARCH_PROFILE_FIELDS = ("country", "gender", "marital_status", "sexual_orientation", "birthdate")
+
+USER_PROJECTION = {"username": 1, "is_verified": 1, "is_deleted": 1}
+ONBOARDING_PROJECTION = {"user_id": 1, "onboarding_completed": 1, "images": 1, **{f: 1 for f in SEARCH_PROFILE_FIELDS}}
+
+
+def build_search_profile(user: dict, onboarding: dict, photo: Optional[dict]) -> dict:
+    doc = {
+        "_id": user["_id"],
+        "user_id": str(user["_id"]),
+        "username": user.get("username"),
+        "is_verified": user.get("is_verified", False),
+        "is_deleted": bool(user.get("is_deleted", False)),
+        "onboarding_completed": bool(onboarding.get("onboarding_completed", False)),
+        "photo": photo,
+        "updated_at": datetime.utcnow(),
+    }
+    for field in SEARCH_PROFILE_FIELDS:
+        doc[field] = onboarding.get(field)
+    return doc
+
+
+async def _photos_by_file_id(onboardings: List[dict]) -> dict:
+    file_ids = [
+        ObjectId(doc["images"][0])
+        for doc in onboardings
+        if doc.get("images") and ObjectId.is_valid(doc["images"][0])
+    ]
+    if not file_ids:
+        return {}
+    file_docs = await file_collection.find(
+        {"_id": {"$in": file_ids}, "is_deleted": {"$ne": True}},
+        {"storage_key": 1, "storage_backend": 1, "variants": 1}
+    ).to_list(length=None)
+    return {
+        str(doc["_id"]): {
+            "storage_key": doc["storage_key"],
+            "storage_backend": doc["storage_backend"],
+            "variants": doc.get("variants"),
+        }
+        for doc in file_docs
+    }
+
+
+async def sync_search_profile(user_id: str):
+    """
+    Rebuild the search document of one user from `users` + `user_onboarding`.
+    Never raises: a failed sync is repaired by the next write or a rebuild.
+    """
+    try:
+        user = await user_collection.find_one({"_id": ObjectId(user_id)}, USER_PROJECTION)
+        if not user:
+            await search_profile_collection.delete_one({"_id": ObjectId(user_id)})
+            return
+
+        onboarding = await onboarding_collection.find_one(
+            {"user_id": str(user_id)}, ONBOARDING_PROJECTION
+        ) or {}
+        photos = await _photos_by_file_id([onboarding])
+        photo = photos.get(str(onboarding["images"][0])) if onboarding.get("images") else None
+
+        doc = build_search_profile(user, onboarding, photo)
+        await search_profile_collection.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+    except Exception as e:
+        print(f"[Search Profile] sync failed for {user_id}: {e}")
+
+
+async def rebuild_search_profiles(batch_size: int = 500) -> int:
+    """
+    Backfill every search document from onboarding records, in batches.
+    """
+    written = 0
+    batch = []
+
+    async def flush(onboardings):
+        user_ids = [ObjectId(doc["user_id"]) for doc in onboardings if ObjectId.is_valid(doc.get("user_id"))]
+        users = await user_collection.find({"_id": {"$in": user_ids}}, USER_PROJECTION).to_list(length=None)
+        users_by_id = {str(user["_id"]): user for user in users}
+        photos = await _photos_by_file_id(onboardings)
+
+        ops = []
+        for onboarding in onboardings:
+            user = users_by_id.get(onboarding.get("user_id"))
+            if not user:
+                continue
+            images = onboarding.get("images") or []
+            photo = photos.get(str(images[0])) if images else None
+            doc = build_search_profile(user, onboarding, photo)
+            ops.append(ReplaceOne({"_id": doc["_id"]}, doc, upsert=True))
+
+        if ops:
+            await search_profile_collection.bulk_write(ops, ordered=False)
+        return len(ops)
+
+    async for onboarding in onboarding_collection.find({}, ONBOARDING_PROJECTION):
+        batch.append(onboarding)
+        if len(batch) >= batch_size:
+            written += await flush(batch)
+            batch = []
+    if batch:
+        written += await flush(batch)
+
+    return written
+
+
+async def rebuild_if_empty() -> int:
+    """
+    Backfill on first deployment only; afterwards the write paths keep it current.
+    """
+    if await search_profile_collection.estimated_document_count():
+        return 0
+    return await rebuild_search_profiles()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "rebuild":
+        print(f"Rebuilt {asyncio.run(rebuild_search_profiles())} search profiles")
+    else:
+        print(__doc__)
+        sys.exit(2)
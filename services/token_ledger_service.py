@@ -0,0 +1,568 @@
+#services/token_ledger_service.py
+
+"""
+Single write path for user token balances.
+
+Every credit and debit is one guarded update of the user document (never a
+read-modify-`$set`) that also appends the operation to a short
+`ledger_ops` window on that document. That update is the idempotency
+anchor: it only matches while the operation's key is absent, so a retried
+request can never move tokens twice, and it computes `balance_after` from
+the pre-image on the server. The `user_token_history` row is inserted
+afterwards from the recorded operation; a replay that finds the operation
+but no row (the process died in between) writes the row then.
+
+Holds (`reserve_tokens`) move tokens out of the spendable buckets into
+`held_tokens`, with each hold's bonus/withdrawable split kept under
+`token_holds.<hold_id>`. `settle_hold` charges from a hold and returns the
+rest in one update; the charge is a ledger op like any debit.
+
+The same code runs on a standalone server and on a replica set; a replica
+set additionally commits both legs of a transfer in one transaction.
+
+Callers pass an `idempotency_key` (e.g. "gift:<sender>:<client key>") for
+anything that can be retried; a repeated key returns the original entry.
+`services.token_ledger_stress` checks the ledger under concurrency.
+"""
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from bson import ObjectId
+from pydantic import BaseModel
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from config.db_config import client, user_collection, user_token_history_collection
+from core.utils.core_enums import TokenTransactionType
+from schemas.user_token_history_schema import CreateTokenHistory
+
+# Withdrawable tokens and non-withdrawable bonus tokens (subscription, rewards)
+TOKEN_BUCKETS = ("tokens", "bonus_tokens")
+
+# Re-reads before giving up when concurrent debits keep invalidating the split
+MAX_DEBIT_ATTEMPTS = 5
+
+# Operations kept on the user document; older keys are answered from history
+LEDGER_OPS_WINDOW = 50
+
+_BALANCE_PROJECTION = {"tokens": 1, "bonus_tokens": 1}
+
+_transactions_supported: Optional[bool] = None
+
+
+# class for InsufficientTokensError
+class InsufficientTokensError(Exception):
+    def __init__(self, available: int):
+        super().__init__(f"Insufficient tokens: {available} available")
+        self.available = available
+
+
+# class for LedgerEntry
+class LedgerEntry(BaseModel):
+    history_id: str
+    delta: int
+    balance_before: int
+    balance_after: int
+    txn_id: Optional[str] = None
+    replayed: bool = False
+
+
+def _total(user: dict) -> int:
+    return int(user.get("tokens") or 0) + int(user.get("bonus_tokens") or 0)
+
+
+def _entry_from_history(doc: dict, replayed: bool) -> LedgerEntry:
+    return LedgerEntry(
+        history_id=str(doc["_id"]),
+        delta=int(doc["delta"]),
+        balance_before=int(doc.get("balance_before") or 0),
+        balance_after=int(doc.get("balance_after") or 0),
+        txn_id=doc.get("txn_id"),
+        replayed=replayed,
+    )
+
+
+async def _supports_transactions() -> bool:
+    global _transactions_supported
+    if _transactions_supported is None:
+        try:
+            hello = await client.admin.command("hello")
+            _transactions_supported = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+        except Exception as e:
+            print(f"[Token Ledger] transaction probe failed, writing without transactions: {e}")
+            _transactions_supported = False
+    return _transactions_supported
+
+
+async def _run_atomically(unit: Callable[[Optional[object]], Awaitable]):
+    """
+    Run `unit(session)` in a transaction (retried on transient errors by
+    the driver), or with `session=None` on a standalone server. Units are
+    correct either way; the transaction only makes transfers all-or-nothing.
+    """
+    if not await _supports_transactions():
+        return await unit(None)
+    async with await client.start_session() as session:
+        return await session.with_transaction(unit)
+
+
+def _new_op(
+    delta: int,
+    transaction_type: TokenTransactionType,
+    reason: str,
+    txn_id: Optional[str],
+    idempotency_key: Optional[str],
+) -> dict:
+    history_id = ObjectId()
+    return {
+        "key": idempotency_key or f"op:{history_id}",
+        "idempotency_key": idempotency_key,
+        "history_id": history_id,
+        "delta": delta,
+        "type": transaction_type.value,
+        "reason": reason,
+        "txn_id": txn_id,
+        "at": datetime.utcnow(),
+    }
+
+
+def _apply_pipeline(changes: Dict[str, int], op: dict, unset: Optional[str] = None) -> list:
+    """
+    Update pipeline adding `changes` to the buckets (and `held_tokens`),
+    removing the `unset` field and appending `op`, stamped with the
+    resulting spendable total, to the `ledger_ops` window.
+    """
+    def balance(bucket: str) -> dict:
+        return {"$ifNull": [f"${bucket}", 0]}
+
+    spendable_change = sum(changes.get(bucket, 0) for bucket in TOKEN_BUCKETS)
+    balance_after = {"$add": [*(balance(bucket) for bucket in TOKEN_BUCKETS), spendable_change]}
+    recorded = {**{field: {"$literal": value} for field, value in op.items()}, "balance_after": balance_after}
+    pipeline = [{"$set": {
+        **{bucket: {"$add": [balance(bucket), change]} for bucket, change in changes.items() if change},
+        "updated_at": datetime.utcnow(),
+        "ledger_ops": {"$slice": [
+            {"$concatArrays": [{"$ifNull": ["$ledger_ops", []]}, [recorded]]},
+            -LEDGER_OPS_WINDOW
+        ]},
+    }}]
+    if unset:
+        pipeline.append({"$unset": unset})
+    return pipeline
+
+
+async def _apply(
+    user_oid: ObjectId, guard: dict, changes: Dict[str, int], op: dict, session, unset: Optional[str] = None
+) -> Optional[dict]:
+    """
+    Apply `changes` unless `op` was already applied or `guard` fails.
+    Returns the recorded op, or None when nothing was written.
+    """
+    user = await user_collection.find_one_and_update(
+        {"_id": user_oid, "ledger_ops.key": {"$ne": op["key"]}, **guard},
+        _apply_pipeline(changes, op, unset),
+        projection={"ledger_ops": {"$elemMatch": {"key": op["key"]}}},
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+    return user["ledger_ops"][0] if user else None
+
+
+async def _record(user_id: str, op: dict, session, replayed: bool = False) -> LedgerEntry:
+    """
+    Write the history row of an applied op. A DuplicateKeyError means a
+    concurrent replay wrote it first; the caller's replay returns that row.
+    """
+    balance_after = int(op["balance_after"])
+    balance_before = balance_after - int(op["delta"])
+    entry = CreateTokenHistory(
+        user_id=user_id,
+        delta=op["delta"],
+        type=op["type"],
+        reason=op["reason"],
+        balance_before=str(balance_before),
+        balance_after=str(balance_after),
+        txn_id=op.get("txn_id"),
+        idempotency_key=op.get("idempotency_key"),
+    )
+    await user_token_history_collection.insert_one(
+        {"_id": op["history_id"], **entry.model_dump()}, session=session
+    )
+    return LedgerEntry(
+        history_id=str(op["history_id"]),
+        delta=int(op["delta"]),
+        balance_before=balance_before,
+        balance_after=balance_after,
+        txn_id=op.get("txn_id"),
+        replayed=replayed,
+    )
+
+
+async def _replay(user_id: str, idempotency_key: Optional[str], session=None) -> Optional[LedgerEntry]:
+    """
+    Result of an already applied request: its history row, or the op still
+    on the user document when the row was never written.
+    """
+    if not idempotency_key:
+        return None
+    existing = await user_token_history_collection.find_one({"idempotency_key": idempotency_key}, session=session)
+    if existing:
+        return _entry_from_history(existing, replayed=True)
+
+    user = await user_collection.find_one(
+        {"_id": ObjectId(user_id), "ledger_ops.key": idempotency_key},
+        {"ledger_ops": {"$elemMatch": {"key": idempotency_key}}},
+        session=session
+    )
+    if not user:
+        return None
+    try:
+        return await _record(user_id, user["ledger_ops"][0], session, replayed=True)
+    except DuplicateKeyError:
+        existing = await user_token_history_collection.find_one({"idempotency_key": idempotency_key}, session=session)
+        return _entry_from_history(existing, replayed=True)
+
+
+async def _execute(unit: Callable[[Optional[object]], Awaitable], replay: Callable[[], Awaitable]):
+    """
+    Return the recorded result of an already applied request, otherwise
+    run `unit`. A DuplicateKeyError means a concurrent request with the
+    same key won the race, so its result is returned instead.
+    """
+    previous = await replay()
+    if previous:
+        return previous
+    try:
+        return await _run_atomically(unit)
+    except DuplicateKeyError:
+        previous = await replay()
+        if not previous:
+            raise
+        return previous
+
+
+async def _load_balances(user_oid: ObjectId, session) -> dict:
+    """
+    Read both buckets, converting legacy string balances to numbers in
+    place so the guarded updates below can match them.
+    """
+    user = await user_collection.find_one({"_id": user_oid}, _BALANCE_PROJECTION, session=session)
+    if not user:
+        raise ValueError(f"User {user_oid} not found")
+
+    legacy = {bucket: user[bucket] for bucket in TOKEN_BUCKETS if isinstance(user.get(bucket), str)}
+    if legacy:
+        await user_collection.update_one(
+            {"_id": user_oid, **legacy},
+            {"$set": {bucket: int(value or 0) for bucket, value in legacy.items()}},
+            session=session
+        )
+        user = await user_collection.find_one({"_id": user_oid}, _BALANCE_PROJECTION, session=session)
+    return user
+
+
+async def _credit(session, user_id, amount, reason, bucket, txn_id, idempotency_key) -> LedgerEntry:
+    user_oid = ObjectId(user_id)
+    await _load_balances(user_oid, session)
+    op = _new_op(amount, TokenTransactionType.CREDIT, reason, txn_id, idempotency_key)
+    applied = await _apply(user_oid, {}, {bucket: amount}, op, session)
+    if applied:
+        return await _record(str(user_oid), applied, session)
+
+    # The key was applied by a concurrent request
+    previous = await _replay(str(user_oid), idempotency_key, session)
+    if previous:
+        return previous
+    raise ValueError(f"User {user_oid} not found")
+
+
+async def _debit(
+    session, user_id, amount, reason, transaction_type, spend_bonus, allow_partial, txn_id, idempotency_key
+) -> LedgerEntry:
+    user_oid = ObjectId(user_id)
+
+    for _ in range(MAX_DEBIT_ATTEMPTS):
+        user = await _load_balances(user_oid, session)
+        bonus = int(user.get("bonus_tokens") or 0) if spend_bonus else 0
+        tokens = int(user.get("tokens") or 0)
+
+        charge = min(amount, bonus + tokens) if allow_partial else amount
+        if charge > bonus + tokens or charge == 0:
+            break
+
+        from_bonus = min(bonus, charge)
+        from_tokens = charge - from_bonus
+
+        # Only guard the buckets being drawn from; a missing field never matches $gte
+        guard = {}
+        if from_bonus:
+            guard["bonus_tokens"] = {"$gte": from_bonus}
+        if from_tokens:
+            guard["tokens"] = {"$gte": from_tokens}
+
+        op = _new_op(-charge, transaction_type, reason, txn_id, idempotency_key)
+        applied = await _apply(user_oid, guard, {"bonus_tokens": -from_bonus, "tokens": -from_tokens}, op, session)
+        if applied:
+            return await _record(str(user_oid), applied, session)
+
+        previous = await _replay(str(user_oid), idempotency_key, session)
+        if previous:
+            return previous
+
+    raise InsufficientTokensError(_total(await _load_balances(user_oid, session)))
+
+
+async def credit_tokens(
+    user_id: str,
+    amount: int,
+    reason: str,
+    bucket: str = "tokens",
+    txn_id: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> LedgerEntry:
+    """
+    Add `amount` to one bucket ("tokens" or "bonus_tokens") and record it.
+    """
+    if amount <= 0:
+        raise ValueError("Tokens must be greater than zero")
+    if bucket not in TOKEN_BUCKETS:
+        raise ValueError(f"Unknown token bucket: {bucket}")
+
+    async def unit(session):
+        return await _credit(session, user_id, amount, reason, bucket, txn_id, idempotency_key)
+
+    return await _execute(unit, lambda: _replay(user_id, idempotency_key))
+
+
+async def debit_tokens(
+    user_id: str,
+    amount: int,
+    reason: str,
+    transaction_type: TokenTransactionType = TokenTransactionType.DEBIT,
+    spend_bonus: bool = True,
+    allow_partial: bool = False,
+    txn_id: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> LedgerEntry:
+    """
+    Take `amount` from the user, bonus tokens first unless `spend_bonus` is
+    False (withdrawals only touch withdrawable tokens). Raises
+    InsufficientTokensError; with `allow_partial` takes what is there and
+    only raises on an empty balance.
+    """
+    if amount <= 0:
+        raise ValueError("Tokens must be greater than zero")
+
+    async def unit(session):
+        return await _debit(
+            session, user_id, amount, reason, transaction_type, spend_bonus, allow_partial, txn_id, idempotency_key
+        )
+
+    return await _execute(unit, lambda: _replay(user_id, idempotency_key))
+
+
+async def transfer_tokens(
+    sender_id: str,
+    receiver_id: str,
+    amount: int,
+    sent_reason: str,
+    received_reason: str,
+    txn_id: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> Tuple[LedgerEntry, LedgerEntry]:
+    """
+    Debit the sender (bonus first) and credit the receiver's withdrawable
+    tokens as one unit. Keys of both legs derive from `idempotency_key`;
+    retrying a transfer that stopped after the debit only runs the credit.
+    """
+    if amount <= 0:
+        raise ValueError("Tokens must be greater than zero")
+
+    sent_key = f"{idempotency_key}:sent" if idempotency_key else None
+    received_key = f"{idempotency_key}:received" if idempotency_key else None
+
+    async def unit(session):
+        sent = await _replay(sender_id, sent_key, session) or await _debit(
+            session, sender_id, amount, sent_reason, TokenTransactionType.DEBIT, True, False, txn_id, sent_key
+        )
+        # A resumed transfer keeps the txn_id of its first attempt
+        received = await _replay(receiver_id, received_key, session) or await _credit(
+            session, receiver_id, amount, received_reason, "tokens", sent.txn_id, received_key
+        )
+        return sent, received
+
+    async def replay():
+        sent, received = await _replay(sender_id, sent_key), await _replay(receiver_id, received_key)
+        return (sent, received) if sent and received else None
+
+    return await _execute(unit, replay)
+
+
+def _hold_field(hold_id: str) -> str:
+    return f"token_holds.{hold_id}"
+
+
+def _hold_guard(hold_id: str, hold: Optional[dict]) -> dict:
+    """
+    Match the hold only while it is unchanged (or still absent).
+    """
+    field = _hold_field(hold_id)
+    if not hold:
+        return {field: {"$exists": False}}
+    return {f"{field}.{bucket}": int(hold.get(bucket) or 0) for bucket in TOKEN_BUCKETS}
+
+
+def _held(hold: Optional[dict]) -> int:
+    return sum(int((hold or {}).get(bucket) or 0) for bucket in TOKEN_BUCKETS)
+
+
+async def _load_hold(user_oid: ObjectId, hold_id: str, session=None) -> Optional[dict]:
+    user = await user_collection.find_one({"_id": user_oid}, {_hold_field(hold_id): 1}, session=session)
+    if not user:
+        raise ValueError(f"User {user_oid} not found")
+    return (user.get("token_holds") or {}).get(hold_id)
+
+
+async def get_hold(user_id: str, hold_id: str) -> int:
+    """
+    Tokens currently reserved under `hold_id`.
+    """
+    return _held(await _load_hold(ObjectId(user_id), hold_id))
+
+
+async def reserve_tokens(user_id: str, hold_id: str, target: int) -> int:
+    """
+    Raise the hold `hold_id` to `target` tokens, bonus first, as far as
+    the spendable balance allows. Held tokens sit in `held_tokens` (the
+    per-hold split in `token_holds`) where other debits cannot reach them.
+    Each step is a guarded `$inc` on the unchanged hold, so repeating a
+    reservation never holds twice. Returns the amount now held.
+    """
+    user_oid = ObjectId(user_id)
+    field = _hold_field(hold_id)
+
+    for _ in range(MAX_DEBIT_ATTEMPTS):
+        user = await _load_balances(user_oid, None)
+        hold = await _load_hold(user_oid, hold_id)
+        held = _held(hold)
+        bonus = int(user.get("bonus_tokens") or 0)
+        tokens = int(user.get("tokens") or 0)
+
+        add = min(target - held, bonus + tokens)
+        if add <= 0:
+            return held
+        from_bonus = min(bonus, add)
+        from_tokens = add - from_bonus
+
+        guard = _hold_guard(hold_id, hold)
+        if from_bonus:
+            guard["bonus_tokens"] = {"$gte": from_bonus}
+        if from_tokens:
+            guard["tokens"] = {"$gte": from_tokens}
+
+        result = await user_collection.update_one(
+            {"_id": user_oid, **guard},
+            {
+                "$inc": {
+                    "bonus_tokens": -from_bonus,
+                    "tokens": -from_tokens,
+                    "held_tokens": add,
+                    f"{field}.bonus_tokens": from_bonus,
+                    f"{field}.tokens": from_tokens,
+                },
+                "$set": {"updated_at": datetime.utcnow()},
+            }
+        )
+        if result.modified_count:
+            return held + add
+
+    return await get_hold(user_id, hold_id)
+
+
+async def _settle_hold(session, user_id, hold_id, amount, reason, txn_id, idempotency_key) -> Optional[LedgerEntry]:
+    user_oid = ObjectId(user_id)
+
+    for _ in range(MAX_DEBIT_ATTEMPTS):
+        hold = await _load_hold(user_oid, hold_id, session)
+        if not hold:
+            return await _replay(str(user_oid), idempotency_key, session)
+
+        charge = min(amount, _held(hold))
+        # The charge takes the held bonus tokens first, like any debit
+        from_bonus = min(int(hold.get("bonus_tokens") or 0), charge)
+        from_tokens = charge - from_bonus
+        changes = {
+            "bonus_tokens": int(hold.get("bonus_tokens") or 0) - from_bonus,
+            "tokens": int(hold.get("tokens") or 0) - from_tokens,
+            "held_tokens": -_held(hold),
+        }
+
+        if charge == 0:
+            result = await user_collection.update_one(
+                {"_id": user_oid, **_hold_guard(hold_id, hold)},
+                {
+                    "$inc": {bucket: change for bucket, change in changes.items() if change},
+                    "$unset": {_hold_field(hold_id): ""},
+                    "$set": {"updated_at": datetime.utcnow()},
+                },
+                session=session
+            )
+            if result.modified_count:
+                return None
+            continue
+
+        op = _new_op(-charge, TokenTransactionType.DEBIT, reason, txn_id, idempotency_key)
+        applied = await _apply(user_oid, _hold_guard(hold_id, hold), changes, op, session, unset=_hold_field(hold_id))
+        if applied:
+            return await _record(str(user_oid), applied, session)
+
+        previous = await _replay(str(user_oid), idempotency_key, session)
+        if previous:
+            return previous
+
+    raise ValueError(f"Hold {hold_id} of user {user_oid} kept changing")
+
+
+async def settle_hold(
+    user_id: str,
+    hold_id: str,
+    amount: int,
+    reason: str,
+    txn_id: Optional[str] = None,
+    idempotency_key: Optional[str] = None,
+) -> Optional[LedgerEntry]:
+    """
+    Charge up to `amount` from the hold `hold_id` and return the rest of it
+    to the buckets it came from, in one update. Never charges more than
+    was held. Returns None when nothing was charged; settling again
+    returns the original entry.
+    """
+    if amount < 0:
+        raise ValueError("Tokens must not be negative")
+
+    async def unit(session):
+        return await _settle_hold(session, user_id, hold_id, amount, reason, txn_id, idempotency_key)
+
+    return await _execute(unit, lambda: _replay(user_id, idempotency_key))
+
+
+async def release_hold(user_id: str, hold_id: str) -> None:
+    """
+    Return the whole hold `hold_id` to the user without charging anything.
+    """
+    await settle_hold(user_id, hold_id, 0, "hold_released")
+
+
+async def normalize_token_balances() -> int:
+    """
+    Convert balances still stored as strings to numbers. Run from
+    config.migrate; the ledger also converts them lazily on first write.
+    """
+    converted = 0
+    for bucket in TOKEN_BUCKETS:
+        result = await user_collection.update_many(
+            {bucket: {"$type": "string"}},
+            [{"$set": {bucket: {"$toInt": f"${bucket}"}}}]
+        )
+        converted += result.modified_count
+    return converted
@@ -0,0 +1,89 @@
+#services/token_ledger_stress.py
+
+"""
+Concurrency check of the token ledger against a scratch database.
+
+    python -m services.token_ledger_stress <scratch_database> [concurrency]
+
+Fires `concurrency` credits and debits of one token at a scratch user, each
+sent twice with the same idempotency key, and checks nothing was lost or
+applied twice. The database must be empty and is dropped afterwards; the
+configured database is refused. Meant to be run on its own, never from the
+app: the ledger's collections point at the scratch database while it runs.
+"""
+import asyncio
+import sys
+from contextlib import contextmanager
+
+from bson import ObjectId
+
+import services.token_ledger_service as ledger
+from config.basic_config import settings
+from config.db_config import client
+
+
+@contextmanager
+def _scratch_collections(scratch):
+    """
+    Point the ledger at `scratch`, restoring the real collections on exit.
+    """
+    real = ledger.user_collection, ledger.user_token_history_collection
+    ledger.user_collection = scratch["users"]
+    ledger.user_token_history_collection = scratch["user_token_history"]
+    try:
+        yield
+    finally:
+        ledger.user_collection, ledger.user_token_history_collection = real
+
+
+async def stress_ledger(database: str, concurrency: int = 50) -> bool:
+    if database == settings.MONGO_DATABASE:
+        print(f"Refusing to stress the configured database {database!r}")
+        return False
+    scratch = client[database]
+    if await scratch.list_collection_names():
+        print(f"Refusing to stress non-empty database {database!r}")
+        return False
+
+    try:
+        with _scratch_collections(scratch):
+            await ledger.user_token_history_collection.create_index(
+                "idempotency_key", unique=True, partialFilterExpression={"idempotency_key": {"$type": "string"}}
+            )
+            user_id = str((await ledger.user_collection.insert_one({"tokens": 0, "bonus_tokens": 0})).inserted_id)
+            reason = "ledger_stress"
+
+            def key(kind: str, i: int) -> str:
+                return f"stress:{kind}:{i}"
+
+            # Every request twice: the duplicate must be answered from the ledger
+            credited = await asyncio.gather(*[
+                ledger.credit_tokens(user_id, 1, reason, idempotency_key=key("credit", i))
+                for i in list(range(concurrency)) * 2
+            ], return_exceptions=True)
+            debited = await asyncio.gather(*[
+                ledger.debit_tokens(user_id, 1, reason, spend_bonus=False, idempotency_key=key("debit", i))
+                for i in list(range(concurrency)) * 2
+            ], return_exceptions=True)
+            results = credited + debited
+
+            errors = [r for r in results if isinstance(r, Exception)]
+            end = ledger._total(await ledger._load_balances(ObjectId(user_id), None))
+            history = await ledger.user_token_history_collection.count_documents({"user_id": user_id})
+    finally:
+        await client.drop_database(database)
+
+    ok = not errors and end == 0 and history == 2 * concurrency
+    print(f"end={end} history={history} expected_history={2 * concurrency} errors={len(errors)}")
+    for error in errors[:5]:
+        print(f"  {type(error).__name__}: {error}")
+    return ok
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        workers = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+        sys.exit(0 if asyncio.run(stress_ledger(sys.argv[1], workers)) else 1)
+    else:
+        print(__doc__)
+        sys.exit(2)
@@ -0,0 +1,150 @@
+#services/user_card_service.py
+
+from typing import List, Optional, Tuple
+from bson import ObjectId
+from config.db_config import user_collection, onboarding_collection, file_collection, countries_collection
+from api.controller.files_controller import generate_file_url
+from core.utils.age_calculation import calculate_age
+from core.utils.helper import get_country_names_by_ids
+from core.utils.pagination import StandardResultsSetPagination, aggregate_with_total
+
+
+async def hydrate_user_cards(user_ids: List[str], lang: str = "en") -> List[dict]:
+    """
+    Build profile cards for a page of user ids with one query per collection
+    (users, onboarding, files, countries). Deleted or unknown users are
+    dropped; the order of `user_ids` is kept.
+
+    Card keys: user_id, name, age, country, profile_photo_id, profile_photo,
+    is_verified, login_status.
+    """
+    object_ids = [ObjectId(uid) for uid in user_ids if ObjectId.is_valid(uid)]
+    if not object_ids:
+        return []
+
+    users = await user_collection.find(
+        {"_id": {"$in": object_ids}, "is_deleted": {"$ne": True}},
+        {"username": 1, "is_verified": 1, "login_status": 1}
+    ).to_list(length=None)
+    users_by_id = {str(user["_id"]): user for user in users}
+
+    onboardings = await onboarding_collection.find(
+        {"user_id": {"$in": list(users_by_id)}},
+        {"user_id": 1, "birthdate": 1, "country": 1, "images": 1}
+    ).to_list(length=None)
+    onboarding_by_user = {doc["user_id"]: doc for doc in onboardings}
+
+    photo_ids = [
+        ObjectId(doc["images"][0])
+        for doc in onboardings
+        if doc.get("images") and ObjectId.is_valid(doc["images"][0])
+    ]
+    files = await file_collection.find(
+        {"_id": {"$in": photo_ids}, "is_deleted": {"$ne": True}},
+        {"storage_key": 1, "storage_backend": 1, "variants": 1}
+    ).to_list(length=None) if photo_ids else []
+    files_by_id = {str(doc["_id"]): doc for doc in files}
+
+    country_names = await get_country_names_by_ids(
+        [doc.get("country") for doc in onboardings],
+        countries_collection,
+        lang
+    )
+
+    cards = []
+    for uid in user_ids:
+        user = users_by_id.get(str(uid))
+        if not user:
+            continue
+        onboarding = onboarding_by_user.get(str(uid), {})
+        birthdate = onboarding.get("birthdate")
+
+        file_doc = None
+        if onboarding.get("images"):
+            file_doc = files_by_id.get(str(onboarding["images"][0]))
+
+        cards.append({
+            "user_id": str(uid),
+            "name": user.get("username"),
+            "age": calculate_age(birthdate) if birthdate else None,
+            "country": country_names.get(str(onboarding.get("country"))),
+            "profile_photo_id": str(file_doc["_id"]) if file_doc else None,
+            "profile_photo": await generate_file_url(
+                file_doc["storage_key"],
+                file_doc.get("storage_backend"),
+                size="medium",
+                variants=file_doc.get("variants")
+            ) if file_doc else None,
+            "is_verified": user.get("is_verified", False),
+            "login_status": user.get("login_status"),
+        })
+
+    return cards
+
+
+async def page_id_array(
+    collection,
+    match: dict,
+    field: str,
+    pagination: StandardResultsSetPagination,
+    exclude_ids: Optional[List[str]] = None
+) -> Tuple[List[str], int]:
+    """
+    Slice one page out of an id array stored on a single document, newest
+    (last appended) first, without loading the whole array.
+    Returns (page_ids, total).
+    """
+    ids_expr = {"$reverseArray": {"$ifNull": [f"${field}", []]}}
+    if exclude_ids:
+        ids_expr = {
+            "$filter": {
+                "input": ids_expr,
+                "as": "uid",
+                "cond": {"$not": [{"$in": ["$$uid", exclude_ids]}]}
+            }
+        }
+
+    result = await collection.aggregate([
+        {"$match": match},
+        {"$project": {"_id": 0, "ids": ids_expr}},
+        {
+            "$project": {
+                "total": {"$size": "$ids"},
+                "page": {"$slice": ["$ids", pagination.skip, pagination.limit]}
+            }
+        }
+    ]).to_list(1)
+
+    if not result:
+        return [], 0
+    return result[0]["page"], result[0]["total"]
+
+
+async def page_profile_views(
+    collection,
+    user_id: str,
+    pagination: StandardResultsSetPagination
+) -> Tuple[List[dict], int]:
+    """
+    Latest visit per viewer, newest first, paginated inside MongoDB.
+    Returns ([{user_id, viewed_at}], total).
+    """
+    return await aggregate_with_total(
+        collection,
+        [
+            {"$match": {"user_id": user_id}},
+            {"$unwind": "$viewed_by_user_ids"},
+            {
+                "$group": {
+                    "_id": "$viewed_by_user_ids.user_id",
+                    "viewed_at": {"$max": "$viewed_by_user_ids.viewed_at"}
+                }
+            }
+        ],
+        [
+            {"$sort": {"viewed_at": -1, "_id": 1}},
+            {"$skip": pagination.skip},
+            {"$limit": pagination.limit},
+            {"$project": {"_id": 0, "user_id": "$_id", "viewed_at": 1}}
+        ]
+    )
@@ -0,0 +1,306 @@
+#services/video_call_session_service.py
+
+"""
+Live state of video calls, kept in Redis so call ticks never touch MongoDB.
+
+  - `video_call:session:{call_id}` (hash): participants, status, per-minute
+    rates, free seconds left at call start and the token hold of each
+    participant.
+  - `video_call:free_used:{user_id}:{YYYY-MM-DD}`: free seconds a user has
+    used on that UTC day, incremented once when a call settles. A missing
+    counter is seeded from that day's ended calls, so each user costs at
+    most one scan per day.
+
+Accepting a call reserves CALL_HOLD_MINUTES of paid time from each
+participant in the ledger (`reserve_tokens`), so gifts or a second call
+cannot spend those tokens meanwhile. Ticks compare the running cost against
+the hold in memory and only touch MongoDB to extend a hold that ran out.
+Settlement charges each participant from their hold and returns the rest
+(`settle_hold`). While a call rings, the hold fields carry the balances read
+at call start; nothing is reserved until it is accepted.
+
+Holds of accepted calls that were never ended are released by
+`release_abandoned_call_holds` (beat) a day after the call was accepted.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from bson import ObjectId
+
+from config.basic_config import settings
+from config.db_config import user_collection, video_call_sessions
+from core.utils.core_enums import MembershipType
+from core.utils.redis_helper import redis_client, redis_pipeline
+from services.token_ledger_service import get_hold, release_hold, reserve_tokens
+
+SESSION_KEY = "video_call:session:{call_id}"
+FREE_USED_KEY = "video_call:free_used:{user_id}:{day}"
+
+# Longer calls fall back to rebuilding the session from MongoDB
+SESSION_TTL = 6 * 3600
+
+FREE_USED_TTL = 2 * 24 * 3600
+
+# Paid minutes reserved per participant at a time
+CALL_HOLD_MINUTES = 10
+
+# Accepted calls without an end request after this long are ended unbilled
+ABANDONED_CALL_SECONDS = 24 * 3600
+
+PARTICIPANTS = ("caller", "receiver")
+
+INT_FIELDS = tuple(
+    f"{role}_{field}" for role in PARTICIPANTS for field in ("rate", "free_seconds", "hold")
+)
+
+
+def _session_key(call_id: str) -> str:
+    return SESSION_KEY.format(call_id=call_id)
+
+
+def _free_used_key(user_id: str, day: datetime) -> str:
+    return FREE_USED_KEY.format(user_id=user_id, day=day.strftime("%Y-%m-%d"))
+
+
+def call_rate(user: dict) -> int:
+    """Tokens per started paid minute."""
+    return 1 if user.get("membership_type") == MembershipType.PREMIUM.value else 2
+
+
+def token_balance(user: dict) -> int:
+    return int(user.get("tokens", 0)) + int(user.get("bonus_tokens", 0))
+
+
+def call_hold_id(call_id: str, role: str) -> str:
+    return f"video_call:{call_id}:{role}"
+
+
+async def _count_free_used(user_id: str, day_start: datetime) -> int:
+    used = 0
+    cursor = video_call_sessions.find(
+        {
+            "$or": [{"caller_id": user_id}, {"receiver_id": user_id}],
+            "status": "ended",
+            "start_time": {"$gte": day_start, "$lt": day_start + timedelta(days=1)}
+        },
+        {"caller_id": 1, "receiver_id": 1, "caller_free_seconds_used": 1, "receiver_free_seconds_used": 1}
+    )
+    async for call in cursor:
+        if call.get("caller_id") == user_id:
+            used += call.get("caller_free_seconds_used", 0)
+        if call.get("receiver_id") == user_id:
+            used += call.get("receiver_free_seconds_used", 0)
+    return used
+
+
+async def free_seconds_remaining(user_id: str) -> int:
+    """
+    Free seconds `user_id` has left today (UTC).
+    """
+    day_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    key = _free_used_key(user_id, day_start)
+    try:
+        used = await redis_client.get(key)
+        if used is None:
+            await redis_client.set(key, await _count_free_used(user_id, day_start), ex=FREE_USED_TTL, nx=True)
+            used = await redis_client.get(key)
+        used = int(used or 0)
+    except Exception as e:
+        print(f"[Video Call] free usage counter unavailable for {user_id}: {e}")
+        used = await _count_free_used(user_id, day_start)
+    return max(0, settings.FREE_VIDEO_LIMIT_SECONDS - used)
+
+
+async def record_free_seconds(user_id: str, seconds: int, call_start: datetime):
+    """
+    Count free seconds used by a settled call. Only increments an existing
+    counter: a missing one is seeded from MongoDB, which already holds this call.
+    """
+    if seconds <= 0:
+        return
+    key = _free_used_key(user_id, call_start)
+    try:
+        if await redis_client.exists(key):
+            await redis_client.incrby(key, seconds)
+    except Exception as e:
+        print(f"[Video Call] could not record free usage for {user_id}: {e}")
+
+
+async def _save_session(call_id: str, session: dict):
+    try:
+        async with redis_pipeline(transaction=True) as pipe:
+            pipe.hset(_session_key(call_id), mapping={k: str(v) for k, v in session.items()})
+            pipe.expire(_session_key(call_id), SESSION_TTL)
+            await pipe.execute()
+    except Exception as e:
+        print(f"[Video Call] could not cache session {call_id}: {e}")
+
+
+async def open_call_session(call_id: str, call_doc: dict, caller: dict, receiver: dict):
+    await _save_session(call_id, {
+        "caller_id": call_doc["caller_id"],
+        "receiver_id": call_doc["receiver_id"],
+        "status": call_doc["status"],
+        "caller_rate": call_doc["caller_rate_per_minute"],
+        "receiver_rate": call_doc["receiver_rate_per_minute"],
+        "caller_free_seconds": call_doc["caller_free_seconds_remaining"],
+        "receiver_free_seconds": call_doc["receiver_free_seconds_remaining"],
+        "caller_hold": token_balance(caller),
+        "receiver_hold": token_balance(receiver),
+    })
+
+
+async def _current_balances(call: dict) -> Dict[str, int]:
+    users = await user_collection.find(
+        {"_id": {"$in": [ObjectId(call["caller_id"]), ObjectId(call["receiver_id"])]}},
+        {"tokens": 1, "bonus_tokens": 1}
+    ).to_list(length=2)
+    balances = {str(user["_id"]): token_balance(user) for user in users}
+    return {
+        f"{role}_hold": balances.get(call[f"{role}_id"], 0)
+        for role in PARTICIPANTS
+    }
+
+
+async def _current_holds(call_id: str, call: dict) -> Dict[str, int]:
+    return {
+        f"{role}_hold": await get_hold(call[f"{role}_id"], call_hold_id(call_id, role))
+        for role in PARTICIPANTS
+    }
+
+
+def _hold_target(session: dict, role: str, elapsed_seconds: int) -> int:
+    """
+    Tokens to hold so that CALL_HOLD_MINUTES more paid minutes are covered.
+    """
+    return tokens_required(session, role, elapsed_seconds) + CALL_HOLD_MINUTES * session[f"{role}_rate"]
+
+
+async def accept_call_session(call_id: str, call_doc: dict):
+    """
+    Mark the session ongoing and reserve the holds billing is checked
+    against. Reserving is idempotent, so a repeated accept holds nothing more.
+    """
+    session = {
+        "caller_id": call_doc["caller_id"],
+        "receiver_id": call_doc["receiver_id"],
+        "status": "ongoing",
+        "caller_rate": int(call_doc.get("caller_rate_per_minute", 2)),
+        "receiver_rate": int(call_doc.get("receiver_rate_per_minute", 2)),
+        "caller_free_seconds": int(call_doc.get("caller_free_seconds_remaining", 0)),
+        "receiver_free_seconds": int(call_doc.get("receiver_free_seconds_remaining", 0)),
+    }
+    for role in PARTICIPANTS:
+        target = _hold_target(session, role, session[f"{role}_free_seconds"])
+        session[f"{role}_hold"] = await reserve_tokens(
+            call_doc[f"{role}_id"], call_hold_id(call_id, role), target
+        )
+    await _save_session(call_id, session)
+
+
+async def extend_call_hold(call_id: str, session: dict, role: str, elapsed_seconds: int) -> int:
+    """
+    Grow the hold of `role` once the running cost has caught up with it.
+    Returns the hold, unchanged when the balance has nothing left to add.
+    """
+    hold = await reserve_tokens(
+        session[f"{role}_id"], call_hold_id(call_id, role), _hold_target(session, role, elapsed_seconds)
+    )
+    if hold != session[f"{role}_hold"]:
+        session[f"{role}_hold"] = hold
+        try:
+            await redis_client.hset(_session_key(call_id), f"{role}_hold", hold)
+        except Exception as e:
+            print(f"[Video Call] could not cache hold of {call_id}: {e}")
+    return hold
+
+
+async def release_call_holds(call_id: str, call: dict):
+    """
+    Return whatever is still held for a call that ends without billing.
+    """
+    for role in PARTICIPANTS:
+        await release_hold(call[f"{role}_id"], call_hold_id(call_id, role))
+
+
+async def get_call_session(call_id: str) -> Optional[dict]:
+    """
+    Session of a call, rebuilt from MongoDB when it is not cached.
+    """
+    try:
+        session = await redis_client.hgetall(_session_key(call_id))
+    except Exception as e:
+        print(f"[Video Call] session read failed for {call_id}: {e}")
+        session = None
+
+    if not session:
+        call = await video_call_sessions.find_one({"_id": ObjectId(call_id)})
+        if not call:
+            return None
+        if call.get("status") == "ended":
+            return {"status": "ended"}
+        accepted = call.get("receiver_accepted") is True
+        session = {
+            "caller_id": call["caller_id"],
+            "receiver_id": call["receiver_id"],
+            "status": "ongoing" if accepted else "ringing",
+            "caller_rate": call.get("caller_rate_per_minute", 2),
+            "receiver_rate": call.get("receiver_rate_per_minute", 2),
+            "caller_free_seconds": call.get("caller_free_seconds_remaining", 0),
+            "receiver_free_seconds": call.get("receiver_free_seconds_remaining", 0),
+            **(await _current_holds(call_id, call) if accepted else await _current_balances(call)),
+        }
+        await _save_session(call_id, session)
+
+    for field in INT_FIELDS:
+        session[field] = int(session.get(field) or 0)
+    return session
+
+
+def paid_seconds(elapsed_seconds: int, free_seconds: int) -> int:
+    return max(0, elapsed_seconds - min(elapsed_seconds, free_seconds))
+
+
+def tokens_required(session: dict, role: str, elapsed_seconds: int) -> int:
+    paid = paid_seconds(elapsed_seconds, session[f"{role}_free_seconds"])
+    return math.ceil(paid / 60) * session[f"{role}_rate"]
+
+
+async def close_call_session(call_id: str):
+    try:
+        await redis_client.delete(_session_key(call_id))
+    except Exception as e:
+        print(f"[Video Call] could not drop session {call_id}: {e}")
+
+
+async def release_abandoned_call_holds() -> int:
+    """
+    End accepted calls that never got an end request, without billing,
+    and release their holds. Returns the calls ended.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=ABANDONED_CALL_SECONDS)
+    ended = 0
+    cursor = video_call_sessions.find(
+        {"status": "ongoing", "accepted_at": {"$lt": cutoff}},
+        {"caller_id": 1, "receiver_id": 1}
+    )
+    async for call in cursor:
+        call_id = str(call["_id"])
+        result = await video_call_sessions.update_one(
+            {"_id": call["_id"], "status": "ongoing"},
+            {"$set": {
+                "status": "ended",
+                "end_time": datetime.utcnow(),
+                "caller_tokens_deducted": 0,
+                "receiver_tokens_deducted": 0,
+                "end_reason": "abandoned",
+            }}
+        )
+        if result.modified_count:
+            await release_call_holds(call_id, call)
+            await close_call_session(call_id)
+            ended += 1
+    if ended:
+        print(f"[Video Call] ended {ended} abandoned calls")
+    return ended
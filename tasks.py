@@ -1,53 +1,25 @@
 from core.utils.celery_app import celery_app
+from core.utils.celery_async import async_task
 from core.utils.send_mail import smtp_send_email
 from core.utils.response_mixin import CustomResponseMixin
 import os
-import asyncio
-import traceback
-import concurrent.futures
-from datetime import datetime
-import traceback
-import concurrent.futures
 from celery.exceptions import MaxRetriesExceededError
 
 from services.job_services.subscription_job_service import notify_expiring_subscriptions, \
     expire_and_activate_subscriptions_job
 
-from services.job_services.contest_tasks import generate_contest_cycles_job , get_loop, declare_contest_winners_job
+from services.job_services.contest_tasks import generate_contest_cycles_job, declare_contest_winners_job, \
+    fire_due_contest_deadlines, reschedule_contest_deadlines
+from services.image_derivative_service import generate_image_derivatives
+from services.dashboard_rollup_service import refresh_rollups
+from services.notification_inbox_service import reconcile_unread_counters
+from services.presence_service import flush_last_seen
+from services.payment_verification_service import process_payment_verification, requeue_payment_verifications
+from services.account_tombstone_service import rebuild_if_missing as rebuild_tombstones_if_missing
+from services.video_call_session_service import release_abandoned_call_holds
 
 ADMIN_EMAIL = os.getenv("EMAIL_FROM")
 
-# Celery task for run_async_in_celery
-def run_async_in_celery(coroutine):
-    """
-    Utility function to safely run async coroutines in Celery tasks.
-    Handles event loop management properly for Celery workers.
-    """
-    # Always use thread executor to avoid event loop conflicts
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        print("Running coroutine in thread executor for Celery compatibility")
-        
-        def run_in_thread():
-            # Create a new event loop for this thread
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            try:
-                return loop.run_until_complete(coroutine())
-            
-            finally:
-                loop.close()
-        
-        future = executor.submit(run_in_thread)
-        try:
-            result = future.result()
-            print(" Coroutine completed successfully in thread")
-            return result
-        except Exception as e:
-            print(f" Error in run_async_in_celery: {str(e)}")
-            print(f" Exception type: {type(e)}")
-            print(f" Traceback: {traceback.format_exc()}")
-            raise e
-
 
 # Celery task for send_contact_us_email
 @celery_app.task(name="tasks.send_contact_us_email")
@@ -76,43 +48,37 @@ def send_email_task(to_email: str, subject: str, body: str, is_html: bool = Fals
 def send_password_reset_email_task(to_email: str, subject: str, body: str):
     smtp_send_email(to_email=to_email, subject=subject, body=body)
 
-@celery_app.task(name="tasks.subscription_expiry_notifier")
-def subscription_expiry_notifier():
+@async_task(name="tasks.subscription_expiry_notifier")
+async def subscription_expiry_notifier():
     try:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-
-        loop.run_until_complete(notify_expiring_subscriptions(3))
-
-        loop.close()
+        await notify_expiring_subscriptions(3)
 
         return {"status": "success", "message": "subscription_expiry_notifier marked"}
     except Exception as e:
         print(f"Error marking subscription_expiry_notifier: {e}")
         return {"status": "error", "message": str(e)}
 
-@celery_app.task(name="tasks.mark_expired_subscriptions")
-def mark_expired_subscriptions():
+@async_task(name="tasks.mark_expired_subscriptions")
+async def mark_expired_subscriptions():
     """
         Scheduled task to mark users with expired subscriptions as EXPIRED.
         Runs periodically (e.g. daily) to update membership status.
     """
     try:
-        asyncio.run(expire_and_activate_subscriptions_job())
+        await expire_and_activate_subscriptions_job()
         return {"status": "success", "message": "mark_expired_subscriptions marked"}
     except Exception as e:
         print(f"Error marking mark_expired_subscriptions: {e}")
         return {"status": "error", "message": str(e)}
 
-@celery_app.task(name="tasks.generate_contest_cycles")
-def generate_contest_cycles():
+@async_task(name="tasks.generate_contest_cycles")
+async def generate_contest_cycles():
     """
     Scheduled task to generate recurring contest cycles.
     Runs periodically (cron) and creates next contest version if due.
     """
     try:
-        loop = get_loop()
-        loop.run_until_complete(generate_contest_cycles_job())
+        await generate_contest_cycles_job()
 
         return {
             "status": "success",
@@ -127,14 +93,13 @@ def generate_contest_cycles():
         }
 
 
-@celery_app.task(name="tasks.declare_contest_winners")
-def declare_contest_winners():
+@async_task(name="tasks.declare_contest_winners")
+async def declare_contest_winners():
     """
     Scheduled task to declare contest winners daily.
     """
     try:
-        loop = get_loop()
-        loop.run_until_complete(declare_contest_winners_job())
+        await declare_contest_winners_job()
 
         return {
             "status": "success",
@@ -146,4 +111,143 @@ def declare_contest_winners():
         return {
             "status": "error",
             "message": str(e)
-        }
\ No newline at end of file
+        }
+
+
+@async_task(name="tasks.fire_contest_deadlines")
+async def fire_contest_deadlines():
+    """
+    Run the contest transitions (winner declaration, next cycle) that are due.
+    """
+    try:
+        fired = await fire_due_contest_deadlines()
+        return {"status": "success", "fired": fired}
+    except Exception as e:
+        print(f"Error in fire_contest_deadlines: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@async_task(name="tasks.reschedule_contest_deadlines")
+async def reschedule_contest_deadlines_task():
+    """
+    Re-queue the pending transition of every active contest history.
+    """
+    try:
+        scheduled = await reschedule_contest_deadlines()
+        return {"status": "success", "scheduled": scheduled}
+    except Exception as e:
+        print(f"Error in reschedule_contest_deadlines: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@async_task(name="tasks.reconcile_notification_unread_counts")
+async def reconcile_notification_unread_counts():
+    """
+    Recount the cached unread notification badges from MongoDB.
+    """
+    try:
+        reconciled = await reconcile_unread_counters()
+        return {"status": "success", "reconciled": reconciled}
+    except Exception as e:
+        print(f"Error in reconcile_notification_unread_counts: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@async_task(name="tasks.flush_presence_last_seen")
+async def flush_presence_last_seen():
+    """
+    Write the last-seen times of users who went offline to MongoDB.
+    """
+    try:
+        flushed = await flush_last_seen()
+        return {"status": "success", "flushed": flushed}
+    except Exception as e:
+        print(f"Error in flush_presence_last_seen: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@async_task(name="tasks.verify_payment")
+async def verify_payment(verification_id: str):
+    """
+    One attempt at verifying a submitted Tron payment; reschedules itself
+    while the chain has no result yet.
+    """
+    try:
+        verification = await process_payment_verification(verification_id)
+        return {"status": "success", "verification_status": verification["status"] if verification else None}
+    except Exception as e:
+        print(f"Error in verify_payment: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@async_task(name="tasks.requeue_payment_verifications")
+async def requeue_payment_verifications_task():
+    """
+    Re-queue payment verifications whose task was lost.
+    """
+    try:
+        requeued = await requeue_payment_verifications()
+        return {"status": "success", "requeued": requeued}
+    except Exception as e:
+        print(f"Error in requeue_payment_verifications: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@async_task(name="tasks.rebuild_account_tombstones")
+async def rebuild_account_tombstones():
+    """
+    Rebuild the deleted-account set after Redis lost it.
+    """
+    try:
+        rebuilt = await rebuild_tombstones_if_missing()
+        return {"status": "success", "rebuilt": rebuilt}
+    except Exception as e:
+        print(f"Error in rebuild_account_tombstones: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@async_task(
+    name="tasks.generate_image_derivatives",
+    bind=True,
+    max_retries=3,
+    default_retry_delay=30
+)
+async def generate_image_derivatives_task(self, file_id: str):
+    """
+    Resize a freshly uploaded image into thumb/medium/full WebP/AVIF variants.
+    """
+    try:
+        variants = await generate_image_derivatives(file_id)
+        return {"status": "success", "file_id": file_id, "generated": bool(variants)}
+    except Exception as e:
+        print(f"Error in generate_image_derivatives for {file_id}: {e}")
+        if self.request.retries >= self.max_retries:
+            return {"status": "error", "message": str(e)}
+        raise self.retry(exc=e)
+
+
+@async_task(name="tasks.refresh_dashboard_rollups")
+async def refresh_dashboard_rollups(recompute_days: int = 0):
+    """
+    Recount today's dashboard bucket, dirty days and the trailing
+    `recompute_days` (nightly run).
+    """
+    try:
+        refreshed = await refresh_rollups(recompute_days)
+        return {"status": "success", "refreshed_days": refreshed}
+    except Exception as e:
+        print(f"Error in refresh_dashboard_rollups: {e}")
+        return {"status": "error", "message": str(e)}
+
+
+@async_task(name="tasks.release_abandoned_video_calls")
+async def release_abandoned_video_calls():
+    """
+    End accepted video calls that never got an end request and return their token holds.
+    """
+    try:
+        ended = await release_abandoned_call_holds()
+        return {"status": "success", "ended": ended}
+    except Exception as e:
+        print(f"Error in release_abandoned_video_calls: {e}")
+        return {"status": "error", "message": str(e)}